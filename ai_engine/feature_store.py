@@ -0,0 +1,416 @@
+# ai_engine/feature_store.py
+"""
+AI Trading Bot - Incremental Feature Store
+Her kapanan barın gösterge vektörünü (tüm timeframe'ler + haber + scalping)
+sembol başına önceden ayrılmış, memory-mapped bir matrise ekler.
+Eğitim ve tahmin özellikleri yeniden hesaplamaz - matrisi kopyasız dilimler.
+
+Sinyal gücü / güven, çoklu timeframe, haber ve scalping özellikleri oluşmakta
+olan barı da görür. Bu yüzden satırın etiket fiyatı kapanmış barın kapanışı
+değil, satırın yazıldığı andaki fiyattır - etiket (sonraki satırın fiyatı -
+bu satırın fiyatı) sadece özelliklerden sonraki fiyat hareketini içerir.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import FEATURE_STORE_DIR, FEATURE_STORE_CAPACITY
+
+# Timeframe başına saklanan özellikler - fiyat seviyesine bağlı olanlar kapanışa oranlanır
+FEATURE_TIMEFRAMES = ('M1', 'M5', 'M15', 'H1')
+TIMEFRAME_FEATURES = (
+    'rsi', 'macd', 'macd_signal', 'macd_histogram', 'bb_percent', 'stoch_k', 'stoch_d',
+    'williams_r', 'momentum', 'atr', 'ma_gap', 'ema_gap', 'buy_strength', 'sell_strength', 'confidence'
+)
+PRICE_SCALED_FEATURES = ('macd', 'macd_signal', 'macd_histogram', 'atr')
+
+FEATURE_NAMES = (
+    [f'{tf}_{name}' for tf in FEATURE_TIMEFRAMES for name in TIMEFRAME_FEATURES]
+    + ['mtf_buy_strength', 'mtf_sell_strength', 'mtf_confidence', 'mtf_alignment']
+    + ['news_direction', 'news_strength', 'news_confidence', 'news_net_score']
+    + ['scalp_direction', 'scalp_strength', 'scalp_confidence', 'scalp_rsi', 'scalp_ema_gap']
+)
+
+# Meta dosyasındaki etiket fiyatı tanımı - farklıysa (eski kapanış bazlı kayıt) matris yeniden açılır
+LABEL_PRICE = 'capture'
+
+SIGNAL_DIRECTIONS = {'BUY': 1.0, 'WEAK_BUY': 0.5, 'SELL': -1.0, 'WEAK_SELL': -0.5}
+
+
+def _to_float(value):
+    """None / NaN / sayısal olmayan değerleri NaN'a çevir"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return value if np.isfinite(value) else np.nan
+
+
+def _to_epoch(bar_time):
+    """Bar zamanını epoch saniyeye çevir (datetime, pandas Timestamp veya sayı)"""
+    if isinstance(bar_time, (int, float, np.integer, np.floating)):
+        return int(bar_time)
+    return int(pd.Timestamp(bar_time).timestamp())
+
+
+def _timeframe_features(analysis):
+    """Tek timeframe analizinden özellik değerleri (kapanmış bar göstergeleri, yoksa son bar)"""
+    if not analysis:
+        return [np.nan] * len(TIMEFRAME_FEATURES)
+
+    closed_bar = analysis.get('closed_bar')
+    if closed_bar:
+        indicators = closed_bar['indicators']
+        close = _to_float(closed_bar['close'])
+    else:
+        indicators = analysis.get('indicators') or {}
+        close = _to_float(analysis.get('current_price'))
+
+    values = []
+    for name in TIMEFRAME_FEATURES:
+        if name == 'ma_gap':
+            value = _to_float(indicators.get('ma_fast')) / _to_float(indicators.get('ma_slow')) - 1
+        elif name == 'ema_gap':
+            value = _to_float(indicators.get('ema_fast')) / _to_float(indicators.get('ema_slow')) - 1
+        elif name in ('buy_strength', 'sell_strength', 'confidence'):
+            value = _to_float(analysis.get(name))
+        else:
+            value = _to_float(indicators.get(name))
+            if name in PRICE_SCALED_FEATURES:
+                value = value / close if close else np.nan
+        values.append(value)
+    return values
+
+
+def get_bar_key(technical_analysis):
+    """Satır anahtarı: M5 teknik analizinin son kapanmış barı (epoch sn) ve yazma anındaki fiyat"""
+    closed_bar = technical_analysis.get('closed_bar')
+    bar_time = closed_bar['time'] if closed_bar else technical_analysis['timestamp']
+    return _to_epoch(bar_time), _to_float(technical_analysis.get('current_price'))
+
+
+def build_feature_vector(technical_analysis, news_signal, multi_tf_result, scalping_result):
+    """SignalProcessor sonuçlarından özellik vektörü üret - eksik bileşenler NaN olarak yazılır"""
+    timeframe_results = (multi_tf_result or {}).get('timeframe_results') or {}
+    values = []
+    for tf in FEATURE_TIMEFRAMES:
+        analysis = timeframe_results.get(tf, {}).get('analysis')
+        if analysis is None and tf == technical_analysis.get('timeframe'):
+            analysis = technical_analysis
+        values.extend(_timeframe_features(analysis))
+
+    mtf = multi_tf_result or {}
+    values.extend(_to_float(mtf.get(name)) for name in ('buy_strength', 'sell_strength', 'confidence', 'alignment_score'))
+
+    news = news_signal or {}
+    values.extend([
+        SIGNAL_DIRECTIONS.get(news.get('signal'), 0.0),
+        _to_float(news.get('strength')),
+        _to_float(news.get('confidence')),
+        _to_float(news.get('net_score'))
+    ])
+
+    scalping = scalping_result or {}
+    scalping_indicators = scalping.get('indicators') or {}
+    values.extend([
+        SIGNAL_DIRECTIONS.get(scalping.get('signal'), 0.0),
+        _to_float(scalping.get('strength')),
+        _to_float(scalping.get('confidence')),
+        _to_float(scalping_indicators.get('rsi')),
+        _to_float(scalping_indicators.get('ema5')) / _to_float(scalping_indicators.get('ema13')) - 1
+    ])
+
+    return np.asarray(values, dtype=np.float32)
+
+
+class FeatureStore:
+    """Sembol başına memory-mapped özellik matrisi (satır = kapanmış bar)
+
+    store_dir=None ise matrisler sadece bellekte tutulur (backtest / replay).
+    matrix() / window() kopyasız view döndürür - kapasite büyütülünce eski view'lar
+    eski diziyi gösterir, uzun süre saklanmamalı.
+    """
+
+    def __init__(self, store_dir=FEATURE_STORE_DIR, capacity=FEATURE_STORE_CAPACITY, feature_names=FEATURE_NAMES):
+        """FeatureStore'u başlat"""
+        self.store_dir = store_dir
+        self.capacity = capacity
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        # sembol -> {'features', 'times', 'prices', 'count'} (dosyalar ilk erişimde açılır)
+        self.symbols = {}
+        self.store_stats = {'appended': 0, 'duplicates': 0, 'grown': 0}
+
+        print(f"🗄️ FeatureStore başlatıldı: {self.n_features} özellik, "
+              f"{self.store_dir or 'bellek içi'} (kapasite {self.capacity} bar)")
+
+    # =========================================================================
+    # Dosya yönetimi
+    # =========================================================================
+
+    def _paths(self, symbol):
+        """Sembolün matris, zaman, etiket fiyatı ve meta dosya yolları"""
+        base = os.path.join(self.store_dir, symbol.replace(os.sep, '_'))
+        return {
+            'features': f'{base}_features.npy',
+            'times': f'{base}_times.npy',
+            'prices': f'{base}_prices.npy',
+            'meta': f'{base}_meta.json'
+        }
+
+    def _allocate(self, symbol, capacity):
+        """Boş matrisler ayır (dosyalı modda diskte seyrek dosya - sadece yazılan sayfalar yer kaplar)"""
+        if not self.store_dir:
+            return {
+                'features': np.zeros((capacity, self.n_features), dtype=np.float32),
+                'times': np.zeros(capacity, dtype=np.int64),
+                'prices': np.zeros(capacity, dtype=np.float64)
+            }
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        paths = self._paths(symbol)
+        arrays = {
+            'features': np.lib.format.open_memmap(paths['features'], mode='w+', dtype=np.float32,
+                                                  shape=(capacity, self.n_features)),
+            'times': np.lib.format.open_memmap(paths['times'], mode='w+', dtype=np.int64, shape=(capacity,)),
+            'prices': np.lib.format.open_memmap(paths['prices'], mode='w+', dtype=np.float64, shape=(capacity,))
+        }
+
+        with open(paths['meta'], 'w') as f:
+            json.dump({'symbol': symbol, 'feature_names': self.feature_names, 'label_price': LABEL_PRICE}, f)
+        return arrays
+
+    def _open(self, symbol):
+        """Sembolün matrisini aç - mevcut dosya varsa kaldığı satırdan devam eder"""
+        state = self.symbols.get(symbol)
+        if state is not None:
+            return state
+
+        arrays = None
+        if self.store_dir:
+            paths = self._paths(symbol)
+            if os.path.exists(paths['meta']):
+                try:
+                    with open(paths['meta']) as f:
+                        meta = json.load(f)
+                    if (meta.get('feature_names') == self.feature_names and meta.get('label_price') == LABEL_PRICE
+                            and all(os.path.exists(path) for path in paths.values())):
+                        arrays = {name: np.load(paths[name], mmap_mode='r+') for name in ('features', 'times', 'prices')}
+                    else:
+                        print(f"⚠️ {symbol} feature store özellik listesi / etiket tanımı değişmiş - yeni matris açılıyor")
+                        for path in paths.values():
+                            if os.path.exists(path):
+                                os.replace(path, path + '.old')
+                except Exception as e:
+                    print(f"❌ {symbol} feature store açma hatası: {e}")
+                    arrays = None
+
+        if arrays is None:
+            arrays = self._allocate(symbol, self.capacity)
+
+        # Zaman dizisi artan ve pozitif - ilk boş (0) satır doluluk sayısıdır
+        empty = np.flatnonzero(arrays['times'] == 0)
+        state = dict(arrays, count=int(empty[0]) if len(empty) else len(arrays['times']))
+        self.symbols[symbol] = state
+
+        if state['count']:
+            print(f"🗄️ {symbol} feature store: {state['count']} bar yüklendi")
+        return state
+
+    def _grow(self, symbol, state):
+        """Kapasiteyi ikiye katla (dosyalı modda yeni dosyaya kopyalanır)"""
+        count = state['count']
+        new_capacity = max(len(state['times']) * 2, 1)
+
+        if not self.store_dir:
+            arrays = self._allocate(symbol, new_capacity)
+        else:
+            paths = self._paths(symbol)
+            arrays = {}
+            for name, dtype in (('features', np.float32), ('times', np.int64), ('prices', np.float64)):
+                shape = (new_capacity, self.n_features) if name == 'features' else (new_capacity,)
+                arrays[name] = np.lib.format.open_memmap(paths[name] + '.tmp', mode='w+', dtype=dtype, shape=shape)
+
+        for name in ('features', 'times', 'prices'):
+            arrays[name][:count] = state[name][:count]
+
+        if self.store_dir:
+            for name in ('features', 'times', 'prices'):
+                arrays[name].flush()
+                del state[name]
+                del arrays[name]
+                os.replace(paths[name] + '.tmp', paths[name])
+                arrays[name] = np.load(paths[name], mmap_mode='r+')
+
+        state.update(arrays)
+        self.store_stats['grown'] += 1
+        print(f"🗄️ {symbol} feature store kapasitesi {new_capacity} bara çıkarıldı")
+
+    # =========================================================================
+    # Yazma
+    # =========================================================================
+
+    def is_new_bar(self, symbol, bar_time):
+        """Bar henüz yazılmadıysa True (zaman son satırdan yeni olmalı)"""
+        state = self._open(symbol)
+        epoch = _to_epoch(bar_time)
+        count = state['count']
+        return epoch > 0 and not (count and epoch <= state['times'][count - 1])
+
+    def append(self, symbol, bar_time, vector, price=np.nan):
+        """Kapanmış bar satırını ekle - aynı / daha eski bar tekrar yazılmaz
+
+        price: satırın yazıldığı andaki fiyat (etiket fiyatı)
+
+        Returns: True yeni satır eklendiyse
+        """
+        if not self.is_new_bar(symbol, bar_time):
+            self.store_stats['duplicates'] += 1
+            return False
+
+        state = self.symbols[symbol]
+        epoch = _to_epoch(bar_time)
+        count = state['count']
+
+        if count >= len(state['times']):
+            self._grow(symbol, state)
+
+        state['features'][count] = vector
+        state['prices'][count] = price
+        # Zaman en son yazılır - yarım kalan satır açılışta doluluk sayısına girmez
+        state['times'][count] = epoch
+        state['count'] = count + 1
+        self.store_stats['appended'] += 1
+        return True
+
+    def append_analysis(self, symbol, technical_analysis, news_signal, multi_tf_result, scalping_result):
+        """SignalProcessor sonuçlarından özellik vektörünü kur ve ekle (bar zaten yazıldıysa vektör kurulmaz)"""
+        bar_time, price = get_bar_key(technical_analysis)
+        if not self.is_new_bar(symbol, bar_time):
+            self.store_stats['duplicates'] += 1
+            return False
+
+        vector = build_feature_vector(technical_analysis, news_signal, multi_tf_result, scalping_result)
+        return self.append(symbol, bar_time, vector, price)
+
+    def flush(self):
+        """Dosyalı modda memory-mapped matrisleri diske yaz"""
+        if not self.store_dir:
+            return
+        for state in self.symbols.values():
+            for name in ('features', 'times', 'prices'):
+                state[name].flush()
+
+    # =========================================================================
+    # Okuma (kopyasız)
+    # =========================================================================
+
+    def get_count(self, symbol):
+        """Sembolde saklanan bar sayısı"""
+        return self._open(symbol)['count']
+
+    def matrix(self, symbol):
+        """Tüm satırlar (bar x özellik) - kopyasız view"""
+        state = self._open(symbol)
+        return state['features'][:state['count']]
+
+    def window(self, symbol, bars):
+        """Son `bars` satır - kopyasız view"""
+        state = self._open(symbol)
+        count = state['count']
+        return state['features'][max(count - bars, 0):count]
+
+    def get_times(self, symbol):
+        """Satırların bar zamanları (epoch sn) - kopyasız view"""
+        state = self._open(symbol)
+        return state['times'][:state['count']]
+
+    def get_prices(self, symbol):
+        """Satırların etiket fiyatları (yazma anındaki fiyat) - kopyasız view"""
+        state = self._open(symbol)
+        return state['prices'][:state['count']]
+
+    def latest(self, symbol):
+        """Son kapanmış barın özellik satırı (yoksa None)"""
+        state = self._open(symbol)
+        if not state['count']:
+            return None
+        return state['features'][state['count'] - 1]
+
+    def feature_index(self, name):
+        """Özellik adının sütun indeksi"""
+        return self.feature_names.index(name)
+
+
+# Test fonksiyonu
+def test_feature_store():
+    """FeatureStore'u test et"""
+    import tempfile
+    import time
+
+    print("🧪 FeatureStore Test Başlıyor...")
+    print("=" * 50)
+
+    store_dir = tempfile.mkdtemp(prefix='feature_store_test_')
+    store = FeatureStore(store_dir=store_dir, capacity=256)
+    symbol = 'EURUSD-T'
+    start = pd.Timestamp('2024-01-02 00:00:00')
+
+    # Örnek analiz sonuçları - M5 barları
+    def sample_analysis(bar, timeframe):
+        bar_time = start + pd.Timedelta(minutes=5 * bar)
+        close = 1.1 + 0.0001 * np.sin(bar / 10)
+        return {
+            'timeframe': timeframe, 'timestamp': bar_time + pd.Timedelta(minutes=5), 'current_price': close + 0.0002,
+            'buy_strength': 40.0, 'sell_strength': 20.0, 'confidence': 10.0,
+            'indicators': {},
+            'closed_bar': {'time': bar_time, 'close': close, 'indicators': {
+                'rsi': 50 + 10 * np.sin(bar / 7), 'macd': 0.0001, 'macd_signal': 0.00008, 'macd_histogram': 0.00002,
+                'bb_percent': 0.5, 'stoch_k': 60, 'stoch_d': 55, 'williams_r': -40, 'momentum': 100.1,
+                'atr': 0.0005, 'ma_fast': close, 'ma_slow': close * 0.999, 'ema_fast': close, 'ema_slow': close}}
+        }
+
+    bars = 1000
+    append_start = time.perf_counter()
+    for bar in range(bars):
+        technical = sample_analysis(bar, 'M5')
+        multi_tf = {'buy_strength': 30, 'sell_strength': 10, 'confidence': 20, 'alignment_score': 75,
+                    'timeframe_results': {tf: {'analysis': sample_analysis(bar, tf)} for tf in FEATURE_TIMEFRAMES}}
+        news = {'signal': 'NEUTRAL', 'strength': 0, 'confidence': 0.5, 'net_score': 0.0}
+        # Aynı bar döngü başına birden fazla kez analiz edilir - sadece ilki yazılır
+        for _ in range(3):
+            store.append_analysis(symbol, technical, news, multi_tf, None)
+    append_ms = (time.perf_counter() - append_start) * 1000
+
+    matrix = store.matrix(symbol)
+    print(f"   Satır: {store.get_count(symbol)} | Tekrar atlanan: {store.store_stats['duplicates']} | "
+          f"Büyütme: {store.store_stats['grown']} | {append_ms / (bars * 3) * 1000:.1f} µs/çağrı")
+    print(f"   Matris: {matrix.shape} {matrix.dtype} | view: {np.shares_memory(matrix, store.symbols[symbol]['features'])}")
+    print(f"   Son 50 bar RSI ort.: {store.window(symbol, 50)[:, store.feature_index('M5_rsi')].mean():.2f}")
+
+    ok = (store.get_count(symbol) == bars and store.store_stats['duplicates'] == 2 * bars
+          and np.shares_memory(store.window(symbol, 50), matrix) and np.all(np.diff(store.get_times(symbol)) == 300))
+    # Etiket fiyatı kapanmış barın kapanışı değil, yazma anındaki fiyat
+    ok = ok and np.isclose(store.get_prices(symbol)[-1], sample_analysis(bars - 1, 'M5')['current_price'])
+
+    # Yeniden açılış - dosyadan kaldığı yerden devam
+    store.flush()
+    reopened = FeatureStore(store_dir=store_dir, capacity=256)
+    ok = ok and reopened.get_count(symbol) == bars
+    ok = ok and np.array_equal(reopened.matrix(symbol), matrix, equal_nan=True)
+    ok = ok and not reopened.append(symbol, start, matrix[0], 1.1)
+
+    print(f"\n{'✅' if ok else '❌'} FeatureStore testi {'başarılı' if ok else 'başarısız'}")
+    return ok
+
+
+if __name__ == "__main__":
+    test_feature_store()
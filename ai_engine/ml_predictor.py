@@ -0,0 +1,512 @@
+# ai_engine/ml_predictor.py
+"""
+AI Trading Bot - Online ML Predictor
+Feature store satırları üzerinde online (SGD) lojistik regresyon:
+her etiketlenen bar O(özellik) sürede öğrenilir, barı kapanan tüm semboller
+tek batch çağrısıyla tahmin edilir. Model durumu diske checkpoint'lenir,
+yeniden başlatmada sıfırdan eğitim yapılmaz.
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    ML_MODEL_FILE, ML_LEARNING_RATE, ML_L2_PENALTY, ML_MIN_UPDATES, ML_CHECKPOINT_EVERY,
+    ML_PER_SYMBOL_MODELS, ML_MODEL_CACHE_SIZE
+)
+from utils.helpers import LatencyHistogram
+
+# Standartlaştırılmış özellikler bu aralığa kırpılır (uç değerler ağırlıkları savurmasın)
+Z_CLIP = 5.0
+GLOBAL_MODEL_KEY = '_global'
+# Feature store satırları M5 barları - etiket sadece ardışık iki satır arasında tanımlı
+BAR_SECONDS = 300
+MODEL_STATE_FIELDS = ('weights', 'bias', 'counts', 'means', 'm2', 'updates', 'accuracy')
+
+
+def _sigmoid(scores):
+    """Taşmasız sigmoid"""
+    return 1.0 / (1.0 + np.exp(-np.clip(scores, -30.0, 30.0)))
+
+
+def _standardize(X, means, stds):
+    """(x - ortalama) / std - NaN ve sabit özellikler 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Z = (X - means) / stds
+    Z = np.where(np.isfinite(Z), Z, 0.0)
+    return np.clip(Z, -Z_CLIP, Z_CLIP)
+
+
+def predict_proba_stacked(models, X):
+    """Her satırı kendi modeliyle tahmin et - model parametreleri yığılıp tek vektörel hesap yapılır"""
+    means = np.vstack([model.means for model in models])
+    stds = np.vstack([model.stds() for model in models])
+    weights = np.vstack([model.weights for model in models])
+    biases = np.array([model.bias for model in models])
+    scores = np.einsum('ij,ij->i', _standardize(X, means, stds), weights) + biases
+    return _sigmoid(scores)
+
+
+class OnlineLogisticModel:
+    """SGD lojistik regresyon - özellikler Welford ile online standartlaştırılır
+
+    Etiket: bir sonraki bar kapanışı yukarı (1) / aşağı (0). NaN özellikler ortalamaya (0) çekilir.
+    """
+
+    def __init__(self, n_features, learning_rate=ML_LEARNING_RATE, l2_penalty=ML_L2_PENALTY):
+        """OnlineLogisticModel'i başlat"""
+        self.n_features = n_features
+        self.learning_rate = learning_rate
+        self.l2_penalty = l2_penalty
+
+        self.weights = np.zeros(n_features, dtype=np.float64)
+        self.bias = 0.0
+
+        # Özellik başına online ortalama / varyans (Welford) - NaN değerler sayılmaz
+        self.counts = np.zeros(n_features, dtype=np.float64)
+        self.means = np.zeros(n_features, dtype=np.float64)
+        self.m2 = np.zeros(n_features, dtype=np.float64)
+
+        self.updates = 0
+        # Güncellemeden önce yapılan tahminin isabeti (prequential, üstel ortalama)
+        self.accuracy = 0.5
+
+    def stds(self):
+        """Özellik standart sapmaları"""
+        return np.sqrt(self.m2 / np.maximum(self.counts - 1, 1))
+
+    def predict_proba(self, X):
+        """Yukarı olasılıkları - X (satır x özellik) için tek matris-vektör çarpımı"""
+        return _sigmoid(_standardize(X, self.means, self.stds()) @ self.weights + self.bias)
+
+    def update(self, x, label):
+        """Tek etiketli satırla öğren - O(özellik)"""
+        x = np.asarray(x, dtype=np.float64)
+
+        # Önce tahmin, sonra öğren: isabet görülmemiş veri üzerinde ölçülür
+        hit = float((self.predict_proba(x) >= 0.5) == bool(label))
+        self.accuracy += 0.01 * (hit - self.accuracy)
+
+        valid = np.isfinite(x)
+        self.counts[valid] += 1
+        delta = x[valid] - self.means[valid]
+        self.means[valid] += delta / self.counts[valid]
+        self.m2[valid] += delta * (x[valid] - self.means[valid])
+
+        z = _standardize(x, self.means, self.stds())
+        error = _sigmoid(z @ self.weights + self.bias) - label
+        self.weights -= self.learning_rate * (error * z + self.l2_penalty * self.weights)
+        self.bias -= self.learning_rate * error
+        self.updates += 1
+
+    def get_state(self):
+        """Checkpoint için model durumu"""
+        return {
+            'weights': self.weights.copy(), 'bias': self.bias,
+            'counts': self.counts.copy(), 'means': self.means.copy(), 'm2': self.m2.copy(),
+            'updates': self.updates, 'accuracy': self.accuracy
+        }
+
+    def load_state(self, state):
+        """Checkpoint'ten model durumunu yükle"""
+        self.weights = np.array(state['weights'], dtype=np.float64)
+        self.bias = float(state['bias'])
+        self.counts = np.array(state['counts'], dtype=np.float64)
+        self.means = np.array(state['means'], dtype=np.float64)
+        self.m2 = np.array(state['m2'], dtype=np.float64)
+        self.updates = int(state['updates'])
+        self.accuracy = float(state['accuracy'])
+
+
+class MLPredictor:
+    """Feature store'dan öğrenen ve tahmin eden online ML sinyal kaynağı
+
+    per_symbol=True ise her sembolün ayrı modeli vardır: modeller ilk kullanımda
+    checkpoint'ten yüklenir ve LRU cache'te tutulur (cache dolunca en eski model
+    checkpoint'lenip bellekten atılır). Tahmin her durumda tek batch çağrısıdır.
+    """
+
+    def __init__(self, feature_store, model_file=ML_MODEL_FILE, learning_rate=ML_LEARNING_RATE,
+                 l2_penalty=ML_L2_PENALTY, min_updates=ML_MIN_UPDATES, checkpoint_every=ML_CHECKPOINT_EVERY,
+                 per_symbol=ML_PER_SYMBOL_MODELS, cache_size=ML_MODEL_CACHE_SIZE):
+        """MLPredictor'ı başlat
+
+        model_file=None ise checkpoint yazılmaz / okunmaz (backtest / replay) - modeller bellekten atılmaz.
+        """
+        self.feature_store = feature_store
+        self.model_file = model_file
+        self.learning_rate = learning_rate
+        self.l2_penalty = l2_penalty
+        self.min_updates = min_updates
+        self.checkpoint_every = checkpoint_every
+        self.per_symbol = per_symbol
+        self.cache_size = cache_size
+
+        # model anahtarı -> OnlineLogisticModel (LRU sırası - en son kullanılan sonda)
+        self.models = OrderedDict()
+        # model anahtarı -> checkpoint'lenmemiş güncelleme sayısı
+        self.pending_updates = {}
+        # sembol -> öğrenilen son barın zamanı (epoch sn)
+        self.trained_until = {}
+        # sembol -> son tahmin (girdi son kapanmış bar - yeni bar kapanana kadar geçerli)
+        self.last_signals = {}
+
+        self.batch_latency = LatencyHistogram()
+        self.model_stats = {'loaded': 0, 'evicted': 0, 'batches': 0, 'predicted': 0}
+
+        print(f"🧠 MLPredictor başlatıldı: {feature_store.n_features} özellik, "
+              f"{'sembol başına model (LRU ' + str(cache_size) + ')' if per_symbol else 'ortak model'}, "
+              f"checkpoint: {model_file or 'yok'}")
+
+    # =========================================================================
+    # Model cache
+    # =========================================================================
+
+    def _model_key(self, symbol):
+        """Sembolün kullandığı model"""
+        return symbol if self.per_symbol else GLOBAL_MODEL_KEY
+
+    def _model_path(self, key):
+        """Model checkpoint dosyası - sembol modelleri ana dosya adından türetilir"""
+        if key == GLOBAL_MODEL_KEY:
+            return self.model_file
+        root, ext = os.path.splitext(self.model_file)
+        return f"{root}_{key.replace(os.sep, '_')}{ext or '.npz'}"
+
+    def _get_model(self, key):
+        """Modeli cache'ten al - yoksa checkpoint'ten (ya da sıfırdan) yükle"""
+        model = self.models.get(key)
+        if model is not None:
+            self.models.move_to_end(key)
+            return model
+
+        model = OnlineLogisticModel(self.feature_store.n_features, self.learning_rate, self.l2_penalty)
+        if self.model_file:
+            self._load_checkpoint(key, model)
+        self.models[key] = model
+        self.model_stats['loaded'] += 1
+
+        # Checkpoint yoksa atılan model geri yüklenemez - bellek içi modda cache sınırsız
+        while self.model_file and len(self.models) > self.cache_size:
+            evicted_key = next(iter(self.models))
+            if self.pending_updates.get(evicted_key):
+                self._save_checkpoint(evicted_key)
+            del self.models[evicted_key]
+            self.model_stats['evicted'] += 1
+        return model
+
+    def is_ready(self, symbol):
+        """Sembolün modeli yeterli etiketli bar gördüyse True - öncesinde sinyal NÖTR"""
+        return self._get_model(self._model_key(symbol)).updates >= self.min_updates
+
+    # =========================================================================
+    # Öğrenme
+    # =========================================================================
+
+    def learn(self, symbol):
+        """Sembolün etiketi belli olan (ardından bar kapanmış) yeni satırlarını öğren
+
+        Normal akışta bar başına bir satır; yeniden başlatmada sadece checkpoint'ten sonraki satırlar.
+        Returns: öğrenilen satır sayısı
+        """
+        times = self.feature_store.get_times(symbol)
+        count = len(times)
+        if count < 2:
+            return 0
+
+        key = self._model_key(symbol)
+        # Model yüklenirken sembolün öğrenme imleci de checkpoint'ten gelir
+        model = self._get_model(key)
+        prices = self.feature_store.get_prices(symbol)
+        features = self.feature_store.matrix(symbol)
+        start = int(np.searchsorted(times, self.trained_until.get(symbol, 0), side='right'))
+
+        learned = 0
+        for row in range(start, count - 1):
+            # Arada eksik bar varsa (kopukluk, hafta sonu) hareket tek bara ait değil - satır atlanır
+            if times[row + 1] - times[row] != BAR_SECONDS:
+                continue
+            change = prices[row + 1] - prices[row]
+            # Fiyat değişmediyse yön bilgisi yok
+            if np.isfinite(change) and change != 0:
+                model.update(features[row], 1.0 if change > 0 else 0.0)
+                learned += 1
+
+        self.trained_until[symbol] = int(times[count - 2])
+        self.pending_updates[key] = self.pending_updates.get(key, 0) + learned
+
+        if self.model_file and self.pending_updates[key] >= self.checkpoint_every:
+            self._save_checkpoint(key)
+        return learned
+
+    # =========================================================================
+    # Tahmin
+    # =========================================================================
+
+    def predict(self, symbols):
+        """Sembollerin son kapanmış bar satırlarından tek batch çağrısıyla tahmin üret
+
+        Ortak modelde tek matris-vektör çarpımı; sembol modellerinde satır başına ağırlıklar
+        yığılıp tek vektörel hesap yapılır.
+        Returns: {sembol: ML sinyali} - feature store'da satırı olmayan semboller NÖTR
+        """
+        start = time.perf_counter()
+        # Her model batch başına bir kez alınır (cache'ten ya da lazy yükleme)
+        models = {symbol: self._get_model(self._model_key(symbol)) for symbol in symbols}
+        rows = []
+        predicted = []
+        for symbol in symbols:
+            row = self.feature_store.latest(symbol)
+            if row is not None:
+                rows.append(row)
+                predicted.append(symbol)
+
+        signals = {symbol: self._to_signal(models[symbol], None) for symbol in symbols}
+        if rows:
+            X = np.vstack(rows)
+            if self.per_symbol:
+                probabilities = predict_proba_stacked([models[symbol] for symbol in predicted], X)
+            else:
+                probabilities = models[predicted[0]].predict_proba(X)
+
+            for symbol, probability in zip(predicted, probabilities):
+                signals[symbol] = self._to_signal(models[symbol], float(probability))
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.batch_latency.record(latency_ms)
+        self.model_stats['batches'] += 1
+        self.model_stats['predicted'] += len(predicted)
+        self.last_signals.update(signals)
+        return signals
+
+    def predict_cycle(self, symbols, closed_symbols):
+        """Döngü tahmini: sadece barı kapanan (ya da henüz tahmini olmayan) semboller tek batch'te
+
+        Diğer sembollerin girdisi (son kapanmış bar) değişmedi - son tahminleri kullanılır.
+        """
+        closed_symbols = set(closed_symbols)
+        batch = [symbol for symbol in symbols if symbol in closed_symbols or symbol not in self.last_signals]
+
+        if batch:
+            start = time.perf_counter()
+            self.predict(batch)
+            print(f"🧠 ML batch tahmin: {len(batch)} sembol, {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        return {symbol: self.last_signals[symbol] for symbol in symbols}
+
+    def _to_signal(self, model, probability):
+        """Yukarı olasılığını haber sinyaliyle aynı biçimde sinyale çevir"""
+        ready = model.updates >= self.min_updates and probability is not None
+        edge = (probability - 0.5) if ready else 0.0
+
+        if edge > 0:
+            signal = 'BUY'
+        elif edge < 0:
+            signal = 'SELL'
+        else:
+            signal = 'NEUTRAL'
+
+        return {
+            'signal': signal,
+            'strength': min(abs(edge) * 200, 100),
+            'confidence': abs(edge) * 2,
+            'probability': probability,
+            'ready': ready,
+            'updates': model.updates,
+            'accuracy': model.accuracy
+        }
+
+    def get_latency_report(self):
+        """Batch tahmin gecikmesi özeti"""
+        return dict(self.batch_latency.summary(), **self.model_stats)
+
+    def print_latency_report(self):
+        """Batch tahmin gecikmesi histogramını ve model cache istatistiklerini yazdır"""
+        print(self.batch_latency.format_report("ML batch tahmin gecikmesi"))
+        stats = self.model_stats
+        print(f"🧠 Tahmin edilen satır: {stats['predicted']} ({stats['batches']} batch) | "
+              f"model yükleme: {stats['loaded']} | cache'ten atılan: {stats['evicted']}")
+
+    # =========================================================================
+    # Checkpoint
+    # =========================================================================
+
+    def _covered_symbols(self, key):
+        """Modelin öğrenme imleçlerini tuttuğu semboller"""
+        if key == GLOBAL_MODEL_KEY:
+            return list(self.trained_until)
+        return [key] if key in self.trained_until else []
+
+    def get_state(self, symbols=None):
+        """Modeller + öğrenme imleçleri (oturum kaydı için)
+
+        symbols verilirse o sembollerin modelleri (gerekirse yüklenerek), yoksa cache'teki modeller.
+        """
+        keys = list(self.models) if symbols is None else list(dict.fromkeys(self._model_key(s) for s in symbols))
+        return {
+            'models': {key: self._get_model(key).get_state() for key in keys},
+            'trained_until': dict(self.trained_until)
+        }
+
+    def load_state(self, state):
+        """get_state() çıktısını yükle"""
+        for key, model_state in state['models'].items():
+            model = OnlineLogisticModel(self.feature_store.n_features, self.learning_rate, self.l2_penalty)
+            model.load_state(model_state)
+            self.models[key] = model
+        self.trained_until.update({symbol: int(epoch) for symbol, epoch in state['trained_until'].items()})
+        self.last_signals.clear()
+
+    def _save_checkpoint(self, key):
+        """Modeli ve imleçlerini atomik olarak diske yaz"""
+        model = self.models.get(key)
+        if not self.model_file or model is None:
+            return False
+
+        try:
+            path = self._model_path(key)
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            symbols = self._covered_symbols(key)
+            temp_file = path + '.tmp'
+            with open(temp_file, 'wb') as f:
+                np.savez(f, feature_names=np.array(self.feature_store.feature_names),
+                         trained_symbols=np.array(symbols, dtype=str),
+                         trained_times=np.array([self.trained_until[s] for s in symbols], dtype=np.int64),
+                         **model.get_state())
+            os.replace(temp_file, path)
+            self.pending_updates[key] = 0
+            return True
+
+        except Exception as e:
+            print(f"❌ ML checkpoint yazma hatası ({key}): {e}")
+            return False
+
+    def _load_checkpoint(self, key, model):
+        """Diskteki checkpoint'i modele yükle - özellik listesi değiştiyse model sıfırdan başlar"""
+        path = self._model_path(key)
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if list(data['feature_names']) != self.feature_store.feature_names:
+                    print(f"⚠️ ML checkpoint ({key}) özellik listesi farklı - model sıfırdan başlıyor")
+                    return False
+
+                model.load_state({name: data[name] for name in MODEL_STATE_FIELDS})
+                self.trained_until.update(zip(data['trained_symbols'].tolist(), data['trained_times'].tolist()))
+
+            print(f"🧠 ML checkpoint yüklendi ({key}): {model.updates} güncelleme, isabet %{model.accuracy * 100:.1f}")
+            return True
+
+        except Exception as e:
+            print(f"❌ ML checkpoint okuma hatası ({key}): {e}")
+            return False
+
+    def save_checkpoint(self):
+        """Bekleyen güncellemesi olan tüm modelleri checkpoint'le"""
+        return all(self._save_checkpoint(key) for key, pending in list(self.pending_updates.items())
+                   if pending and key in self.models)
+
+    def close(self):
+        """Bekleyen güncellemeleri checkpoint'le"""
+        self.save_checkpoint()
+
+
+# Test fonksiyonu
+def test_ml_predictor():
+    """MLPredictor'ı test et"""
+    import tempfile
+
+    from ai_engine.feature_store import FeatureStore
+
+    print("🧪 MLPredictor Test Başlıyor...")
+    print("=" * 50)
+
+    work_dir = tempfile.mkdtemp(prefix='ml_predictor_test_')
+    store = FeatureStore(store_dir=None, capacity=1024)
+    symbols = [f'SYM{index}' for index in range(6)]
+
+    # Sentetik veri: ilk iki özellik bir sonraki barın yönünü gürültülü olarak taşır
+    rng = np.random.default_rng(7)
+    bars = 1500
+    for symbol in symbols:
+        price = 100.0
+        for bar in range(bars):
+            direction = rng.choice([-1.0, 1.0])
+            vector = rng.normal(size=store.n_features).astype(np.float32)
+            vector[0] = direction + rng.normal(scale=0.8)
+            vector[1] = 50 + 10 * direction + rng.normal(scale=10)
+            vector[5] = np.nan
+            store.append(symbol, 1_700_000_000 + 300 * bar, vector, price)
+            price += direction * 0.1
+
+    ok = True
+    for per_symbol in (False, True):
+        mode = 'sembol başına model' if per_symbol else 'ortak model'
+        model_file = os.path.join(work_dir, f'ml_model_{int(per_symbol)}.npz')
+        predictor = MLPredictor(store, model_file=model_file, min_updates=200, checkpoint_every=100,
+                                per_symbol=per_symbol, cache_size=len(symbols))
+
+        learn_start = time.perf_counter()
+        updates = sum(predictor.learn(symbol) for symbol in symbols)
+        learn_us = (time.perf_counter() - learn_start) / updates * 1e6
+
+        # Tek batch vs sembol sembol tahmin
+        for _ in range(200):
+            batched = predictor.predict(symbols)
+        batch_ms = predictor.batch_latency.summary()['mean_ms']
+        single_start = time.perf_counter()
+        for _ in range(200):
+            for symbol in symbols:
+                predictor.predict([symbol])
+        single_ms = (time.perf_counter() - single_start) * 1000 / 200
+
+        accuracy = np.mean([predictor._get_model(predictor._model_key(s)).accuracy for s in symbols])
+        print(f"\n   [{mode}] {updates} güncelleme | {learn_us:.1f} µs/güncelleme | isabet %{accuracy * 100:.1f}")
+        print(f"   Batch tahmin: {batch_ms:.3f} ms / {len(symbols)} sembol | sembol sembol: {single_ms:.3f} ms")
+
+        # Döngü tahmini: sadece barı kapanan semboller batch'e girer
+        cycle = predictor.predict_cycle(symbols, closed_symbols=symbols[:2])
+        batches = predictor.model_stats['batches']
+        predictor.predict_cycle(symbols, closed_symbols=[])
+
+        # Sıfırdan başlatma yok - checkpoint + imleç ile kaldığı yerden (küçük cache: lazy yükleme + LRU atma)
+        predictor.close()
+        restored = MLPredictor(store, model_file=model_file, min_updates=200, per_symbol=per_symbol, cache_size=2)
+        relearned = sum(restored.learn(symbol) for symbol in symbols)
+        same = all(np.isclose(restored.predict([s])[s]['probability'], batched[s]['probability']) for s in symbols)
+        print(f"   Checkpoint geri yükleme: {'aynı' if same else 'FARKLI'} | yeniden öğrenilen satır: {relearned} | "
+              f"cache'ten atılan: {restored.model_stats['evicted']}")
+
+        ok = ok and (updates == len(symbols) * (bars - 1) and accuracy > 0.7 and predictor.is_ready(symbols[0])
+                     and all(cycle[s]['signal'] != 'NEUTRAL' for s in symbols)
+                     and predictor.model_stats['batches'] == batches and same and relearned == 0)
+        ok = ok and (restored.model_stats['evicted'] > 0) == per_symbol
+
+    # Kopukluk: ardışık olmayan satırlar (ör. hafta sonu boşluğu) etiketlenmez
+    gap_store = FeatureStore(store_dir=None, capacity=16)
+    for bar_time, price in ((0, 100.0), (300, 100.1), (3600, 101.0), (3900, 100.9)):
+        gap_store.append('GAP', 1_700_000_000 + bar_time, np.zeros(gap_store.n_features, dtype=np.float32), price)
+    gap_learned = MLPredictor(gap_store, model_file=None).learn('GAP')
+    print(f"   Kopukluk: 3 satır çiftinden {gap_learned} öğrenildi")
+    ok = ok and gap_learned == 2
+
+    print()
+    predictor.print_latency_report()
+    print(f"\n{'✅' if ok else '❌'} MLPredictor testi {'başarılı' if ok else 'başarısız'}")
+    return ok
+
+
+if __name__ == "__main__":
+    test_ml_predictor()
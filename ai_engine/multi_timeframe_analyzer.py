@@ -38,10 +38,6 @@ class MultiTimeframeAnalyzer:
             print("=" * 60)
             
             timeframe_results = {}
-            total_weight = 0
-            weighted_buy_strength = 0
-            weighted_sell_strength = 0
-            weighted_confidence = 0
             
             # Her timeframe için analiz
             for tf, config in self.timeframes.items():
@@ -63,13 +59,6 @@ class MultiTimeframeAnalyzer:
                             'name': config['name']
                         }
                         
-                        # Ağırlıklı ortalamalara ekle
-                        weight = config['weight']
-                        weighted_buy_strength += analysis['buy_strength'] * weight
-                        weighted_sell_strength += analysis['sell_strength'] * weight
-                        weighted_confidence += analysis['confidence'] * weight
-                        total_weight += weight
-                        
                         # Özet yazdır
                         print(f"   📊 Sinyal: {analysis['overall_signal']} (Güven: %{analysis['confidence']:.0f})")
                         print(f"   💪 Buy: {analysis['buy_strength']:.0f} | Sell: {analysis['sell_strength']:.0f}")
@@ -81,43 +70,7 @@ class MultiTimeframeAnalyzer:
                     print(f"   ❌ {tf} analizi hatası: {e}")
                     continue
             
-            # Ağırlıklı sonuçları hesapla
-            if total_weight > 0:
-                final_buy_strength = weighted_buy_strength / total_weight
-                final_sell_strength = weighted_sell_strength / total_weight
-                final_confidence = weighted_confidence / total_weight
-            else:
-                final_buy_strength = 0
-                final_sell_strength = 0
-                final_confidence = 0
-            
-            # Dominant sinyal belirle
-            if final_buy_strength > final_sell_strength and final_buy_strength > 60:
-                overall_signal = 'BUY'
-                signal_strength = final_buy_strength
-            elif final_sell_strength > final_buy_strength and final_sell_strength > 60:
-                overall_signal = 'SELL'
-                signal_strength = final_sell_strength
-            else:
-                overall_signal = 'NEUTRAL'
-                signal_strength = max(final_buy_strength, final_sell_strength)
-            
-            # Timeframe uyumu analizi
-            alignment_score = self._calculate_timeframe_alignment(timeframe_results)
-            
-            # Son sonuç
-            multi_tf_result = {
-                'symbol': symbol,
-                'overall_signal': overall_signal,
-                'confidence': final_confidence,
-                'buy_strength': final_buy_strength,
-                'sell_strength': final_sell_strength,
-                'signal_strength': signal_strength,
-                'alignment_score': alignment_score,
-                'timeframe_results': timeframe_results,
-                'analyzed_timeframes': len(timeframe_results),
-                'timestamp': datetime.now()
-            }
+            multi_tf_result = self.combine_timeframe_results(symbol, timeframe_results)
             
             # Özet raporu yazdır
             self._print_multi_tf_summary(multi_tf_result)
@@ -128,6 +81,61 @@ class MultiTimeframeAnalyzer:
             print(f"❌ Multiple timeframe analizi hatası: {e}")
             return None
     
+    def combine_timeframe_results(self, symbol, timeframe_results):
+        """Timeframe analizlerini ağırlıklı ortalama ve uyum skoru ile birleştir"""
+        total_weight = 0
+        weighted_buy_strength = 0
+        weighted_sell_strength = 0
+        weighted_confidence = 0
+        
+        for tf_data in timeframe_results.values():
+            analysis = tf_data['analysis']
+            weight = tf_data['weight']
+            weighted_buy_strength += analysis['buy_strength'] * weight
+            weighted_sell_strength += analysis['sell_strength'] * weight
+            weighted_confidence += analysis['confidence'] * weight
+            total_weight += weight
+        
+        # Ağırlıklı sonuçları hesapla
+        if total_weight > 0:
+            final_buy_strength = weighted_buy_strength / total_weight
+            final_sell_strength = weighted_sell_strength / total_weight
+            final_confidence = weighted_confidence / total_weight
+        else:
+            final_buy_strength = 0
+            final_sell_strength = 0
+            final_confidence = 0
+        
+        # Dominant sinyal belirle
+        if final_buy_strength > final_sell_strength and final_buy_strength > 60:
+            overall_signal = 'BUY'
+            signal_strength = final_buy_strength
+        elif final_sell_strength > final_buy_strength and final_sell_strength > 60:
+            overall_signal = 'SELL'
+            signal_strength = final_sell_strength
+        else:
+            overall_signal = 'NEUTRAL'
+            signal_strength = max(final_buy_strength, final_sell_strength)
+        
+        # Timeframe uyumu analizi
+        alignment_score = self._calculate_timeframe_alignment(timeframe_results)
+        
+        # Son sonuç
+        multi_tf_result = {
+            'symbol': symbol,
+            'overall_signal': overall_signal,
+            'confidence': final_confidence,
+            'buy_strength': final_buy_strength,
+            'sell_strength': final_sell_strength,
+            'signal_strength': signal_strength,
+            'alignment_score': alignment_score,
+            'timeframe_results': timeframe_results,
+            'analyzed_timeframes': len(timeframe_results),
+            'timestamp': datetime.now()
+        }
+        
+        return multi_tf_result
+    
     def _calculate_timeframe_alignment(self, timeframe_results):
         """Timeframe'ler arası uyumu hesapla"""
         try:
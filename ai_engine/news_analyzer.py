@@ -14,6 +14,8 @@ import os
 # Parent directory'yi ekle
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from ai_engine.sentiment_analyzer import BatchSentimentScorer
+
 # Sentiment analizi için basit implementation (textblob yerine)
 class SimpleSentimentAnalyzer:
     """Basit sentiment analizi"""
@@ -79,6 +81,10 @@ class NewsAnalyzer:
     def __init__(self):
         """NewsAnalyzer'ı başlat"""
         self.sentiment_analyzer = SimpleSentimentAnalyzer()
+        self.batch_scorer = BatchSentimentScorer(
+            self.sentiment_analyzer.positive_words,
+            self.sentiment_analyzer.negative_words
+        )
         self.news_cache = []
         self.last_update = None
         
@@ -99,10 +105,15 @@ class NewsAnalyzer:
             # Basit news scraping (demo amaçlı)
             news_items = self._fetch_sample_news()
             
+            # Tüm haberleri tek seferde skorla (tekrar gelen başlıklar cache'ten)
+            sentiment_scores = self.batch_scorer.score_batch([
+                f"{news.get('title', '')} {news.get('content', '')}" for news in news_items
+            ])
+            
             # Haberleri filtrele ve analiz et
             analyzed_news = []
-            for news in news_items:
-                analysis = self.analyze_news_item(news)
+            for news, sentiment_score in zip(news_items, sentiment_scores):
+                analysis = self.analyze_news_item(news, sentiment_score=float(sentiment_score))
                 if analysis:
                     analyzed_news.append(analysis)
             
@@ -152,15 +163,16 @@ class NewsAnalyzer:
         
         return sample_news
     
-    def analyze_news_item(self, news_item):
+    def analyze_news_item(self, news_item, sentiment_score=None):
         """Bir haber maddesini analiz et"""
         try:
             title = news_item.get('title', '')
             content = news_item.get('content', '')
             full_text = f"{title} {content}"
             
-            # Sentiment analizi
-            sentiment_score = self.sentiment_analyzer.analyze_sentiment(full_text)
+            # Sentiment analizi (batch skor verilmediyse tek başına skorla)
+            if sentiment_score is None:
+                sentiment_score = self.batch_scorer.score(full_text)
             
             # Etkilenen para birimleri
             affected_currencies = self.sentiment_analyzer.get_affected_currencies(full_text)
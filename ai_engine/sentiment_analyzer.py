@@ -0,0 +1,196 @@
+# ai_engine/sentiment_analyzer.py
+"""
+AI Trading Bot - Toplu (Batch) Sentiment Skorlama
+Binlerce başlığı tek seferde skorlar: ağırlıklı sözlüğe karşı seyrek terim
+matrisi kurulur, skorlar NumPy dizisi olarak döner. İçerik hash'li LRU cache
+sayesinde tekrar çekilen aynı başlıklar asla ikinci kez skorlanmaz.
+"""
+
+import re
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+# Basit ek temizleme (rallies -> rally, gains -> gain, surged -> surge)
+SUFFIX_RULES = (('ies', 'y'), ('es', ''), ('s', ''), ('ed', ''), ('ed', 'e'), ('ing', ''), ('ing', 'e'))
+
+class BatchSentimentScorer:
+    """Vektörize toplu sentiment skorlayıcı"""
+
+    def __init__(self, positive_words, negative_words, weights=None, cache_size=50000):
+        """BatchSentimentScorer'ı başlat"""
+        # Ağırlıklı sözlük: pozitif +1, negatif -1 (weights ile ezilebilir)
+        lexicon = {}
+        for word in positive_words:
+            lexicon[word.lower()] = 1.0
+        for word in negative_words:
+            lexicon[word.lower()] = -1.0
+        if weights:
+            lexicon.update({word.lower(): float(weight) for word, weight in weights.items()})
+
+        self.vocabulary = {word: index for index, word in enumerate(lexicon)}
+        self.term_weights = np.array(list(lexicon.values()), dtype=np.float64)
+
+        # Token -> sözlük indeksi (-1 = sözlükte yok); ekli halleri de önbelleğe alınır
+        self.token_lookup = {}
+
+        # İçerik hash'i -> skor (LRU)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        print(f"🧮 BatchSentimentScorer başlatıldı ({len(self.vocabulary)} terim)")
+
+    def build_term_matrix(self, texts):
+        """Seyrek (COO) terim matrisi kur: satır=metin, sütun=sözlük terimi"""
+        rows = []
+        cols = []
+        word_counts = np.empty(len(texts), dtype=np.float64)
+
+        lookup = self.token_lookup
+        for row, text in enumerate(texts):
+            text_lower = (text or '').lower()
+            word_counts[row] = len(text_lower.split())
+
+            # Her terim metin başına bir kez sayılır (SimpleSentimentAnalyzer ile aynı)
+            seen = set()
+            for token in TOKEN_PATTERN.findall(text_lower):
+                term = lookup.get(token)
+                if term is None:
+                    term = self._resolve_token(token)
+                if term >= 0 and term not in seen:
+                    seen.add(term)
+                    rows.append(row)
+                    cols.append(term)
+
+        return (np.array(rows, dtype=np.int64),
+                np.array(cols, dtype=np.int64),
+                word_counts)
+
+    def score_texts(self, texts):
+        """Cache'e bakmadan metinleri skorla (-1 ile +1 arası)"""
+        if not texts:
+            return np.zeros(0, dtype=np.float64)
+
+        rows, cols, word_counts = self.build_term_matrix(texts)
+
+        # Seyrek matris x ağırlık vektörü = satır başına net skor
+        net_scores = np.bincount(rows, weights=self.term_weights[cols], minlength=len(texts))
+
+        scores = net_scores / np.maximum(word_counts * 0.1, 1.0)
+        scores[word_counts == 0] = 0.0
+        return np.clip(scores, -1.0, 1.0)
+
+    def score_batch(self, texts):
+        """Metinleri skorla - daha önce görülen içerikler cache'ten gelir"""
+        scores = np.zeros(len(texts), dtype=np.float64)
+        if not texts:
+            return scores
+
+        keys = [self._content_hash(text) for text in texts]
+
+        # Cache'te olmayan benzersiz içerikleri topla
+        pending = {}
+        for index, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                scores[index] = cached
+                self.cache_hits += 1
+            else:
+                pending.setdefault(key, []).append(index)
+
+        if pending:
+            pending_keys = list(pending.keys())
+            new_scores = self.score_texts([texts[pending[key][0]] for key in pending_keys])
+            self.cache_misses += len(pending_keys)
+
+            for key, score in zip(pending_keys, new_scores):
+                scores[pending[key]] = score
+                self.cache[key] = float(score)
+
+            # LRU tahliyesi
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return scores
+
+    def score(self, text):
+        """Tek metin skorla (batch yolu üzerinden)"""
+        return float(self.score_batch([text])[0])
+
+    def get_cache_stats(self):
+        """Cache istatistikleri"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'size': len(self.cache),
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total else 0.0
+        }
+
+    def _resolve_token(self, token):
+        """Token'ı sözlük indeksine çevir (ek temizleme ile) ve sonucu sakla"""
+        term = self.vocabulary.get(token, -1)
+
+        if term < 0:
+            for suffix, replacement in SUFFIX_RULES:
+                if token.endswith(suffix) and len(token) > len(suffix) + 1:
+                    term = self.vocabulary.get(token[:-len(suffix)] + replacement, -1)
+                    if term >= 0:
+                        break
+
+        self.token_lookup[token] = term
+        return term
+
+    def _content_hash(self, text):
+        """Metin içeriği için sabit boyutlu hash"""
+        return hashlib.blake2b((text or '').encode('utf-8'), digest_size=16).digest()
+
+
+# Test fonksiyonu
+def test_batch_sentiment_scorer():
+    """BatchSentimentScorer'ı test et"""
+    import time
+
+    print("🧪 BatchSentimentScorer Test Başlıyor...")
+    print("=" * 50)
+
+    scorer = BatchSentimentScorer(
+        positive_words=['rise', 'growth', 'strong', 'rally', 'gains', 'beat'],
+        negative_words=['fall', 'weak', 'drop', 'crash', 'losses', 'miss']
+    )
+
+    headlines = [
+        'Gold rallies on strong safe haven demand',
+        'Euro falls as ECB holds rates, outlook weak',
+        'US jobs data beats expectations',
+        'Markets flat ahead of FOMC'
+    ]
+
+    for headline, score in zip(headlines, scorer.score_batch(headlines)):
+        print(f"   {score:+.2f}  {headline}")
+
+    # Backfill benzeri yük: 1 yıllık başlık (tekrarlar dahil)
+    backfill = [f"{headlines[i % 4]} #{i % 20000}" for i in range(200000)]
+    start = time.perf_counter()
+    scorer.score_batch(backfill)
+    first_pass = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer.score_batch(backfill)
+    second_pass = time.perf_counter() - start
+
+    print(f"\n⏱️ {len(backfill)} başlık: ilk geçiş {first_pass:.2f}s, tekrar {second_pass:.2f}s")
+    print(f"📦 Cache: {scorer.get_cache_stats()}")
+
+if __name__ == "__main__":
+    test_batch_sentiment_scorer()
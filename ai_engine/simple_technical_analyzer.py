@@ -21,6 +21,8 @@ class SimpleTechnicalAnalyzer:
     def __init__(self):
         """SimpleTechnicalAnalyzer'ı başlat"""
         self.indicators = TECHNICAL_INDICATORS
+        self.indicator_cache = {}  # (symbol, timeframe, bar sayısı) -> kapanmış barların gösterge durumu
+        self.cache_stats = {'hits': 0, 'misses': 0}
         print("📊 SimpleTechnicalAnalyzer başlatıldı")
     
     def calculate_sma(self, data, period):
@@ -151,7 +153,150 @@ class SimpleTechnicalAnalyzer:
         except Exception as e:
             print(f"❌ Teknik gösterge hesaplama hatası: {e}")
             return None
-    
+
+    def indicator_rows(self, symbol, timeframe, df):
+        """Son (oluşan) ve önceki (kapanmış) barın gösterge satırları.
+
+        Kapanmış barlar önceki çağrıyla aynıysa (aynı sembol/timeframe/bar sayısı, aynı
+        zaman indeksi ve OHLC) cache'teki çerçeve kullanılır ve yalnız oluşan bar yeniden
+        hesaplanır. EMA'lar pandas'ın EWM(adjust=True) adımıyla birebir, rolling değerler
+        son pencere üzerinden hesaplanır (tam hesaplamayla float yuvarlama düzeyinde aynı).
+        Yeni bar açıldığında pencere kaydığı için tüm göstergeler yeniden hesaplanır.
+        """
+        if df is None or df.empty:
+            print("❌ Veri yok, göstergeler hesaplanamadı")
+            return None, None
+
+        key = (symbol, timeframe, len(df))
+        values = df.to_numpy(dtype=float)
+        entry = self.indicator_cache.get(key)
+
+        if (entry is not None and entry['index'].equals(df.index)
+                and np.array_equal(entry['closed'], values[:-1], equal_nan=True)):
+            try:
+                last_row = self._forming_bar_row(entry, df)
+                self.cache_stats['hits'] += 1
+                return last_row, entry['prev_row']
+            except Exception as e:
+                print(f"⚠️ Oluşan bar hesaplanamadı, tam hesaplama yapılıyor: {e}")
+
+        data = self.calculate_all_indicators(df)
+        if data is None:
+            return None, None
+
+        self.cache_stats['misses'] += 1
+        prev_row = data.iloc[-2] if len(data) > 1 else None
+        if len(data) > self._min_cached_bars():
+            self.indicator_cache[key] = self._cache_entry(data, values, prev_row)
+        else:
+            self.indicator_cache.pop(key, None)
+        return data.iloc[-1], prev_row
+
+    def _min_cached_bars(self):
+        """Oluşan bar hesabının tam pencere görmesi için gereken minimum bar sayısı"""
+        return max(self.indicators['RSI_PERIOD'], self.indicators['MA_SLOW'],
+                   self.indicators['BOLLINGER_PERIOD'], self.indicators['ATR_PERIOD'], 14) + 1
+
+    def _ewm_state(self, series, period):
+        """Son kapanmış bardaki EWM(span=period, adjust=True) durumu: (değer, ağırlık toplamı)"""
+        decay = 1 - 2 / (period + 1)
+        weight = 1.0
+        for _ in range(len(series) - 1):
+            weight = weight * decay + 1.0
+        return float(series.ewm(span=period).mean().iloc[-1]), weight, decay
+
+    @staticmethod
+    def _ewm_step(state, value):
+        """EWM durumuna yeni değeri ekle (pandas ewm adımıyla aynı işlem sırası)"""
+        weighted, weight, decay = state
+        weight = weight * decay
+        if weighted != value:
+            weighted = weight * weighted + value
+            weighted /= (weight + 1.0)
+        return weighted
+
+    def _cache_entry(self, data, values, prev_row):
+        """Kapanmış barların gösterge durumunu cache'e hazırla"""
+        closed = data.iloc[:-1]
+        close = closed['close']
+        macd_line = (close.ewm(span=self.indicators['MACD_FAST']).mean()
+                     - close.ewm(span=self.indicators['MACD_SLOW']).mean())
+        return {
+            'index': data.index,
+            'closed': values[:-1],
+            'columns': data.columns,
+            'close': close.to_numpy(dtype=float),
+            'high': closed['high'].to_numpy(dtype=float),
+            'low': closed['low'].to_numpy(dtype=float),
+            'stoch_k': closed['stoch_k'].to_numpy(dtype=float),
+            'prev_row': prev_row,
+            'ewm': {
+                'ema_fast': self._ewm_state(close, self.indicators['MA_FAST']),
+                'ema_slow': self._ewm_state(close, self.indicators['MA_SLOW']),
+                'macd_fast': self._ewm_state(close, self.indicators['MACD_FAST']),
+                'macd_slow': self._ewm_state(close, self.indicators['MACD_SLOW']),
+                'macd_signal': self._ewm_state(macd_line, self.indicators['MACD_SIGNAL'])
+            }
+        }
+
+    def _forming_bar_row(self, entry, df):
+        """Yalnız oluşan bar için calculate_all_indicators ile aynı sütunları hesapla"""
+        last = df.iloc[-1]
+        price, high_now, low_now = float(last['close']), float(last['high']), float(last['low'])
+        close = np.append(entry['close'], price)
+        high = np.append(entry['high'], high_now)
+        low = np.append(entry['low'], low_now)
+        ewm = entry['ewm']
+        row = last.to_dict()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # RSI
+            period = self.indicators['RSI_PERIOD']
+            delta = np.diff(close[-period - 1:])
+            gain = np.where(delta > 0, delta, 0.0).mean()
+            loss = np.where(delta < 0, -delta, 0.0).mean()
+            row['rsi'] = 100 - (100 / (1 + np.float64(gain) / loss))
+
+            # Moving Averages
+            row['ma_fast'] = close[-self.indicators['MA_FAST']:].mean()
+            row['ma_slow'] = close[-self.indicators['MA_SLOW']:].mean()
+            row['ema_fast'] = self._ewm_step(ewm['ema_fast'], price)
+            row['ema_slow'] = self._ewm_step(ewm['ema_slow'], price)
+
+            # MACD
+            macd = self._ewm_step(ewm['macd_fast'], price) - self._ewm_step(ewm['macd_slow'], price)
+            row['macd'] = macd
+            row['macd_signal'] = self._ewm_step(ewm['macd_signal'], macd)
+            row['macd_histogram'] = row['macd'] - row['macd_signal']
+
+            # Bollinger Bands
+            window = close[-self.indicators['BOLLINGER_PERIOD']:]
+            middle = window.mean()
+            std = window.std(ddof=1)
+            row['bb_upper'] = middle + std * 2
+            row['bb_middle'] = middle
+            row['bb_lower'] = middle - std * 2
+            row['bb_percent'] = (price - row['bb_lower']) / (row['bb_upper'] - row['bb_lower'])
+
+            # Stochastic (14, 3)
+            lowest_low, highest_high = low[-14:].min(), high[-14:].max()
+            row['stoch_k'] = 100 * ((price - lowest_low) / (highest_high - lowest_low))
+            row['stoch_d'] = np.append(entry['stoch_k'][-2:], row['stoch_k']).mean()
+
+            # ATR
+            period = self.indicators['ATR_PERIOD']
+            previous = close[-period - 1:-1]
+            true_range = np.maximum.reduce([high[-period:] - low[-period:],
+                                            np.abs(high[-period:] - previous),
+                                            np.abs(low[-period:] - previous)])
+            row['atr'] = true_range.mean()
+
+            # Williams %R ve Momentum
+            row['williams_r'] = -100 * ((highest_high - price) / (highest_high - lowest_low))
+            row['momentum'] = price / close[-11] * 100
+
+        return pd.Series(row, name=last.name).reindex(entry['columns'])
+
     def get_rsi_signal(self, rsi_current):
         """RSI sinyali üret"""
         if pd.isna(rsi_current):
@@ -249,85 +394,91 @@ class SimpleTechnicalAnalyzer:
                 print("❌ Market verisi alınamadı")
                 return None
             
-            # Teknik göstergeleri hesapla
-            data_with_indicators = self.calculate_all_indicators(df)
-            if data_with_indicators is None:
-                return None
-            
-            # Son değerleri al
-            last_row = data_with_indicators.iloc[-1]
-            prev_row = data_with_indicators.iloc[-2] if len(data_with_indicators) > 1 else None
-            
-            # Sinyalleri topla
-            signals = {}
-            
-            signals['rsi'] = self.get_rsi_signal(last_row.get('rsi'))
-            
-            signals['macd'] = self.get_macd_signal(
-                last_row.get('macd'), 
-                last_row.get('macd_signal'),
-                prev_row.get('macd') if prev_row is not None else None,
-                prev_row.get('macd_signal') if prev_row is not None else None
-            )
-            
-            signals['bollinger'] = self.get_bollinger_signal(
-                last_row.get('close'),
-                last_row.get('bb_upper'),
-                last_row.get('bb_lower'),
-                last_row.get('bb_percent')
-            )
-            
-            signals['ma'] = self.get_ma_signal(
-                last_row.get('close'),
-                last_row.get('ma_fast'),
-                last_row.get('ma_slow')
-            )
-            
-            # Genel sinyal gücünü hesapla
-            total_buy_strength = 0
-            total_sell_strength = 0
-            
-            for indicator, signal_data in signals.items():
-                if signal_data['signal'] in ['BUY', 'WEAK_BUY']:
-                    total_buy_strength += signal_data['strength']
-                elif signal_data['signal'] in ['SELL', 'WEAK_SELL']:
-                    total_sell_strength += signal_data['strength']
-            
-            # Dominant sinyali belirle
-            if total_buy_strength > total_sell_strength and total_buy_strength > 80:
-                overall_signal = 'BUY'
-                confidence = min(100, total_buy_strength / 2)
-            elif total_sell_strength > total_buy_strength and total_sell_strength > 80:
-                overall_signal = 'SELL'
-                confidence = min(100, total_sell_strength / 2)
-            else:
-                overall_signal = 'NEUTRAL'
-                confidence = 0
-            
-            result = {
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'timestamp': last_row.name,
-                'current_price': last_row.get('close'),
-                'overall_signal': overall_signal,
-                'confidence': confidence,
-                'buy_strength': total_buy_strength,
-                'sell_strength': total_sell_strength,
-                'signals': signals,
-                'indicators': {
-                    'rsi': last_row.get('rsi'),
-                    'macd': last_row.get('macd'),
-                    'macd_signal': last_row.get('macd_signal'),
-                    'bb_percent': last_row.get('bb_percent'),
-                    'ma_fast': last_row.get('ma_fast'),
-                    'ma_slow': last_row.get('ma_slow'),
-                    'stoch_k': last_row.get('stoch_k'),
-                    'atr': last_row.get('atr')
-                }
-            }
-            
-            self._print_analysis_summary(result)
-            return result
+            return self.analyze_dataframe(symbol, timeframe, df)
+    
+    def analyze_dataframe(self, symbol, timeframe, df):
+        """Hazır OHLC verisi üzerinde analiz yap (canlı ve backtest aynı kuralları kullanır)"""
+        # Teknik göstergeleri hesapla (kapanmış barlar cache'ten, oluşan bar yeniden)
+        last_row, prev_row = self.indicator_rows(symbol, timeframe, df)
+        if last_row is None:
+            return None
+        
+        # Sinyalleri topla
+        signals = {}
+        
+        signals['rsi'] = self.get_rsi_signal(last_row.get('rsi'))
+        
+        signals['macd'] = self.get_macd_signal(
+            last_row.get('macd'), 
+            last_row.get('macd_signal'),
+            prev_row.get('macd') if prev_row is not None else None,
+            prev_row.get('macd_signal') if prev_row is not None else None
+        )
+        
+        signals['bollinger'] = self.get_bollinger_signal(
+            last_row.get('close'),
+            last_row.get('bb_upper'),
+            last_row.get('bb_lower'),
+            last_row.get('bb_percent')
+        )
+        
+        signals['ma'] = self.get_ma_signal(
+            last_row.get('close'),
+            last_row.get('ma_fast'),
+            last_row.get('ma_slow')
+        )
+        
+        # Genel sinyal gücünü hesapla
+        total_buy_strength = 0
+        total_sell_strength = 0
+        
+        for indicator, signal_data in signals.items():
+            if signal_data['signal'] in ['BUY', 'WEAK_BUY']:
+                total_buy_strength += signal_data['strength']
+            elif signal_data['signal'] in ['SELL', 'WEAK_SELL']:
+                total_sell_strength += signal_data['strength']
+        
+        # Dominant sinyali belirle
+        if total_buy_strength > total_sell_strength and total_buy_strength > 80:
+            overall_signal = 'BUY'
+            confidence = min(100, total_buy_strength / 2)
+        elif total_sell_strength > total_buy_strength and total_sell_strength > 80:
+            overall_signal = 'SELL'
+            confidence = min(100, total_sell_strength / 2)
+        else:
+            overall_signal = 'NEUTRAL'
+            confidence = 0
+        
+        result = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'timestamp': last_row.name,
+            'current_price': last_row.get('close'),
+            'overall_signal': overall_signal,
+            'confidence': confidence,
+            'buy_strength': total_buy_strength,
+            'sell_strength': total_sell_strength,
+            'signals': signals,
+            'indicators': {
+                'rsi': last_row.get('rsi'),
+                'macd': last_row.get('macd'),
+                'macd_signal': last_row.get('macd_signal'),
+                'bb_percent': last_row.get('bb_percent'),
+                'ma_fast': last_row.get('ma_fast'),
+                'ma_slow': last_row.get('ma_slow'),
+                'stoch_k': last_row.get('stoch_k'),
+                'atr': last_row.get('atr')
+            },
+            # Son kapanmış barın tüm gösterge değerleri (feature store bunları saklar)
+            'closed_bar': {
+                'time': prev_row.name,
+                'close': prev_row.get('close'),
+                'indicators': prev_row.drop(['open', 'high', 'low', 'close'], errors='ignore').to_dict()
+            } if prev_row is not None else None
+        }
+        
+        self._print_analysis_summary(result)
+        return result
     
     def _print_analysis_summary(self, result):
         """Analiz özetini yazdır"""
@@ -358,6 +509,11 @@ def test_simple_analyzer():
         print(f"\n✅ {result['symbol']} analizi başarılı!")
     else:
         print("❌ Analiz başarısız!")
+        return
+
+    # Aynı bar içinde tekrar analiz: kapanmış barlar cache'ten gelmeli
+    analyzer.analyze_symbol('EURUSD', 'M5', 50)
+    print(f"\n🗄️ Gösterge cache: {analyzer.cache_stats['hits']} isabet, {analyzer.cache_stats['misses']} tam hesaplama")
 
 if __name__ == "__main__":
     test_simple_analyzer()
\ No newline at end of file
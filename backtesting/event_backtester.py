@@ -0,0 +1,359 @@
+# backtesting/event_backtester.py
+"""
+AI Trading Bot - Event Tabanlı Tick Backtest
+Gerçek AITradingBot döngüsünü (_run_cycle: risk yenileme, korelasyon, trailing
+stop, max süre, analiz, duplicate sinyal kontrolü, toplu risk onayı, emir
+gönderimi) kaydedilmiş tick'ler üzerinde çalıştırır. MT5 API'si
+SimulatedTerminal ile, saat VirtualClock ile sağlanır; bekleme yoktur, bot
+döngüsü sanal zamanda cycle_seconds aralıklarla ilerler.
+
+Hızlı modda (varsayılan) teknik analiz sonuçları canlı yolla tutarlılığı
+doğrulanmış VectorizedBacktester ile tüm döngü anları için önceden hesaplanır;
+live_analysis=True ise her döngüde gerçek analizörler çalışır. Önceden
+hesaplanmış sonuçlarda kapanmış bar göstergeleri olmadığı için bu modda
+feature store ve ML sinyali kapalıdır; ML canlıda açıksa yüksek sesle uyarılır.
+
+live_analysis=True yavaştır: analizör kapanmış bar göstergelerini cache'leyip
+yalnız oluşan barı yeniden hesaplasa da her analizde MT5 verisinden DataFrame
+kurulur; 3 sembolde 30 sanal dakika ~15 sn, bir gün ~12 dk sürer (1 dakika
+hedefi bu modda tutmaz, günlük testler için hızlı modu kullanın).
+"""
+
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+import numpy as np
+import pandas as pd
+import sys
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    TRADING_SYMBOLS, BACKTEST_INITIAL_BALANCE, BACKTEST_COMMISSION_PER_LOT, BACKTEST_LEVERAGE,
+    EVENT_BACKTEST_CYCLE_SECONDS, ML_ENABLED, FEATURE_STORE_ENABLED
+)
+from backtesting.simulated_terminal import SimulatedTerminal, simulated_environment, generate_synthetic_ticks, ticks_to_m1_bars
+from backtesting.vectorized_backtester import VectorizedBacktester, NEUTRAL_NEWS_SIGNAL, SIGNAL_NAMES
+
+# Deal sebebi -> çıkış etiketi
+EXIT_REASONS = {
+    SimulatedTerminal.DEAL_REASON_SL: 'SL',
+    SimulatedTerminal.DEAL_REASON_TP: 'TP',
+    SimulatedTerminal.DEAL_REASON_EXPERT: 'BOT'
+}
+
+class EventBacktester:
+    """Canlı bot döngüsünü simüle terminal üzerinde süren backtest"""
+
+    def __init__(self, ticks, history=None, cycle_seconds=EVENT_BACKTEST_CYCLE_SECONDS,
+                 initial_balance=BACKTEST_INITIAL_BALANCE, commission_per_lot=BACKTEST_COMMISSION_PER_LOT,
+                 leverage=BACKTEST_LEVERAGE, calendar_events=None, live_analysis=False, work_dir=None):
+        """EventBacktester'ı başlat
+
+        ticks: {broker sembolü: DataFrame(time, bid, ask)}
+        history: {broker sembolü: tick'lerden önceki M1 barları} - gösterge pencerelerinin ısınması için
+        """
+        self.terminal = SimulatedTerminal(ticks, history, initial_balance=initial_balance,
+                                          commission_per_lot=commission_per_lot, leverage=leverage)
+        self.cycle_seconds = cycle_seconds
+        self.initial_balance = initial_balance
+        self.calendar_events = calendar_events
+        self.live_analysis = live_analysis
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='event_backtest_')
+
+        # Döngü anları: ilk tick'ten son tick'e cycle_seconds aralıkla
+        first = min(state['time_msc'][0] for state in self.terminal.symbols.values()) / 1000
+        last = max(state['time_msc'][-1] for state in self.terminal.symbols.values()) / 1000
+        self.cycle_epochs = np.arange(np.ceil(first), last + cycle_seconds, cycle_seconds)
+        self.cycle_times = pd.to_datetime(self.cycle_epochs, unit='s')
+
+        # (sembol, timeframe, bar sayısı) -> (skorlar, geçerli, fiyat)
+        self.analyses = {}
+        self.cycle_index = 0
+        self.duplicate_signals = 0
+        # Önceden hesaplanmış modda canlıda açık olan ML sinyali kapatılır - sonuç canlı kararları birebir üretmez
+        self.ml_skipped = ML_ENABLED and FEATURE_STORE_ENABLED and not live_analysis
+
+        print(f"🎬 EventBacktester başlatıldı: {len(self.terminal.symbols)} sembol, {len(self.cycle_epochs)} döngü "
+              f"({cycle_seconds} sn), analiz: {'canlı' if live_analysis else 'önceden hesaplanmış'}")
+        if self.ml_skipped:
+            self._warn_ml_skipped()
+
+    def _warn_ml_skipped(self):
+        """ML canlıda açık ama bu backtest'te yok - sonuçlar canlı kararlardan farklı olabilir"""
+        print("⚠️" * 3 + " UYARI: ML_ENABLED=True fakat önceden hesaplanmış analizde ML sinyali ÜRETİLMİYOR - "
+              "kararlar canlı botla aynı değil. Canlıyla birebir sonuç için live_analysis=True kullanın.")
+
+    # =========================================================================
+    # Analiz önbelleği
+    # =========================================================================
+
+    def _precompute_analyses(self):
+        """Her sembol ve timeframe için tüm döngü anlarının analizini vektörel hesapla"""
+        cycle_msc = (self.cycle_epochs * 1000).astype(np.int64)
+
+        for symbol, state in self.terminal.symbols.items():
+            m1 = state['m1']
+            bars = pd.DataFrame({
+                'open': m1['open'], 'high': m1['high'], 'low': m1['low'], 'close': m1['close'],
+                'spread': m1['spread']
+            }, index=pd.to_datetime(m1['minute'] * 60, unit='s'))
+
+            # Döngü anında oluşan M1 barı ve son bid - terminalin copy_rates_from_pos'u ile aynı
+            pointers = np.searchsorted(state['time_msc'], cycle_msc, side='right')
+            seen = pointers > 0
+            last_tick = np.maximum(pointers - 1, 0)
+            eval_index = np.where(seen, state['tick_bar'][last_tick], state['history_count'] - 1)
+            available = eval_index >= 0
+            eval_index = np.maximum(eval_index, 0)
+            eval_close = np.where(seen, state['bid'][last_tick], m1['close'][eval_index])
+
+            backtester = VectorizedBacktester(symbol, bars)
+            backtester.set_eval_points(eval_index, eval_close, self.cycle_times)
+
+            for tf, window in backtester.windows.items():
+                scores = backtester.timeframe_scores(tf)
+                self.analyses[(symbol, tf, window['bars'])] = (scores, window['valid'] & available, eval_close)
+
+    def _precomputed_analyzer(self, analyze_symbol):
+        """analyze_symbol yerine önbellekten sonuç döndüren fonksiyon (önbellekte yoksa gerçek analiz)"""
+        def analyze(symbol, timeframe='M1', bars=100):
+            entry = self.analyses.get((symbol, timeframe, bars))
+            if entry is None:
+                return analyze_symbol(symbol, timeframe, bars)
+
+            scores, valid, prices = entry
+            i = self.cycle_index
+            if not valid[i]:
+                return None
+
+            return {
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'timestamp': self.cycle_times[i],
+                'current_price': float(prices[i]),
+                'overall_signal': SIGNAL_NAMES[int(scores['signal'][i])],
+                'confidence': float(scores['confidence'][i]),
+                'buy_strength': float(scores['buy_strength'][i]),
+                'sell_strength': float(scores['sell_strength'][i]),
+                'signals': {},
+                'indicators': {name: float(values[i]) for name, values in scores['indicators'].items()}
+            }
+        return analyze
+
+    # =========================================================================
+    # Bot kurulumu
+    # =========================================================================
+
+    def _create_bot(self):
+        """Gerçek botu kur ve backtest kaynaklarına (geçici günlük, nötr haber, takvim) bağla"""
+        from bot_core.trading_bot import AITradingBot
+        from data_manager.mt5_connector import MT5Connector
+        from data_manager.economic_calendar import EconomicCalendar
+        from trading_engine.trade_journal import TradeJournal
+        from trading_engine.pnl_ledger import DailyPnLLedger
+        from trading_engine.circuit_breaker import CircuitBreaker
+        from ai_engine.feature_store import FeatureStore
+        from ai_engine.ml_predictor import MLPredictor
+
+        bot = AITradingBot(simulation_mode=False)
+        signal_processor = bot.signal_processor
+
+        # Canlı dosyalara dokunma - günlük, P&L defteri, devre kesici, feature store ve ML modeli backtest'e özel
+        bot.trade_journal = TradeJournal(os.path.join(self.work_dir, 'trade_journal.bin'))
+        bot.order_executor.journal = bot.trade_journal
+        bot.risk_manager.pnl_ledger = DailyPnLLedger(ledger_file=None)
+        bot.risk_manager.circuit_breaker = CircuitBreaker(state_file=None)
+        if signal_processor.feature_store is not None:
+            signal_processor.feature_store = FeatureStore(store_dir=None, capacity=1024)
+        if signal_processor.ml_predictor is not None:
+            signal_processor.ml_predictor = MLPredictor(signal_processor.feature_store, model_file=None)
+
+        # Geçmiş haber verisi yok - nötr
+        signal_processor.news_analyzer.get_trading_signal_from_news = (
+            lambda symbol: dict(NEUTRAL_NEWS_SIGNAL, reason='Backtest - haber verisi yok')
+        )
+
+        bot.economic_calendar = EconomicCalendar(calendar_file=None, feed_url='')
+        if self.calendar_events:
+            bot.economic_calendar.load_events(self.calendar_events)
+
+        if not self.live_analysis:
+            for analyzer in (signal_processor.technical_analyzer, signal_processor.multi_tf_analyzer.technical_analyzer):
+                analyzer.analyze_symbol = self._precomputed_analyzer(analyzer.analyze_symbol)
+            # Scalping sonucu birleşik skora girmez
+            signal_processor.scalping_analyzer.analyze_scalping_opportunity = lambda symbol: None
+            # Önceden hesaplanmış analizlerde kapanmış bar göstergeleri yok - özellik saklanmaz, ML sinyali üretilmez
+            signal_processor.feature_store = None
+            signal_processor.ml_predictor = None
+
+        # Bastırılan duplicate sinyalleri say
+        is_duplicate_signal = bot._is_duplicate_signal
+
+        def counting_duplicate_check(symbol, signal):
+            duplicate = is_duplicate_signal(symbol, signal)
+            if duplicate:
+                self.duplicate_signals += 1
+            return duplicate
+        bot._is_duplicate_signal = counting_duplicate_check
+
+        # start() ile aynı oturum kurulumu (Telegram / dashboard hariç)
+        bot.mt5_connector = MT5Connector()
+        if not bot.mt5_connector.connect():
+            raise RuntimeError("Simüle terminale bağlanılamadı")
+        bot.order_executor.attach_session(bot.mt5_connector)
+        bot._restore_from_journal()
+        bot.running = True
+
+        return bot
+
+    # =========================================================================
+    # Çalıştırma
+    # =========================================================================
+
+    def run(self, verbose=False):
+        """Tüm döngüleri sanal zamanda çalıştır"""
+        start = time.perf_counter()
+        equity = np.empty(len(self.cycle_epochs))
+        log = io.StringIO() if verbose else open(os.devnull, 'w')
+
+        try:
+            with redirect_stdout(log):
+                if not self.live_analysis:
+                    self._precompute_analyses()
+                precompute_seconds = time.perf_counter() - start
+
+                with simulated_environment(self.terminal):
+                    self.terminal.advance_to(self.cycle_epochs[0])
+                    bot = self._create_bot()
+
+                    for i, epoch in enumerate(self.cycle_epochs):
+                        self.cycle_index = i
+                        self.terminal.advance_to(epoch)
+                        bot._run_cycle()
+                        equity[i] = self.terminal.account_info().equity
+
+                    bot.stop()
+        finally:
+            if not verbose:
+                log.close()
+
+        trades = self.get_trades()
+        equity_curve = pd.Series(equity, index=self.cycle_times, name='equity')
+        stats = self.calculate_stats(trades, equity_curve)
+        stats['signals'] = bot.trade_count
+        stats['precompute_seconds'] = precompute_seconds
+        stats['elapsed_seconds'] = time.perf_counter() - start
+
+        return {
+            'trades': trades,
+            'equity_curve': equity_curve,
+            'stats': stats,
+            'log': log.getvalue() if verbose else None
+        }
+
+    def get_trades(self):
+        """Terminal deal'lerinden (IN/OUT, position_id ile eşleştirilmiş) işlem listesi"""
+        entries = {}
+        rows = []
+        for deal in self.terminal.deals:
+            if deal.entry == self.terminal.DEAL_ENTRY_IN:
+                entries[deal.position_id] = deal
+                continue
+
+            entry = entries.get(deal.position_id)
+            if entry is None:
+                continue
+
+            rows.append({
+                'ticket': deal.position_id,
+                'symbol': deal.symbol,
+                'type': 'BUY' if entry.type == self.terminal.DEAL_TYPE_BUY else 'SELL',
+                'volume': deal.volume,
+                'entry_time': pd.to_datetime(entry.time_msc, unit='ms'),
+                'exit_time': pd.to_datetime(deal.time_msc, unit='ms'),
+                'entry_price': entry.price,
+                'exit_price': deal.price,
+                'exit_reason': EXIT_REASONS.get(deal.reason, 'OTHER'),
+                'commission': -(deal.commission + entry.commission * deal.volume / entry.volume),
+                'profit': deal.profit + deal.commission + entry.commission * deal.volume / entry.volume
+            })
+
+        return pd.DataFrame(rows, columns=['ticket', 'symbol', 'type', 'volume', 'entry_time', 'exit_time',
+                                           'entry_price', 'exit_price', 'exit_reason', 'commission', 'profit'])
+
+    def calculate_stats(self, trades, equity_curve):
+        """Backtest özet istatistikleri"""
+        profits = trades['profit'].to_numpy(dtype=np.float64)
+        gross_profit = float(profits[profits > 0].sum())
+        gross_loss = float(-profits[profits < 0].sum())
+
+        equity = equity_curve.to_numpy()
+        peak = np.maximum.accumulate(equity) if len(equity) else equity
+        drawdown = peak - equity
+        account = self.terminal.account_info()
+
+        return {
+            'cycles': len(self.cycle_epochs),
+            'ticks': sum(len(state['bid']) for state in self.terminal.symbols.values()),
+            'trades': len(trades),
+            'win_rate': float((profits > 0).mean() * 100) if len(profits) else 0.0,
+            'net_profit': float(profits.sum()),
+            'gross_profit': gross_profit,
+            'gross_loss': gross_loss,
+            'profit_factor': gross_profit / gross_loss if gross_loss > 0 else float('inf') if gross_profit > 0 else 0.0,
+            'commission': float(trades['commission'].sum()),
+            'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+            'max_drawdown_percent': float((drawdown / peak).max() * 100) if len(drawdown) else 0.0,
+            'exit_reasons': trades['exit_reason'].value_counts().to_dict(),
+            'duplicate_signals': self.duplicate_signals,
+            'rejected_orders': self.terminal.stats['rejected'],
+            'open_positions': len(self.terminal.positions),
+            'ml_skipped': self.ml_skipped,
+            'final_balance': float(account.balance),
+            'final_equity': float(account.equity)
+        }
+
+    def print_report(self, result):
+        """Backtest özetini yazdır"""
+        stats = result['stats']
+        print(f"\n🎬 EVENT BACKTEST SONUCU")
+        print("=" * 50)
+        print(f"   Döngü: {stats['cycles']} | Tick: {stats['ticks']} | Sinyal: {stats['signals']} | İşlem: {stats['trades']}")
+        print(f"   Net kâr: ${stats['net_profit']:.2f} | Kazanma: %{stats['win_rate']:.1f} | "
+              f"Profit factor: {stats['profit_factor']:.2f}")
+        print(f"   Max drawdown: ${stats['max_drawdown']:.2f} (%{stats['max_drawdown_percent']:.2f})")
+        print(f"   Çıkışlar: {stats['exit_reasons']} | Açık pozisyon: {stats['open_positions']}")
+        print(f"   Duplicate sinyal bastırıldı: {stats['duplicate_signals']} | Reddedilen emir: {stats['rejected_orders']}")
+        print(f"   Bakiye: ${stats['final_balance']:.2f} | Equity: ${stats['final_equity']:.2f}")
+        print(f"   Süre: {stats['elapsed_seconds']:.2f} sn (önhesaplama {stats['precompute_seconds']:.2f} sn)")
+        if stats['ml_skipped']:
+            self._warn_ml_skipped()
+
+
+# Test fonksiyonu
+def test_event_backtester():
+    """EventBacktester'ı bir günlük sentetik tick verisiyle test et"""
+    print("🧪 EventBacktester Test Başlıyor...")
+    print("=" * 50)
+
+    ticks = {}
+    history = {}
+    for seed, symbol_config in enumerate(TRADING_SYMBOLS.values()):
+        symbol = symbol_config['symbol']
+        # 2 günlük ısınma geçmişi + 1 günlük tick
+        warmup = generate_synthetic_ticks(symbol, '2024-03-02', hours=48, seed=seed + 10, ticks_per_minute=1)
+        history[symbol] = ticks_to_m1_bars(warmup)
+        ticks[symbol] = generate_synthetic_ticks(symbol, '2024-03-04', hours=24, seed=seed,
+                                                 base_price=warmup['bid'].iloc[-1])
+
+    backtester = EventBacktester(ticks, history)
+    result = backtester.run()
+    backtester.print_report(result)
+    print(result['trades'].head(10))
+
+if __name__ == "__main__":
+    test_event_backtester()
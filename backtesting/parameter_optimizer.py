@@ -0,0 +1,313 @@
+# backtesting/parameter_optimizer.py
+"""
+AI Trading Bot - Paralel Parametre Optimizasyonu
+TECHNICAL_INDICATORS periyotları, _combine_all_signals ağırlıkları ve sinyal
+eşikleri (teknik 80, multi-TF 60, birleşik 35) üzerinde grid veya random
+search yapar. Her parametre seti VectorizedBacktester ile değerlendirilir.
+
+Bar geçmişi bir kez shared memory'ye yazılır; worker process'ler bu bloğa
+bağlanır (görev başına pickle yok) ve kendi backtester'ını bir kez kurar.
+Gösterge sonuçları worker'daki indicator_cache'te kalır; aynı gösterge
+periyotlarını paylaşan setler art arda aynı worker'a gönderildiği için
+RSI / MACD / MA / Bollinger tekrar hesaplanmaz.
+"""
+
+import io
+import itertools
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import OPTIMIZER_MAX_WORKERS, OPTIMIZER_MIN_TRADES, OPTIMIZER_RANDOM_SEED
+from backtesting.vectorized_backtester import VectorizedBacktester, DEFAULT_STRATEGY_PARAMS
+
+# Gösterge hesabını değiştiren parametreler - aynı değerlere sahip setler cache'i paylaşır
+INDICATOR_PARAMS = [
+    'rsi_period', 'macd_fast', 'macd_slow', 'macd_signal', 'ma_fast', 'ma_slow',
+    'bollinger_period', 'bollinger_std'
+]
+
+# Varsayılan arama uzayı (canlı değerler her listede var)
+DEFAULT_SEARCH_SPACE = {
+    'rsi_period': [7, 14, 21],
+    'macd_fast': [8, 12],
+    'macd_slow': [21, 26],
+    'ma_fast': [5, 10],
+    'ma_slow': [20, 30],
+    'technical_threshold': [70, 80, 90],
+    'multi_tf_threshold': [50, 60, 70],
+    'combined_threshold': [30, 35, 40],
+    'technical_weight': [0.3, 0.4, 0.5],
+    'multi_tf_weight': [0.3, 0.4, 0.5]
+}
+
+# Sonuç tablosundaki performans sütunları
+RESULT_COLUMNS = [
+    'trades', 'net_profit', 'return_percent', 'win_rate', 'profit_factor', 'max_drawdown_percent', 'stopped_out'
+]
+
+# Shared memory'deki bar matrisinin satırları (time = epoch saniye)
+BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'spread')
+
+# Worker process durumu (initializer'da bir kez kurulur)
+_worker = {}
+
+
+def share_bars(bars):
+    """Bar verisini shared memory'ye yaz - (SharedMemory, bağlanma bilgisi) döndürür"""
+    data = bars.set_index('time') if 'time' in bars.columns else bars
+    data = data.sort_index()
+
+    shape = (len(BAR_FIELDS), len(data))
+    block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+    matrix[0] = pd.DatetimeIndex(data.index).values.astype('datetime64[s]').astype(np.int64)
+    for row, field in enumerate(BAR_FIELDS[1:], start=1):
+        matrix[row] = data[field].to_numpy(dtype=np.float64) if field in data.columns else np.nan
+
+    return block, {'name': block.name, 'shape': shape, 'has_spread': 'spread' in data.columns}
+
+
+def attach_bars(shared):
+    """Shared memory'deki barları kopyalamadan DataFrame olarak aç"""
+    block = shared_memory.SharedMemory(name=shared['name'])
+    matrix = np.ndarray(shared['shape'], dtype=np.float64, buffer=block.buf)
+
+    fields = BAR_FIELDS[1:] if shared['has_spread'] else BAR_FIELDS[1:-1]
+    bars = pd.DataFrame(
+        {field: matrix[BAR_FIELDS.index(field)] for field in fields},
+        index=pd.to_datetime(matrix[0].astype(np.int64), unit='s'),
+        copy=False
+    )
+    return block, bars
+
+
+def rank_results(results, rank_by, min_trades):
+    """min_trades şartını sağlayan ve stop-out olmayanları rank_by'a göre sırala; diğerleri sıralamasız sona"""
+    if rank_by not in results.columns:
+        results[rank_by] = np.nan
+
+    eligible = results['trades'].fillna(0) >= min_trades if 'trades' in results.columns else False
+    if 'stopped_out' in results.columns:
+        eligible = eligible & ~results['stopped_out'].fillna(False).astype(bool)
+    ranked = results[eligible].sort_values(rank_by, ascending=False, kind='stable')
+    others = results[~eligible].sort_values(rank_by, ascending=False, kind='stable')
+
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1, dtype=float))
+    others.insert(0, 'rank', np.nan)
+    return pd.concat([ranked, others], ignore_index=True)
+
+
+def _init_worker(shared, symbol, backtester_options):
+    """Worker başlangıcı: shared memory'ye bağlan ve backtester'ı kur"""
+    block, bars = attach_bars(shared)
+    with redirect_stdout(io.StringIO()):
+        backtester = VectorizedBacktester(symbol, bars, **backtester_options)
+
+    _worker['block'] = block
+    _worker['backtester'] = backtester
+
+
+def _evaluate(params):
+    """Bir parametre setini worker'ın backtester'ında değerlendir"""
+    backtester = _worker['backtester']
+    hits, misses = backtester.cache_stats['hits'], backtester.cache_stats['misses']
+
+    try:
+        result = backtester.run(dict(DEFAULT_STRATEGY_PARAMS, **params))
+        row = dict(params, **{column: result['stats'][column] for column in RESULT_COLUMNS})
+    except Exception as e:
+        row = dict(params, error=str(e))
+
+    return row, backtester.cache_stats['hits'] - hits, backtester.cache_stats['misses'] - misses
+
+
+class ParameterOptimizer:
+    """Grid / random search ile strateji parametrelerini tara"""
+
+    def __init__(self, symbol, bars, search_space=None, max_workers=OPTIMIZER_MAX_WORKERS,
+                 min_trades=OPTIMIZER_MIN_TRADES, rank_by='net_profit', backtester_options=None):
+        """ParameterOptimizer'ı başlat
+
+        search_space: {parametre: [değerler]} - DEFAULT_STRATEGY_PARAMS anahtarları
+        """
+        self.symbol = symbol
+        self.bars = bars
+        self.search_space = dict(search_space or DEFAULT_SEARCH_SPACE)
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.min_trades = min_trades
+        self.rank_by = rank_by
+        self.backtester_options = backtester_options or {}
+
+        unknown = set(self.search_space) - set(DEFAULT_STRATEGY_PARAMS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen parametre(ler): {sorted(unknown)}")
+
+        self.last_run = {}
+
+        print(f"🔬 ParameterOptimizer başlatıldı: {symbol} - {len(self.search_space)} parametre, "
+              f"grid {self.grid_size()} set, {self.max_workers} worker")
+
+    # =========================================================================
+    # Parametre setleri
+    # =========================================================================
+
+    def grid_size(self):
+        """Grid'deki (kısıtlar uygulanmadan) set sayısı"""
+        return math.prod(len(values) for values in self.search_space.values())
+
+    def grid(self):
+        """Tüm geçerli kombinasyonlar"""
+        names = list(self.search_space)
+        combinations = itertools.product(*(self.search_space[name] for name in names))
+        return [params for params in (dict(zip(names, values)) for values in combinations) if self._is_valid(params)]
+
+    def random_sample(self, samples, seed=OPTIMIZER_RANDOM_SEED):
+        """Grid'den tekrarsız rastgele örnek (grid listesi kurulmadan indeks çözülür)"""
+        names = list(self.search_space)
+        sizes = [len(self.search_space[name]) for name in names]
+        total = self.grid_size()
+
+        rng = np.random.default_rng(seed)
+        indices = rng.choice(total, size=min(samples, total), replace=False)
+
+        param_sets = []
+        for index in indices:
+            params = {}
+            for name, size in zip(reversed(names), reversed(sizes)):
+                index, position = divmod(int(index), size)
+                params[name] = self.search_space[name][position]
+            if self._is_valid(params):
+                param_sets.append({name: params[name] for name in names})
+        return param_sets
+
+    def _is_valid(self, params):
+        """Anlamsız kombinasyonları ele (hızlı periyot yavaştan küçük olmalı)"""
+        merged = dict(DEFAULT_STRATEGY_PARAMS, **params)
+        return merged['macd_fast'] < merged['macd_slow'] and merged['ma_fast'] < merged['ma_slow']
+
+    def _indicator_order(self, param_sets):
+        """Aynı gösterge periyotlarına sahip setleri yan yana getir (worker cache'i için)"""
+        def key(params):
+            merged = dict(DEFAULT_STRATEGY_PARAMS, **params)
+            return tuple(merged[name] for name in INDICATOR_PARAMS)
+        return sorted(param_sets, key=key)
+
+    # =========================================================================
+    # Çalıştırma
+    # =========================================================================
+
+    def grid_search(self):
+        """Tüm grid'i değerlendir"""
+        return self.run(self.grid())
+
+    def random_search(self, samples, seed=OPTIMIZER_RANDOM_SEED):
+        """Rastgele samples set değerlendir"""
+        return self.run(self.random_sample(samples, seed))
+
+    def run(self, param_sets):
+        """Parametre setlerini process pool'da değerlendir ve sıralı sonuç tablosu döndür"""
+        start = time.perf_counter()
+        param_sets = self._indicator_order(param_sets)
+        if not param_sets:
+            return pd.DataFrame(columns=['rank'] + list(self.search_space) + RESULT_COLUMNS)
+
+        # Gösterge grubu worker'lar arasında bölünmesin diye büyük parçalar
+        chunksize = max(1, math.ceil(len(param_sets) / (self.max_workers * 4)))
+
+        block, shared = share_bars(self.bars)
+        rows = []
+        cache_hits = cache_misses = 0
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(shared, self.symbol, self.backtester_options)) as executor:
+                for row, hits, misses in executor.map(_evaluate, param_sets, chunksize=chunksize):
+                    rows.append(row)
+                    cache_hits += hits
+                    cache_misses += misses
+        finally:
+            block.close()
+            block.unlink()
+
+        results = self.rank_results(pd.DataFrame(rows))
+        elapsed = time.perf_counter() - start
+        lookups = cache_hits + cache_misses
+
+        self.last_run = {
+            'evaluated': len(rows),
+            'elapsed_seconds': elapsed,
+            'sets_per_second': len(rows) / elapsed if elapsed > 0 else 0.0,
+            'cache_hit_rate': cache_hits / lookups * 100 if lookups else 0.0,
+            'errors': int(results['error'].notna().sum()) if 'error' in results.columns else 0,
+            'stopped_out': int(results['stopped_out'].fillna(False).astype(bool).sum()) if 'stopped_out' in results.columns else 0
+        }
+        return results
+
+    def rank_results(self, results):
+        """min_trades şartını sağlayanları rank_by'a göre sırala; diğerleri sıralamasız sona"""
+        return rank_results(results, self.rank_by, self.min_trades)
+
+    def print_results(self, results, top=10):
+        """En iyi sonuçları ve canlı parametrelerle karşılaştırmayı yazdır"""
+        run = self.last_run
+        print(f"\n🔬 {self.symbol} PARAMETRE TARAMASI - {run.get('evaluated', len(results))} set")
+        print("=" * 70)
+        print(f"   Süre: {run.get('elapsed_seconds', 0):.1f} sn ({run.get('sets_per_second', 0):.1f} set/sn) | "
+              f"Gösterge cache isabeti: %{run.get('cache_hit_rate', 0):.1f} | Hata: {run.get('errors', 0)} | "
+              f"Stop-out: {run.get('stopped_out', 0)}")
+        if run.get('evaluated') and run.get('stopped_out', 0) == run['evaluated']:
+            print("   ❌ Tüm setler stop-out oldu - sıralama stratejiyi değil hesabın bitişini ölçüyor")
+
+        live = {name: DEFAULT_STRATEGY_PARAMS[name] for name in self.search_space}
+        match = results[np.logical_and.reduce([results[name] == value for name, value in live.items()])]
+        if len(match):
+            row = match.iloc[0]
+            print(f"   Canlı parametreler: sıra {row['rank'] if not pd.isna(row['rank']) else '-'}, "
+                  f"{self.rank_by} {row[self.rank_by]:.2f}, işlem {row['trades']:.0f}")
+
+        print(f"\n   İlk {top} (min {self.min_trades} işlem, sıralama: {self.rank_by}):")
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(results.head(top).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+
+
+# Test fonksiyonu
+def test_parameter_optimizer():
+    """ParameterOptimizer'ı sentetik M1 verisiyle test et"""
+    print("🧪 ParameterOptimizer Test Başlıyor...")
+    print("=" * 50)
+
+    # 60 günlük sentetik EURUSD M1 verisi
+    rng = np.random.default_rng(7)
+    times = pd.date_range('2024-01-01', periods=60 * 1440, freq='1min')
+    close = 1.10 * np.exp(np.cumsum(rng.normal(0, 0.00012, len(times))))
+    opens = np.r_[close[0], close[:-1]]
+    wick = np.abs(rng.normal(0, 0.00008, len(times)))
+    bars = pd.DataFrame({
+        'open': opens,
+        'high': np.maximum(opens, close) + wick,
+        'low': np.minimum(opens, close) - wick,
+        'close': close,
+        'spread': rng.integers(5, 25, len(times))
+    }, index=times)
+
+    optimizer = ParameterOptimizer('EURUSD', bars, max_workers=2, min_trades=10)
+    results = optimizer.random_search(200)
+    optimizer.print_results(results)
+
+    # Sıralama anlamlı olmalı: setlerin hepsi stop-out olmamalı
+    assert optimizer.last_run['stopped_out'] < optimizer.last_run['evaluated'], "❌ Tüm setler stop-out oldu"
+    print(f"\n✅ Stop-out olmayan set: {optimizer.last_run['evaluated'] - optimizer.last_run['stopped_out']}"
+          f"/{optimizer.last_run['evaluated']}")
+
+if __name__ == "__main__":
+    test_parameter_optimizer()
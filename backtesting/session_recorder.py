@@ -0,0 +1,901 @@
+# backtesting/session_recorder.py
+"""
+AI Trading Bot - Oturum Kaydı ve Tekrar Oynatma
+Canlı döngünün gördüğü tüm dış girdiler (MT5 çağrıları ve sonuçları, saat
+okumaları, haber / takvim / günlük girdileri) uzunluk önekli + CRC'li ikili
+bir dosyaya kaydedilir. SessionReplayer aynı girdileri bekleme olmadan,
+döngü döngü yeni bir bota geri besler: yavaş bir döngü profil altında
+tekrar üretilebilir, kod sürümleri arasında kararlar (emir / kapatma / SL
+değişikliği) karşılaştırılabilir.
+
+Kayıt, modülleri simüle terminalle aynı mekanizmayla (patch_bot_modules)
+kayıt proxy'sine ve kaydeden saate yönlendirir. Her döngü tek (sıkıştırılmış)
+kayıttır; çağrı anahtarları bir kez yazılıp numarayla anılır, değişmeyen
+sonuçlar tek işaretle, sadece son barı değişen bar dizileri fark olarak yazılır.
+"""
+
+import cProfile
+import importlib
+import io
+import os
+import pickle
+import pstats
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from contextlib import redirect_stdout
+from datetime import datetime as _datetime, date as _date
+import numpy as np
+import sys
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import SESSION_RECORD_DIR, TRADING_SYMBOLS
+from backtesting.simulated_terminal import patch_bot_modules
+from utils.helpers import LatencyHistogram
+
+# Dosya imzası ve kayıt başlığı: payload uzunluğu + CRC32 + bayrak (1 = zlib)
+SESSION_MAGIC = b'AISESS01'
+FRAME_HEADER = struct.Struct('<IIB')
+COMPRESS_MIN_BYTES = 512
+
+# Sonuç kodlaması: tam değer / önceki ile aynı / bar dizisinde fark
+VALUE, SAME, DELTA = 0, 1, 2
+
+# Anahtar başına tutulan son sonuç sayısı (kayıt ve oynatmada aynı)
+CODEC_CACHE_SIZE = 1024
+
+# Argümanları kaydedilmeyen çağrılar (hesap bilgileri / şifre)
+PRIVATE_CALLS = {'initialize', 'login'}
+
+# mt5 dışındaki dış girdiler: kanal -> (bot üzerindeki nesne yolu, metod)
+INPUT_SOURCES = {
+    'news': ('signal_processor.news_analyzer', '_fetch_sample_news'),
+    'calendar': ('economic_calendar', 'fetch_events'),
+    'journal': ('trade_journal', 'rebuild_state')
+}
+
+# Karşılaştırılan bot kararları (order_executor metodları)
+DECISION_METHODS = ('execute_market_order', 'close_position', 'close_all_positions', 'modify_position', 'modify_stops')
+
+
+class RecordedTuple:
+    """MT5 namedtuple sonucunun taşınabilir hali (oynatmada MetaTrader5 gerekmez)"""
+    __slots__ = ('name', 'fields', 'values')
+
+    def __init__(self, name, fields, values):
+        self.name = name
+        self.fields = fields
+        self.values = values
+
+    def __getstate__(self):
+        return self.name, self.fields, self.values
+
+    def __setstate__(self, state):
+        self.name, self.fields, self.values = state
+
+
+class _SessionUnpickler(pickle.Unpickler):
+    """Sadece kayıtta kullanılan tiplerin yüklenmesine izin ver
+
+    Liste modül önekiyle değil tam adla tutulur - numpy altındaki keyfi fonksiyonlar
+    (ör. kod çalıştıran test yardımcıları) kayıt dosyasından çağrılamaz.
+    """
+
+    SAFE_GLOBALS = {
+        # numpy dizi / skaler yeniden kurucuları (numpy 1.x 'core', 2.x '_core')
+        ('numpy', 'ndarray'), ('numpy', 'dtype'),
+        ('numpy.core.multiarray', '_reconstruct'), ('numpy.core.multiarray', 'scalar'),
+        ('numpy.core.numeric', '_frombuffer'),
+        ('numpy._core.multiarray', '_reconstruct'), ('numpy._core.multiarray', 'scalar'),
+        ('numpy._core.numeric', '_frombuffer'),
+        ('datetime', 'datetime'), ('datetime', 'date'), ('datetime', 'timedelta'), ('datetime', 'timezone'),
+        ('builtins', 'set'), ('builtins', 'frozenset'), ('builtins', 'bytearray'), ('builtins', 'complex'),
+        ('builtins', 'slice'), ('builtins', 'range'),
+        ('collections', 'deque'), ('collections', 'OrderedDict'),
+        ('backtesting.session_recorder', 'RecordedTuple')
+    }
+
+    def find_class(self, module, name):
+        if (module, name) in self.SAFE_GLOBALS:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Oturum kaydında izin verilmeyen tip: {module}.{name}")
+
+
+def _loads(payload):
+    """Güvenli pickle yükleme"""
+    return _SessionUnpickler(io.BytesIO(payload)).load()
+
+def _dumps(value):
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+_tuple_types = {}
+
+def _encode(value):
+    """namedtuple'ları RecordedTuple'a, sanal saat datetime'larını gerçek datetime'a çevir (iç içe)"""
+    if isinstance(value, _date) and type(value) not in (_datetime, _date):
+        if isinstance(value, _datetime):
+            return _datetime.combine(value.date(), value.timetz())
+        return _date(value.year, value.month, value.day)
+    if isinstance(value, tuple):
+        if hasattr(value, '_fields'):
+            return RecordedTuple(type(value).__name__, tuple(value._fields), tuple(_encode(item) for item in value))
+        return tuple(_encode(item) for item in value)
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    return value
+
+def _decode(value):
+    """RecordedTuple'ları namedtuple'a geri çevir (tip başına bir kez oluşturulur)"""
+    if isinstance(value, RecordedTuple):
+        key = (value.name, value.fields)
+        tuple_type = _tuple_types.get(key)
+        if tuple_type is None:
+            tuple_type = _tuple_types[key] = namedtuple(value.name, value.fields)
+        return tuple_type(*(_decode(item) for item in value.values))
+    if isinstance(value, tuple):
+        return tuple(_decode(item) for item in value)
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _decode(item) for key, item in value.items()}
+    return value
+
+def _call_key(name, args, kwargs):
+    """Çağrının argüman anahtarı"""
+    if name in PRIVATE_CALLS:
+        return ''
+    return repr(args) + (repr(sorted(kwargs.items())) if kwargs else '')
+
+def _rates_delta(previous, current):
+    """Bar dizisi öncekinin kaydırılmış hali + yeni barlarsa (başlangıç, ortak bar, yeni barlar)"""
+    if (not isinstance(previous, np.ndarray) or not isinstance(current, np.ndarray) or previous.dtype != current.dtype
+            or not current.dtype.names or 'time' not in current.dtype.names or not len(current) or not len(previous)):
+        return None
+
+    start = int(np.searchsorted(previous['time'], current['time'][0]))
+    if start >= len(previous) or previous['time'][start] != current['time'][0]:
+        return None
+
+    overlap = min(len(previous) - start, len(current))
+    same = previous[start:start + overlap] == current[:overlap]
+    common = overlap if same.all() else int(np.argmin(same))
+    return start, common, current[common:].copy()
+
+def _round_floats(value):
+    """Karar karşılaştırması için float'ları yuvarla (iç içe)"""
+    if isinstance(value, float):
+        return round(value, 8)
+    if isinstance(value, (tuple, list)):
+        return tuple(_round_floats(item) for item in value)
+    return value
+
+def _decision(method, args, kwargs):
+    """Karşılaştırılabilir karar kaydı (client_id her oturumda farklı - dahil edilmez)"""
+    kwargs = {key: value for key, value in kwargs.items() if key != 'client_id'}
+    return (method, _round_floats(args), _round_floats(tuple(sorted(kwargs.items()))))
+
+def _resolve(bot, path):
+    """'a.b' yolundaki nesne"""
+    target = bot
+    for name in path.split('.'):
+        target = getattr(target, name)
+    return target
+
+def _wrap_attribute(owner, name, wrapper, wrapped):
+    """Nesne metodunu sarmalayıcıyla değiştir - geri alma bilgisini wrapped listesine ekle"""
+    wrapped.append((owner, name, owner.__dict__.get(name)))
+    setattr(owner, name, wrapper)
+
+def _unwrap_attributes(wrapped):
+    """_wrap_attribute değişikliklerini geri al"""
+    for owner, name, previous in reversed(wrapped):
+        if previous is None:
+            owner.__dict__.pop(name, None)
+        else:
+            setattr(owner, name, previous)
+    wrapped.clear()
+
+def _snapshot_ml(signal_processor):
+    """ML modeli ve sembol başına son feature satırı - replay aynı model durumundan başlar (ML kapalıysa None)"""
+    predictor = signal_processor.ml_predictor
+    if predictor is None:
+        return None
+
+    store = predictor.feature_store
+    symbols = [symbol_config['symbol'] for symbol_config in TRADING_SYMBOLS.values()]
+    tail = {}
+    for symbol in symbols:
+        # Bekleyen etiketler kayıttan önce öğrenilir - replay'in görmediği satırlar kalmasın
+        predictor.learn(symbol)
+        count = store.get_count(symbol)
+        if count:
+            tail[symbol] = (int(store.get_times(symbol)[-1]), float(store.get_prices(symbol)[-1]),
+                            np.array(store.latest(symbol)))
+    return {'model': predictor.get_state(symbols), 'tail': tail,
+            'min_updates': predictor.min_updates, 'per_symbol': predictor.per_symbol}
+
+def _wrap_decisions(bot, sink, wrapped):
+    """order_executor karar metodlarının çağrılarını sink listesine ekle"""
+    executor = bot.order_executor
+    for method in DECISION_METHODS:
+        original = getattr(executor, method)
+
+        def recorded(*args, _method=method, _original=original, **kwargs):
+            sink.append(_decision(_method, args, kwargs))
+            return _original(*args, **kwargs)
+
+        _wrap_attribute(executor, method, recorded, wrapped)
+
+
+class _ResultCodec:
+    """Çağrı anahtarı başına son sonuca göre kodlama (aynı / fark / tam değer)"""
+
+    def __init__(self, capacity=CODEC_CACHE_SIZE):
+        self.capacity = capacity
+        self.values = OrderedDict()
+
+    def _remember(self, key, entry):
+        self.values[key] = entry
+        self.values.move_to_end(key)
+        if len(self.values) > self.capacity:
+            self.values.popitem(last=False)
+
+    def encode(self, key, value):
+        """(mod, veri) - kayıt tarafı"""
+        blob = _dumps(_encode(value))
+        previous = self.values.get(key)
+        self._remember(key, (blob, value))
+
+        if previous is not None:
+            if previous[0] == blob:
+                return SAME, None
+            delta = _rates_delta(previous[1], value)
+            if delta is not None:
+                return DELTA, delta
+        return VALUE, blob
+
+    def decode(self, key, mode, data):
+        """Değer - oynatma tarafı (kayıtla aynı anahtar sırası, aynı cache)"""
+        if mode == VALUE:
+            value = _decode(_loads(data))
+        elif mode == SAME:
+            value = self.values[key]
+        else:
+            start, common, tail = data
+            previous = self.values[key]
+            value = np.concatenate([previous[start:start + common], tail])
+        self._remember(key, value)
+        return value
+
+
+class RecordingTerminal:
+    """MT5 modülü proxy'si - kayıt thread'inden gelen çağrıları ve sonuçlarını kaydeder"""
+
+    def __init__(self, terminal, recorder):
+        self.__dict__['_terminal'] = terminal
+        self.__dict__['_recorder'] = recorder
+
+    def __getattr__(self, name):
+        value = getattr(self._terminal, name)
+        if name.startswith('_') or not callable(value):
+            return value
+
+        recorder = self._recorder
+
+        def recorded(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if threading.get_ident() == recorder.thread_id:
+                try:
+                    recorder.record_call(name, args, kwargs, result)
+                except Exception as e:
+                    print(f"❌ Oturum kaydı hatası ({name}): {e}")
+            return result
+
+        self.__dict__[name] = recorded
+        return recorded
+
+
+class _RecordingClock:
+    """Kaynak saatten okur, kayıt thread'inin okumalarını döngü listesine ekler"""
+
+    def __init__(self, recorder, source):
+        self.recorder = recorder
+        self.source = source
+
+    def time(self):
+        value = self.source()
+        if threading.get_ident() == self.recorder.thread_id:
+            self.recorder.clock_values.append(value)
+        return value
+
+    def now(self):
+        return _datetime.fromtimestamp(self.time())
+
+
+class SessionRecorder:
+    """Canlı bot oturumunun dış girdilerini ikili dosyaya kaydeder"""
+
+    def __init__(self, path=None, terminal=None, clock=None):
+        """SessionRecorder'ı başlat
+
+        terminal: Kaydedilecek MT5 API'si (None -> MetaTrader5 modülü)
+        clock: Saat kaynağı (None -> duvar saati; verilirse sleep beklemez)
+        """
+        self.path = path or os.path.join(SESSION_RECORD_DIR, f"session_{_datetime.now():%Y%m%d_%H%M%S}.bin")
+        self.terminal = terminal
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.codec = _ResultCodec()
+
+        self.file = None
+        self.thread_id = None
+        self.restore_modules = None
+        self.wrapped = []
+
+        # Açık segmentin (kurulum veya döngü) çağrıları, girdileri, saat okumaları ve kararları
+        self.calls = []
+        self.sources = []
+        self.clock_values = []
+        self.decisions = []
+        self.key_ids = {}             # (isim, argüman anahtarı) -> numara
+        self.cycle = 0
+        self.cycle_start = None
+        self.setup_done = False
+
+        self.stats = {'cycles': 0, 'calls': 0, 'same': 0, 'delta': 0, 'sources': 0, 'frames': 0,
+                      'bytes': 0, 'raw_bytes': 0}
+
+    def start(self, bot):
+        """Kaydı başlat: modülleri proxy'ye yönlendir, bot girdi kaynaklarını ve döngüyü sar"""
+        terminal = self.terminal if self.terminal is not None else importlib.import_module('MetaTrader5')
+        time_source = self.clock.time if self.clock is not None else time.time
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, 'wb')
+        self.file.write(SESSION_MAGIC)
+
+        # Paper broker kayması da tekrar üretilebilsin
+        paper_seed = None
+        if hasattr(bot.order_executor, 'rng'):
+            paper_seed = int(time_source() * 1000) % 2 ** 32
+            bot.order_executor.rng = np.random.default_rng(paper_seed)
+
+        ledger = bot.risk_manager.pnl_ledger
+        with ledger.lock:
+            ledger_state = {'cursor_msc': ledger.cursor_msc, 'cursor_tickets': sorted(ledger.cursor_tickets),
+                            'days': dict(ledger.days)}
+
+        self._write(('header', {
+            'started': time_source(),
+            'simulation_mode': bot.simulation_mode,
+            'paper_seed': paper_seed,
+            'pnl_ledger': ledger_state,
+            'circuit_breaker': bot.risk_manager.circuit_breaker.get_state(),
+            'ml': _snapshot_ml(bot.signal_processor),
+            'constants': {name: getattr(terminal, name) for name in dir(terminal)
+                          if name.isupper() and isinstance(getattr(terminal, name), (int, float, str))}
+        }))
+
+        self.thread_id = threading.get_ident()
+        self.restore_modules = patch_bot_modules(RecordingTerminal(terminal, self), _RecordingClock(self, time_source),
+                                                 real_sleep=self.clock is None)
+
+        for channel, (path, method) in INPUT_SOURCES.items():
+            self._wrap_source(_resolve(bot, path), method, channel)
+        _wrap_decisions(bot, self.decisions, self.wrapped)
+
+        run_cycle = bot._run_cycle
+
+        def recorded_cycle():
+            self.begin_cycle()
+            try:
+                return run_cycle()
+            finally:
+                self.end_cycle()
+
+        _wrap_attribute(bot, '_run_cycle', recorded_cycle, self.wrapped)
+
+        print(f"📼 Oturum kaydı başladı: {self.path}")
+
+    def _wrap_source(self, owner, method, channel):
+        """Dış girdi metodunun sonucunu kaydet"""
+        original = getattr(owner, method)
+
+        def recorded(*args, **kwargs):
+            result = original(*args, **kwargs)
+            if threading.get_ident() == self.thread_id:
+                try:
+                    self.sources.append((channel, _dumps(_encode(result))))
+                    self.stats['sources'] += 1
+                except Exception as e:
+                    print(f"❌ Oturum kaydı hatası ({channel}): {e}")
+            return result
+
+        _wrap_attribute(owner, method, recorded, self.wrapped)
+
+    def record_call(self, name, args, kwargs, result):
+        """MT5 çağrı sonucunu açık segmente ekle - anahtar ilk kullanımda tam, sonra numarayla"""
+        key = (name, _call_key(name, args, kwargs))
+        mode, data = self.codec.encode(key, result)
+
+        key_id = self.key_ids.get(key)
+        if key_id is None:
+            self.key_ids[key] = len(self.key_ids)
+            reference = key
+        else:
+            reference = key_id
+        self.calls.append((reference, mode, data))
+
+        self.stats['calls'] += 1
+        if mode == SAME:
+            self.stats['same'] += 1
+        elif mode == DELTA:
+            self.stats['delta'] += 1
+
+    def begin_cycle(self):
+        """Döngü başı - ilk döngüden önceki her şey kurulum segmentidir"""
+        if not self.setup_done:
+            self._end_segment('setup', 0.0)
+            self.setup_done = True
+        self.cycle_start = time.perf_counter()
+
+    def end_cycle(self):
+        """Döngü sonu - saat okumaları, kararlar ve süre ile segmenti kapat"""
+        duration_ms = (time.perf_counter() - self.cycle_start) * 1000
+        self.cycle += 1
+        self.stats['cycles'] += 1
+        self._end_segment('cycle', duration_ms)
+        self.file.flush()
+
+    def _end_segment(self, kind, duration_ms):
+        """Segmenti tek kayıt olarak yaz"""
+        self._write(('segment', kind, self.cycle, self.calls, self.sources,
+                     np.array(self.clock_values, dtype=np.float64), list(self.decisions), duration_ms))
+        self.calls = []
+        self.sources = []
+        self.clock_values.clear()
+        self.decisions.clear()
+
+    def _write(self, frame):
+        """Kaydı dosyaya ekle (büyük kayıtlar sıkıştırılır)"""
+        payload = _dumps(frame)
+        raw_size = len(payload)
+        flags = 0
+        if raw_size >= COMPRESS_MIN_BYTES:
+            payload = zlib.compress(payload, 1)
+            flags = 1
+
+        with self.lock:
+            self.file.write(FRAME_HEADER.pack(len(payload), zlib.crc32(payload), flags) + payload)
+            self.stats['frames'] += 1
+            self.stats['bytes'] += FRAME_HEADER.size + len(payload)
+            self.stats['raw_bytes'] += raw_size
+
+    def close(self):
+        """Kaydı durdur, modülleri ve bot metodlarını geri al"""
+        if self.file is None:
+            return
+
+        # Son döngüden sonraki çağrılar (ör. bot.stop()) kapanış segmentine yazılır
+        if not self.setup_done:
+            self._end_segment('setup', 0.0)
+            self.setup_done = True
+        self._end_segment('shutdown', 0.0)
+
+        if self.restore_modules:
+            self.restore_modules()
+            self.restore_modules = None
+        _unwrap_attributes(self.wrapped)
+        self.thread_id = None
+
+        with self.lock:
+            self.file.close()
+            self.file = None
+
+        stats = self.stats
+        print(f"📼 Oturum kaydı kapatıldı: {stats['cycles']} döngü, {stats['calls']} çağrı "
+              f"({stats['same']} aynı, {stats['delta']} fark), {stats['bytes'] / 1024:.1f} KB "
+              f"(ham {stats['raw_bytes'] / 1024:.1f} KB)")
+
+
+def read_frames(path):
+    """Kayıtları sırayla oku - yarım / bozuk kayıtta durur"""
+    with open(path, 'rb') as f:
+        if f.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+            raise ValueError(f"Oturum kaydı değil: {path}")
+
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+
+            length, checksum, flags = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                print(f"⚠️ Oturum kaydı yarım kayıtta bitti: {path}")
+                return
+
+            yield _loads(zlib.decompress(payload) if flags & 1 else payload)
+
+
+class ReplayTerminal:
+    """Kaydedilmiş MT5 çağrı sonuçlarını döngü döngü geri veren terminal"""
+
+    def __init__(self, constants):
+        self.__dict__.update(constants)
+        self.__dict__['calls'] = {}
+        self.__dict__['last'] = {}
+        self.__dict__['stats'] = {'calls': 0, 'exact': 0, 'reordered': 0, 'missing': 0}
+
+    def load(self, calls):
+        """Segmentin çağrılarını yükle: {isim: deque[(argüman anahtarı, sonuç)]}"""
+        self.__dict__['calls'] = calls
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            return self._next(name, _call_key(name, args, kwargs))
+
+        self.__dict__[name] = replayed
+        return replayed
+
+    def _next(self, name, key):
+        """Aynı argümanlı kayıt, yoksa sıradaki aynı isimli kayıt, o da yoksa son sonuç"""
+        stats = self.stats
+        stats['calls'] += 1
+        queue = self.calls.get(name)
+
+        if queue:
+            for index, (recorded_key, result) in enumerate(queue):
+                if recorded_key == key:
+                    del queue[index]
+                    stats['exact'] += 1
+                    break
+            else:
+                recorded_key, result = queue.popleft()
+                stats['reordered'] += 1
+            self.last[name] = result
+            return result
+
+        # Yeni kod sürümü kayıtta olmayan bir çağrı yaptı
+        stats['missing'] += 1
+        return self.last.get(name)
+
+
+class _ReplayClock:
+    """Segmentin kaydedilmiş saat okumalarını sırayla verir, bitince sonuncuda kalır"""
+
+    def __init__(self, epoch):
+        self.values = deque()
+        self.last = epoch
+
+    def load(self, values):
+        self.values = deque(values.tolist())
+
+    def time(self):
+        if self.values:
+            self.last = self.values.popleft()
+        return self.last
+
+    def now(self):
+        return _datetime.fromtimestamp(self.time())
+
+
+class SessionReplayer:
+    """Kaydedilmiş oturumu yeni bir bota bekleme olmadan geri besler"""
+
+    def __init__(self, path):
+        """SessionReplayer'ı başlat"""
+        self.path = path
+        self.sources = {}
+
+    def _segments(self, frames):
+        """Segment kayıtlarını çöz (kurulum + döngüler + kapanış)"""
+        codec = _ResultCodec()
+        keys = []
+
+        for frame in frames:
+            if frame[0] != 'segment':
+                continue
+            _, kind, index, recorded_calls, recorded_sources, clock_values, decisions, duration_ms = frame
+
+            calls = {}
+            for reference, mode, data in recorded_calls:
+                if isinstance(reference, tuple):
+                    keys.append(reference)
+                    key = reference
+                else:
+                    key = keys[reference]
+                calls.setdefault(key[0], deque()).append((key[1], codec.decode(key, mode, data)))
+
+            sources = {}
+            for channel, blob in recorded_sources:
+                sources.setdefault(channel, deque()).append(_decode(_loads(blob)))
+
+            yield {'kind': kind, 'index': index, 'calls': calls, 'sources': sources,
+                   'clock': clock_values, 'decisions': decisions, 'duration_ms': duration_ms}
+
+    def _create_bot(self, header, work_dir):
+        """Kayıttaki modda bot kur - canlı dosyalara dokunmaz"""
+        from bot_core.trading_bot import AITradingBot
+        from trading_engine.trade_journal import TradeJournal
+        from trading_engine.pnl_ledger import DailyPnLLedger
+        from trading_engine.circuit_breaker import CircuitBreaker
+        from ai_engine.feature_store import FeatureStore
+        from ai_engine.ml_predictor import MLPredictor
+
+        bot = AITradingBot(simulation_mode=header['simulation_mode'])
+
+        bot.trade_journal = TradeJournal(os.path.join(work_dir, 'trade_journal.bin'))
+        if bot.order_executor.journal is not None:
+            bot.order_executor.journal = bot.trade_journal
+
+        ledger = DailyPnLLedger(ledger_file=None)
+        ledger.cursor_msc = header['pnl_ledger']['cursor_msc']
+        ledger.cursor_tickets = set(header['pnl_ledger']['cursor_tickets'])
+        ledger.days = dict(header['pnl_ledger']['days'])
+        bot.risk_manager.pnl_ledger = ledger
+
+        # Devre kesici kayıt anındaki seri / tetik / zirveden başlar
+        breaker = CircuitBreaker(state_file=None)
+        breaker.load_state(header.get('circuit_breaker'))
+        bot.risk_manager.circuit_breaker = breaker
+        processor = bot.signal_processor
+        if processor.feature_store is not None:
+            processor.feature_store = FeatureStore(store_dir=None, capacity=1024)
+        if processor.ml_predictor is not None:
+            # Model kayıt anındaki durumdan, store etiket için gereken son satırlardan başlar
+            ml = header.get('ml')
+            processor.ml_predictor = MLPredictor(processor.feature_store, model_file=None) if not ml else MLPredictor(
+                processor.feature_store, model_file=None, min_updates=ml['min_updates'], per_symbol=ml['per_symbol'])
+            if ml:
+                processor.ml_predictor.load_state(ml['model'])
+                for symbol, (bar_time, close, vector) in ml['tail'].items():
+                    processor.feature_store.append(symbol, bar_time, vector, close)
+
+        # Takvim sadece kayıttan gelir - feed / dosya okunmaz
+        bot.economic_calendar.feed_url = ''
+        bot.economic_calendar.calendar_file = None
+        return bot
+
+    def _setup(self, bot, header):
+        """start() ile aynı oturum kurulumu (Telegram / dashboard hariç)"""
+        from data_manager.mt5_connector import MT5Connector
+
+        bot.mt5_connector = MT5Connector()
+        bot.mt5_connector.connect()
+        bot.order_executor.attach_session(bot.mt5_connector)
+        if not header['simulation_mode']:
+            bot._restore_from_journal()
+        bot.running = True
+
+    def _wrap_source(self, owner, method, channel, wrapped):
+        """Dış girdi metodu kayıttan döner (kayıtta yoksa gerçek metod)"""
+        original = getattr(owner, method)
+
+        def replayed(*args, **kwargs):
+            queue = self.sources.get(channel)
+            return queue.popleft() if queue else original(*args, **kwargs)
+
+        _wrap_attribute(owner, method, replayed, wrapped)
+
+    def run(self, bot_factory=None, verbose=False, profile=False):
+        """Oturumu oynat, kararları kayıtla karşılaştır
+
+        bot_factory: (header, work_dir) -> bot - verilmezse kayıttaki modda yeni bot
+        profile: True ise döngüler cProfile altında çalışır
+        """
+        start = time.perf_counter()
+        frames = read_frames(self.path)
+        kind, header = next(frames)
+
+        terminal = ReplayTerminal(header['constants'])
+        clock = _ReplayClock(header['started'])
+        work_dir = tempfile.mkdtemp(prefix='session_replay_')
+        profiler = cProfile.Profile() if profile else None
+        log = io.StringIO() if verbose else open(os.devnull, 'w')
+
+        replay_latency = LatencyHistogram()
+        recorded_latency = LatencyHistogram()
+        mismatches = []
+        cycles = 0
+        decisions = 0
+        recorded_decisions = 0
+        wrapped = []
+
+        restore_modules = patch_bot_modules(terminal, clock)
+        try:
+            with redirect_stdout(log):
+                bot = (bot_factory or self._create_bot)(header, work_dir)
+                if header['paper_seed'] is not None and hasattr(bot.order_executor, 'rng'):
+                    bot.order_executor.rng = np.random.default_rng(header['paper_seed'])
+
+                for channel, (path, method) in INPUT_SOURCES.items():
+                    self._wrap_source(_resolve(bot, path), method, channel, wrapped)
+                made = []
+                _wrap_decisions(bot, made, wrapped)
+
+                for segment in self._segments(frames):
+                    terminal.load(segment['calls'])
+                    clock.load(segment['clock'])
+                    self.sources = segment['sources']
+                    made.clear()
+
+                    if segment['kind'] == 'setup':
+                        self._setup(bot, header)
+                        continue
+
+                    if segment['kind'] == 'shutdown':
+                        # Kapanış çağrıları kayıttaki segmentle birlikte oynatılır
+                        if bot.running:
+                            bot.stop()
+                        if made != segment['decisions']:
+                            mismatches.append({'cycle': 'shutdown', 'recorded': segment['decisions'],
+                                               'replayed': list(made)})
+                        continue
+
+                    cycle_start = time.perf_counter()
+                    if profiler:
+                        profiler.enable()
+                    bot._run_cycle()
+                    if profiler:
+                        profiler.disable()
+
+                    replay_latency.record((time.perf_counter() - cycle_start) * 1000)
+                    recorded_latency.record(segment['duration_ms'])
+                    cycles += 1
+                    decisions += len(made)
+                    recorded_decisions += len(segment['decisions'])
+
+                    if made != segment['decisions']:
+                        mismatches.append({'cycle': segment['index'], 'recorded': segment['decisions'],
+                                           'replayed': list(made)})
+
+                if bot.running:
+                    bot.stop()
+        finally:
+            restore_modules()
+            _unwrap_attributes(wrapped)
+            frames.close()
+            if not verbose:
+                log.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        profile_report = None
+        if profiler:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(20)
+            profile_report = stream.getvalue()
+
+        return {
+            'cycles': cycles,
+            'decisions': decisions,
+            'recorded_decisions': recorded_decisions,
+            'mismatches': mismatches,
+            'calls': dict(terminal.stats),
+            'replay_latency': replay_latency,
+            'recorded_latency': recorded_latency,
+            'elapsed_seconds': time.perf_counter() - start,
+            'profile': profile_report,
+            'log': log.getvalue() if verbose else None
+        }
+
+    def print_report(self, result, max_mismatches=5):
+        """Oynatma özetini yazdır"""
+        calls = result['calls']
+        print(f"\n📼 OTURUM OYNATMA SONUCU ({os.path.basename(self.path)})")
+        print("=" * 50)
+        print(f"   Döngü: {result['cycles']} | Karar: {result['decisions']} (kayıtta {result['recorded_decisions']}) | "
+              f"Süre: {result['elapsed_seconds']:.2f} sn")
+        print(f"   MT5 çağrısı: {calls['calls']} (birebir {calls['exact']}, sıra dışı {calls['reordered']}, "
+              f"kayıtta yok {calls['missing']})")
+        print(result['recorded_latency'].format_report("Kayıttaki döngü süresi"))
+        print(result['replay_latency'].format_report("Oynatmadaki döngü süresi"))
+
+        if result['mismatches']:
+            print(f"⚠️ {len(result['mismatches'])} döngüde kararlar kayıttan farklı:")
+            for mismatch in result['mismatches'][:max_mismatches]:
+                print(f"   Döngü {mismatch['cycle']}: kayıt {mismatch['recorded']} -> oynatma {mismatch['replayed']}")
+        else:
+            print("✅ Tüm döngülerde kararlar kayıtla aynı")
+
+        if result['profile']:
+            print(result['profile'])
+
+
+# Test fonksiyonu
+def test_session_recorder():
+    """Simüle terminal üzerinde canlı döngüyü kaydet ve tekrar oynat"""
+    from contextlib import redirect_stdout as redirect
+    from backtesting.simulated_terminal import (
+        SimulatedTerminal, simulated_environment, generate_synthetic_ticks, ticks_to_m1_bars
+    )
+    # __main__ olarak çalışırken paket modülündeki sınıflar kullanılmalı (pickle tipleri)
+    from backtesting.session_recorder import SessionRecorder, SessionReplayer
+    from bot_core.trading_bot import AITradingBot
+    from data_manager.mt5_connector import MT5Connector
+    from trading_engine.trade_journal import TradeJournal
+    from trading_engine.pnl_ledger import DailyPnLLedger
+    from trading_engine.circuit_breaker import CircuitBreaker
+    from ai_engine.feature_store import FeatureStore
+    from ai_engine.ml_predictor import MLPredictor
+
+    print("🧪 SessionRecorder Test Başlıyor...")
+    print("=" * 50)
+
+    symbol = 'EURUSD-T'
+    warmup = generate_synthetic_ticks(symbol, '2024-03-02', hours=48, seed=10, ticks_per_minute=1)
+    ticks = generate_synthetic_ticks(symbol, '2024-03-04', hours=4, seed=3, base_price=warmup['bid'].iloc[-1])
+    terminal = SimulatedTerminal({symbol: ticks}, {symbol: ticks_to_m1_bars(warmup)}, leverage=1000)
+    start_epoch = ticks['time'].iloc[0].timestamp()
+    terminal.advance_to(start_epoch)
+
+    work_dir = tempfile.mkdtemp(prefix='session_test_')
+    path = os.path.join(work_dir, 'session.bin')
+    cycles = 240
+
+    try:
+        log = io.StringIO()
+        record_start = time.perf_counter()
+        with redirect(log):
+            # Bot sanal saatte kurulur (timer wheel vb. kayıt saatiyle tutarlı olsun)
+            with simulated_environment(terminal):
+                bot = AITradingBot(simulation_mode=False)
+            bot.trade_journal = TradeJournal(os.path.join(work_dir, 'trade_journal.bin'))
+            bot.order_executor.journal = bot.trade_journal
+            bot.risk_manager.pnl_ledger = DailyPnLLedger(ledger_file=None)
+            bot.risk_manager.circuit_breaker = CircuitBreaker(state_file=None)
+            bot.signal_processor.feature_store = FeatureStore(store_dir=None, capacity=1024)
+            # ML kısa sürede devreye girsin - kararlar model durumuna bağlıyken de birebir tekrar üretilmeli
+            bot.signal_processor.ml_predictor = MLPredictor(bot.signal_processor.feature_store, model_file=None,
+                                                            min_updates=5)
+            bot.economic_calendar.feed_url = ''
+
+            recorder = SessionRecorder(path, terminal=terminal, clock=terminal.clock)
+            recorder.start(bot)
+
+            bot.mt5_connector = MT5Connector()
+            bot.mt5_connector.connect()
+            bot.order_executor.attach_session(bot.mt5_connector)
+            bot._restore_from_journal()
+            bot.running = True
+
+            for cycle in range(cycles):
+                terminal.advance_to(start_epoch + 60 * (cycle + 1))
+                bot._run_cycle()
+
+            bot.stop()
+            recorder.close()
+
+        record_seconds = time.perf_counter() - record_start
+        stats = recorder.stats
+        print(f"   Kayıt: {stats['cycles']} döngü, {stats['calls']} çağrı ({stats['same']} aynı, {stats['delta']} fark), "
+              f"{os.path.getsize(path) / 1024:.1f} KB (ham {stats['raw_bytes'] / 1024:.1f} KB) - {record_seconds:.2f} sn")
+        print(f"   Terminal emirleri: {terminal.stats}")
+
+        replayer = SessionReplayer(path)
+        result = replayer.run()
+        replayer.print_report(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # python backtesting/session_recorder.py data/sessions/session_xxx.bin [--profile]
+        from backtesting.session_recorder import SessionReplayer as PackageReplayer
+        session_replayer = PackageReplayer(sys.argv[1])
+        session_replayer.print_report(session_replayer.run(profile='--profile' in sys.argv))
+    else:
+        test_session_recorder()
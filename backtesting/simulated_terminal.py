@@ -0,0 +1,947 @@
+# backtesting/simulated_terminal.py
+"""
+AI Trading Bot - Simüle MT5 Terminali ve Sanal Saat
+Kaydedilmiş tick'ler üzerinde MetaTrader5 modülünün botun kullandığı API'sini
+(hesap, sembol, tick, bar, emir, pozisyon ve deal geçmişi) taklit eder. Barlar
+tick'lerden kurulur; oluşmakta olan bar sadece o ana kadar gelen tick'leri
+içerir (ileriye bakış yok). SL/TP, döngüler arasındaki tick'ler üzerinde
+tetiklendiği tick'in fiyatından doldurulur.
+
+simulated_environment() bot modüllerindeki mt5 / datetime / date / time
+referanslarını bu terminal ve sanal saatle değiştirir; çıkışta geri alır.
+Canlı kod değişmez, sadece backtest süresince yönlendirilir.
+"""
+
+import fnmatch
+import importlib
+import time as _time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime as _datetime, date as _date
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    TRADING_SYMBOLS, BACKTEST_INITIAL_BALANCE, BACKTEST_COMMISSION_PER_LOT, BACKTEST_LEVERAGE
+)
+from utils.helpers import get_symbol_config, get_symbol_currencies
+
+# MT5'in döndürdüğü yapılar (aynı alan adlarıyla)
+AccountInfo = namedtuple('AccountInfo', [
+    'login', 'balance', 'equity', 'margin', 'margin_free', 'margin_level', 'profit',
+    'server', 'currency', 'leverage', 'trade_allowed', 'name', 'company'
+])
+TerminalInfo = namedtuple('TerminalInfo', ['connected', 'trade_allowed', 'name', 'company', 'path'])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'visible', 'select', 'time', 'digits', 'spread', 'point', 'bid', 'ask', 'last',
+    'volume_min', 'volume_max', 'volume_step', 'trade_tick_value', 'trade_tick_size',
+    'trade_contract_size', 'trade_stops_level', 'currency_base', 'currency_profit', 'currency_margin'
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc', 'flags', 'volume_real'])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'time', 'time_msc', 'time_update', 'time_update_msc', 'type', 'magic', 'identifier',
+    'reason', 'volume', 'price_open', 'sl', 'tp', 'price_current', 'swap', 'profit', 'commission',
+    'symbol', 'comment', 'external_id'
+])
+TradeOrder = namedtuple('TradeOrder', [
+    'ticket', 'time_setup', 'time_setup_msc', 'time_done', 'time_done_msc', 'type', 'type_time',
+    'type_filling', 'state', 'magic', 'position_id', 'reason', 'volume_initial', 'volume_current',
+    'price_open', 'sl', 'tp', 'price_current', 'symbol', 'comment', 'external_id'
+])
+TradeDeal = namedtuple('TradeDeal', [
+    'ticket', 'order', 'time', 'time_msc', 'type', 'entry', 'magic', 'position_id', 'reason',
+    'volume', 'price', 'commission', 'swap', 'profit', 'fee', 'symbol', 'comment', 'external_id'
+])
+OrderSendResult = namedtuple('OrderSendResult', [
+    'retcode', 'deal', 'order', 'volume', 'price', 'bid', 'ask', 'comment', 'request_id',
+    'retcode_external', 'request'
+])
+
+# copy_rates_* dönüş formatı
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+# Simülasyonda yönlendirilen modüller
+PATCHED_MODULES = [
+    'bot_core.trading_bot',
+    'bot_core.signal_processor',
+    'ai_engine.multi_timeframe_analyzer',
+    'ai_engine.news_analyzer',
+    'ai_engine.scalping_analyzer',
+    'data_manager.mt5_connector',
+    'data_manager.economic_calendar',
+    'trading_engine.order_executor',
+    'trading_engine.paper_broker',
+    'trading_engine.risk_manager',
+    'trading_engine.risk_state',
+    'trading_engine.circuit_breaker',
+    'trading_engine.pnl_ledger',
+    'trading_engine.position_manager',
+    'trading_engine.trade_journal'
+]
+
+# Arka plan thread'i gerçek sleep'e ihtiyaç duyan modüller - time değiştirilmez
+REAL_TIME_MODULES = {'trading_engine.trade_journal'}
+
+
+class VirtualClock:
+    """Backtest'in sanal saati (epoch saniye)"""
+
+    def __init__(self, epoch=0.0):
+        """VirtualClock'u başlat"""
+        self.epoch = float(epoch)
+
+    def set(self, epoch):
+        """Saati verilen ana ayarla (geri gitmez)"""
+        self.epoch = max(self.epoch, float(epoch))
+
+    def advance(self, seconds):
+        """Saati ilerlet"""
+        self.epoch += seconds
+
+    def time(self):
+        """time.time() karşılığı"""
+        return self.epoch
+
+    def now(self):
+        """datetime.now() karşılığı"""
+        return _datetime.fromtimestamp(self.epoch)
+
+
+def create_virtual_time_types(clock, real_sleep=False):
+    """Sanal saate bağlı datetime / date sınıfları ve time modülü yerine geçen nesne
+
+    real_sleep: True ise sleep gerçekten bekler (canlı oturum kaydı)
+    """
+
+    class _DateTimeMeta(type):
+        # Modüldeki isinstance(x, datetime) kontrolleri gerçek datetime'ları da kabul etsin
+        def __instancecheck__(cls, instance):
+            return isinstance(instance, _datetime)
+
+    class _DateMeta(type):
+        def __instancecheck__(cls, instance):
+            return isinstance(instance, _date)
+
+    class VirtualDateTime(_datetime, metaclass=_DateTimeMeta):
+        """datetime.now() sanal saati döndürür"""
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromtimestamp(clock.time(), tz)
+
+        @classmethod
+        def today(cls):
+            return cls.fromtimestamp(clock.time())
+
+    class VirtualDate(_date, metaclass=_DateMeta):
+        """date.today() sanal günü döndürür"""
+
+        @classmethod
+        def today(cls):
+            return clock.now().date()
+
+    class VirtualTime:
+        """time modülü: time/monotonic sanal, sleep (real_sleep değilse) beklemez, diğerleri gerçek"""
+
+        def __getattr__(self, name):
+            return getattr(_time, name)
+
+        def time(self):
+            return clock.time()
+
+        def monotonic(self):
+            return clock.time()
+
+        def sleep(self, seconds):
+            if real_sleep:
+                _time.sleep(seconds)
+
+    return VirtualDateTime, VirtualDate, VirtualTime()
+
+
+class SimulatedTerminal:
+    """Tick verisi üzerinde MetaTrader5 API'si"""
+
+    # Emir sonuç kodları
+    TRADE_RETCODE_REQUOTE = 10004
+    TRADE_RETCODE_REJECT = 10006
+    TRADE_RETCODE_CANCEL = 10007
+    TRADE_RETCODE_PLACED = 10008
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_DONE_PARTIAL = 10010
+    TRADE_RETCODE_ERROR = 10011
+    TRADE_RETCODE_TIMEOUT = 10012
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_INVALID_VOLUME = 10014
+    TRADE_RETCODE_INVALID_PRICE = 10015
+    TRADE_RETCODE_INVALID_STOPS = 10016
+    TRADE_RETCODE_TRADE_DISABLED = 10017
+    TRADE_RETCODE_MARKET_CLOSED = 10018
+    TRADE_RETCODE_NO_MONEY = 10019
+    TRADE_RETCODE_PRICE_CHANGED = 10020
+    TRADE_RETCODE_PRICE_OFF = 10021
+    TRADE_RETCODE_INVALID_EXPIRATION = 10022
+    TRADE_RETCODE_CONNECTION = 10031
+
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_SLTP = 6
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+    ORDER_STATE_PARTIAL = 3
+    ORDER_STATE_FILLED = 4
+    ORDER_STATE_REJECTED = 5
+
+    DEAL_TYPE_BUY = 0
+    DEAL_TYPE_SELL = 1
+    DEAL_ENTRY_IN = 0
+    DEAL_ENTRY_OUT = 1
+    DEAL_ENTRY_INOUT = 2
+    DEAL_ENTRY_OUT_BY = 3
+    DEAL_REASON_EXPERT = 3
+    DEAL_REASON_SL = 4
+    DEAL_REASON_TP = 5
+
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+
+    # MT5 timeframe sabiti -> dakika
+    TIMEFRAME_MINUTES = {1: 1, 5: 5, 15: 15, 30: 30, 16385: 60, 16388: 240, 16408: 1440}
+
+    def __init__(self, ticks, history=None, initial_balance=BACKTEST_INITIAL_BALANCE,
+                 commission_per_lot=BACKTEST_COMMISSION_PER_LOT, leverage=BACKTEST_LEVERAGE,
+                 symbol_specs=None, clock=None):
+        """SimulatedTerminal'ı başlat
+
+        ticks: {broker sembolü: DataFrame(time, bid, ask)}
+        history: {broker sembolü: tick'lerden önceki M1 barları (time, open, high, low, close[, tick_volume, spread])}
+        commission_per_lot: lot başına gidiş-dönüş komisyon (her deal'de yarısı)
+        """
+        self.clock = clock or VirtualClock()
+        self.balance = float(initial_balance)
+        self.commission_per_lot = commission_per_lot
+        self.leverage = leverage
+        self.initialized = False
+        self.error = (1, 'Success')
+
+        self.positions = {}
+        self.history_orders = []
+        self.deals = []
+        self.next_ticket = 1000000
+        self.stats = {'order_send': 0, 'rejected': 0, 'sl_hits': 0, 'tp_hits': 0, 'rates_calls': 0}
+
+        self.symbols = {}
+        history = history or {}
+        for symbol, symbol_ticks in ticks.items():
+            spec = dict(self._default_spec(symbol), **((symbol_specs or {}).get(symbol, {})))
+            self.symbols[symbol] = self._load_symbol(symbol, spec, symbol_ticks, history.get(symbol))
+
+        first_tick = min(state['time_msc'][0] for state in self.symbols.values())
+        self.clock.set(first_tick / 1000 - 1)
+
+        print(f"🖥️ SimulatedTerminal başlatıldı: {len(self.symbols)} sembol, "
+              f"{sum(len(state['bid']) for state in self.symbols.values())} tick")
+
+    # =========================================================================
+    # Veri hazırlığı
+    # =========================================================================
+
+    def _default_spec(self, symbol):
+        """Config'teki sembol ayarlarından kontrat bilgisi"""
+        config = get_symbol_config(symbol) or {}
+        point = config.get('point_value', 0.00001)
+        contract_size = config.get('contract_size', 100000)
+        currencies = get_symbol_currencies(symbol)
+
+        return {
+            'point': point,
+            'digits': max(0, -int(np.floor(np.log10(point)))) if point < 1 else 0,
+            'contract_size': contract_size,
+            'tick_size': point,
+            'tick_value': point * contract_size,
+            'volume_min': config.get('min_lot', 0.01),
+            'volume_max': config.get('max_lot', 100.0),
+            'volume_step': 0.01,
+            'stops_level': 0,
+            'currency_base': currencies[0],
+            'currency_profit': currencies[1] if len(currencies) > 1 else 'USD'
+        }
+
+    def _load_symbol(self, symbol, spec, ticks, history):
+        """Tick'leri dizilere çevir ve M1 barlarını kur"""
+        data = ticks.set_index('time') if 'time' in ticks.columns else ticks
+        data = data.sort_index()
+        if not len(data):
+            raise ValueError(f"{symbol} için tick verisi yok")
+
+        time_msc = pd.DatetimeIndex(data.index).values.astype('datetime64[ms]').astype(np.int64)
+        bid = data['bid'].to_numpy(dtype=np.float64)
+        ask = data['ask'].to_numpy(dtype=np.float64)
+        count = len(bid)
+
+        # Tick'lerden M1 barları (fiyatlar bid)
+        minute = time_msc // 60000
+        starts = np.r_[True, minute[1:] != minute[:-1]]
+        tick_bar = np.cumsum(starts) - 1
+        first = np.flatnonzero(starts)
+        last = np.r_[first[1:] - 1, count - 1]
+        tick_volume = np.diff(np.r_[first, count])
+        spread_points = np.rint(np.add.reduceat(ask - bid, first) / tick_volume / spec['point'])
+
+        tick_bars = {
+            'minute': minute[first],
+            'open': bid[first],
+            'high': np.maximum.reduceat(bid, first),
+            'low': np.minimum.reduceat(bid, first),
+            'close': bid[last],
+            'tick_volume': tick_volume,
+            'spread': spread_points
+        }
+
+        # Oluşan bar: dakika içindeki tick'e kadar high / low / tick sayısı
+        grouped = pd.Series(bid).groupby(tick_bar)
+        running_high = grouped.cummax().to_numpy()
+        running_low = grouped.cummin().to_numpy()
+        running_count = np.arange(count) - first[tick_bar] + 1
+
+        # Tick'lerden önceki geçmiş barlar
+        if history is not None and len(history):
+            bars = history.set_index('time') if 'time' in history.columns else history
+            bars = bars.sort_index()
+            history_minute = pd.DatetimeIndex(bars.index).values.astype('datetime64[m]').astype(np.int64)
+            keep = history_minute < minute[0]
+            bars = bars[keep]
+            history_bars = {
+                'minute': history_minute[keep],
+                'open': bars['open'].to_numpy(dtype=np.float64),
+                'high': bars['high'].to_numpy(dtype=np.float64),
+                'low': bars['low'].to_numpy(dtype=np.float64),
+                'close': bars['close'].to_numpy(dtype=np.float64),
+                'tick_volume': (bars['tick_volume'].to_numpy() if 'tick_volume' in bars.columns
+                                else np.ones(len(bars))),
+                'spread': (bars['spread'].to_numpy() if 'spread' in bars.columns
+                           else np.full(len(bars), np.median(spread_points)))
+            }
+        else:
+            history_bars = {key: np.zeros(0) for key in tick_bars}
+
+        m1 = {key: np.r_[history_bars[key], tick_bars[key]] for key in tick_bars}
+        m1['minute'] = m1['minute'].astype(np.int64)
+
+        return {
+            'symbol': symbol,
+            'spec': spec,
+            'time_msc': time_msc,
+            'bid': bid,
+            'ask': ask,
+            'pointer': 0,
+            'tick_bar': tick_bar + len(history_bars['minute']),
+            'running_high': running_high,
+            'running_low': running_low,
+            'running_count': running_count,
+            'history_count': len(history_bars['minute']),
+            'm1': m1,
+            'timeframes': {}
+        }
+
+    def _timeframe_bars(self, state, minutes):
+        """M1 barlarından timeframe barları ve bar içi (hariç) prefix high/low/volume"""
+        bars = state['timeframes'].get(minutes)
+        if bars is not None:
+            return bars
+
+        m1 = state['m1']
+        bucket = m1['minute'] // minutes
+        starts = np.r_[True, bucket[1:] != bucket[:-1]]
+        ordinal = np.cumsum(starts) - 1
+        first = np.flatnonzero(starts)
+        last = np.r_[first[1:] - 1, len(bucket) - 1]
+
+        high = pd.Series(m1['high']).groupby(ordinal)
+        low = pd.Series(m1['low']).groupby(ordinal)
+        volume = pd.Series(m1['tick_volume']).groupby(ordinal)
+
+        bars = {
+            'time': bucket[first] * minutes * 60,
+            'open': m1['open'][first],
+            'high': np.maximum.reduceat(m1['high'], first),
+            'low': np.minimum.reduceat(m1['low'], first),
+            'close': m1['close'][last],
+            'tick_volume': np.add.reduceat(m1['tick_volume'], first),
+            'spread': m1['spread'][last],
+            'ordinal': ordinal,
+            # M1 barından önceki (aynı timeframe barındaki) M1 barlarının high/low/volume'u
+            'prefix_high': np.where(starts, -np.inf, np.r_[-np.inf, high.cummax().to_numpy()[:-1]]),
+            'prefix_low': np.where(starts, np.inf, np.r_[np.inf, low.cummin().to_numpy()[:-1]]),
+            'prefix_volume': volume.cumsum().to_numpy() - m1['tick_volume']
+        }
+        state['timeframes'][minutes] = bars
+        return bars
+
+    def _current_bar(self, state):
+        """O anki M1 barının indeksi ve o ana kadarki (high, low, close, tick sayısı)"""
+        pointer = state['pointer']
+        if pointer > 0:
+            i = pointer - 1
+            return state['tick_bar'][i], (
+                state['running_high'][i], state['running_low'][i], state['bid'][i], state['running_count'][i]
+            )
+
+        k = state['history_count'] - 1
+        if k < 0:
+            return -1, None
+        m1 = state['m1']
+        return k, (m1['high'][k], m1['low'][k], m1['close'][k], m1['tick_volume'][k])
+
+    # =========================================================================
+    # Zaman
+    # =========================================================================
+
+    def advance_to(self, epoch):
+        """Sanal saati ilerlet, aradaki tick'lerde SL/TP tetiklenen pozisyonları kapat"""
+        self.clock.set(epoch)
+        epoch_msc = int(round(self.clock.time() * 1000))
+
+        for symbol, state in self.symbols.items():
+            pointer = int(np.searchsorted(state['time_msc'], epoch_msc, side='right'))
+            if pointer > state['pointer']:
+                self._check_stops(symbol, state, state['pointer'], pointer)
+                state['pointer'] = pointer
+
+    def _check_stops(self, symbol, state, begin, end):
+        """[begin, end) tick'lerinde her pozisyon için ilk SL/TP tetiklenmesi (pozisyon x tick matrisi)"""
+        positions = [position for position in self.positions.values()
+                     if position['symbol'] == symbol and (position['sl'] or position['tp'])]
+        if not positions:
+            return
+
+        is_buy = np.array([position['type'] == self.ORDER_TYPE_BUY for position in positions])[:, None]
+        stop_loss = np.array([position['sl'] for position in positions])[:, None]
+        take_profit = np.array([position['tp'] for position in positions])[:, None]
+
+        # BUY bid'den, SELL ask'ten kapanır
+        price = np.where(is_buy, state['bid'][begin:end], state['ask'][begin:end])
+        hit_sl = (stop_loss > 0) & np.where(is_buy, price <= stop_loss, price >= stop_loss)
+        hit_tp = (take_profit > 0) & np.where(is_buy, price >= take_profit, price <= take_profit)
+        hit = hit_sl | hit_tp
+
+        triggered = np.flatnonzero(hit.any(axis=1))
+        first_hit = hit.argmax(axis=1)
+
+        for row in sorted(triggered, key=lambda row: first_hit[row]):
+            column = first_hit[row]
+            reason = self.DEAL_REASON_SL if hit_sl[row, column] else self.DEAL_REASON_TP
+            self.stats['sl_hits' if reason == self.DEAL_REASON_SL else 'tp_hits'] += 1
+
+            position = positions[row]
+            self._close_volume(position, position['volume'], price[row, column],
+                               int(state['time_msc'][begin + column]), reason,
+                               'sl' if reason == self.DEAL_REASON_SL else 'tp')
+
+    # =========================================================================
+    # Oturum / hesap
+    # =========================================================================
+
+    def initialize(self, *args, **kwargs):
+        self.initialized = True
+        return True
+
+    def login(self, login=None, password=None, server=None, timeout=None):
+        return self.initialized
+
+    def shutdown(self):
+        # Analizörler her çağrıda bağlanıp kapatır - simülasyon durumu korunur
+        return True
+
+    def last_error(self):
+        return self.error
+
+    def terminal_info(self):
+        if not self.initialized:
+            return None
+        return TerminalInfo(True, True, 'SimulatedTerminal', 'Backtest', '')
+
+    def account_info(self):
+        if not self.initialized:
+            return None
+
+        profit = sum(self._position_profit(position) for position in self.positions.values())
+        margin = sum(position['margin'] for position in self.positions.values())
+        equity = self.balance + profit
+        return AccountInfo(
+            login=1, balance=round(self.balance, 2), equity=round(equity, 2), margin=round(margin, 2),
+            margin_free=round(equity - margin, 2), margin_level=equity / margin * 100 if margin else 0.0,
+            profit=round(profit, 2), server='Backtest', currency='USD', leverage=self.leverage,
+            trade_allowed=True, name='Backtest', company='Backtest'
+        )
+
+    # =========================================================================
+    # Sembol / fiyat
+    # =========================================================================
+
+    def symbols_get(self, group=None):
+        return tuple(self.symbol_info(symbol) for symbol in self.symbols
+                     if group is None or fnmatch.fnmatch(symbol, group))
+
+    def symbol_select(self, symbol, enable=True):
+        return symbol in self.symbols
+
+    def symbol_info(self, symbol):
+        state = self.symbols.get(symbol)
+        if state is None:
+            return None
+
+        spec = state['spec']
+        tick = self.symbol_info_tick(symbol)
+        bid, ask, tick_time = (tick.bid, tick.ask, tick.time) if tick else (0.0, 0.0, int(self.clock.time()))
+        return SymbolInfo(
+            name=symbol, visible=True, select=True, time=tick_time, digits=spec['digits'],
+            spread=int(round((ask - bid) / spec['point'])), point=spec['point'], bid=bid, ask=ask, last=0.0,
+            volume_min=spec['volume_min'], volume_max=spec['volume_max'], volume_step=spec['volume_step'],
+            trade_tick_value=spec['tick_value'], trade_tick_size=spec['tick_size'],
+            trade_contract_size=spec['contract_size'], trade_stops_level=spec['stops_level'],
+            currency_base=spec['currency_base'], currency_profit=spec['currency_profit'],
+            currency_margin=spec['currency_base']
+        )
+
+    def symbol_info_tick(self, symbol):
+        state = self.symbols.get(symbol)
+        if state is None or state['pointer'] == 0:
+            return None
+
+        i = state['pointer'] - 1
+        time_msc = int(state['time_msc'][i])
+        return Tick(time_msc // 1000, state['bid'][i], state['ask'][i], 0.0, 0, time_msc, 6, 0.0)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        """Son count bar (oluşan bar dahil) - MT5 rates dizisi"""
+        state = self.symbols.get(symbol)
+        minutes = self.TIMEFRAME_MINUTES.get(timeframe)
+        if state is None or minutes is None:
+            self.error = (-2, 'Invalid params')
+            return None
+
+        self.stats['rates_calls'] += 1
+        current, partial = self._current_bar(state)
+        if current < 0:
+            return None
+
+        bars = self._timeframe_bars(state, minutes)
+        end = bars['ordinal'][current] + 1 - start_pos
+        begin = max(0, end - count)
+        if end <= 0:
+            return None
+
+        rates = np.empty(end - begin, dtype=RATES_DTYPE)
+        for field in ('time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread'):
+            rates[field] = bars[field][begin:end]
+        rates['real_volume'] = 0
+
+        # Oluşan bar sadece o ana kadarki tick'lerden
+        if start_pos == 0:
+            high, low, close, volume = partial
+            rates['high'][-1] = max(bars['prefix_high'][current], high)
+            rates['low'][-1] = min(bars['prefix_low'][current], low)
+            rates['close'][-1] = close
+            rates['tick_volume'][-1] = bars['prefix_volume'][current] + volume
+            rates['spread'][-1] = state['m1']['spread'][current]
+
+        return rates
+
+    def order_calc_margin(self, action, symbol, volume, price):
+        state = self.symbols.get(symbol)
+        if state is None:
+            return None
+        return self._margin(state['spec'], volume, price)
+
+    def _margin(self, spec, volume, price):
+        """Gereken margin (hesap para birimi USD)"""
+        notional = volume * spec['contract_size']
+        if spec['currency_base'] == 'USD':
+            return notional / self.leverage
+        return notional * price / self.leverage
+
+    # =========================================================================
+    # Emirler
+    # =========================================================================
+
+    def order_send(self, request):
+        """TRADE_ACTION_DEAL (açma / kapatma) ve TRADE_ACTION_SLTP"""
+        self.stats['order_send'] += 1
+        action = request.get('action')
+        symbol = request.get('symbol')
+        state = self.symbols.get(symbol)
+        tick = self.symbol_info_tick(symbol) if state else None
+
+        if state is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, comment='Unknown symbol')
+        if tick is None:
+            return self._result(request, self.TRADE_RETCODE_MARKET_CLOSED, comment='Market closed')
+
+        if action == self.TRADE_ACTION_SLTP:
+            return self._modify(request, state, tick)
+        if action != self.TRADE_ACTION_DEAL:
+            return self._result(request, self.TRADE_RETCODE_INVALID, tick=tick, comment='Unsupported action')
+
+        spec = state['spec']
+        volume = float(request.get('volume') or 0.0)
+        steps = volume / spec['volume_step']
+        if (volume < spec['volume_min'] - 1e-9 or volume > spec['volume_max'] + 1e-9
+                or abs(steps - round(steps)) > 1e-6):
+            return self._result(request, self.TRADE_RETCODE_INVALID_VOLUME, tick=tick, comment='Invalid volume')
+
+        order_type = request.get('type')
+        fill_price = tick.ask if order_type == self.ORDER_TYPE_BUY else tick.bid
+
+        # İstenen fiyattan sapma deviation'ı aşarsa requote
+        requested = request.get('price')
+        deviation = request.get('deviation', 0) * spec['point']
+        if requested and abs(fill_price - requested) > deviation + 1e-12:
+            return self._result(request, self.TRADE_RETCODE_REQUOTE, tick=tick, comment='Requote')
+
+        if request.get('position'):
+            return self._close_request(request, tick, volume, fill_price)
+        return self._open_request(request, state, tick, volume, fill_price)
+
+    def _open_request(self, request, state, tick, volume, fill_price):
+        """Yeni pozisyon aç"""
+        spec = state['spec']
+        order_type = request.get('type')
+        stop_loss = request.get('sl') or 0.0
+        take_profit = request.get('tp') or 0.0
+
+        if not self._stops_valid(order_type, spec, tick, stop_loss, take_profit):
+            return self._result(request, self.TRADE_RETCODE_INVALID_STOPS, tick=tick, comment='Invalid stops')
+
+        margin = self._margin(spec, volume, fill_price)
+        if margin > self.account_info().margin_free:
+            return self._result(request, self.TRADE_RETCODE_NO_MONEY, tick=tick, comment='No money')
+
+        ticket = self._new_ticket()
+        time_msc = int(round(self.clock.time() * 1000))
+        commission = -volume * self.commission_per_lot / 2
+
+        self.positions[ticket] = {
+            'ticket': ticket,
+            'symbol': request['symbol'],
+            'type': order_type,
+            'volume': volume,
+            'price_open': fill_price,
+            'sl': stop_loss,
+            'tp': take_profit,
+            'magic': request.get('magic', 0),
+            'comment': request.get('comment', ''),
+            'time_msc': time_msc,
+            'commission': commission,
+            'margin': margin
+        }
+        self.balance += commission
+
+        self._add_order(ticket, request, order_type, volume, fill_price, ticket, time_msc)
+        deal = self._add_deal(ticket, order_type, self.DEAL_ENTRY_IN, self.DEAL_REASON_EXPERT, volume,
+                              fill_price, commission, 0.0, ticket, request, time_msc)
+        return self._result(request, self.TRADE_RETCODE_DONE, tick=tick, deal=deal, order=ticket,
+                            volume=volume, price=fill_price, comment='Request executed')
+
+    def _close_request(self, request, tick, volume, fill_price):
+        """Pozisyonu (kısmen) kapat"""
+        position = self.positions.get(request['position'])
+        if position is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, tick=tick, comment='Position not found')
+        if request.get('type') == position['type']:
+            return self._result(request, self.TRADE_RETCODE_INVALID, tick=tick, comment='Invalid close type')
+        if volume > position['volume'] + 1e-9:
+            return self._result(request, self.TRADE_RETCODE_INVALID_VOLUME, tick=tick, comment='Invalid volume')
+
+        order, deal = self._close_volume(position, volume, fill_price, int(round(self.clock.time() * 1000)),
+                                         self.DEAL_REASON_EXPERT, request.get('comment', ''), request)
+        return self._result(request, self.TRADE_RETCODE_DONE, tick=tick, deal=deal, order=order,
+                            volume=volume, price=fill_price, comment='Request executed')
+
+    def _close_volume(self, position, volume, price, time_msc, reason, comment, request=None):
+        """Pozisyondan volume kapat: kapanış emri, OUT deal'i ve bakiye güncellemesi"""
+        spec = self.symbols[position['symbol']]['spec']
+        direction = 1 if position['type'] == self.ORDER_TYPE_BUY else -1
+        close_type = self.ORDER_TYPE_SELL if direction == 1 else self.ORDER_TYPE_BUY
+
+        profit = round((price - position['price_open']) * direction / spec['tick_size']
+                       * spec['tick_value'] * volume, 2)
+        commission = -volume * self.commission_per_lot / 2
+        self.balance += profit + commission
+
+        request = request or {'symbol': position['symbol'], 'magic': position['magic'], 'comment': comment}
+        order = self._new_ticket()
+        self._add_order(order, request, close_type, volume, price, position['ticket'], time_msc)
+        deal = self._add_deal(order, close_type, self.DEAL_ENTRY_OUT, reason, volume, price, commission,
+                              profit, position['ticket'], dict(request, comment=comment), time_msc)
+
+        remaining = round(position['volume'] - volume, 8)
+        if remaining <= 1e-9:
+            del self.positions[position['ticket']]
+        else:
+            position['margin'] *= remaining / position['volume']
+            position['volume'] = remaining
+
+        return order, deal
+
+    def _modify(self, request, state, tick):
+        """Pozisyon SL/TP değişikliği"""
+        position = self.positions.get(request.get('position'))
+        if position is None:
+            return self._result(request, self.TRADE_RETCODE_INVALID, tick=tick, comment='Position not found')
+
+        stop_loss = request.get('sl') or 0.0
+        take_profit = request.get('tp') or 0.0
+        if not self._stops_valid(position['type'], state['spec'], tick, stop_loss, take_profit):
+            return self._result(request, self.TRADE_RETCODE_INVALID_STOPS, tick=tick, comment='Invalid stops')
+
+        position['sl'] = stop_loss
+        position['tp'] = take_profit
+        return self._result(request, self.TRADE_RETCODE_DONE, tick=tick, comment='Request executed')
+
+    def _stops_valid(self, order_type, spec, tick, stop_loss, take_profit):
+        """SL/TP kapanış fiyatının doğru tarafında ve stops_level uzaklığında mı"""
+        distance = spec['stops_level'] * spec['point']
+        if order_type == self.ORDER_TYPE_BUY:
+            return ((not stop_loss or stop_loss <= tick.bid - distance)
+                    and (not take_profit or take_profit >= tick.bid + distance))
+        return ((not stop_loss or stop_loss >= tick.ask + distance)
+                and (not take_profit or take_profit <= tick.ask - distance))
+
+    def _new_ticket(self):
+        self.next_ticket += 1
+        return self.next_ticket
+
+    def _add_order(self, ticket, request, order_type, volume, price, position_id, time_msc):
+        self.history_orders.append(TradeOrder(
+            ticket=ticket, time_setup=time_msc // 1000, time_setup_msc=time_msc, time_done=time_msc // 1000,
+            time_done_msc=time_msc, type=order_type, type_time=self.ORDER_TIME_GTC,
+            type_filling=request.get('type_filling', self.ORDER_FILLING_RETURN), state=self.ORDER_STATE_FILLED,
+            magic=request.get('magic', 0), position_id=position_id, reason=self.DEAL_REASON_EXPERT,
+            volume_initial=volume, volume_current=0.0, price_open=price, sl=request.get('sl') or 0.0,
+            tp=request.get('tp') or 0.0, price_current=price, symbol=request['symbol'],
+            comment=request.get('comment', ''), external_id=''
+        ))
+
+    def _add_deal(self, order, deal_type, entry, reason, volume, price, commission, profit, position_id,
+                  request, time_msc):
+        ticket = self._new_ticket()
+        self.deals.append(TradeDeal(
+            ticket=ticket, order=order, time=time_msc // 1000, time_msc=time_msc, type=deal_type,
+            entry=entry, magic=request.get('magic', 0), position_id=position_id, reason=reason,
+            volume=volume, price=price, commission=commission, swap=0.0, profit=profit, fee=0.0,
+            symbol=request['symbol'], comment=request.get('comment', ''), external_id=''
+        ))
+        return ticket
+
+    def _result(self, request, retcode, tick=None, deal=0, order=0, volume=0.0, price=0.0, comment=''):
+        if retcode != self.TRADE_RETCODE_DONE:
+            self.stats['rejected'] += 1
+        return OrderSendResult(
+            retcode=retcode, deal=deal, order=order, volume=volume, price=price,
+            bid=tick.bid if tick else 0.0, ask=tick.ask if tick else 0.0, comment=comment,
+            request_id=self.stats['order_send'], retcode_external=0, request=request
+        )
+
+    def _position_profit(self, position):
+        """Pozisyonun anlık kâr/zararı (BUY bid'den, SELL ask'ten)"""
+        state = self.symbols[position['symbol']]
+        tick = self.symbol_info_tick(position['symbol'])
+        if tick is None:
+            return 0.0
+        spec = state['spec']
+        if position['type'] == self.ORDER_TYPE_BUY:
+            difference = tick.bid - position['price_open']
+        else:
+            difference = position['price_open'] - tick.ask
+        return round(difference / spec['tick_size'] * spec['tick_value'] * position['volume'], 2)
+
+    # =========================================================================
+    # Sorgular
+    # =========================================================================
+
+    def positions_get(self, symbol=None, group=None, ticket=None):
+        result = []
+        for position in self.positions.values():
+            if ticket is not None and position['ticket'] != ticket:
+                continue
+            if symbol is not None and position['symbol'] != symbol:
+                continue
+            if group is not None and not fnmatch.fnmatch(position['symbol'], group):
+                continue
+
+            tick = self.symbol_info_tick(position['symbol'])
+            current = (tick.bid if position['type'] == self.ORDER_TYPE_BUY else tick.ask) if tick else 0.0
+            result.append(TradePosition(
+                ticket=position['ticket'], time=position['time_msc'] // 1000, time_msc=position['time_msc'],
+                time_update=position['time_msc'] // 1000, time_update_msc=position['time_msc'],
+                type=position['type'], magic=position['magic'], identifier=position['ticket'],
+                reason=self.DEAL_REASON_EXPERT, volume=position['volume'], price_open=position['price_open'],
+                sl=position['sl'], tp=position['tp'], price_current=current, swap=0.0,
+                profit=self._position_profit(position), commission=position['commission'],
+                symbol=position['symbol'], comment=position['comment'], external_id=''
+            ))
+        return tuple(result)
+
+    def orders_get(self, symbol=None, group=None, ticket=None):
+        # Sadece market emri - bekleyen emir yok
+        return ()
+
+    def history_orders_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        return self._history(self.history_orders, 'time_done', date_from, date_to, group, ticket, position)
+
+    def history_deals_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        return self._history(self.deals, 'time', date_from, date_to, group, ticket, position)
+
+    def _history(self, items, time_field, date_from, date_to, group, ticket, position):
+        """Zaman aralığı / grup / ticket / pozisyon filtresi"""
+        start = date_from.timestamp() if isinstance(date_from, _datetime) else (date_from or 0)
+        end = date_to.timestamp() if isinstance(date_to, _datetime) else (date_to or float('inf'))
+
+        result = []
+        for item in items:
+            if ticket is not None and item.ticket != ticket:
+                continue
+            if position is not None and item.position_id != position:
+                continue
+            if ticket is None and position is None and not start <= getattr(item, time_field) <= end:
+                continue
+            if group is not None and not fnmatch.fnmatch(item.symbol, group):
+                continue
+            result.append(item)
+        return tuple(result)
+
+
+def patch_bot_modules(terminal, clock, real_sleep=False):
+    """PATCHED_MODULES'teki mt5 ve datetime / date / time referanslarını değiştir
+
+    MetaTrader5 modülü sys.modules'te terminal ile değiştirilir; modüllerdeki gerçek
+    datetime / date / time referansları clock'a bağlı karşılıklarıyla değiştirilir.
+    Dönüş: değişiklikleri geri alan fonksiyon
+    """
+    virtual_datetime, virtual_date, virtual_time = create_virtual_time_types(clock, real_sleep)
+    replacements = {'datetime': (_datetime, virtual_datetime), 'date': (_date, virtual_date),
+                    'time': (_time, virtual_time)}
+
+    previous_mt5 = sys.modules.get('MetaTrader5')
+    sys.modules['MetaTrader5'] = terminal
+    patched = []
+
+    try:
+        for module_name in PATCHED_MODULES:
+            module = importlib.import_module(module_name)
+
+            if getattr(module, 'mt5', None) is not None:
+                patched.append((module, 'mt5', module.mt5))
+                module.mt5 = terminal
+
+            for name, (real, virtual) in replacements.items():
+                if name == 'time' and module_name in REAL_TIME_MODULES:
+                    continue
+                if getattr(module, name, None) is real:
+                    patched.append((module, name, real))
+                    setattr(module, name, virtual)
+
+    except Exception:
+        _restore_modules(patched, previous_mt5)
+        raise
+
+    return lambda: _restore_modules(patched, previous_mt5)
+
+
+def _restore_modules(patched, previous_mt5):
+    """patch_bot_modules değişikliklerini geri al"""
+    for module, name, original in reversed(patched):
+        setattr(module, name, original)
+
+    if previous_mt5 is None:
+        sys.modules.pop('MetaTrader5', None)
+    else:
+        sys.modules['MetaTrader5'] = previous_mt5
+
+
+@contextmanager
+def simulated_environment(terminal):
+    """Bot modüllerini simüle terminal ve sanal saate yönlendir"""
+    restore = patch_bot_modules(terminal, terminal.clock)
+    try:
+        yield terminal
+    finally:
+        restore()
+
+
+def generate_synthetic_ticks(symbol, start, hours=24, seed=0, ticks_per_minute=30, base_price=None):
+    """Test / demo için sentetik tick verisi (rastgele yürüyüş, değişken spread)"""
+    config = get_symbol_config(symbol) or {}
+    point = config.get('point_value', 0.00001)
+    if base_price is None:
+        base_price = {'EURUSD-T': 1.10, 'GOLD-T': 2000.0, 'BTCUSD-T': 60000.0}.get(symbol, 1.0)
+
+    rng = np.random.default_rng(seed)
+    count = int(hours * 60 * ticks_per_minute)
+    offsets = np.sort(rng.uniform(0, hours * 3600, count))
+    times = pd.Timestamp(start) + pd.to_timedelta(offsets, unit='s')
+
+    volatility = 0.000015 * np.sqrt(60 / ticks_per_minute)
+    bid = np.round(base_price * np.exp(np.cumsum(rng.normal(0, volatility, count))) / point) * point
+    spread = rng.integers(5, 25, count) * point
+    return pd.DataFrame({'time': times, 'bid': bid, 'ask': bid + spread})
+
+
+def ticks_to_m1_bars(ticks):
+    """Tick'lerden M1 bar (geçmiş veri üretmek için)"""
+    data = ticks.set_index('time')
+    bars = data['bid'].resample('1min').ohlc().dropna()
+    bars['tick_volume'] = data['bid'].resample('1min').count()
+    bars['spread'] = 10
+    return bars
+
+
+# Test fonksiyonu
+def test_simulated_terminal():
+    """SimulatedTerminal'ı test et"""
+    print("🧪 SimulatedTerminal Test Başlıyor...")
+    print("=" * 50)
+
+    symbol = TRADING_SYMBOLS['EURUSD']['symbol']
+    ticks = generate_synthetic_ticks(symbol, '2024-03-04', hours=4)
+    terminal = SimulatedTerminal({symbol: ticks})
+    terminal.initialize()
+
+    start = ticks['time'].iloc[0].timestamp()
+    terminal.advance_to(start + 90 * 60)
+    rates = terminal.copy_rates_from_pos(symbol, terminal.TIMEFRAME_M15, 0, 5)
+    print(f"   M15 son bar: {pd.to_datetime(rates['time'][-1], unit='s')} close {rates['close'][-1]:.5f}")
+    print(f"   Tick: {terminal.symbol_info_tick(symbol)}")
+
+    tick = terminal.symbol_info_tick(symbol)
+    result = terminal.order_send({
+        'action': terminal.TRADE_ACTION_DEAL, 'symbol': symbol, 'volume': 0.1, 'type': terminal.ORDER_TYPE_BUY,
+        'price': tick.ask, 'sl': tick.bid - 0.0010, 'tp': tick.bid + 0.0010, 'deviation': 10, 'magic': 1
+    })
+    print(f"   Açılış: retcode {result.retcode}, ticket {result.order}, fiyat {result.price:.5f}")
+
+    terminal.advance_to(start + 4 * 3600)
+    print(f"   Açık pozisyon: {len(terminal.positions_get())}, istatistik: {terminal.stats}")
+    for deal in terminal.deals:
+        print(f"   Deal {deal.ticket}: entry {deal.entry} reason {deal.reason} fiyat {deal.price:.5f} kâr {deal.profit}")
+    print(f"   Hesap: {terminal.account_info()}")
+
+if __name__ == "__main__":
+    test_simulated_terminal()
@@ -0,0 +1,448 @@
+# backtesting/walk_forward.py
+"""
+AI Trading Bot - Walk-Forward Doğrulama
+Geçmiş veri kayan eğitim (in-sample) / test (out-of-sample) pencerelerine
+bölünür. Her pencerede parametre setleri eğitim diliminde taranır, en iyi set
+hemen ardından gelen test diliminde çalıştırılır ve canlı parametrelerle
+karşılaştırılır. Canlı ağırlıklar ancak test dilimlerinin toplamı da
+iyileşme gösteriyorsa değiştirilmelidir.
+
+Göstergeler her gösterge kombinasyonu için tüm geçmiş üzerinde bir kez
+hesaplanır ve shared memory'ye yazılır; pencereler bu dizilerin dilimleriyle
+çalışır, worker'larda gösterge yeniden hesaplanmaz. Her değerlendirme anının
+göstergesi sadece o ana kadarki barlardan geldiği için dilimleme ileriye
+bakma yaratmaz (pencere başında ısınma süresi de gerekmez). Pencereler
+process pool'da paralel koşar; eğitim sonuçları (fit) aynı pencere ve
+parametre seti için tekrar çalıştırmada önbellekten kullanılır.
+"""
+
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    OPTIMIZER_MAX_WORKERS, OPTIMIZER_MIN_TRADES, OPTIMIZER_RANDOM_SEED,
+    WALK_FORWARD_TRAIN_DAYS, WALK_FORWARD_TEST_DAYS, WALK_FORWARD_STEP_DAYS
+)
+from backtesting.vectorized_backtester import VectorizedBacktester, DEFAULT_STRATEGY_PARAMS
+from backtesting.parameter_optimizer import (
+    ParameterOptimizer, INDICATOR_PARAMS, RESULT_COLUMNS, share_bars, attach_bars, rank_results
+)
+
+# Worker process durumu (initializer'da bir kez kurulur)
+_worker = {}
+
+
+def share_indicators(cache):
+    """indicator_cache dizilerini tek shared memory bloğuna yaz - (SharedMemory, bağlanma bilgisi)
+
+    Cache değerleri dizi veya dizi tuple'ı (MACD) olabilir; manifest her anahtar için
+    (tuple mu, [(offset, uzunluk) | None]) tutar.
+    """
+    parts, manifest, offset = [], {}, 0
+    for key, value in cache.items():
+        entries = []
+        for part in (value if isinstance(value, tuple) else (value,)):
+            if part is None:
+                entries.append(None)
+                continue
+            part = np.asarray(part, dtype=np.float64)
+            entries.append((offset, len(part)))
+            parts.append(part)
+            offset += len(part)
+        manifest[key] = (isinstance(value, tuple), entries)
+
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+    buffer = np.ndarray((offset,), dtype=np.float64, buffer=block.buf)
+    position = 0
+    for part in parts:
+        buffer[position:position + len(part)] = part
+        position += len(part)
+
+    return block, {'name': block.name, 'size': offset, 'manifest': manifest}
+
+
+def attach_indicators(shared):
+    """Shared memory'deki göstergeleri kopyalamadan (salt okunur) indicator_cache olarak aç"""
+    block = shared_memory.SharedMemory(name=shared['name'])
+    buffer = np.ndarray((shared['size'],), dtype=np.float64, buffer=block.buf)
+    buffer.flags.writeable = False
+
+    cache = {}
+    for key, (is_tuple, entries) in shared['manifest'].items():
+        parts = tuple(None if entry is None else buffer[entry[0]:entry[0] + entry[1]] for entry in entries)
+        cache[key] = parts if is_tuple else parts[0]
+    return block, cache
+
+
+def _init_worker(shared_bars, shared_indicators, symbol, backtester_options):
+    """Worker başlangıcı: barlara ve göstergelere bağlan, backtester'ı kur"""
+    block, bars = attach_bars(shared_bars)
+    indicator_block, cache = attach_indicators(shared_indicators)
+    with redirect_stdout(io.StringIO()):
+        backtester = VectorizedBacktester(symbol, bars, **backtester_options)
+    backtester.indicator_cache = cache
+
+    _worker['block'] = block
+    _worker['indicator_block'] = indicator_block
+    _worker['backtester'] = backtester
+
+
+def _fit_window(backtester, train, param_sets, rank_by, min_trades):
+    """Eğitim diliminde setleri tara, en iyisini seç (uygun set yoksa canlı parametreler)"""
+    rows = []
+    for params in param_sets:
+        try:
+            stats = backtester.run(dict(DEFAULT_STRATEGY_PARAMS, **params), segment=train)['stats']
+            rows.append(dict(params, **{column: stats[column] for column in RESULT_COLUMNS}))
+        except Exception as e:
+            rows.append(dict(params, error=str(e)))
+
+    results = rank_results(pd.DataFrame(rows), rank_by, min_trades)
+    names = list(param_sets[0]) if param_sets else []
+    best = results[results['rank'] == 1]
+
+    if len(best):
+        row = best.iloc[0]
+        params = {name: row[name].item() if hasattr(row[name], 'item') else row[name] for name in names}
+        stats = {column: row[column] for column in RESULT_COLUMNS}
+        fallback = False
+    else:
+        params = {name: DEFAULT_STRATEGY_PARAMS[name] for name in names}
+        live = backtester.run(dict(DEFAULT_STRATEGY_PARAMS), segment=train)['stats']
+        stats = {column: live[column] for column in RESULT_COLUMNS}
+        fallback = True
+
+    return {
+        'params': params,
+        'stats': stats,
+        'fallback': fallback,
+        'candidates': len(rows),
+        'eligible': int(results['rank'].notna().sum()),
+        'errors': int(results['error'].notna().sum()) if 'error' in results.columns else 0
+    }
+
+
+def _run_window(task):
+    """Bir pencere: (önbellekte yoksa) eğitim taraması, seçilen set ve canlı set ile test"""
+    backtester = _worker['backtester']
+    misses = backtester.cache_stats['misses']
+    window = task['window']
+    train = slice(window['train_start'], window['train_stop'])
+    test = slice(window['test_start'], window['test_stop'])
+
+    start = time.perf_counter()
+    fit = task['fit']
+    cached = fit is not None
+    if not cached:
+        fit = _fit_window(backtester, train, task['param_sets'], task['rank_by'], task['min_trades'])
+
+    result = backtester.run(dict(DEFAULT_STRATEGY_PARAMS, **fit['params']), segment=test)
+    baseline = backtester.run(dict(DEFAULT_STRATEGY_PARAMS), segment=test)
+
+    return {
+        'window': window,
+        'fit': fit,
+        'fit_cached': cached,
+        'test_stats': result['stats'],
+        'baseline_stats': baseline['stats'],
+        'trades': result['trades'],
+        'equity_curve': result['equity_curve'],
+        'recomputed': backtester.cache_stats['misses'] - misses,
+        'elapsed_seconds': time.perf_counter() - start
+    }
+
+
+class WalkForwardRunner:
+    """Kayan eğitim/test pencereleriyle parametre seçimini örneklem dışında doğrula"""
+
+    def __init__(self, symbol, bars, search_space=None, train_days=WALK_FORWARD_TRAIN_DAYS,
+                 test_days=WALK_FORWARD_TEST_DAYS, step_days=WALK_FORWARD_STEP_DAYS,
+                 max_workers=OPTIMIZER_MAX_WORKERS, min_trades=OPTIMIZER_MIN_TRADES,
+                 rank_by='net_profit', backtester_options=None):
+        """WalkForwardRunner'ı başlat
+
+        min_trades: eğitim diliminde seçilebilmek için gereken min işlem sayısı
+        """
+        self.symbol = symbol
+        self.bars = bars
+        self.train_days = train_days
+        self.test_days = test_days
+        self.step_days = step_days or test_days
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.min_trades = min_trades
+        self.rank_by = rank_by
+        self.backtester_options = backtester_options or {}
+
+        # Parametre seti üretimi (grid / random) optimizer ile ortak
+        with redirect_stdout(io.StringIO()):
+            self.optimizer = ParameterOptimizer(symbol, bars, search_space, self.max_workers, min_trades,
+                                                rank_by, self.backtester_options)
+            self.backtester = VectorizedBacktester(symbol, bars, **self.backtester_options)
+
+        # (eğitim aralığı, parametre setleri, sıralama) -> seçilen set
+        self.fit_cache = {}
+        self.last_run = {}
+
+        print(f"🚶 WalkForwardRunner başlatıldı: {symbol} - eğitim {train_days} gün, test {test_days} gün, "
+              f"adım {self.step_days} gün, {len(self.windows())} pencere")
+
+    # =========================================================================
+    # Pencereler / göstergeler
+    # =========================================================================
+
+    def windows(self):
+        """Değerlendirme anı indeksleriyle kayan (eğitim, test) pencereleri
+
+        İlk pencere tüm timeframe pencerelerinin dolduğu ilk andan başlar;
+        test dilimi veri sonunu aşan son pencere alınmaz.
+        """
+        times = self.backtester.eval_times
+        valid = np.flatnonzero(self.backtester.valid)
+        if not len(valid):
+            return []
+
+        train = pd.Timedelta(days=self.train_days)
+        test = pd.Timedelta(days=self.test_days)
+        step = pd.Timedelta(days=self.step_days)
+
+        windows = []
+        start = times[valid[0]]
+        while start + train + test <= times[-1]:
+            train_end, test_end = start + train, start + train + test
+            windows.append({
+                'index': len(windows),
+                'train_start': int(times.searchsorted(start)),
+                'train_stop': int(times.searchsorted(train_end)),
+                'test_start': int(times.searchsorted(train_end)),
+                'test_stop': int(times.searchsorted(test_end)),
+                'train_from': start,
+                'test_from': train_end,
+                'test_to': test_end
+            })
+            start += step
+        return windows
+
+    def precompute_indicators(self, param_sets):
+        """Setlerdeki her gösterge kombinasyonu için tüm geçmişte göstergeleri bir kez hesapla"""
+        combinations = {}
+        for params in list(param_sets) + [{}]:
+            merged = dict(DEFAULT_STRATEGY_PARAMS, **params)
+            combinations[tuple(merged[name] for name in INDICATOR_PARAMS)] = merged
+
+        for merged in combinations.values():
+            for tf in self.backtester.windows:
+                self.backtester.indicator_arrays(tf, merged)
+        return len(combinations)
+
+    def _fit_key(self, window, signature):
+        """Fit önbelleği anahtarı"""
+        return (window['train_from'], window['test_from'], signature, self.rank_by, self.min_trades)
+
+    # =========================================================================
+    # Çalıştırma
+    # =========================================================================
+
+    def run(self, param_sets=None, samples=None, seed=OPTIMIZER_RANDOM_SEED):
+        """Tüm pencereleri paralel çalıştır - (pencere tablosu, birleşik özet, test işlemleri)
+
+        param_sets verilmezse samples kadar rastgele set, o da yoksa tüm grid kullanılır
+        """
+        start = time.perf_counter()
+        if param_sets is None:
+            param_sets = self.optimizer.random_sample(samples, seed) if samples else self.optimizer.grid()
+        param_sets = [dict(params) for params in param_sets]
+
+        windows = self.windows()
+        if not windows:
+            raise ValueError(f"Walk-forward için veri yetersiz: eğitim {self.train_days} + test {self.test_days} gün gerekli")
+
+        indicator_start = time.perf_counter()
+        combinations = self.precompute_indicators(param_sets)
+        indicator_seconds = time.perf_counter() - indicator_start
+
+        signature = tuple(tuple(sorted(params.items())) for params in param_sets)
+        tasks = [{
+            'window': window,
+            'param_sets': param_sets,
+            'fit': self.fit_cache.get(self._fit_key(window, signature)),
+            'rank_by': self.rank_by,
+            'min_trades': self.min_trades
+        } for window in windows]
+
+        bar_block, shared_bars = share_bars(self.bars)
+        indicator_block, shared_indicators = share_indicators(self.backtester.indicator_cache)
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks)), initializer=_init_worker,
+                                     initargs=(shared_bars, shared_indicators, self.symbol,
+                                               self.backtester_options)) as executor:
+                window_results = list(executor.map(_run_window, tasks))
+        finally:
+            for block in (bar_block, indicator_block):
+                block.close()
+                block.unlink()
+
+        for window_result in window_results:
+            self.fit_cache[self._fit_key(window_result['window'], signature)] = window_result['fit']
+
+        table = self.window_table(window_results)
+        summary = self.aggregate(window_results)
+        trades = pd.concat([result['trades'].assign(window=result['window']['index'])
+                            for result in window_results], ignore_index=True)
+
+        elapsed = time.perf_counter() - start
+        self.last_run = {
+            'windows': len(windows),
+            'param_sets': len(param_sets),
+            'indicator_combinations': combinations,
+            'indicator_seconds': indicator_seconds,
+            'recomputed': sum(result['recomputed'] for result in window_results),
+            'cached_fits': sum(result['fit_cached'] for result in window_results),
+            'elapsed_seconds': elapsed
+        }
+        return table, summary, trades
+
+    def window_table(self, window_results):
+        """Pencere başına seçilen set, eğitim ve test sonuçları"""
+        rows = []
+        for result in window_results:
+            window, fit = result['window'], result['fit']
+            test, baseline = result['test_stats'], result['baseline_stats']
+            rows.append(dict(
+                {
+                    'window': window['index'],
+                    'train_from': window['train_from'],
+                    'test_from': window['test_from'],
+                    'test_to': window['test_to']
+                },
+                **fit['params'],
+                is_trades=fit['stats']['trades'],
+                is_net_profit=fit['stats']['net_profit'],
+                oos_trades=test['trades'],
+                oos_net_profit=test['net_profit'],
+                oos_win_rate=test['win_rate'],
+                oos_profit_factor=test['profit_factor'],
+                oos_max_drawdown_percent=test['max_drawdown_percent'],
+                oos_stopped_out=test['stopped_out'],
+                live_oos_net_profit=baseline['net_profit'],
+                fallback=fit['fallback'],
+                fit_cached=result['fit_cached']
+            ))
+        return pd.DataFrame(rows)
+
+    def aggregate(self, window_results):
+        """Test dilimlerinin birleşik performansı
+
+        Her pencere başlangıç bakiyesiyle başladığı için birleşik equity eğrisi
+        pencere kâr/zararlarının art arda eklenmesiyle kurulur. Birleşik hesap
+        sıfıra indiğinde stop-out sayılır; sonraki dilimler eğriye eklenmez.
+        """
+        initial_balance = self.backtester.initial_balance
+        profits = np.concatenate([result['trades']['profit'].to_numpy() for result in window_results])
+        gross_profit = float(profits[profits > 0].sum())
+        gross_loss = float(-profits[profits < 0].sum())
+
+        offset, curves = 0.0, []
+        for result in window_results:
+            curves.append(result['equity_curve'].to_numpy() - initial_balance + offset)
+            offset += result['test_stats']['net_profit']
+        equity = initial_balance + np.concatenate(curves)
+        stopped = np.flatnonzero(equity <= 0)
+        if len(stopped):
+            equity[stopped[0]:] = 0.0
+        net_profit = float(equity[-1] - initial_balance) if len(equity) else 0.0
+        peak = np.maximum.accumulate(equity)
+        drawdown = peak - equity
+
+        window_profits = np.array([result['test_stats']['net_profit'] for result in window_results])
+        live_profit = sum(result['baseline_stats']['net_profit'] for result in window_results)
+        in_sample_profit = sum(result['fit']['stats']['net_profit'] for result in window_results)
+
+        # Walk-forward verimliliği: test dilimindeki günlük kâr / eğitim dilimindeki günlük kâr
+        in_sample_daily = in_sample_profit / (self.train_days * len(window_results))
+        out_of_sample_daily = net_profit / (self.test_days * len(window_results))
+
+        return {
+            'windows': len(window_results),
+            'profitable_windows_percent': float((window_profits > 0).mean() * 100),
+            'trades': len(profits),
+            'net_profit': net_profit,
+            'stopped_out': bool(len(stopped)),
+            'win_rate': float((profits > 0).mean() * 100) if len(profits) else 0.0,
+            'profit_factor': gross_profit / gross_loss if gross_loss > 0 else float('inf') if gross_profit > 0 else 0.0,
+            'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+            'max_drawdown_percent': float((drawdown / peak).max() * 100) if len(drawdown) else 0.0,
+            'return_percent': net_profit / initial_balance * 100,
+            'live_net_profit': float(live_profit),
+            'in_sample_net_profit': float(in_sample_profit),
+            'efficiency': out_of_sample_daily / in_sample_daily if in_sample_daily > 0 else float('nan'),
+            'fallback_windows': sum(result['fit']['fallback'] for result in window_results)
+        }
+
+    def print_results(self, table, summary):
+        """Pencere tablosunu ve birleşik özeti yazdır"""
+        run = self.last_run
+        print(f"\n🚶 {self.symbol} WALK-FORWARD - {summary['windows']} pencere, {run.get('param_sets', 0)} set")
+        print("=" * 70)
+        print(f"   Süre: {run.get('elapsed_seconds', 0):.1f} sn | Gösterge: {run.get('indicator_combinations', 0)} "
+              f"kombinasyon {run.get('indicator_seconds', 0):.1f} sn (worker'da yeniden hesap: {run.get('recomputed', 0)}) | "
+              f"Önbellekten fit: {run.get('cached_fits', 0)}")
+
+        columns = ['window', 'test_from', 'is_trades', 'is_net_profit', 'oos_trades', 'oos_net_profit',
+                   'oos_win_rate', 'live_oos_net_profit', 'fallback']
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(table[columns].to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+
+        print(f"\n   Test (OOS) toplamı: ${summary['net_profit']:.2f} (%{summary['return_percent']:.2f}) | "
+              f"İşlem: {summary['trades']} | Kazanma: %{summary['win_rate']:.1f} | PF: {summary['profit_factor']:.2f}")
+        print(f"   Kârlı pencere: %{summary['profitable_windows_percent']:.0f} | "
+              f"Max drawdown: ${summary['max_drawdown']:.2f} (%{summary['max_drawdown_percent']:.2f})"
+              f"{' - birleşik hesap stop-out' if summary['stopped_out'] else ''}")
+        print(f"   Canlı parametreler aynı dilimlerde: ${summary['live_net_profit']:.2f} | "
+              f"Eğitim toplamı: ${summary['in_sample_net_profit']:.2f} | WF verimliliği: {summary['efficiency']:.2f}")
+
+
+# Test fonksiyonu
+def test_walk_forward():
+    """WalkForwardRunner'ı sentetik M1 verisiyle test et"""
+    print("🧪 WalkForwardRunner Test Başlıyor...")
+    print("=" * 50)
+
+    # 120 günlük sentetik EURUSD M1 verisi
+    rng = np.random.default_rng(11)
+    times = pd.date_range('2024-01-01', periods=120 * 1440, freq='1min')
+    close = 1.10 * np.exp(np.cumsum(rng.normal(0, 0.00012, len(times))))
+    opens = np.r_[close[0], close[:-1]]
+    wick = np.abs(rng.normal(0, 0.00008, len(times)))
+    bars = pd.DataFrame({
+        'open': opens,
+        'high': np.maximum(opens, close) + wick,
+        'low': np.minimum(opens, close) - wick,
+        'close': close,
+        'spread': rng.integers(5, 25, len(times))
+    }, index=times)
+
+    runner = WalkForwardRunner('EURUSD', bars, train_days=30, test_days=10, step_days=10, max_workers=2, min_trades=10)
+    table, summary, trades = runner.run(samples=40)
+    runner.print_results(table, summary)
+
+    # Pencerelerin hepsi stop-out ise seçim stratejiyi değil hesabın bitişini ölçer
+    assert not table['oos_stopped_out'].all(), "❌ Tüm test pencereleri stop-out oldu"
+    print(f"\n✅ Stop-out olmayan test penceresi: {int((~table['oos_stopped_out']).sum())}/{len(table)}")
+
+    # Aynı pencereler tekrar: eğitim taraması önbellekten
+    runner.run(samples=40)
+    print(f"\n♻️ İkinci çalıştırma: {runner.last_run['elapsed_seconds']:.1f} sn, "
+          f"önbellekten fit {runner.last_run['cached_fits']}/{runner.last_run['windows']}")
+
+if __name__ == "__main__":
+    test_walk_forward()
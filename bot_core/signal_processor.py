@@ -16,8 +16,10 @@ from ai_engine.simple_technical_analyzer import SimpleTechnicalAnalyzer
 from ai_engine.news_analyzer import NewsAnalyzer
 from ai_engine.multi_timeframe_analyzer import MultiTimeframeAnalyzer
 from ai_engine.scalping_analyzer import ScalpingAnalyzer  # SCALPING EKLENDİ
+from ai_engine.feature_store import FeatureStore
+from ai_engine.ml_predictor import MLPredictor
 from trading_engine.risk_manager import RiskManager
-from config.settings import SIGNAL_STRENGTH_MIN
+from config.settings import SIGNAL_STRENGTH_MIN, FEATURE_STORE_ENABLED, ML_ENABLED, ML_SIGNAL_WEIGHT
 
 class SignalProcessor:
     """Triple AI sinyal işleme sınıfı"""
@@ -29,11 +31,46 @@ class SignalProcessor:
         self.multi_tf_analyzer = MultiTimeframeAnalyzer()
         self.scalping_analyzer = ScalpingAnalyzer()  # SCALPING EKLENDİ
         self.risk_manager = RiskManager()
+        self.feature_store = FeatureStore() if FEATURE_STORE_ENABLED else None
+        # ML tahmincisi feature store satırlarından öğrenir
+        self.ml_predictor = MLPredictor(self.feature_store) if ML_ENABLED and self.feature_store is not None else None
         
         print("🎯 SignalProcessor başlatıldı - Quadruple AI Ready (Teknik+Haber+MultiTF+Scalping)")
     
     def analyze_symbol_triple_ai(self, symbol):
         """Bir sembol için Triple AI analizi yap"""
+        return self.analyze_symbols_triple_ai([symbol]).get(symbol)
+    
+    def analyze_symbols_triple_ai(self, symbols, should_continue=None):
+        """Semboller için Triple AI analizi - ML tahmini barı kapanan sembollerle tek batch'te
+        
+        should_continue: her sembolden önce çağrılır, False dönerse kalan semboller atlanır
+        Returns: {sembol: triple AI sonucu} (analizi başarısız semboller yok)
+        """
+        components = {}
+        closed_symbols = []
+        for symbol in symbols:
+            if should_continue is not None and not should_continue():
+                break
+            
+            analysis = self._analyze_components(symbol)
+            if analysis:
+                components[symbol] = analysis
+                if analysis['new_bar']:
+                    closed_symbols.append(symbol)
+        
+        # 5. ML TAHMİNİ (feature store'un son kapanmış barları - tek batch)
+        ml_signals = self._get_ml_signals(list(components), closed_symbols)
+        
+        results = {}
+        for symbol, analysis in components.items():
+            result = self._finalize_triple_ai(symbol, analysis, ml_signals.get(symbol))
+            if result:
+                results[symbol] = result
+        return results
+    
+    def _analyze_components(self, symbol):
+        """Teknik, haber, multi-TF ve scalping analizleri + kapanan barın özellikleri"""
         try:
             print(f"\n🔍 {symbol} TRIPLE AI ANALİZİ başlıyor...")
             
@@ -57,8 +94,34 @@ class SignalProcessor:
             # 4. SCALPING ANALİZİ
             scalping_result = self.scalping_analyzer.analyze_scalping_opportunity(symbol)
             
+            # Kapanan barın özellik vektörünü sakla, etiketi belli olan satırları öğren
+            new_bar = self._store_features(symbol, analysis_result, news_signal, multi_tf_result, scalping_result)
+            if new_bar:
+                self._learn_ml(symbol)
+            
+            return {
+                'technical_analysis': analysis_result,
+                'news_signal': news_signal,
+                'multi_tf_result': multi_tf_result,
+                'scalping_result': scalping_result,
+                'new_bar': new_bar
+            }
+            
+        except Exception as e:
+            print(f"❌ {symbol} triple AI analiz hatası: {e}")
+            return None
+    
+    def _finalize_triple_ai(self, symbol, analysis, ml_signal):
+        """Bileşenleri ML sinyaliyle birleştir ve sonuç paketini kur"""
+        try:
+            analysis_result = analysis['technical_analysis']
+            news_signal = analysis['news_signal']
+            multi_tf_result = analysis['multi_tf_result']
+            scalping_result = analysis['scalping_result']
+            
             # TÜM SİNYALLERİ BİRLEŞTİR (QUADRUPLE AI)
-            combined_analysis = self._combine_all_signals(analysis_result, news_signal, multi_tf_result, scalping_result)
+            combined_analysis = self._combine_all_signals(analysis_result, news_signal, multi_tf_result, scalping_result,
+                                                          ml_signal)
             
             # Sonuç paketi
             triple_ai_result = {
@@ -67,6 +130,7 @@ class SignalProcessor:
                 'news_signal': news_signal,
                 'multi_tf_result': multi_tf_result,
                 'scalping_result': scalping_result,  # SCALPING EKLENDİ
+                'ml_signal': ml_signal,
                 'combined_analysis': combined_analysis,
                 'timestamp': datetime.now()
             }
@@ -79,13 +143,51 @@ class SignalProcessor:
             print(f"❌ {symbol} triple AI analiz hatası: {e}")
             return None
     
-    def _combine_all_signals(self, technical_analysis, news_signal, multi_tf_result):
-        """Triple AI: Teknik + Haber + Multiple Timeframe birleştirme"""
+    def _store_features(self, symbol, analysis_result, news_signal, multi_tf_result, scalping_result):
+        """Yeni kapanan bar varsa özellik vektörünü feature store'a ekle"""
+        if self.feature_store is None:
+            return False
+        
+        try:
+            return self.feature_store.append_analysis(symbol, analysis_result, news_signal, multi_tf_result, scalping_result)
+        except Exception as e:
+            print(f"❌ {symbol} feature store yazma hatası: {e}")
+            return False
+    
+    def _learn_ml(self, symbol):
+        """Yeni etiketlenen satırları ML modeline öğret"""
+        if self.ml_predictor is None:
+            return
+        
+        try:
+            self.ml_predictor.learn(symbol)
+        except Exception as e:
+            print(f"❌ {symbol} ML öğrenme hatası: {e}")
+    
+    def _get_ml_signals(self, symbols, closed_symbols):
+        """Barı kapanan sembollerin ML tahminini tek batch'te üret, diğerlerinde son tahmini kullan (ML kapalıysa {})"""
+        if self.ml_predictor is None or not symbols:
+            return {}
+        
         try:
-            # Ağırlıklar
-            technical_weight = 0.4   # %40 teknik analiz (M5)
-            news_weight = 0.2        # %20 haber analizi  
-            multi_tf_weight = 0.4    # %40 multiple timeframe
+            return self.ml_predictor.predict_cycle(symbols, closed_symbols)
+        except Exception as e:
+            print(f"❌ ML batch tahmin hatası: {e}")
+            return {}
+    
+    @staticmethod
+    def _combine_all_signals(technical_analysis, news_signal, multi_tf_result, scalping_result=None, ml_signal=None):
+        """Triple AI: Teknik + Haber + Multiple Timeframe (+ hazırsa ML) birleştirme
+
+        scalping_result sonuç paketinde raporlanır, birleşik skora ağırlık olarak girmez.
+        ML modeli ısınmadıysa ağırlığı 0'dır - skorlar üçlü birleştirmeyle birebir aynı kalır.
+        """
+        try:
+            # Ağırlıklar - ML hazırsa diğerleri oransal küçülür
+            ml_weight = ML_SIGNAL_WEIGHT if ml_signal and ml_signal['ready'] else 0.0
+            technical_weight = 0.4 * (1 - ml_weight)   # %40 teknik analiz (M5)
+            news_weight = 0.2 * (1 - ml_weight)        # %20 haber analizi  
+            multi_tf_weight = 0.4 * (1 - ml_weight)    # %40 multiple timeframe
             
             # Teknik analiz skorları (M5)
             tech_buy_strength = technical_analysis['buy_strength']
@@ -113,24 +215,32 @@ class SignalProcessor:
                 news_buy_boost = 0
                 news_sell_boost = 0
             
+            # ML sinyali (yukarı olasılığından)
+            ml_buy_strength = ml_signal['strength'] if ml_weight and ml_signal['signal'] == 'BUY' else 0
+            ml_sell_strength = ml_signal['strength'] if ml_weight and ml_signal['signal'] == 'SELL' else 0
+            ml_confidence = ml_signal['confidence'] * 100 if ml_weight else 0
+            
             # Birleşik güç hesapla
             combined_buy_strength = (
                 (tech_buy_strength * technical_weight) + 
                 (news_buy_boost * news_weight) + 
-                (mtf_buy_strength * multi_tf_weight)
+                (mtf_buy_strength * multi_tf_weight) + 
+                (ml_buy_strength * ml_weight)
             )
             
             combined_sell_strength = (
                 (tech_sell_strength * technical_weight) + 
                 (news_sell_boost * news_weight) + 
-                (mtf_sell_strength * multi_tf_weight)
+                (mtf_sell_strength * multi_tf_weight) + 
+                (ml_sell_strength * ml_weight)
             )
             
             # Birleşik güven hesapla (timeframe uyumu bonus)
             base_confidence = (
                 (tech_confidence * technical_weight) + 
                 (news_confidence * news_weight) + 
-                (mtf_confidence * multi_tf_weight)
+                (mtf_confidence * multi_tf_weight) + 
+                (ml_confidence * ml_weight)
             )
             
             # Timeframe uyumu bonusu
@@ -157,11 +267,13 @@ class SignalProcessor:
                 'technical_weight': technical_weight,
                 'news_weight': news_weight,
                 'multi_tf_weight': multi_tf_weight,
+                'ml_weight': ml_weight,
                 'alignment_bonus': alignment_bonus,
                 'components': {
                     'technical': {'buy': tech_buy_strength, 'sell': tech_sell_strength},
                     'news': {'buy': news_buy_boost, 'sell': news_sell_boost},
-                    'multi_tf': {'buy': mtf_buy_strength, 'sell': mtf_sell_strength}
+                    'multi_tf': {'buy': mtf_buy_strength, 'sell': mtf_sell_strength},
+                    'ml': {'buy': ml_buy_strength, 'sell': ml_sell_strength}
                 }
             }
             
@@ -186,11 +298,27 @@ class SignalProcessor:
             print(f"📊 {symbol} Teknik: {technical['overall_signal']} (Güven: %{technical['confidence']:.1f})")
             print(f"📰 {symbol} Haber: {news['signal']} (Güç: {news['strength']:.0f})")
             print(f"🕐 {symbol} Multi-TF: {multi_tf['overall_signal']} (Uyum: %{multi_tf['alignment_score']:.0f})")
+            ml = result.get('ml_signal')
+            if ml:
+                status = f"Güç: {ml['strength']:.0f}" if ml['ready'] else f"ısınıyor {ml['updates']} güncelleme"
+                print(f"🧠 {symbol} ML: {ml['signal']} ({status}, isabet %{ml['accuracy'] * 100:.0f})")
             print(f"🎯 {symbol} FINAL: {combined['overall_signal']} (Güven: %{combined['confidence']:.1f})")
             
         except Exception as e:
             print(f"❌ Özet yazdırma hatası: {e}")
     
+    def close(self):
+        """Feature store'u diske yaz, bekleyen ML güncellemelerini checkpoint'le"""
+        try:
+            if self.feature_store is not None:
+                self.feature_store.flush()
+            if self.ml_predictor is not None:
+                if self.ml_predictor.batch_latency.count:
+                    self.ml_predictor.print_latency_report()
+                self.ml_predictor.close()
+        except Exception as e:
+            print(f"❌ SignalProcessor kapatma hatası: {e}")
+    
     def validate_signal_strength(self, combined_analysis):
         """Sinyal gücünü doğrula"""
         try:
@@ -220,6 +348,7 @@ class SignalProcessor:
                 'analysis': technical,
                 'news_signal': triple_ai_result['news_signal'],
                 'multi_tf_result': triple_ai_result['multi_tf_result'],
+                'ml_signal': triple_ai_result.get('ml_signal'),
                 'combined_analysis': combined,
                 'risk_details': risk_result['risk_details'],
                 'lot_size': risk_result['risk_details']['lot_size'],
@@ -258,6 +387,12 @@ class SignalProcessor:
             print(f"   Uyum: %{multi_tf['alignment_score']:.0f}")
             print(f"   Analiz edilen TF: {multi_tf['analyzed_timeframes']}/4")
             
+            ml = signal.get('ml_signal')
+            if ml:
+                print("🧠 ML TAHMİNİ:")
+                print(f"   Sinyal: {ml['signal']} (Güç: {ml['strength']:.0f})")
+                print(f"   Güncelleme: {ml['updates']} | İsabet: %{ml['accuracy'] * 100:.0f}")
+            
             print("🎯 BİRLEŞİK SONUÇ:")
             print(f"   Final Sinyal: {combined['overall_signal']}")
             print(f"   Final Güven: %{combined['confidence']:.1f}")
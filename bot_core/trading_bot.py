@@ -8,16 +8,21 @@ import threading
 from datetime import datetime
 import sys
 import os
-import random
 
 # Parent directory'yi ekle
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import (
-    TRADING_SYMBOLS, DATA_UPDATE_INTERVAL_SECONDS
+    TRADING_SYMBOLS, DATA_UPDATE_INTERVAL_SECONDS, SESSION_RECORD_ENABLED, ORDER_MAGIC
 )
 from data_manager.mt5_connector import MT5Connector
+from data_manager.economic_calendar import EconomicCalendar
 from trading_engine.order_executor import OrderExecutor
+from trading_engine.paper_broker import PaperBroker
+from trading_engine.pnl_ledger import DailyPnLLedger
+from trading_engine.circuit_breaker import CircuitBreaker
+from trading_engine.trade_journal import TradeJournal
+from trading_engine.position_manager import TrailingStopManager, PositionExpiryManager
 from telegram_bot.bot_handler import TelegramBotHandler
 from .signal_processor import SignalProcessor
 
@@ -38,14 +43,28 @@ class AITradingBot:
         
         # Core modüller
         self.signal_processor = SignalProcessor()
+        self.risk_manager = self.signal_processor.risk_manager
         self.mt5_connector = None
-        self.order_executor = OrderExecutor()
+        self.session_recorder = None
+        self.trade_journal = TradeJournal()
+        if self.simulation_mode:
+            # Paper hesap: emirler canlı fiyatlardan süreç içinde doldurulur, risk durumu paper hesaptan beslenir
+            self.order_executor = PaperBroker(contract_specs=self.risk_manager.contract_specs)
+            self.risk_manager.pnl_ledger = DailyPnLLedger(ledger_file=None)
+            self.risk_manager.circuit_breaker = CircuitBreaker(state_file=None)
+            self.risk_manager.account_connector = self.order_executor
+        else:
+            self.order_executor = OrderExecutor(contract_specs=self.risk_manager.contract_specs, journal=self.trade_journal)
+        self.trailing_stops = TrailingStopManager(self.order_executor, self.risk_manager.contract_specs)
+        self.position_expiry = PositionExpiryManager(self.order_executor)
         self.telegram_handler = TelegramBotHandler(self)
+        self.economic_calendar = EconomicCalendar()
         
         # Trading durumu
         self.last_signals = {}
         self.active_positions = {}
         self.trade_count = 0
+        self.last_correlation_bar = None
         self.session_start_time = datetime.now()
         
         # Web Dashboard
@@ -60,6 +79,8 @@ class AITradingBot:
             'balance': 0,
             'equity': 0,
             'positions': [],
+            'var': 0.0,
+            'expected_shortfall': 0.0,
             'last_analysis': 'No analysis yet'
         }
         
@@ -75,12 +96,26 @@ class AITradingBot:
         
         print("\n🚀 Modular AI Bot başlatılıyor...")
         
+        # Oturum kaydı: bağlantı dahil tüm dış girdiler kaydedilir
+        if SESSION_RECORD_ENABLED:
+            from backtesting.session_recorder import SessionRecorder
+            self.session_recorder = SessionRecorder()
+            self.session_recorder.start(self)
+        
         # MT5 bağlantısını test et
         self.mt5_connector = MT5Connector()
         if not self.mt5_connector.connect():
             print("❌ MT5 bağlantısı başarısız! Bot durduruluyor.")
+            self._close_session_recorder()
             return False
         
+        # Emirler botun kalıcı oturumu üzerinden gönderilir
+        self.order_executor.attach_session(self.mt5_connector)
+        
+        # Önceki oturumun açık pozisyonlarını günlükten geri yükle (paper hesap her oturumda sıfırdan başlar)
+        if not self.simulation_mode:
+            self._restore_from_journal()
+        
         self.running = True
         self.session_start_time = datetime.now()
         
@@ -118,12 +153,20 @@ class AITradingBot:
         print("\n🛑 Bot durduruluyor...")
         self.running = False
         
+        if self.order_executor.send_latency.count:
+            self.order_executor.print_latency_report()
+        self.order_executor.close()
+        self.trade_journal.close()
+        self.signal_processor.close()
+        
         if self.mt5_connector:
             self.mt5_connector.disconnect()
         
         if self.telegram_handler:
             self.telegram_handler.stop_bot()
         
+        self._close_session_recorder()
+        
         # Session özeti
         session_duration = datetime.now() - self.session_start_time
         print(f"\n📊 SESSION ÖZETİ:")
@@ -133,22 +176,19 @@ class AITradingBot:
         
         print("✅ Modular Bot başarıyla durduruldu!")
     
+    def _close_session_recorder(self):
+        """Oturum kaydı açıksa kapat"""
+        if self.session_recorder:
+            self.session_recorder.close()
+            self.session_recorder = None
+    
     def _main_loop(self):
         """Ana triple AI döngüsü"""
         print("🔄 Modular triple AI döngüsü başlatıldı...")
         
         while self.running:
             try:
-                # Her sembol için analiz yap
-                for symbol_name, symbol_config in TRADING_SYMBOLS.items():
-                    if not self.running:
-                        break
-                    
-                    symbol = symbol_config['symbol']
-                    self._process_symbol(symbol)
-                
-                # Dashboard güncelle
-                self.update_dashboard_data()
+                self._run_cycle()
                 
                 # Bekleme
                 print(f"⏱️ {DATA_UPDATE_INTERVAL_SECONDS} saniye bekleniyor...")
@@ -158,15 +198,201 @@ class AITradingBot:
                 print(f"❌ Ana döngü hatası: {e}")
                 time.sleep(5)
     
-    def _process_symbol(self, symbol):
-        """Bir sembol için işlem sürecini yönet"""
+    def _run_cycle(self):
+        """Tek analiz/trade döngüsü (canlı döngü ve event backtest aynı adımları çalıştırır)"""
+        # Döngü başına tek hesap/pozisyon okuması - risk kontrolleri bellekten yapılır
+        self._refresh_risk_state()
+        self._update_correlation_engine()
+        self._update_trailing_stops()
+        self._enforce_trade_duration()
+        self._refresh_calendar()
+        
+        # Devre kesici / haber blackout'una takılmayan semboller birlikte analiz edilir (ML tahmini tek batch)
+        symbols = [symbol_config['symbol'] for symbol_config in TRADING_SYMBOLS.values()]
+        symbols = [symbol for symbol in symbols if self._can_analyze(symbol)]
+        results = self.signal_processor.analyze_symbols_triple_ai(symbols, should_continue=lambda: self.running)
+        
+        # Analiz sonuçlarından trade adaylarını topla
+        candidates = []
+        for symbol in symbols:
+            if not self.running:
+                break
+            
+            candidate = self._process_symbol(symbol, results.get(symbol))
+            if candidate:
+                candidates.append(candidate)
+        
+        # Tüm adaylar için tek risk değerlendirmesi ve trade
+        if candidates and self.running:
+            self._execute_cycle_candidates(candidates)
+        
+        # Dashboard güncelle
+        self.update_dashboard_data()
+    
+    def _restore_from_journal(self):
+        """Trade günlüğünü oynat, canlı pozisyonlarla uzlaştır ve active_positions'ı kur"""
         try:
-            # Triple AI analizi yap
-            triple_ai_result = self.signal_processor.analyze_symbol_triple_ai(symbol)
+            # Günlük oynatmadan önce açılır - oynatma hata verse de yeni emir event'leri diske yazılır
+            self.trade_journal.open()
+            journal_state = self.trade_journal.rebuild_state()
             
-            if not triple_ai_result:
+            live_positions = self.mt5_connector.get_positions()
+            live_magic = {position['ticket']: position.get('magic') for position in live_positions or []}
+            reconciled = self.trade_journal.reconcile(journal_state['open_positions'], live_positions)
+            self.trade_journal.compact(reconciled['open_positions'])
+            self.order_executor.restore_state(journal_state)
+            
+            for ticket, position in reconciled['open_positions'].items():
+                open_time = position.get('time')
+                if isinstance(open_time, str):
+                    open_time = datetime.fromisoformat(open_time)
+                
+                self.active_positions[ticket] = {
+                    'signal': None,
+                    'trade_result': position,
+                    'open_time': open_time or datetime.now(),
+                    'restored': True
+                }
+                self.position_expiry.on_position_opened(ticket, self.active_positions[ticket]['open_time'],
+                                                        magic=live_magic.get(ticket))
+            
+            if self.active_positions:
+                print(f"📓 {len(self.active_positions)} açık pozisyon günlükten geri yüklendi")
+                
+        except Exception as e:
+            print(f"❌ Trade günlüğü geri yükleme hatası: {e}")
+    
+    def _refresh_risk_state(self):
+        """Bellek içi risk durumunu botun açık MT5 oturumundan (simülasyonda paper hesaptan) güncelle"""
+        try:
+            if self.mt5_connector and self.mt5_connector.connected:
+                if self.simulation_mode:
+                    self._process_paper_stops()
+                    refreshed = self.risk_manager.refresh_risk_state(self.order_executor)
+                else:
+                    refreshed = self.risk_manager.refresh_risk_state(self.mt5_connector)
+                
+                if refreshed:
+                    self._forget_closed_positions()
+        except Exception as e:
+            print(f"❌ Risk durumu güncelleme hatası: {e}")
+    
+    def _forget_closed_positions(self):
+        """Terminalde artık görünmeyen pozisyonları (broker SL/TP, elle kapatma) bot durumundan çıkar"""
+        open_positions = self.risk_manager.risk_state.positions
+        for ticket in [ticket for ticket in self.active_positions if ticket not in open_positions]:
+            self._on_position_closed(ticket)
+    
+    def _on_position_closed(self, ticket):
+        """Kapanan pozisyonu aktif listeden, trailing stop'tan ve max süre zamanlayıcısından çıkar"""
+        self.active_positions.pop(ticket, None)
+        self.trailing_stops.remove_position(ticket)
+        self.position_expiry.on_position_closed(ticket)
+    
+    def _process_paper_stops(self):
+        """Paper pozisyonları son tick'lerle değerle, SL/TP'ye değenleri kapat"""
+        for result in self.order_executor.process_ticks():
+            self._on_position_closed(result['original_ticket'])
+    
+    def _update_trailing_stops(self):
+        """Açık pozisyonların trailing stop'larını son tick'lere göre güncelle"""
+        try:
+            if not self.mt5_connector or not self.mt5_connector.connected:
+                return
+            
+            # Pozisyon listesi döngü başında yenilenen risk durumundan
+            self.trailing_stops.sync_positions(self.risk_manager.risk_state.snapshot()['positions'])
+            
+            symbols = self.trailing_stops.get_symbols()
+            if not symbols:
+                return
+            
+            modified = self.trailing_stops.on_ticks(self.order_executor.get_ticks(symbols))
+            if modified:
+                print(f"📈 Trailing stop: {modified} pozisyonun SL'i güncellendi")
+                
+        except Exception as e:
+            print(f"❌ Trailing stop hatası: {e}")
+    
+    def _enforce_trade_duration(self):
+        """Max süresi dolan pozisyonları kapat (timer wheel - pozisyon taraması yok)"""
+        try:
+            if not self.mt5_connector or not self.mt5_connector.connected:
+                return
+            
+            open_positions = self.risk_manager.risk_state.positions
+            def is_bot_position(ticket):
+                return ticket in open_positions and open_positions[ticket].get('magic') == ORDER_MAGIC
+            
+            for result in self.position_expiry.process_expired(is_open=is_bot_position):
+                if result['success']:
+                    ticket = result['original_ticket']
+                    self._on_position_closed(ticket)
+                    self.risk_manager.risk_state.on_position_closed(ticket, result['profit'])
+                    
+        except Exception as e:
+            print(f"❌ Max süre kontrolü hatası: {e}")
+    
+    def _update_correlation_engine(self):
+        """Yeni kapanan M1 barlarını korelasyon motoruna ekle (dakikada bir)"""
+        try:
+            current_minute = datetime.now().replace(second=0, microsecond=0)
+            if current_minute == self.last_correlation_bar:
+                return
+            
+            if not self.mt5_connector or not self.mt5_connector.connected:
                 return
             
+            closes = {}
+            for symbol_config in TRADING_SYMBOLS.values():
+                symbol = symbol_config['symbol']
+                df = self.mt5_connector.get_market_data(symbol, 'M1', 2)
+                if df is not None and len(df) >= 2:
+                    # Son bar henüz kapanmadı - bir öncekini kullan
+                    closes[symbol] = df['close'].iloc[-2]
+            
+            if closes:
+                self.risk_manager.correlation_engine.update_prices(closes)
+                self.last_correlation_bar = current_minute
+                
+        except Exception as e:
+            print(f"❌ Korelasyon güncelleme hatası: {e}")
+    
+    def _refresh_calendar(self):
+        """Ekonomik takvimi döngü başında bir kez yenile (sembol döngüsünde ağ isteği yapılmaz)"""
+        try:
+            self.economic_calendar.refresh()
+        except Exception as e:
+            print(f"❌ Takvim yenileme hatası: {e}")
+    
+    def _can_analyze(self, symbol):
+        """Devre kesici veya haber blackout'u varsa sembolü pahalı analize hiç sokma"""
+        try:
+            # Devre kesici aktifse analiz döngüsüne hiç girme
+            if self.risk_manager.circuit_breaker.is_tripped():
+                remaining = self.risk_manager.circuit_breaker.get_remaining_seconds() / 60
+                print(f"🧯 {symbol} atlandı - devre kesici aktif ({self.risk_manager.circuit_breaker.trip_reason}, {remaining:.0f} dk kaldı)")
+                return False
+            
+            # Yüksek etkili haber penceresi - pahalı analize hiç girme
+            blackout_event = self.economic_calendar.get_blackout_event(symbol)
+            if blackout_event:
+                print(f"📅 {symbol} haber blackout: {blackout_event['currency']} {blackout_event['title']} "
+                      f"({blackout_event['time'].strftime('%H:%M')}) - analiz atlandı")
+                return False
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ {symbol} işlem süreci hatası: {e}")
+            return False
+    
+    def _process_symbol(self, symbol, triple_ai_result):
+        """Sembolün Triple AI sonucunu değerlendir, trade adayı varsa döndür"""
+        try:
+            if not triple_ai_result:
+                return None
+            
             combined_analysis = triple_ai_result['combined_analysis']
             
             # Dashboard'a kaydet
@@ -181,24 +407,49 @@ class AITradingBot:
             # Güven kontrolü
             if confidence < 5.0:
                 print(f"⚠️ Güven seviyesi yetersiz: %{confidence:.1f} < %5.0")
-                return
+                return None
             
             # Sinyal gücü kontrolü
             is_strong, strength_message = self.signal_processor.validate_signal_strength(combined_analysis)
             if not is_strong:
                 print(f"⚠️ {strength_message}")
-                return
+                return None
             
             # Duplicate sinyal kontrolü
             if self._is_duplicate_signal(symbol, combined_analysis['overall_signal']):
                 print(f"⚠️ {symbol} için yakın zamanda aynı sinyal verildi")
-                return
+                return None
             
-            # Risk analizi ve trade işlemi
-            self._execute_trade_process(triple_ai_result)
+            # Risk analizi döngü sonunda tüm adaylarla birlikte yapılır
+            return {
+                'symbol': symbol,
+                'signal_type': combined_analysis['overall_signal'],
+                'entry_price': triple_ai_result['technical_analysis']['current_price'],
+                'confidence': confidence,
+                'atr_value': triple_ai_result['technical_analysis'].get('indicators', {}).get('atr'),
+                'triple_ai_result': triple_ai_result
+            }
             
         except Exception as e:
             print(f"❌ {symbol} işlem süreci hatası: {e}")
+            return None
+    
+    def _execute_cycle_candidates(self, candidates):
+        """Döngüdeki trade adaylarını tek hesap görüntüsüyle değerlendir ve kabul edilenleri aç"""
+        try:
+            batch_result = self.risk_manager.validate_trade_batch(candidates, self.mt5_connector)
+            
+            for rejected in batch_result['rejected']:
+                print(f"❌ {rejected['candidate']['symbol']} risk reddi: {', '.join(rejected['reasons'])}")
+            
+            # Kabul edilenler güven sırasıyla açılır
+            for accepted in batch_result['accepted']:
+                if not self.running:
+                    break
+                self._execute_trade_process(accepted['candidate']['triple_ai_result'], accepted)
+                
+        except Exception as e:
+            print(f"❌ Toplu trade süreci hatası: {e}")
     
     def _is_duplicate_signal(self, symbol, signal):
         """Duplicate sinyal kontrolü"""
@@ -209,33 +460,14 @@ class AITradingBot:
             return True
         return False
     
-    def _execute_trade_process(self, triple_ai_result):
-        """Trade sürecini yürüt"""
+    def _execute_trade_process(self, triple_ai_result, risk_result):
+        """Risk onaylı trade sürecini yürüt"""
         try:
             symbol = triple_ai_result['symbol']
             combined = triple_ai_result['combined_analysis']
-            technical = triple_ai_result['technical_analysis']
-            
-            # Basit risk hesaplama
-            entry_price = technical['current_price']
-            
-            if combined['overall_signal'] == 'BUY':
-                stop_loss = entry_price * 0.99
-                take_profit = entry_price * 1.015
-            else:  # SELL
-                stop_loss = entry_price * 1.01
-                take_profit = entry_price * 0.985
-            
-            risk_result = {
-                'allowed': True,
-                'risk_details': {
-                    'lot_size': 0.01,
-                    'stop_loss': stop_loss,
-                    'take_profit': take_profit,
-                    'risk_amount': 100.0,
-                    'account_balance': 100000.0
-                }
-            }
+            
+            for warning in risk_result.get('warnings', []):
+                print(f"⚠️ {symbol}: {warning}")
             
             # Trade sinyali oluştur
             trade_signal = self.signal_processor.create_trade_signal(triple_ai_result, risk_result)
@@ -289,27 +521,20 @@ class AITradingBot:
             print(f"❌ Sinyal işleme hatası: {e}")
     
     def _simulate_trade(self, signal):
-        """Demo trade simülasyonu"""
-        ticket = random.randint(100000, 999999)
-        
-        print(f"🎭 SİMÜLE EDİLEN MODULAR AI TRADE:")
-        print(f"   Ticket: {ticket}")
-        print(f"   Entry: {signal['entry_price']:.5f}")
-        print(f"   Lot: {signal['lot_size']}")
-        print(f"   Modular AI Güven: %{signal['confidence']:.1f}")
-        
-        return {
-            'success': True,
-            'ticket': ticket,
-            'symbol': signal['symbol'],
-            'type': signal['signal'],
-            'volume': signal['lot_size'],
-            'price': signal['entry_price'],
-            'simulated': True
-        }
+        """Paper trade - emir PaperBroker üzerinden canlı fiyattan doldurulur"""
+        result = self._execute_real_trade(signal)
+        
+        if result['success']:
+            print(f"🎭 SİMÜLE EDİLEN MODULAR AI TRADE:")
+            print(f"   Ticket: {result['ticket']}")
+            print(f"   Entry: {result['price']:.5f} (sinyal {signal['entry_price']:.5f})")
+            print(f"   Lot: {result['volume']}")
+            print(f"   Modular AI Güven: %{signal['confidence']:.1f}")
+        
+        return result
     
     def _execute_real_trade(self, signal):
-        """Gerçek trade çalıştır"""
+        """Trade çalıştır (simülasyonda order_executor PaperBroker'dır)"""
         try:
             result = self.order_executor.execute_market_order(
                 symbol=signal['symbol'],
@@ -317,7 +542,8 @@ class AITradingBot:
                 lot_size=signal['lot_size'],
                 stop_loss=signal['stop_loss'],
                 take_profit=signal['take_profit'],
-                comment=f"Modular AI - Conf:{signal['confidence']:.0f}%"
+                comment=f"Modular AI - Conf:{signal['confidence']:.0f}%",
+                client_id=signal.setdefault('client_id', self.order_executor.new_client_id())
             )
             
             if result['success']:
@@ -326,6 +552,20 @@ class AITradingBot:
                     'trade_result': result,
                     'open_time': datetime.now()
                 }
+                
+                # Risk durumuna yeni pozisyon event'i
+                self.risk_manager.risk_state.on_position_opened({
+                    'ticket': result['ticket'],
+                    'symbol': result['symbol'],
+                    'type': result['type'].upper(),
+                    'volume': result['volume'],
+                    'open_price': result['price'],
+                    'sl': result['stop_loss'] or 0.0,
+                    'tp': result['take_profit'] or 0.0,
+                    'profit': 0.0,
+                    'magic': ORDER_MAGIC
+                })
+                self.position_expiry.on_position_opened(result['ticket'])
                 print(f"🎯 Modular AI Trade ID {result['ticket']} aktif")
             
             return result
@@ -426,6 +666,14 @@ body {{ font-family: Arial; background: #1a1a2e; color: white; margin: 0; paddin
                 <span>Positions:</span>
                 <span class="value">{len(self.dashboard_data['positions'])}</span>
             </div>
+            <div class="metric">
+                <span>VaR (99%):</span>
+                <span class="value">${self.dashboard_data['var']:,.2f}</span>
+            </div>
+            <div class="metric">
+                <span>Expected Shortfall:</span>
+                <span class="value">${self.dashboard_data['expected_shortfall']:,.2f}</span>
+            </div>
         </div>
         
         <div class="card">
@@ -459,16 +707,18 @@ body {{ font-family: Arial; background: #1a1a2e; color: white; margin: 0; paddin
             
             self.dashboard_data['signals'] = self.trade_count
             
-            # MT5 verileri
-            with MT5Connector() as mt5_conn:
-                if mt5_conn.connected:
-                    account_info = mt5_conn.get_account_info()
-                    if account_info:
-                        self.dashboard_data['balance'] = account_info['balance']
-                        self.dashboard_data['equity'] = account_info['equity']
-                    
-                    positions = mt5_conn.get_positions()
-                    self.dashboard_data['positions'] = positions
+            # Hesap verileri (döngü başında yenilenen bellek içi risk durumundan)
+            risk_state = self.risk_manager.risk_state
+            if risk_state.is_ready():
+                state = risk_state.snapshot()
+                self.dashboard_data['balance'] = state['balance']
+                self.dashboard_data['equity'] = state['equity']
+                self.dashboard_data['positions'] = state['positions']
+                
+                # Portföy VaR / ES
+                var_result = self.risk_manager.portfolio_var.calculate(state['positions'])
+                self.dashboard_data['var'] = var_result['var']
+                self.dashboard_data['expected_shortfall'] = var_result['expected_shortfall']
         except:
             pass
     
@@ -13,6 +13,7 @@ TRADING_SYMBOLS = {
     'EURUSD': {
         'symbol': 'EURUSD-T',  # Admiral Markets format
         'point_value': 0.00001,  # 1 pip değeri
+        'contract_size': 100000,  # 1 lot (MT5 symbol_info yoksa yedek)
         'min_lot': 0.01,
         'max_lot': 100.0,
         'spread_limit': 60  # Demo'da spread daha yüksek olabilir
@@ -20,6 +21,7 @@ TRADING_SYMBOLS = {
     'XAUUSD': {  # Altın
         'symbol': 'GOLD-T',  # Admiral Markets'te GOLD-T
         'point_value': 0.01,
+        'contract_size': 100,     # 1 lot = 100 ons
         'min_lot': 0.01,
         'max_lot': 50.0,
         'spread_limit': 50  # Altında spread daha yüksek
@@ -27,6 +29,7 @@ TRADING_SYMBOLS = {
     'BTCUSD': {  # Bitcoin
         'symbol': 'BTCUSD-T',  # Admiral Markets format
         'point_value': 1.0,
+        'contract_size': 1,       # 1 lot = 1 BTC
         'min_lot': 0.01,
         'max_lot': 10.0,
         'spread_limit': 100
@@ -42,17 +45,49 @@ DAILY_MAX_LOSS_PERCENT = 10.0  # Günlük max %10 kayıp
 MAX_POSITIONS_PER_SYMBOL = 2   # Sembole max 2 açık pozisyon
 MAX_TOTAL_POSITIONS = 6        # Toplam max 6 pozisyon
 MAX_CORRELATION_POSITIONS = 3   # Korelasyonlu max 3 pozisyon
+CORRELATION_THRESHOLD = 0.7     # |korelasyon| >= 0.7 ise semboller aynı kümede sayılır
+CORRELATION_WINDOW_BARS = 240   # Rolling korelasyon penceresi (M1 bar)
+CORRELATION_RESYNC_BARS = 240   # Running sum'lar bu kadar barda bir pencereden yeniden hesaplanır
 
 # Position sizing
 RISK_PER_TRADE = 2.0          # İşlem başına risk %2
 DEFAULT_LOT_SIZE = 0.01       # Varsayılan lot boyutu
+MAX_ORDER_LOTS = 1.0          # Tek emirde max lot (hatalı SL mesafesi dev emre dönüşmesin)
 MIN_ACCOUNT_BALANCE = 100.0   # Min hesap bakiyesi ($)
+RISK_STATE_MAX_AGE_SECONDS = 10  # Bellek içi risk durumu bu süreden eskiyse terminalden yenilenir
+MARGIN_PRICE_BUCKET_PERCENT = 0.5  # order_calc_margin sonuçları bu fiyat aralığında tekrar kullanılır
+
+# Portföy VaR (Monte Carlo)
+VAR_SIMULATIONS = 10000        # Senaryo sayısı
+VAR_CONFIDENCE = 0.99          # VaR güven seviyesi
+VAR_HORIZON_BARS = 60          # Risk ufku (M1 bar - 1 saat)
+VAR_RANDOM_SEED = 42           # Tekrarlanabilir sonuçlar için sabit seed
+VAR_GATE_ENABLED = False       # True ise VaR limiti trade öncesi kontrol edilir
+MAX_PORTFOLIO_VAR_PERCENT = 5.0  # Max portföy VaR'ı (equity yüzdesi)
 
 # Stop Loss & Take Profit (Scalping için)
 DEFAULT_STOP_LOSS_PIPS = 15   # Varsayılan SL (pip)
 DEFAULT_TAKE_PROFIT_PIPS = 20 # Varsayılan TP (pip)
+MIN_STOP_LOSS_PERCENT = 1.0   # SL mesafesi en az fiyatın %1'i (ATR/pip SL'i buna genişletilir, TP aynı oranla)
 TRAILING_STOP_DISTANCE = 10   # Trailing stop mesafesi
+TRAILING_STOP_MIN_STEP = 2    # Trailing stop bu kadar point ilerlemeden SL değiştirilmez
 MAX_TRADE_DURATION_MINUTES = 30  # Max açık kalma süresi
+EXPIRY_CLOSE_RETRY_SECONDS = 30  # Süre dolumunda kapatma başarısızsa tekrar deneme aralığı (sn)
+
+# Emir gönderimi
+CLOSE_ALL_MAX_WORKERS = 4     # Toplu kapatmada eş zamanlı gönderim sayısı
+ORDER_RETRY_MAX_ATTEMPTS = 3  # Requote / fiyat değişti durumunda max tekrar gönderim
+ORDER_RETRY_DEADLINE_MS = 500 # İlk gönderimden itibaren tekrar deneme süresi (ms)
+ORDER_MAX_SLIPPAGE_POINTS = 30  # Açılış emrinde ilk fiyattan izin verilen aleyhte kayma (point)
+ORDER_MAGIC = 240601          # Bot emirlerinin magic numarası
+ORDER_DEDUPE_TTL_SECONDS = 3600  # Client order id'lerin dedupe index'inde tutulma süresi
+
+# Paper trading (simulation_mode)
+PAPER_INITIAL_BALANCE = 10000.0  # Paper hesap başlangıç bakiyesi ($)
+PAPER_LATENCY_MS = 50            # Emir gönderimi ile dolum arası simüle gecikme (ms)
+PAPER_SLIPPAGE_POINTS = 3        # Dolumda aleyhte rastgele kayma üst sınırı (point)
+PAPER_COMMISSION_PER_LOT = 7.0   # Lot başına gidiş-dönüş komisyon ($)
+PAPER_LEVERAGE = 100             # Terminal margin hesaplayamazsa kullanılacak kaldıraç
 
 # =============================================================================
 # AI VE ANALİZ PARAMETRELERİ  
@@ -83,6 +118,39 @@ AI_CONFIDENCE_THRESHOLD = 0.05  # Test için %5'e düşürüldü
 SIGNAL_STRENGTH_MIN = 60       # Min sinyal gücü
 NEWS_IMPACT_WEIGHT = 0.3       # Haber etkisi ağırlığı
 
+# Feature store (kapanan barların gösterge vektörleri - ML eğitimi / tahmini)
+FEATURE_STORE_ENABLED = True           # False ise özellikler saklanmaz
+FEATURE_STORE_DIR = 'data/features'    # Sembol başına memory-mapped matris dosyaları
+FEATURE_STORE_CAPACITY = 50000         # Başlangıç kapasitesi (M5 bar) - dolunca ikiye katlanır
+
+# Online ML tahmincisi (feature store üzerinde SGD lojistik regresyon - dördüncü sinyal)
+ML_ENABLED = True                      # False ise ML sinyali üretilmez
+ML_MODEL_FILE = 'data/ml_model.npz'    # Model checkpoint dosyası
+ML_SIGNAL_WEIGHT = 0.2                 # Birleşik skorda ML ağırlığı (diğerleri oransal küçülür)
+ML_LEARNING_RATE = 0.01                # SGD öğrenme oranı
+ML_L2_PENALTY = 0.0001                 # L2 düzenlileştirme
+ML_MIN_UPDATES = 500                   # Bu kadar etiketli bar görülmeden ML sinyali NÖTR
+ML_CHECKPOINT_EVERY = 50               # Bu kadar güncellemede bir checkpoint yazılır
+ML_PER_SYMBOL_MODELS = False           # True ise her sembolün ayrı modeli olur (dosya adı sembolle türetilir)
+ML_MODEL_CACHE_SIZE = 32               # Bellekte tutulacak max sembol modeli (LRU - fazlası checkpoint'lenip atılır)
+
+# =============================================================================
+# BACKTEST AYARLARI
+# =============================================================================
+
+BACKTEST_INITIAL_BALANCE = 10000.0   # Başlangıç bakiyesi ($)
+BACKTEST_COMMISSION_PER_LOT = 7.0    # Lot başına gidiş-dönüş komisyon ($)
+BACKTEST_DEFAULT_SPREAD_POINTS = 20  # Bar verisinde spread yoksa kullanılacak spread (point)
+BACKTEST_EVAL_TIMEFRAME = 'M5'       # Sinyallerin değerlendirildiği bar kapanışları
+BACKTEST_LEVERAGE = 100              # Simüle hesap kaldıracı (margin hesabı)
+EVENT_BACKTEST_CYCLE_SECONDS = 5     # Event backtest'te bot döngüleri arası sanal süre (sn)
+OPTIMIZER_MAX_WORKERS = 4            # Parametre taramasında paralel process sayısı
+OPTIMIZER_MIN_TRADES = 30            # Sıralamaya girmek için gereken min işlem sayısı
+OPTIMIZER_RANDOM_SEED = 42           # Random search için sabit seed
+WALK_FORWARD_TRAIN_DAYS = 60         # Walk-forward eğitim (in-sample) penceresi (gün)
+WALK_FORWARD_TEST_DAYS = 20          # Walk-forward test (out-of-sample) penceresi (gün)
+WALK_FORWARD_STEP_DAYS = 20          # Pencerelerin kayma adımı (gün)
+
 # =============================================================================
 # TELEGRAM BOT AYARLARI
 # =============================================================================
@@ -126,6 +194,14 @@ NEWS_SOURCES = {
     'TRADINGECONOMICS': False  # Economic data
 }
 
+# Ekonomik takvim (yüksek etkili haber blackout)
+ECONOMIC_CALENDAR_FILE = 'data/economic_calendar.json'  # Yerel takvim (JSON veya CSV)
+ECONOMIC_CALENDAR_URL = 'https://nfs.faireconomy.media/ff_calendar_thisweek.json'  # ForexFactory feed
+CALENDAR_REFRESH_HOURS = 6          # Takvim yenileme sıklığı
+CALENDAR_RETRY_SECONDS = 60         # Başarısız yenilemeden sonra ilk bekleme (her hatada ikiye katlanır)
+NEWS_BLACKOUT_MINUTES_BEFORE = 15   # Haberden önce işlem yapma (dk)
+NEWS_BLACKOUT_MINUTES_AFTER = 15    # Haberden sonra işlem yapma (dk)
+
 # =============================================================================
 # SİSTEM AYARLARI
 # =============================================================================
@@ -138,6 +214,16 @@ MAX_LOG_FILES = 10
 
 # Database ayarları
 DATABASE_PATH = 'data/trading_bot.db'
+PNL_LEDGER_FILE = 'data/pnl_ledger.json'  # Günlük P&L defteri ve deal cursor'ı
+PNL_LEDGER_KEEP_DAYS = 30                  # Defterde tutulacak gün sayısı
+MT5_SERVER_UTC_OFFSET_HOURS = None         # Broker sunucu saatinin UTC farkı (None: tick zamanından otomatik tahmin)
+SERVER_OFFSET_CHECK_SECONDS = 600          # Otomatik sunucu saati farkı tahmini sıklığı (sn)
+TRADE_JOURNAL_FILE = 'data/trade_journal.bin'  # Append-only emir/trade günlüğü
+TRADE_JOURNAL_FLUSH_MS = 5                 # Group commit penceresi (ms)
+TRADE_JOURNAL_COMPACT_BYTES = 5 * 1024 * 1024  # Bu boyutu aşınca açılışta snapshot ile sıkıştır
+ORDER_HISTORY_SIZE = 1000                  # Bellekte tutulacak son emir sayısı
+SESSION_RECORD_ENABLED = False             # True ise canlı döngünün tüm dış girdileri kaydedilir (tekrar oynatma için)
+SESSION_RECORD_DIR = 'data/sessions'       # Oturum kayıtlarının klasörü
 BACKUP_INTERVAL_HOURS = 24
 
 # Performance ayarları
@@ -153,6 +239,7 @@ CLEANUP_INTERVAL_MINUTES = 60     # Temizlik sıklığı
 EMERGENCY_STOP_LOSS_PERCENT = 15.0  # Acil durum SL
 MAX_CONSECUTIVE_LOSSES = 5          # Ard arda max 5 zarar
 CIRCUIT_BREAKER_COOLDOWN = 30       # Devre kesici bekleme (dk)
+CIRCUIT_BREAKER_STATE_FILE = 'data/circuit_breaker.json'  # Seri / tetik / equity zirvesi (yeniden başlatmada korunur)
 
 # API güvenliği
 MAX_API_CALLS_PER_MINUTE = 100
@@ -0,0 +1,289 @@
+# data_manager/economic_calendar.py
+"""
+AI Trading Bot - Ekonomik Takvim
+Yüksek etkili haberleri (NFP, FOMC, CPI...) yükler ve para birimi bazında
+sıralı zaman indeksi kurar. "Sembol X, N dakika içinde yüksek etkili bir
+habere yakın mı?" sorusu O(log n) ile cevaplanır. Yenileme bot döngüsünün
+başında bir kez yapılır (sembol döngüsünde ağ isteği yok); başarısız
+denemeler üstel beklemeyle tekrarlanır.
+"""
+
+import json
+import csv
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    NEWS_SOURCES, ECONOMIC_CALENDAR_FILE, ECONOMIC_CALENDAR_URL,
+    CALENDAR_REFRESH_HOURS, CALENDAR_RETRY_SECONDS, NEWS_BLACKOUT_MINUTES_BEFORE, NEWS_BLACKOUT_MINUTES_AFTER
+)
+from utils.helpers import get_symbol_currencies
+
+class EconomicCalendar:
+    """Ekonomik takvim ve haber blackout indeksi"""
+
+    def __init__(self, calendar_file=ECONOMIC_CALENDAR_FILE, feed_url=None, impact_levels=('HIGH',)):
+        """EconomicCalendar'ı başlat"""
+        self.calendar_file = calendar_file
+        self.feed_url = feed_url if feed_url is not None else (
+            ECONOMIC_CALENDAR_URL if NEWS_SOURCES.get('FOREXFACTORY') else None
+        )
+        self.impact_levels = {level.upper() for level in impact_levels}
+
+        # Para birimi -> sıralı event zamanları (epoch saniye) ve event bilgileri
+        self.event_times = {}
+        self.event_details = {}
+        self.last_load = 0.0
+        self.event_count = 0
+
+        # Sonraki yenileme zamanı ve ardışık başarısız deneme sayısı (üstel bekleme)
+        self.next_refresh = 0.0
+        self.failures = 0
+
+        print("📅 EconomicCalendar başlatıldı")
+
+    @property
+    def feed_cache_file(self):
+        """Feed'in yerel kopyası - elle tutulan takvim dosyasının üzerine yazılmaz"""
+        return f"{self.calendar_file}.feed.json" if self.calendar_file else None
+
+    def load_events(self, events):
+        """Event listesinden para birimi bazlı sıralı indeksi kur"""
+        index = {}
+        seen = set()
+
+        for event in events:
+            parsed = self._parse_event(event)
+            if parsed is None:
+                continue
+            # Feed ve yerel dosyada aynı event iki kez indekslenmesin
+            key = (parsed['currency'], parsed['timestamp'], parsed['title'])
+            if key in seen:
+                continue
+            seen.add(key)
+            index.setdefault(parsed['currency'], []).append(parsed)
+
+        event_times = {}
+        event_details = {}
+        for currency, currency_events in index.items():
+            currency_events.sort(key=lambda item: item['timestamp'])
+            event_times[currency] = [item['timestamp'] for item in currency_events]
+            event_details[currency] = currency_events
+
+        # Tek seferde değiştir (okuyan thread yarım indeks görmesin)
+        self.event_times = event_times
+        self.event_details = event_details
+        self.event_count = sum(len(times) for times in event_times.values())
+        self.last_load = time.time()
+        self.next_refresh = self.last_load + CALENDAR_REFRESH_HOURS * 3600
+        self.failures = 0
+
+        print(f"📅 {self.event_count} yüksek etkili event indekslendi ({len(event_times)} para birimi)")
+        return self.event_count
+
+    def load_from_file(self, path=None):
+        """Yerel dosyadan (JSON veya CSV) takvimi yükle"""
+        events = self._read_file(path)
+        return self.load_events(events) if events is not None else None
+
+    def load_from_feed(self):
+        """ForexFactory feed'inden takvimi indir ve feed kopyasına yaz"""
+        events = self._download_feed()
+        return self.load_events(events) if events is not None else None
+
+    def fetch_events(self):
+        """Ham event listesi: feed (olmazsa son feed kopyası) + yerel dosya (hiçbiri yoksa None)
+
+        Yerel takvim dosyası ayrı bir kaynaktır - elle eklenen event'ler feed'le birleştirilir.
+        Takvimin tek dış girdi noktası - oturum kaydı bu çağrıyı kaydeder / oynatır.
+        """
+        feed_events = self._download_feed()
+        if feed_events is None:
+            feed_events = self._read_file(self.feed_cache_file)
+        local_events = self._read_file()
+
+        if feed_events is None and local_events is None:
+            return None
+        return (feed_events or []) + (local_events or [])
+
+    def _read_file(self, path=None):
+        """Yerel takvim dosyasını (JSON veya CSV) oku"""
+        path = path or self.calendar_file
+        if not path or not os.path.exists(path):
+            return None
+
+        try:
+            if path.lower().endswith('.csv'):
+                with open(path, newline='', encoding='utf-8') as f:
+                    return list(csv.DictReader(f))
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+
+        except Exception as e:
+            print(f"❌ Takvim dosyası okunamadı ({path}): {e}")
+            return None
+
+    def _download_feed(self):
+        """Feed'i indir ve <calendar_file>.feed.json kopyasını yaz"""
+        if not self.feed_url:
+            return None
+
+        try:
+            import requests
+            response = requests.get(self.feed_url, timeout=10)
+            response.raise_for_status()
+            events = response.json()
+
+            # Feed erişilemezse kullanılacak kopya (yerel takvim dosyasına dokunulmaz)
+            cache_file = self.feed_cache_file
+            if cache_file:
+                directory = os.path.dirname(cache_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(events, f)
+
+            return events
+
+        except Exception as e:
+            print(f"❌ Takvim feed'i alınamadı: {e}")
+            return None
+
+    def refresh(self, force=False):
+        """Takvim eskidiyse yenile (feed / feed kopyası + yerel dosya) - bot döngüsü başında çağrılır"""
+        now = time.time()
+        if not force and now < self.next_refresh:
+            return self.event_count
+
+        events = self.fetch_events()
+        if events is None:
+            # Eski indeks korunur; tekrar deneme 60 sn, 120 sn, ... en fazla yenileme aralığı kadar ertelenir
+            self.failures += 1
+            delay = min(CALENDAR_RETRY_SECONDS * 2 ** (self.failures - 1), CALENDAR_REFRESH_HOURS * 3600)
+            self.next_refresh = now + delay
+            print(f"⚠️ Takvim yenilenemedi ({self.failures}. deneme) - {delay / 60:.0f} dk sonra tekrar denenecek")
+            return self.event_count
+
+        return self.load_events(events)
+
+    def get_blackout_event(self, symbol, now=None, minutes_before=NEWS_BLACKOUT_MINUTES_BEFORE,
+                           minutes_after=NEWS_BLACKOUT_MINUTES_AFTER):
+        """Sembolün para birimleri için blackout penceresindeki ilk event'i döndür (ağ isteği yapmaz)"""
+        now = time.time() if now is None else now
+        window_start = now - minutes_after * 60
+        window_end = now + minutes_before * 60
+
+        for currency in get_symbol_currencies(symbol):
+            times = self.event_times.get(currency)
+            if not times:
+                continue
+
+            # [now - after, now + before] aralığındaki ilk event (O(log n))
+            position = bisect_left(times, window_start)
+            if position < len(times) and times[position] <= window_end:
+                return self.event_details[currency][position]
+
+        return None
+
+    def is_in_blackout(self, symbol, now=None, minutes_before=NEWS_BLACKOUT_MINUTES_BEFORE,
+                       minutes_after=NEWS_BLACKOUT_MINUTES_AFTER):
+        """Sembol yüksek etkili bir habere N dakika yakın mı?"""
+        return self.get_blackout_event(symbol, now, minutes_before, minutes_after) is not None
+
+    def get_upcoming_events(self, currency, now=None, limit=5):
+        """Bir para birimi için yaklaşan event'leri al"""
+        now = time.time() if now is None else now
+        times = self.event_times.get(currency.upper(), [])
+        position = bisect_left(times, now)
+        return self.event_details.get(currency.upper(), [])[position:position + limit]
+
+    def _parse_event(self, event):
+        """Ham event kaydını normalize et (ForexFactory JSON veya CSV formatı)"""
+        try:
+            impact = str(event.get('impact', '')).strip().upper()
+            if impact not in self.impact_levels:
+                return None
+
+            currency = str(event.get('currency') or event.get('country') or '').strip().upper()
+            if not currency:
+                return None
+
+            raw_date = event.get('date') or event.get('datetime') or event.get('time')
+            if isinstance(raw_date, (int, float)):
+                timestamp = float(raw_date)
+            else:
+                event_time = datetime.fromisoformat(str(raw_date).strip().replace('Z', '+00:00'))
+                if event_time.tzinfo is None:
+                    event_time = event_time.replace(tzinfo=timezone.utc)
+                timestamp = event_time.timestamp()
+
+            return {
+                'currency': currency,
+                'timestamp': timestamp,
+                'time': datetime.fromtimestamp(timestamp),
+                'title': event.get('title', 'Unknown event'),
+                'impact': impact
+            }
+
+        except (TypeError, ValueError):
+            return None
+
+
+# Test fonksiyonu
+def test_economic_calendar():
+    """EconomicCalendar'ı test et"""
+    print("🧪 EconomicCalendar Test Başlıyor...")
+    print("=" * 50)
+
+    calendar = EconomicCalendar(calendar_file=None, feed_url='')
+    now = time.time()
+
+    calendar.load_events([
+        {'title': 'Non-Farm Employment Change', 'country': 'USD', 'impact': 'High',
+         'date': datetime.fromtimestamp(now + 600, tz=timezone.utc).isoformat()},
+        {'title': 'ECB Press Conference', 'country': 'EUR', 'impact': 'High',
+         'date': datetime.fromtimestamp(now + 7200, tz=timezone.utc).isoformat()},
+        {'title': 'German Buba President Speaks', 'country': 'EUR', 'impact': 'Low',
+         'date': datetime.fromtimestamp(now, tz=timezone.utc).isoformat()}
+    ])
+
+    for symbol in ['EURUSD-T', 'GOLD-T', 'BTCUSD-T']:
+        event = calendar.get_blackout_event(symbol, now)
+        if event:
+            print(f"   ⛔ {symbol}: {event['currency']} {event['title']} ({event['time'].strftime('%H:%M')})")
+        else:
+            print(f"   ✅ {symbol}: blackout yok")
+
+    # Kaynak yokken yenileme: indeks korunur, tekrar deneme üstel olarak ertelenir
+    for attempt in range(3):
+        calendar.refresh(force=True)
+    print(f"   Başarısız yenileme: {calendar.failures} deneme, sonraki {calendar.next_refresh - time.time():.0f} sn sonra, "
+          f"indeks {calendar.event_count} event")
+
+    # Feed kopyası + yerel dosya ayrı kaynaklar; yerel dosyanın üzerine yazılmaz
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        local_file = os.path.join(directory, 'economic_calendar.json')
+        manual = [{'title': 'SNB Policy Rate', 'country': 'CHF', 'impact': 'High',
+                   'date': datetime.fromtimestamp(now + 900, tz=timezone.utc).isoformat()}]
+        with open(local_file, 'w', encoding='utf-8') as f:
+            json.dump(manual, f)
+        with open(f"{local_file}.feed.json", 'w', encoding='utf-8') as f:
+            json.dump(manual + [{'title': 'CPI m/m', 'country': 'USD', 'impact': 'High',
+                                 'date': datetime.fromtimestamp(now + 600, tz=timezone.utc).isoformat()}], f)
+
+        cached = EconomicCalendar(calendar_file=local_file, feed_url='')
+        cached.refresh(force=True)
+        with open(local_file, encoding='utf-8') as f:
+            untouched = json.load(f) == manual
+        print(f"   Feed kopyası + yerel dosya: {cached.event_count} event, "
+              f"USDCHF blackout: {cached.is_in_blackout('USDCHF', now)}, yerel dosya korundu: {untouched}")
+
+if __name__ == "__main__":
+    test_economic_calendar()
@@ -16,7 +16,12 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.credentials import MT5_LOGIN, MT5_PASSWORD, MT5_SERVER
-from config.settings import TRADING_SYMBOLS, TIMEFRAMES
+from config.settings import (
+    TRADING_SYMBOLS, TIMEFRAMES, MT5_SERVER_UTC_OFFSET_HOURS, SERVER_OFFSET_CHECK_SECONDS
+)
+
+# Sunucu saati farkı tahminleri (tüm bağlantılar ortak): [(yerel zaman, tahmin sn | None)]
+_server_offset_samples = []
 
 class MT5Connector:
     """MetaTrader 5 bağlantı ve veri yöneticisi"""
@@ -90,6 +95,46 @@ class MT5Connector:
         
         return terminal_info.connected
     
+    def get_server_offset(self):
+        """Broker sunucu saatinin UTC farkı (sn)
+        
+        MT5 zamanları (tick, deal, pozisyon) sunucunun duvar saatini epoch gibi verir.
+        Ayarda verilmemişse en taze tick zamanı ile time.time() farkından (15 dk'ya
+        yuvarlanmış) tahmin edilir. Eski tick farkı küçük gösterdiği için son 24
+        saatteki tahminlerin en büyüğü kullanılır.
+        """
+        if MT5_SERVER_UTC_OFFSET_HOURS is not None:
+            return int(MT5_SERVER_UTC_OFFSET_HOURS * 3600)
+        
+        now = time.time()
+        if not _server_offset_samples or now - _server_offset_samples[-1][0] >= SERVER_OFFSET_CHECK_SECONDS:
+            _server_offset_samples.append((now, self._estimate_server_offset(now)))
+            _server_offset_samples[:] = [sample for sample in _server_offset_samples if now - sample[0] <= 86400]
+        
+        estimates = [estimate for _, estimate in _server_offset_samples if estimate is not None]
+        return max(estimates) if estimates else 0
+    
+    def _estimate_server_offset(self, now):
+        """En taze tick zamanından sunucu saati farkı tahmini (makul aralık dışındaysa None)"""
+        if not self.connected:
+            return None
+        
+        latest = None
+        for config in TRADING_SYMBOLS.values():
+            tick = mt5.symbol_info_tick(config['symbol'])
+            if tick is not None and tick.time:
+                latest = tick.time if latest is None else max(latest, tick.time)
+        
+        if latest is None:
+            return None
+        
+        offset = round((latest - now) / 900) * 900
+        return offset if -12 * 3600 <= offset <= 14 * 3600 else None
+    
+    def server_to_local(self, server_time):
+        """MT5 sunucu zaman damgasını yerel datetime'a çevir"""
+        return datetime.fromtimestamp(server_time - self.get_server_offset())
+    
     def get_account_info(self):
         """Güncel hesap bilgilerini al"""
         if not self.is_connected():
@@ -141,6 +186,12 @@ class MT5Connector:
             'volume_min': info.volume_min,
             'volume_max': info.volume_max,
             'volume_step': info.volume_step,
+            'trade_tick_value': info.trade_tick_value,
+            'trade_tick_size': info.trade_tick_size,
+            'trade_contract_size': info.trade_contract_size,
+            'trade_stops_level': info.trade_stops_level,
+            'currency_profit': info.currency_profit,
+            'currency_margin': info.currency_margin,
             'time': datetime.fromtimestamp(info.time)
         }
     
@@ -185,6 +236,14 @@ class MT5Connector:
             'time': symbol_info['time']
         }
     
+    def calculate_margin(self, order_type, symbol, volume, price):
+        """Emir için gereken margin'i hesapla (hesap para biriminde)"""
+        if not self.is_connected():
+            return None
+        
+        mt5_type = mt5.ORDER_TYPE_BUY if order_type.upper() == 'BUY' else mt5.ORDER_TYPE_SELL
+        return mt5.order_calc_margin(mt5_type, symbol, volume, price)
+    
     def get_positions(self):
         """Açık pozisyonları al"""
         if not self.is_connected():
@@ -209,12 +268,54 @@ class MT5Connector:
                 'profit': pos.profit,
                 'swap': pos.swap,
                 'commission': pos.commission,
-                'time_open': datetime.fromtimestamp(pos.time),
+                'time_open': self.server_to_local(pos.time),
+                'magic': pos.magic,
                 'comment': pos.comment
             })
         
         return position_list
     
+    def get_deals_history(self, date_from, date_to):
+        """Belirli aralıktaki gerçekleşen deal'leri al"""
+        if not self.is_connected():
+            print("❌ MT5 bağlantısı yok")
+            return []
+        
+        deals = mt5.history_deals_get(date_from, date_to)
+        if deals is None:
+            return []
+        
+        deal_types = {mt5.DEAL_TYPE_BUY: 'BUY', mt5.DEAL_TYPE_SELL: 'SELL'}
+        deal_entries = {
+            mt5.DEAL_ENTRY_IN: 'IN',
+            mt5.DEAL_ENTRY_OUT: 'OUT',
+            mt5.DEAL_ENTRY_INOUT: 'INOUT',
+            mt5.DEAL_ENTRY_OUT_BY: 'OUT_BY'
+        }
+        
+        deal_list = []
+        for deal in deals:
+            deal_list.append({
+                'ticket': deal.ticket,
+                'order': deal.order,
+                'position_id': deal.position_id,
+                'symbol': deal.symbol,
+                'type': deal_types.get(deal.type, 'OTHER'),
+                'entry': deal_entries.get(deal.entry, 'OTHER'),
+                'volume': deal.volume,
+                'price': deal.price,
+                'profit': deal.profit,
+                'commission': deal.commission,
+                'swap': deal.swap,
+                'fee': deal.fee,
+                'magic': deal.magic,
+                'comment': deal.comment,
+                'time': self.server_to_local(deal.time),
+                'time_msc': deal.time_msc
+            })
+        
+        return deal_list
+    
     def _get_mt5_timeframe(self, timeframe):
         """Timeframe'i MT5 formatına çevir"""
         timeframe_map = {
@@ -0,0 +1,258 @@
+# trading_engine/circuit_breaker.py
+"""
+AI Trading Bot - Devre Kesici (Circuit Breaker)
+Kapanan deal event'lerinden ard arda zarar serisini ve equity drawdown'u
+takip eder. Limit aşılınca CIRCUIT_BREAKER_COOLDOWN dakika boyunca trading
+durdurulur. Tüm durum güncellemeleri O(1). Seri, tetik ve günlük equity
+zirvesi P&L defterinin yanında saklanır - yeniden başlatma cooldown'u sıfırlamaz.
+"""
+
+import json
+import time
+import threading
+from datetime import datetime, date
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    MAX_CONSECUTIVE_LOSSES, CIRCUIT_BREAKER_COOLDOWN, EMERGENCY_STOP_LOSS_PERCENT,
+    CIRCUIT_BREAKER_STATE_FILE
+)
+
+# Pozisyon kapatan deal girişleri
+CLOSING_ENTRIES = ('OUT', 'INOUT', 'OUT_BY')
+
+class CircuitBreaker:
+    """Zarar serisi ve drawdown bazlı devre kesici"""
+
+    def __init__(self, max_consecutive_losses=MAX_CONSECUTIVE_LOSSES,
+                 cooldown_minutes=CIRCUIT_BREAKER_COOLDOWN,
+                 max_drawdown_percent=EMERGENCY_STOP_LOSS_PERCENT,
+                 state_file=CIRCUIT_BREAKER_STATE_FILE):
+        """CircuitBreaker'ı başlat"""
+        self.state_file = state_file
+        self.max_consecutive_losses = max_consecutive_losses
+        self.cooldown_seconds = cooldown_minutes * 60
+        self.max_drawdown_percent = max_drawdown_percent
+        self.lock = threading.Lock()
+
+        self.consecutive_losses = 0
+        self.peak_equity = 0.0
+        self.current_drawdown = 0.0
+        self.peak_day = date.today()
+
+        self.tripped_until = 0.0
+        self.trip_reason = None
+        self.trip_count = 0
+
+        self._load()
+        print("🧯 CircuitBreaker başlatıldı")
+
+    def on_deal_closed(self, pnl):
+        """Kapanan trade sonucu event'i
+
+        Cooldown zararın görüldüğü andan (time.time()) başlar; deal zamanı broker
+        sunucu saatinde olduğu için yerel epoch ile karşılaştırılamaz.
+        """
+        with self.lock:
+            if pnl < 0:
+                self.consecutive_losses += 1
+            else:
+                self.consecutive_losses = 0
+
+            if self.consecutive_losses >= self.max_consecutive_losses:
+                self._trip(f'Ard arda {self.consecutive_losses} zarar', time.time())
+
+        self._save()
+
+    def on_deals(self, deals):
+        """P&L defterinden gelen yeni deal listesini işle"""
+        for deal in deals:
+            if deal.get('entry') in CLOSING_ENTRIES:
+                self.on_deal_closed(deal.get('pnl', deal.get('profit', 0.0)))
+
+    def on_equity(self, equity):
+        """Equity güncellemesi - günlük zirveden drawdown kontrolü"""
+        if not equity:
+            return
+
+        with self.lock:
+            previous = (self.peak_equity, self.tripped_until)
+            today = date.today()
+            if today != self.peak_day:
+                self.peak_day = today
+                self.peak_equity = equity
+
+            if equity > self.peak_equity:
+                self.peak_equity = equity
+
+            self.current_drawdown = (self.peak_equity - equity) / self.peak_equity * 100 if self.peak_equity else 0.0
+
+            if self.current_drawdown >= self.max_drawdown_percent:
+                self._trip(f'Equity drawdown %{self.current_drawdown:.1f}', time.time())
+
+            changed = previous != (self.peak_equity, self.tripped_until)
+
+        # Sadece zirve veya tetik değişince diske yazılır
+        if changed:
+            self._save()
+
+    def is_tripped(self, now=None):
+        """Devre kesici aktif mi? - O(1)"""
+        if not self.tripped_until:
+            return False
+
+        now = time.time() if now is None else now
+        if now < self.tripped_until:
+            return True
+
+        with self.lock:
+            expired = bool(self.tripped_until) and now >= self.tripped_until
+            if expired:
+                print(f"🟢 Devre kesici sıfırlandı (neden: {self.trip_reason})")
+                self.tripped_until = 0.0
+                self.trip_reason = None
+                self.consecutive_losses = 0
+
+        if expired:
+            self._save()
+        return False
+
+    def get_remaining_seconds(self, now=None):
+        """Cooldown bitimine kalan süre"""
+        now = time.time() if now is None else now
+        return max(0.0, self.tripped_until - now) if self.tripped_until else 0.0
+
+    def reset(self):
+        """Devre kesiciyi elle sıfırla"""
+        with self.lock:
+            self.tripped_until = 0.0
+            self.trip_reason = None
+            self.consecutive_losses = 0
+        self._save()
+
+    def get_status(self):
+        """Durum özeti"""
+        tripped = self.is_tripped()
+        return {
+            'tripped': tripped,
+            'reason': self.trip_reason,
+            'remaining_seconds': self.get_remaining_seconds(),
+            'consecutive_losses': self.consecutive_losses,
+            'max_consecutive_losses': self.max_consecutive_losses,
+            'drawdown_percent': self.current_drawdown,
+            'max_drawdown_percent': self.max_drawdown_percent,
+            'trip_count': self.trip_count
+        }
+
+    def get_state(self):
+        """Kalıcı durum (seri, tetik, günlük equity zirvesi)"""
+        with self.lock:
+            return {
+                'consecutive_losses': self.consecutive_losses,
+                'tripped_until': self.tripped_until,
+                'trip_reason': self.trip_reason,
+                'trip_count': self.trip_count,
+                'peak_equity': self.peak_equity,
+                'peak_day': self.peak_day.isoformat()
+            }
+
+    def load_state(self, state):
+        """get_state() çıktısını geri yükle - süresi dolmuş tetik ve eski günün zirvesi atlanır"""
+        if not state:
+            return
+
+        with self.lock:
+            self.consecutive_losses = int(state.get('consecutive_losses', 0))
+            self.trip_count = int(state.get('trip_count', 0))
+
+            tripped_until = float(state.get('tripped_until') or 0.0)
+            if tripped_until > time.time():
+                self.tripped_until = tripped_until
+                self.trip_reason = state.get('trip_reason')
+
+            if state.get('peak_day') == date.today().isoformat():
+                self.peak_equity = float(state.get('peak_equity', 0.0))
+
+    def _load(self):
+        """Kalıcı durumu yükle"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                self.load_state(json.load(f))
+
+            if self.tripped_until:
+                print(f"🧯 Devre kesici önceki oturumdan aktif: {self.trip_reason} - "
+                      f"{datetime.fromtimestamp(self.tripped_until).strftime('%H:%M')}'e kadar")
+
+        except Exception as e:
+            print(f"❌ Devre kesici durumu okunamadı: {e}")
+
+    def _save(self):
+        """Durumu atomik olarak diske yaz"""
+        if not self.state_file:
+            return
+
+        try:
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            state = self.get_state()
+            temp_file = f"{self.state_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.state_file)
+
+        except Exception as e:
+            print(f"❌ Devre kesici durumu yazılamadı: {e}")
+
+    def _trip(self, reason, event_time):
+        """Devre kesiciyi tetikle (lock altında çağrılır)"""
+        until = event_time + self.cooldown_seconds
+        if until <= time.time() or until <= self.tripped_until:
+            return
+
+        self.tripped_until = until
+        self.trip_reason = reason
+        self.trip_count += 1
+
+        print(f"🧯 DEVRE KESİCİ TETİKLENDİ: {reason} - "
+              f"{datetime.fromtimestamp(until).strftime('%H:%M')}'e kadar trading durduruldu")
+
+
+# Test fonksiyonu
+def test_circuit_breaker():
+    """CircuitBreaker'ı test et"""
+    print("🧪 CircuitBreaker Test Başlıyor...")
+    print("=" * 50)
+
+    breaker = CircuitBreaker(max_consecutive_losses=3, cooldown_minutes=30, max_drawdown_percent=15.0,
+                             state_file=None)
+
+    for pnl in [12.0, -5.0, -7.5, -3.0]:
+        breaker.on_deal_closed(pnl)
+        print(f"   P&L {pnl:+.1f} -> seri: {breaker.consecutive_losses}, aktif: {breaker.is_tripped()}")
+
+    # Sunucu saati (ör. GMT+3) cooldown'u uzatmaz - süre zararın görüldüğü andan başlar
+    print(f"   Kalan cooldown: {breaker.get_remaining_seconds() / 60:.1f} dk (max 30)")
+    print(f"   Cooldown sonrası aktif: {breaker.is_tripped(now=time.time() + 31 * 60)}")
+
+    breaker.on_equity(10000.0)
+    breaker.on_equity(8400.0)
+    print(f"   Drawdown sonrası: {breaker.get_status()}")
+
+    # Yeniden başlatma: seri, tetik ve zirve korunur
+    restored = CircuitBreaker(max_consecutive_losses=3, cooldown_minutes=30, max_drawdown_percent=15.0,
+                              state_file=None)
+    restored.load_state(breaker.get_state())
+    print(f"   Yeniden başlatma sonrası: aktif {restored.is_tripped()}, zirve ${restored.peak_equity:.0f}, "
+          f"neden: {restored.trip_reason}")
+
+if __name__ == "__main__":
+    test_circuit_breaker()
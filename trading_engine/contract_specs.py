@@ -0,0 +1,195 @@
+# trading_engine/contract_specs.py
+"""
+AI Trading Bot - Kontrat Bilgisi Cache'i
+Sembol başına symbol_info'dan (tick_value, tick_size, contract size, volume
+adımı) kurulan kontrat bilgisi ve fiyat aralığı (bucket) bazında memoize
+edilen order_calc_margin sonuçları. Lot hesabı sembol isimlendirmesinden
+bağımsız ve çağrı başına O(1) olur.
+"""
+
+import math
+import threading
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import TRADING_SYMBOLS, MARGIN_PRICE_BUCKET_PERCENT, MAX_ORDER_LOTS
+from utils.helpers import get_symbol_config, get_broker_symbol
+
+class ContractSpecCache:
+    """Sembol başına kontrat bilgisi ve margin cache'i"""
+
+    def __init__(self, bucket_percent=MARGIN_PRICE_BUCKET_PERCENT):
+        """ContractSpecCache'i başlat"""
+        self.specs = {}             # broker sembolü -> kontrat bilgisi
+        self.margin_cache = {}      # (sembol, yön, bucket) -> 1 lot margin
+        self.bucket_log_step = math.log1p(bucket_percent / 100)
+        self.lock = threading.Lock()
+
+        # Yedek bilgiler (terminal yokken) config'ten
+        for config in TRADING_SYMBOLS.values():
+            self.specs[config['symbol']] = self._spec_from_config(config['symbol'], config)
+
+        print("📐 ContractSpecCache başlatıldı")
+
+    def load(self, mt5_conn, symbols=None):
+        """Sembollerin kontrat bilgisini terminalden yükle"""
+        if symbols is None:
+            symbols = [config['symbol'] for config in TRADING_SYMBOLS.values()]
+
+        loaded = 0
+        for symbol in symbols:
+            symbol = get_broker_symbol(symbol)
+            info = mt5_conn.get_symbol_info(symbol)
+            if not info:
+                continue
+
+            spec = self._spec_from_symbol_info(symbol, info)
+            if spec:
+                with self.lock:
+                    self.specs[symbol] = spec
+                    # Kontrat değiştiyse eski margin'ler geçersiz
+                    self.margin_cache = {key: value for key, value in self.margin_cache.items() if key[0] != symbol}
+                loaded += 1
+
+        return loaded
+
+    def ensure_loaded(self, mt5_conn, symbols=None):
+        """Henüz terminalden yüklenmemiş sembolleri yükle (tek seferlik)"""
+        if symbols is None:
+            symbols = [config['symbol'] for config in TRADING_SYMBOLS.values()]
+
+        missing = [symbol for symbol in symbols
+                   if self.specs.get(get_broker_symbol(symbol), {}).get('source') != 'mt5']
+        return self.load(mt5_conn, missing) if missing else 0
+
+    def get(self, symbol):
+        """Kontrat bilgisi (config anahtarı veya broker sembolü) - O(1)"""
+        spec = self.specs.get(symbol)
+        if spec is None:
+            spec = self.specs.get(get_broker_symbol(symbol))
+        if spec is None:
+            config = get_symbol_config(symbol)
+            if config:
+                spec = self._spec_from_config(config['symbol'], config)
+        return spec
+
+    def get_money_per_lot(self, symbol, price_distance):
+        """1 lot için fiyat farkının hesap para birimindeki değeri"""
+        spec = self.get(symbol)
+        if not spec or not spec['tick_size']:
+            return None
+        return abs(price_distance) / spec['tick_size'] * spec['tick_value']
+
+    def get_point_value_per_lot(self, symbol):
+        """1 lot için 1 point'in değeri"""
+        spec = self.get(symbol)
+        if not spec or not spec['tick_size']:
+            return None
+        return spec['point'] / spec['tick_size'] * spec['tick_value']
+
+    def get_margin_per_lot(self, symbol, order_type, price, mt5_conn=None):
+        """1 lot için margin - fiyat bucket'ı başına bir kez order_calc_margin çağrılır"""
+        spec = self.get(symbol)
+        if not spec or not price or price <= 0:
+            return None
+
+        symbol = spec['symbol']
+        key = (symbol, order_type.upper(), int(math.floor(math.log(price) / self.bucket_log_step)))
+
+        margin = self.margin_cache.get(key)
+        if margin is not None:
+            return margin
+
+        if mt5_conn is None or not mt5_conn.connected:
+            return None
+
+        margin = mt5_conn.calculate_margin(order_type, symbol, 1.0, price)
+        if margin is None:
+            return None
+
+        with self.lock:
+            self.margin_cache[key] = margin
+        return margin
+
+    def normalize_volume(self, symbol, volume):
+        """Lotu min/max sınırlarına (ve MAX_ORDER_LOTS tavanına) ve volume adımına yuvarla"""
+        spec = self.get(symbol)
+        if not spec:
+            return round(min(volume, MAX_ORDER_LOTS), 2)
+
+        step = spec['volume_step'] or 0.01
+        volume = max(spec['volume_min'], min(volume, spec['volume_max'], MAX_ORDER_LOTS))
+        steps = math.floor(volume / step + 1e-9)
+        digits = max(0, -int(math.floor(math.log10(step))))
+        return round(max(spec['volume_min'], steps * step), digits)
+
+    def _spec_from_symbol_info(self, symbol, info):
+        """MT5 symbol_info sözlüğünden kontrat bilgisi"""
+        if not info.get('trade_tick_size'):
+            return None
+
+        config = get_symbol_config(symbol) or {}
+        volume_max = info['volume_max']
+        if config.get('max_lot'):
+            volume_max = min(volume_max, config['max_lot'])
+
+        return {
+            'symbol': symbol,
+            'point': info['point'],
+            'digits': info['digits'],
+            'tick_size': info['trade_tick_size'],
+            'tick_value': info['trade_tick_value'],
+            'contract_size': info['trade_contract_size'],
+            'volume_min': max(info['volume_min'], config.get('min_lot', 0.0)),
+            'volume_max': volume_max,
+            'volume_step': info['volume_step'],
+            'stops_level': info.get('trade_stops_level', 0),
+            'currency_profit': info.get('currency_profit'),
+            'currency_margin': info.get('currency_margin'),
+            'source': 'mt5'
+        }
+
+    def _spec_from_config(self, symbol, config):
+        """Config'ten yedek kontrat bilgisi (USD kotasyonlu semboller için tam doğru)"""
+        point = config['point_value']
+        contract_size = config.get('contract_size', 100000)
+        digits = max(0, -int(math.floor(math.log10(point)))) if point < 1 else 0
+
+        return {
+            'symbol': symbol,
+            'point': point,
+            'digits': digits,
+            'tick_size': point,
+            'tick_value': point * contract_size,
+            'contract_size': contract_size,
+            'volume_min': config['min_lot'],
+            'volume_max': config['max_lot'],
+            'volume_step': 0.01,
+            'stops_level': 0,
+            'currency_profit': None,
+            'currency_margin': None,
+            'source': 'config'
+        }
+
+
+# Test fonksiyonu
+def test_contract_specs():
+    """ContractSpecCache'i test et"""
+    print("🧪 ContractSpecCache Test Başlıyor...")
+    print("=" * 50)
+
+    cache = ContractSpecCache()
+
+    for symbol in ['EURUSD', 'EURUSD-T', 'GOLD-T', 'BTCUSD-T']:
+        spec = cache.get(symbol)
+        print(f"   {symbol}: tick {spec['tick_size']} = ${spec['tick_value']:.2f}, "
+              f"20 point SL/lot = ${cache.get_money_per_lot(symbol, 20 * spec['point']):.2f}")
+
+    print(f"   Lot normalize (0.1234 EURUSD-T): {cache.normalize_volume('EURUSD-T', 0.1234)}")
+    print(f"   Lot normalize (13.3 EURUSD-T, tavan {MAX_ORDER_LOTS}): {cache.normalize_volume('EURUSD-T', 13.3)}")
+
+if __name__ == "__main__":
+    test_contract_specs()
@@ -0,0 +1,252 @@
+# trading_engine/correlation_engine.py
+"""
+AI Trading Bot - Rolling Korelasyon Motoru
+Sembol getirileri üzerinde kayan pencereli kovaryans/korelasyon matrisi.
+Her bar için running sum'lar O(sembol²) ile güncellenir, pencere baştan
+hesaplanmaz. Birkaç yüz sembollük evrene ölçeklenir.
+
+Fiyatı olmayan (ilk bar, eksik tick) semboller o barda geçersiz sayılır;
+sayaç ve toplamlar çift bazında tutulur, istatistikler sadece iki sembolün
+de geçerli olduğu barlardan hesaplanır. Kayan nokta birikimi için running
+sum'lar CORRELATION_RESYNC_BARS barda bir ring buffer'dan yeniden kurulur.
+"""
+
+import threading
+import numpy as np
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    TRADING_SYMBOLS, CORRELATION_WINDOW_BARS, CORRELATION_THRESHOLD, CORRELATION_RESYNC_BARS
+)
+
+class RollingCorrelationEngine:
+    """Artımlı rolling kovaryans ve korelasyon motoru"""
+
+    def __init__(self, symbols=None, window=CORRELATION_WINDOW_BARS, resync_bars=CORRELATION_RESYNC_BARS):
+        """RollingCorrelationEngine'i başlat"""
+        if symbols is None:
+            symbols = [config['symbol'] for config in TRADING_SYMBOLS.values()]
+
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.resync_bars = resync_bars
+        self.lock = threading.Lock()
+
+        n = len(self.symbols)
+
+        # Pencere içindeki getiriler ve geçerlilik maskesi (ring buffer) - geçersiz getiri 0 olarak saklanır
+        self.returns = np.zeros((window, n), dtype=np.float64)
+        self.valid = np.zeros((window, n), dtype=np.float64)
+
+        # Çift bazında running sum'lar ([a, b]: a ve b'nin birlikte geçerli olduğu barlar üzerinden)
+        self.pair_counts = np.zeros((n, n), dtype=np.float64)     # Σ v_a v_b
+        self.pair_sums = np.zeros((n, n), dtype=np.float64)       # Σ r_a v_b
+        self.pair_squares = np.zeros((n, n), dtype=np.float64)    # Σ r_a² v_b
+        self.sum_products = np.zeros((n, n), dtype=np.float64)    # Σ r_a r_b
+        self.scratch = np.empty((n, n), dtype=np.float64)
+        self.position = 0
+        self.count = 0
+        self.updates_since_resync = 0
+
+        # Getiri hesabı için son kapanışlar
+        self.last_prices = np.full(n, np.nan, dtype=np.float64)
+
+        print(f"🔗 RollingCorrelationEngine başlatıldı ({n} sembol, {window} bar pencere)")
+
+    def update_prices(self, prices):
+        """Yeni bar kapanışlarını ekle (symbol -> close). Getiriler log-return olarak hesaplanır"""
+        closes = self.last_prices.copy()
+        bar_returns = np.full(len(self.symbols), np.nan, dtype=np.float64)
+        for symbol, price in prices.items():
+            index = self.symbol_index.get(symbol)
+            if index is not None and price and price > 0:
+                closes[index] = price
+                # İlk fiyat getiri üretmez; eksik bar sonrası getiri son bilinen fiyattan
+                if self.last_prices[index] > 0:
+                    bar_returns[index] = np.log(price / self.last_prices[index])
+
+        self.last_prices = closes
+
+        if np.isnan(closes).all():
+            return False
+
+        self.update_returns(bar_returns)
+        return True
+
+    def update_returns(self, bar_returns):
+        """Bir barlık getiri vektörünü pencereye ekle (NaN = o barda geçersiz) - O(sembol²)"""
+        bar_returns = np.asarray(bar_returns, dtype=np.float64)
+        valid = np.isfinite(bar_returns).astype(np.float64)
+        bar_returns = np.where(valid > 0, bar_returns, 0.0)
+
+        with self.lock:
+            if self.count == self.window:
+                # Pencereden çıkan barın katkısını geri al
+                self._accumulate(self.returns[self.position], self.valid[self.position], -1.0)
+            else:
+                self.count += 1
+
+            self.returns[self.position] = bar_returns
+            self.valid[self.position] = valid
+            self._accumulate(bar_returns, valid, 1.0)
+
+            self.position = (self.position + 1) % self.window
+
+            # Ekle/çıkar birikimi sıfırlanır - toplamlar pencereden yeniden kurulur
+            self.updates_since_resync += 1
+            if self.resync_bars and self.updates_since_resync >= self.resync_bars:
+                self._resync()
+
+    def _accumulate(self, bar_returns, valid, sign):
+        """Bir barın çift bazındaki katkısını ekle (sign=1) veya çıkar (sign=-1) - lock altında çağrılır"""
+        # Dış çarpımlar tek bir ara matrise yazılır (sembol² boyutlu geçici dizi ayrılmaz)
+        scratch = self.scratch
+        signed = sign * valid
+        for total, left, right in ((self.pair_counts, signed, valid), (self.pair_sums, bar_returns, signed),
+                                   (self.pair_squares, bar_returns * bar_returns, signed),
+                                   (self.sum_products, sign * bar_returns, bar_returns)):
+            np.outer(left, right, out=scratch)
+            total += scratch
+
+    def _resync(self):
+        """Running sum'ları ring buffer'dan baştan hesapla - lock altında çağrılır"""
+        returns = self.returns[:self.count]
+        valid = self.valid[:self.count]
+        self.pair_counts = valid.T @ valid
+        self.pair_sums = returns.T @ valid
+        self.pair_squares = (returns * returns).T @ valid
+        self.sum_products = returns.T @ returns
+        self.updates_since_resync = 0
+
+    def get_covariance_matrix(self):
+        """Örneklem kovaryans matrisi (çift bazında running sum'lardan, O(sembol²))
+
+        İkiden az ortak geçerli barı olan çiftlerin kovaryansı 0 kabul edilir.
+        """
+        with self.lock:
+            if self.count < 2:
+                return None
+
+            counts = self.pair_counts.copy()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                covariance = (self.sum_products - self.pair_sums * self.pair_sums.T / counts) / (counts - 1)
+
+        covariance[~(counts >= 2) | ~np.isfinite(covariance)] = 0.0
+        return covariance
+
+    def get_correlation_matrix(self):
+        """Korelasyon matrisi (her çift kendi ortak geçerli barları üzerinden)"""
+        with self.lock:
+            if self.count < 2:
+                return None
+
+            counts = self.pair_counts.copy()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                covariance = self.sum_products - self.pair_sums * self.pair_sums.T / counts
+                variance = np.clip(self.pair_squares - self.pair_sums * self.pair_sums / counts, 0.0, None)
+                correlation = covariance / np.sqrt(variance * variance.T)
+
+        # Sabit seriler (std=0) ve ortak barı yetersiz çiftler korelasyonsuz kabul edilir
+        correlation[~(counts >= 2) | ~np.isfinite(correlation)] = 0.0
+        np.clip(correlation, -1.0, 1.0, out=correlation)
+        np.fill_diagonal(correlation, 1.0)
+        return correlation
+
+    def get_correlation(self, symbol_a, symbol_b):
+        """İki sembol arasındaki korelasyon - O(1)"""
+        index_a = self.symbol_index.get(symbol_a)
+        index_b = self.symbol_index.get(symbol_b)
+        if index_a is None or index_b is None:
+            return 0.0
+        if index_a == index_b:
+            return 1.0
+
+        with self.lock:
+            n = self.pair_counts[index_a, index_b]
+            if n < 2:
+                return 0.0
+
+            sum_a = self.pair_sums[index_a, index_b]
+            sum_b = self.pair_sums[index_b, index_a]
+            cov_ab = self.sum_products[index_a, index_b] - sum_a * sum_b / n
+            var_a = self.pair_squares[index_a, index_b] - sum_a * sum_a / n
+            var_b = self.pair_squares[index_b, index_a] - sum_b * sum_b / n
+
+        if var_a <= 0 or var_b <= 0:
+            return 0.0
+
+        return float(np.clip(cov_ab / np.sqrt(var_a * var_b), -1.0, 1.0))
+
+    def get_correlation_mask(self, threshold=CORRELATION_THRESHOLD):
+        """|korelasyon| >= eşik olan sembol çiftleri için boolean matris (köşegen dahil)"""
+        correlation = self.get_correlation_matrix()
+        if correlation is None:
+            return np.eye(len(self.symbols), dtype=bool)
+        return np.abs(correlation) >= threshold
+
+    def get_correlated_symbols(self, symbol, candidates, threshold=CORRELATION_THRESHOLD):
+        """Verilen aday semboller arasından |korelasyon| >= eşik olanları döndür"""
+        return [
+            other for other in candidates
+            if other != symbol and abs(self.get_correlation(symbol, other)) >= threshold
+        ]
+
+    def is_ready(self, min_bars=None):
+        """Korelasyon için yeterli bar toplandı mı?"""
+        min_bars = min_bars if min_bars is not None else min(30, self.window)
+        return self.count >= min_bars
+
+
+# Test fonksiyonu
+def test_correlation_engine():
+    """RollingCorrelationEngine'i test et"""
+    import time
+
+    print("🧪 RollingCorrelationEngine Test Başlıyor...")
+    print("=" * 50)
+
+    rng = np.random.default_rng(42)
+
+    # Korelasyonlu 3 sembol
+    engine = RollingCorrelationEngine(['EURUSD-T', 'GBPUSD-T', 'GOLD-T'], window=200)
+    common = rng.normal(0, 1e-4, 500)
+    for step in range(500):
+        engine.update_returns([
+            common[step] + rng.normal(0, 3e-5),
+            common[step] * 0.8 + rng.normal(0, 3e-5),
+            rng.normal(0, 1e-4)
+        ])
+
+    print(f"   EURUSD/GBPUSD: {engine.get_correlation('EURUSD-T', 'GBPUSD-T'):.2f}")
+    print(f"   EURUSD/GOLD:   {engine.get_correlation('EURUSD-T', 'GOLD-T'):.2f}")
+
+    # Eksik fiyatlar: ilk bar ve tick'i gelmeyen semboller 0 getiri olarak pencereye girmez
+    sparse = RollingCorrelationEngine(['A', 'B', 'C'], window=100, resync_bars=37)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, (300, 3)), axis=0))
+    prices[:, 1] = prices[:, 0] * np.exp(rng.normal(0, 2e-4, 300))
+    missing = rng.random((300, 3)) < 0.2
+    for step in range(300):
+        sparse.update_prices({symbol: prices[step, i] for i, symbol in enumerate('ABC') if not missing[step, i]})
+
+    window_returns = np.where(sparse.valid > 0, sparse.returns, np.nan)
+    both = np.isfinite(window_returns[:, 0]) & np.isfinite(window_returns[:, 1])
+    expected = np.corrcoef(window_returns[both, 0], window_returns[both, 1])[0, 1]
+    print(f"   Eksik fiyatlı A/B: {sparse.get_correlation('A', 'B'):.4f} (ortak {int(sparse.pair_counts[0, 1])} bar, "
+          f"doğrudan hesap {expected:.4f})")
+
+    # Ölçek testi: 300 sembol
+    big = RollingCorrelationEngine([f'SYM{i}' for i in range(300)], window=500)
+    bars = rng.normal(0, 1e-4, (1000, 300))
+    start = time.perf_counter()
+    for bar in bars:
+        big.update_returns(bar)
+    elapsed = time.perf_counter() - start
+    print(f"   300 sembol: bar başına {elapsed / len(bars) * 1000:.2f} ms güncelleme")
+
+if __name__ == "__main__":
+    test_correlation_engine()
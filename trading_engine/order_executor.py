@@ -6,364 +6,742 @@ Bu modül gerçek MT5 emirlerini çalıştırır
 
 import MetaTrader5 as mt5
 import time
-from datetime import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import sys
 import os
 
 # Parent directory'yi ekle
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import TRADING_SYMBOLS
+from config.settings import (
+    TRADING_SYMBOLS, CLOSE_ALL_MAX_WORKERS, ORDER_RETRY_MAX_ATTEMPTS,
+    ORDER_RETRY_DEADLINE_MS, ORDER_MAX_SLIPPAGE_POINTS, ORDER_HISTORY_SIZE,
+    ORDER_MAGIC, ORDER_DEDUPE_TTL_SECONDS, MAX_ORDER_LOTS
+)
 from data_manager.mt5_connector import MT5Connector
+from trading_engine.contract_specs import ContractSpecCache
+from utils.helpers import LatencyHistogram
+
+# Taze fiyatla tekrar gönderilebilecek red kodları
+RETRYABLE_RETCODES = (
+    mt5.TRADE_RETCODE_REQUOTE,
+    mt5.TRADE_RETCODE_PRICE_CHANGED,
+    mt5.TRADE_RETCODE_PRICE_OFF
+)
+
+# Sonucu belirsiz bırakan kodlar - emir dolmuş olabilir, terminalden sorulur
+UNCERTAIN_RETCODES = (
+    mt5.TRADE_RETCODE_TIMEOUT,
+    mt5.TRADE_RETCODE_CONNECTION
+)
+
+# Emir yorumunda client order id öneki
+CLIENT_ID_TAG = '#'
+
+def _to_base36(number):
+    """Pozitif tamsayıyı base36 metne çevir"""
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    text = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
 
 class OrderExecutor:
     """MT5 emir çalıştırma sınıfı"""
     
-    def __init__(self):
+    def __init__(self, mt5_conn=None, contract_specs=None, journal=None):
         """OrderExecutor'ı başlat"""
         self.active_orders = {}
-        self.order_history = []
+        self.order_history = deque(maxlen=ORDER_HISTORY_SIZE)
+        
+        # Kalıcı emir/trade günlüğü (opsiyonel)
+        self.journal = journal
+        
+        # Client order id -> durum (TTL ile düşen dedupe index'i)
+        self.client_orders = OrderedDict()
+        self.client_lock = threading.Lock()
+        self.client_prefix = _to_base36(int(time.time()))[-6:]
+        self.client_sequence = 0
+        
+        # Kalıcı terminal oturumu (bot'un bağlantısı veya executor'ın kendi bağlantısı)
+        self.mt5_conn = mt5_conn
+        self.owns_session = False
+        
+        # Sembol başına kontrat bilgisi ve hazır request şablonları
+        self.contract_specs = contract_specs if contract_specs is not None else ContractSpecCache()
+        self.request_templates = {}
+        
+        # order_send -> cevap gecikmesi
+        self.send_latency = LatencyHistogram()
+        
+        # Requote tekrar deneme istatistikleri
+        self.retry_latency = LatencyHistogram()
+        self.stats_lock = threading.Lock()
+        self.retry_stats = {
+            'submissions': 0,
+            'retried': 0,
+            'retries': 0,
+            'recovered': 0,
+            'exhausted': 0,
+            'deadline': 0,
+            'slippage': 0
+        }
+        
         print("⚡ OrderExecutor başlatıldı")
     
-    def execute_market_order(self, symbol, order_type, lot_size, stop_loss=None, take_profit=None, comment="AI Bot"):
-        """Market emri çalıştır"""
+    def attach_session(self, mt5_conn):
+        """Dışarıda açılmış kalıcı MT5 oturumunu kullan"""
+        if self.owns_session and self.mt5_conn is not mt5_conn:
+            self.mt5_conn.disconnect()
+        self.mt5_conn = mt5_conn
+        self.owns_session = False
+        
+        if mt5_conn and mt5_conn.connected:
+            self.contract_specs.ensure_loaded(mt5_conn)
+    
+    def close(self):
+        """Executor'ın kendi açtığı oturumu kapat"""
+        if self.owns_session and self.mt5_conn:
+            self.mt5_conn.disconnect()
+        self.mt5_conn = None
+        self.owns_session = False
+    
+    def _get_session(self):
+        """Kalıcı MT5 oturumunu döndür - yoksa bir kez bağlan"""
+        if self.mt5_conn is not None and self.mt5_conn.connected:
+            return self.mt5_conn
+        
+        mt5_conn = MT5Connector()
+        if not mt5_conn.connect():
+            return None
+        
+        self.mt5_conn = mt5_conn
+        self.owns_session = True
+        self.contract_specs.ensure_loaded(mt5_conn)
+        return mt5_conn
+    
+    def _get_request_template(self, symbol):
+        """Sembol için önceden kurulmuş market emri şablonu"""
+        template = self.request_templates.get(symbol)
+        if template is None:
+            template = {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": symbol,
+                "deviation": 100,
+                "magic": ORDER_MAGIC,
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_RETURN,
+            }
+            self.request_templates[symbol] = template
+        return template
+    
+    def _journal(self, event_type, data):
+        """Günlüğe event ekle (günlük yoksa hiçbir şey yapma)"""
+        if self.journal is not None:
+            self.journal.append(event_type, data)
+    
+    def _journal_result(self, request, result, send_info):
+        """order_send sonucunu günlüğe ekle"""
+        if self.journal is None:
+            return
+        self.journal.append('result', {
+            'symbol': request['symbol'],
+            'position': request.get('position'),
+            'retcode': result.retcode if result is not None else None,
+            'order': result.order if result is not None else None,
+            'deal': result.deal if result is not None else None,
+            'price': result.price if result is not None else None,
+            'volume': result.volume if result is not None else None,
+            'attempts': send_info['attempts'],
+            'total_ms': send_info['total_ms'],
+            'abort_reason': send_info['abort_reason']
+        })
+    
+    def _timed_order_send(self, request):
+        """order_send çağrısı - gönderim->cevap gecikmesi histograma yazılır"""
+        start = time.perf_counter()
+        result = mt5.order_send(request)
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.send_latency.record(latency_ms)
+        return result, latency_ms
+    
+    def _send_with_requote_retry(self, request, reference_price=None):
+        """Emri gönder; requote / fiyat değişti redlerinde sadece taze tick okuyup tekrar gönder
+        
+        Tekrar denemeler ORDER_RETRY_MAX_ATTEMPTS, ORDER_RETRY_DEADLINE_MS ve (reference_price
+        verilmişse) ORDER_MAX_SLIPPAGE_POINTS aleyhte kayma bütçesiyle sınırlıdır.
+        """
+        start = time.perf_counter()
+        deadline = start + ORDER_RETRY_DEADLINE_MS / 1000
+        is_buy = request["type"] == mt5.ORDER_TYPE_BUY
+        
+        spec = self.contract_specs.get(request["symbol"])
+        slippage_budget = ORDER_MAX_SLIPPAGE_POINTS * spec['point'] if spec else None
+        
+        attempts = 0
+        abort_reason = None
+        while True:
+            attempts += 1
+            result, latency_ms = self._timed_order_send(request)
+            
+            if result is None or result.retcode not in RETRYABLE_RETCODES:
+                break
+            if attempts > ORDER_RETRY_MAX_ATTEMPTS:
+                abort_reason = 'exhausted'
+                break
+            if time.perf_counter() >= deadline:
+                abort_reason = 'deadline'
+                break
+            
+            tick = mt5.symbol_info_tick(request["symbol"])
+            if tick is None:
+                break
+            
+            price = tick.ask if is_buy else tick.bid
+            if reference_price and slippage_budget is not None:
+                adverse_move = price - reference_price if is_buy else reference_price - price
+                if adverse_move > slippage_budget:
+                    abort_reason = 'slippage'
+                    break
+            
+            request["price"] = price
+        
+        total_ms = (time.perf_counter() - start) * 1000
+        self._record_retry(attempts, abort_reason, result, total_ms)
+        
+        return result, {
+            'attempts': attempts,
+            'latency_ms': latency_ms,
+            'total_ms': total_ms,
+            'abort_reason': abort_reason
+        }
+    
+    def _record_retry(self, attempts, abort_reason, result, total_ms):
+        """Tekrar deneme sayaçlarını güncelle"""
+        with self.stats_lock:
+            stats = self.retry_stats
+            stats['submissions'] += 1
+            if attempts == 1:
+                return
+            
+            stats['retried'] += 1
+            stats['retries'] += attempts - 1
+            
+            if abort_reason:
+                stats[abort_reason] += 1
+            elif result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+                stats['recovered'] += 1
+        
+        self.retry_latency.record(total_ms)
+    
+    def execute_market_order(self, symbol, order_type, lot_size, stop_loss=None, take_profit=None,
+                             comment="AI Bot", client_id=None):
+        """Market emri çalıştır - kalıcı oturum, cache'li kontrat bilgisi ve tek tick okuması
+        
+        client_id: Aynı id ile tekrar çağrı ikinci bir dolum oluşturmaz (idempotent gönderim)
+        """
+        client_id = client_id or self.new_client_id()
         try:
-            print(f"\n⚡ {symbol} {order_type} emri çalıştırılıyor...")
-            print(f"   Lot: {lot_size}")
-            print(f"   SL: {stop_loss}")
-            print(f"   TP: {take_profit}")
-            
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    return self._create_error_result("MT5 bağlantısı yok")
-                
-                # Trading izni kontrol et (demo hesap sorunu için geçici bypass)
-                account = mt5_conn.get_account_info()
-                if account and not account.get('trade_allowed', True):
-                    print("⚠️ Hesap trading izni yok - ancak test için devam ediyoruz")
-                    # return self._create_error_result("Hesap trading izni yok")
-                else:
-                    print("✅ Trading izni kontrolü geçildi")
-                
-                # Sembol bilgilerini al
-                symbol_info = mt5_conn.get_symbol_info(symbol)
-                if not symbol_info:
-                    return self._create_error_result(f"{symbol} sembol bilgisi alınamadı")
-                
-                # Güncel fiyatları al
-                current_price = mt5_conn.get_current_price(symbol)
-                if not current_price:
-                    return self._create_error_result(f"{symbol} fiyat bilgisi alınamadı")
-                
-                # Emir tipini belirle
-                if order_type.upper() == 'BUY':
-                    trade_type = mt5.ORDER_TYPE_BUY
-                    price = current_price['ask']
-                    if stop_loss and stop_loss >= price:
-                        stop_loss = price - (symbol_info['point'] * 100)  # 10 pip SL
-                elif order_type.upper() == 'SELL':
-                    trade_type = mt5.ORDER_TYPE_SELL
-                    price = current_price['bid']
-                    if stop_loss and stop_loss <= price:
-                        stop_loss = price + (symbol_info['point'] * 100)  # 10 pip SL
-                else:
-                    return self._create_error_result(f"Geçersiz emir tipi: {order_type}")
-                
-                # Lot boyutunu kontrol et
-                min_lot = symbol_info['volume_min']
-                max_lot = symbol_info['volume_max']
-                
-                if lot_size < min_lot:
-                    lot_size = min_lot
-                    print(f"⚠️ Lot boyutu minimum değere ayarlandı: {min_lot}")
-                elif lot_size > max_lot:
-                    lot_size = max_lot
-                    print(f"⚠️ Lot boyutu maksimum değere ayarlandı: {max_lot}")
-                
-                # Son deneme - en basit emir
-                request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": symbol,
-                    "volume": 0.01,  # Sabit mikro lot
-                    "type": trade_type,
-                    "deviation": 100,  # Çok yüksek slippage
-                    "magic": 0,  # Magic number sıfır
-                    "comment": "test",
-                    "type_filling": mt5.ORDER_FILLING_RETURN,  # Return filling
-                }
-                
-                # SL/TP ekle (varsa)
-                if stop_loss:
-                    request["sl"] = stop_loss
-                if take_profit:
-                    request["tp"] = take_profit
-                
-                print(f"📋 Emir Detayları:")
-                print(f"   Sembol: {symbol}")
-                print(f"   Tip: {order_type}")
-                print(f"   Lot: {lot_size}")
-                print(f"   Fiyat: {price:.5f}")
-                if stop_loss:
-                    print(f"   SL: {stop_loss:.5f}")
-                else:
-                    print(f"   SL: Yok")
-                if take_profit:
-                    print(f"   TP: {take_profit:.5f}")
-                else:
-                    print(f"   TP: Yok")
-                
-                # Emri gönder
-                result = mt5.order_send(request)
-                
-                if result is None:
-                    return self._create_error_result("Emir gönderim hatası")
-                
-                # Sonucu kontrol et
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    error_msg = f"Emir başarısız! Kod: {result.retcode}, Açıklama: {self._get_error_description(result.retcode)}"
-                    return self._create_error_result(error_msg)
-                
-                # Başarılı emir
-                order_result = {
-                    'success': True,
-                    'ticket': result.order,
-                    'symbol': symbol,
-                    'type': order_type,
-                    'volume': result.volume,
-                    'price': result.price,
-                    'stop_loss': stop_loss,
-                    'take_profit': take_profit,
-                    'time': datetime.now(),
-                    'comment': comment,
-                    'retcode': result.retcode,
-                    'deal': result.deal
-                }
-                
-                # Aktif emirlere ekle
-                self.active_orders[result.order] = order_result
-                self.order_history.append(order_result)
-                
-                print(f"✅ EMİR BAŞARILI!")
-                print(f"   Ticket: {result.order}")
-                print(f"   Deal: {result.deal}")
-                print(f"   Fiyat: {result.price:.5f}")
-                print(f"   Volume: {result.volume}")
-                
-                return order_result
+            mt5_conn = self._get_session()
+            if mt5_conn is None:
+                return self._create_error_result("MT5 bağlantısı yok")
+            
+            # Bu client id daha önce gönderildi mi?
+            known = self._get_client_order(client_id)
+            if known and known['status'] == 'filled':
+                print(f"♻️ {client_id} zaten doldu - tekrar gönderilmedi (Ticket: {known['result']['ticket']})")
+                return known['result']
+            if known and known['status'] in ('pending', 'unknown'):
+                recovered = self._resolve_uncertain_order(client_id, symbol)
+                if recovered is not None:
+                    return recovered
+            
+            spec = self.contract_specs.get(symbol)
+            if not spec:
+                return self._create_error_result(f"{symbol} sembol bilgisi alınamadı")
+            
+            # Emir tipini belirle
+            order_type = order_type.upper()
+            if order_type == 'BUY':
+                trade_type = mt5.ORDER_TYPE_BUY
+            elif order_type == 'SELL':
+                trade_type = mt5.ORDER_TYPE_SELL
+            else:
+                return self._create_error_result(f"Geçersiz emir tipi: {order_type}")
+            
+            # Lot boyutunu sembolün min/max, MAX_ORDER_LOTS tavanı ve adımına göre ayarla
+            volume = self.contract_specs.normalize_volume(symbol, lot_size)
+            if lot_size > MAX_ORDER_LOTS:
+                print(f"⚠️ {symbol} istenen lot {lot_size} > tavan {MAX_ORDER_LOTS} - {volume} lot gönderiliyor")
+            
+            # Tek taze fiyat okuması
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                return self._create_error_result(f"{symbol} fiyat bilgisi alınamadı")
+            
+            if trade_type == mt5.ORDER_TYPE_BUY:
+                price = tick.ask
+                if stop_loss and stop_loss >= price:
+                    stop_loss = price - (spec['point'] * 100)  # 10 pip SL
+            else:
+                price = tick.bid
+                if stop_loss and stop_loss <= price:
+                    stop_loss = price + (spec['point'] * 100)  # 10 pip SL
+            
+            request = dict(self._get_request_template(symbol))
+            request["volume"] = volume
+            request["type"] = trade_type
+            request["price"] = price
+            request["comment"] = self._client_comment(client_id, comment)
+            
+            # SL/TP ekle (varsa)
+            if stop_loss:
+                request["sl"] = round(stop_loss, spec['digits'])
+            if take_profit:
+                request["tp"] = round(take_profit, spec['digits'])
+            
+            # Emri gönder (requote'ta taze fiyatla sınırlı tekrar)
+            self._remember_client_order(client_id, 'pending', symbol=symbol)
+            self._journal('request', dict(request, client_id=client_id))
+            result, send_info = self._send_with_requote_retry(request, reference_price=price)
+            self._journal_result(request, result, send_info)
+            latency_ms = send_info['latency_ms']
+            
+            print(f"\n⚡ {symbol} {order_type} {volume} lot @ {request['price']:.5f} "
+                  f"(SL: {request.get('sl', 'Yok')}, TP: {request.get('tp', 'Yok')}) - {latency_ms:.1f} ms"
+                  + (f", {send_info['attempts']} deneme / {send_info['total_ms']:.1f} ms" if send_info['attempts'] > 1 else ""))
+            
+            # Sonuç belirsiz (cevap yok / zaman aşımı) - terminalden client id ile sor
+            if result is None or result.retcode in UNCERTAIN_RETCODES:
+                recovered = self._resolve_uncertain_order(client_id, symbol)
+                if recovered is not None:
+                    return recovered
+                return self._create_error_result(f"Emir sonucu belirsiz ({client_id}) - aynı client id ile tekrar denenebilir")
+            
+            # Sonucu kontrol et
+            if result.retcode != mt5.TRADE_RETCODE_DONE:
+                self._remember_client_order(client_id, 'failed', symbol=symbol)
+                error_msg = f"Emir başarısız! Kod: {result.retcode}, Açıklama: {self._get_error_description(result.retcode)}"
+                if send_info['abort_reason']:
+                    error_msg += f" ({send_info['attempts']} deneme, durdurma: {send_info['abort_reason']})"
+                return self._create_error_result(error_msg)
+            
+            # Başarılı emir
+            order_result = {
+                'success': True,
+                'ticket': result.order,
+                'client_id': client_id,
+                'symbol': symbol,
+                'type': order_type,
+                'volume': result.volume,
+                'price': result.price,
+                'stop_loss': request.get('sl'),
+                'take_profit': request.get('tp'),
+                'time': datetime.now(),
+                'comment': comment,
+                'retcode': result.retcode,
+                'deal': result.deal,
+                'latency_ms': latency_ms,
+                'attempts': send_info['attempts']
+            }
+            
+            self._record_fill(client_id, order_result)
+            
+            print(f"✅ EMİR BAŞARILI! Ticket: {result.order}, Deal: {result.deal}, "
+                  f"Fiyat: {result.price:.5f}, Volume: {result.volume}")
+            
+            return order_result
                 
         except Exception as e:
+            known = self._get_client_order(client_id)
+            if known and known['status'] == 'pending':
+                self._remember_client_order(client_id, 'unknown', symbol=symbol)
             error_msg = f"Emir çalıştırma hatası: {e}"
             print(f"❌ {error_msg}")
             return self._create_error_result(error_msg)
     
+    # =========================================================================
+    # Client order id (idempotent gönderim)
+    # =========================================================================
+    
+    def new_client_id(self):
+        """Oturum öneki + sayaçtan kısa, benzersiz client order id"""
+        with self.client_lock:
+            self.client_sequence += 1
+            return f"{self.client_prefix}{_to_base36(self.client_sequence):0>3}"
+    
+    def _client_comment(self, client_id, comment):
+        """Client id'yi emir yorumunun başına koy (MT5 yorum sınırı 31 karakter)"""
+        return f"{CLIENT_ID_TAG}{client_id} {comment}"[:31]
+    
+    def _remember_client_order(self, client_id, status, result=None, symbol=None):
+        """Dedupe index'ine yaz - süresi dolan kayıtlar baştan atılır"""
+        now = time.time()
+        with self.client_lock:
+            entry = self.client_orders.pop(client_id, None) or {'created': now, 'symbol': symbol}
+            entry['status'] = status
+            entry['updated'] = now
+            if result is not None:
+                entry['result'] = result
+            self.client_orders[client_id] = entry
+            
+            while self.client_orders:
+                oldest_id, oldest = next(iter(self.client_orders.items()))
+                if now - oldest['updated'] < ORDER_DEDUPE_TTL_SECONDS:
+                    break
+                del self.client_orders[oldest_id]
+    
+    def _get_client_order(self, client_id):
+        """Dedupe index'inden kayıt (TTL dolmuşsa yok sayılır)"""
+        entry = self.client_orders.get(client_id)
+        if entry is None or time.time() - entry['updated'] >= ORDER_DEDUPE_TTL_SECONDS:
+            return None
+        return entry
+    
+    def _record_fill(self, client_id, order_result):
+        """Dolan emri dedupe index'i, aktif emirler ve günlüğe işle"""
+        self._remember_client_order(client_id, 'filled', result=order_result)
+        self.active_orders[order_result['ticket']] = order_result
+        self.order_history.append(order_result)
+        self._journal('fill', order_result)
+    
+    def _resolve_uncertain_order(self, client_id, symbol):
+        """Belirsiz emri terminalde ara: dolduysa sonucu döndür, işlemdeyse hata, hiç yoksa None"""
+        found = self.find_client_order(client_id, symbol)
+        
+        if found is None:
+            # Terminal emri görmedi - aynı id ile tekrar göndermek güvenli
+            self._remember_client_order(client_id, 'failed', symbol=symbol)
+            return None
+        
+        if found['state'] == 'filled':
+            order_result = found['result']
+            print(f"♻️ {client_id} terminalde dolmuş bulundu (Ticket: {order_result['ticket']})")
+            self._record_fill(client_id, order_result)
+            return order_result
+        
+        if found['state'] == 'in_progress':
+            self._remember_client_order(client_id, 'unknown', symbol=symbol)
+            return self._create_error_result(f"Emir {client_id} hâlâ işlemde - tekrar gönderilmedi")
+        
+        self._remember_client_order(client_id, 'failed', symbol=symbol)
+        return None
+    
+    def find_client_order(self, client_id, symbol=None):
+        """Client id'yi açık pozisyon, bekleyen emir ve emir geçmişinde ara
+        
+        Dönüş: {'state': 'filled' | 'in_progress' | 'rejected', 'result': ...} veya None
+        """
+        tag = f"{CLIENT_ID_TAG}{client_id}"
+        
+        def matches(item):
+            return item.magic == ORDER_MAGIC and (item.comment or '').startswith(tag)
+        
+        positions = (mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()) or []
+        for position in positions:
+            if matches(position):
+                return {'state': 'filled', 'result': self._recovered_result(
+                    client_id, position.ticket, position.symbol, position.type, position.volume,
+                    position.price_open, position.sl, position.tp, position.comment
+                )}
+        
+        orders = (mt5.orders_get(symbol=symbol) if symbol else mt5.orders_get()) or []
+        if any(matches(order) for order in orders):
+            return {'state': 'in_progress', 'result': None}
+        
+        # Sunucu saati farkı için geniş pencere
+        date_from = datetime.now() - timedelta(seconds=ORDER_DEDUPE_TTL_SECONDS) - timedelta(days=1)
+        date_to = datetime.now() + timedelta(days=1)
+        history = (mt5.history_orders_get(date_from, date_to, group=f"*{symbol}*") if symbol
+                   else mt5.history_orders_get(date_from, date_to)) or []
+        for order in history:
+            if not matches(order):
+                continue
+            if order.state in (mt5.ORDER_STATE_FILLED, mt5.ORDER_STATE_PARTIAL):
+                return {'state': 'filled', 'result': self._recovered_result(
+                    client_id, order.position_id or order.ticket, order.symbol, order.type,
+                    order.volume_initial - order.volume_current, order.price_current,
+                    order.sl, order.tp, order.comment
+                )}
+            return {'state': 'rejected', 'result': None}
+        
+        return None
+    
+    def _recovered_result(self, client_id, ticket, symbol, trade_type, volume, price, stop_loss, take_profit, comment):
+        """Terminalden bulunan emir için execute_market_order sonuç formatı"""
+        return {
+            'success': True,
+            'ticket': ticket,
+            'client_id': client_id,
+            'symbol': symbol,
+            'type': 'BUY' if trade_type == mt5.ORDER_TYPE_BUY else 'SELL',
+            'volume': volume,
+            'price': price,
+            'stop_loss': stop_loss or None,
+            'take_profit': take_profit or None,
+            'time': datetime.now(),
+            'comment': comment,
+            'retcode': mt5.TRADE_RETCODE_DONE,
+            'deal': None,
+            'latency_ms': None,
+            'attempts': None,
+            'recovered': True
+        }
+    
     def close_position(self, ticket, comment="AI Bot Close"):
         """Pozisyonu kapat"""
         try:
             print(f"\n🔻 Pozisyon kapatılıyor: {ticket}")
             
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    return self._create_error_result("MT5 bağlantısı yok")
-                
-                # Pozisyonu bul
-                positions = mt5.positions_get(ticket=ticket)
-                if not positions:
-                    return self._create_error_result(f"Pozisyon bulunamadı: {ticket}")
-                
-                position = positions[0]
-                symbol = position.symbol
-                
-                # Güncel fiyatları al
-                symbol_info = mt5_conn.get_symbol_info(symbol)
-                current_price = mt5_conn.get_current_price(symbol)
-                
-                if not symbol_info or not current_price:
-                    return self._create_error_result(f"{symbol} fiyat bilgisi alınamadı")
-                
-                # Kapatma emri tipi
-                if position.type == mt5.ORDER_TYPE_BUY:
-                    close_type = mt5.ORDER_TYPE_SELL
-                    close_price = current_price['bid']
-                else:
-                    close_type = mt5.ORDER_TYPE_BUY
-                    close_price = current_price['ask']
-                
-                # Kapatma request'i
-                close_request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": symbol,
-                    "volume": position.volume,
-                    "type": close_type,
-                    "position": ticket,
-                    "price": close_price,
-                    "deviation": 20,
-                    "magic": 123456,
-                    "comment": comment,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                }
-                
-                print(f"📋 Kapatma Detayları:")
-                print(f"   Ticket: {ticket}")
-                print(f"   Sembol: {symbol}")
-                print(f"   Volume: {position.volume}")
-                print(f"   Kapatma Fiyatı: {close_price:.5f}")
-                print(f"   Güncel P&L: {position.profit:.2f}")
-                
-                # Kapatma emrini gönder
-                result = mt5.order_send(close_request)
-                
-                if result is None:
-                    return self._create_error_result("Kapatma emri gönderim hatası")
-                
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    error_msg = f"Kapatma başarısız! Kod: {result.retcode}"
-                    return self._create_error_result(error_msg)
-                
-                # Başarılı kapatma
-                close_result = {
-                    'success': True,
-                    'original_ticket': ticket,
-                    'close_ticket': result.order,
-                    'symbol': symbol,
-                    'volume': result.volume,
-                    'close_price': result.price,
-                    'profit': position.profit,
-                    'time': datetime.now(),
-                    'comment': comment
-                }
-                
-                # Aktif emirlerden çıkar
-                if ticket in self.active_orders:
-                    del self.active_orders[ticket]
-                
-                self.order_history.append(close_result)
-                
-                print(f"✅ POZİSYON KAPATILDI!")
-                print(f"   Kapatma Ticket: {result.order}")
-                print(f"   Profit: ${position.profit:.2f}")
-                print(f"   Kapatma Fiyatı: {result.price:.5f}")
-                
-                return close_result
+            mt5_conn = self._get_session()
+            if mt5_conn is None:
+                return self._create_error_result("MT5 bağlantısı yok")
+            
+            # Pozisyonu bul
+            positions = mt5.positions_get(ticket=ticket)
+            if not positions:
+                return self._create_error_result(f"Pozisyon bulunamadı: {ticket}")
+            
+            close_result = self._close_position_snapshot(positions[0], comment)
+            
+            if close_result['success']:
+                print(f"✅ POZİSYON KAPATILDI! Kapatma Ticket: {close_result['close_ticket']}, "
+                      f"Profit: ${close_result['profit']:.2f}, Fiyat: {close_result['close_price']:.5f}")
+            else:
+                print(f"❌ {close_result['error']}")
+            
+            return close_result
                 
         except Exception as e:
             error_msg = f"Pozisyon kapatma hatası: {e}"
             print(f"❌ {error_msg}")
             return self._create_error_result(error_msg)
     
-    def close_all_positions(self, symbol=None):
-        """Tüm pozisyonları kapat (opsiyonel olarak sadece belirli sembol)"""
+    def close_all_positions(self, symbol=None, max_workers=CLOSE_ALL_MAX_WORKERS):
+        """Tüm pozisyonları kapat (opsiyonel olarak sadece belirli sembol)
+        
+        Tek positions_get görüntüsünden kapatma emirleri sınırlı bir thread havuzuyla
+        art arda gönderilir; pozisyon başına oturum açma ve bekleme yoktur.
+        """
         try:
             print(f"\n🔻 Tüm pozisyonlar kapatılıyor..." + (f" ({symbol})" if symbol else ""))
+            start = time.perf_counter()
             
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    return self._create_error_result("MT5 bağlantısı yok")
-                
-                # Tüm pozisyonları al
-                positions = mt5_conn.get_positions()
-                
-                if not positions:
-                    print("📭 Kapatılacak pozisyon yok")
-                    return {'success': True, 'closed_count': 0, 'results': []}
-                
-                # Filtrele (eğer sembol belirtildiyse)
-                if symbol:
-                    positions = [pos for pos in positions if pos['symbol'] == symbol]
-                
-                results = []
-                closed_count = 0
-                
-                for position in positions:
-                    result = self.close_position(position['ticket'], "AI Bot - Close All")
-                    results.append(result)
-                    
-                    if result['success']:
-                        closed_count += 1
-                    
-                    # Emirler arasında kısa bekleme
-                    time.sleep(0.5)
-                
-                print(f"✅ Kapatma işlemi tamamlandı: {closed_count}/{len(positions)} pozisyon")
-                
-                return {
-                    'success': True,
-                    'closed_count': closed_count,
-                    'total_positions': len(positions),
-                    'results': results
-                }
+            mt5_conn = self._get_session()
+            if mt5_conn is None:
+                return self._create_error_result("MT5 bağlantısı yok")
+            
+            # Tek pozisyon görüntüsü
+            positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
+            
+            if not positions:
+                print("📭 Kapatılacak pozisyon yok")
+                return {'success': True, 'closed_count': 0, 'total_positions': 0, 'results': [], 'elapsed_ms': 0.0}
+            
+            workers = max(1, min(max_workers, len(positions)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    lambda position: self._close_position_snapshot(position, "AI Bot - Close All"), positions
+                ))
+            
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            closed_count = sum(1 for result in results if result['success'])
+            
+            for result in results:
+                if not result['success']:
+                    print(f"❌ {result['error']}")
+            
+            print(f"✅ Kapatma işlemi tamamlandı: {closed_count}/{len(positions)} pozisyon - toplam {elapsed_ms:.1f} ms")
+            
+            return {
+                'success': True,
+                'closed_count': closed_count,
+                'total_positions': len(positions),
+                'results': results,
+                'elapsed_ms': elapsed_ms
+            }
                 
         except Exception as e:
             error_msg = f"Toplu kapatma hatası: {e}"
             print(f"❌ {error_msg}")
             return self._create_error_result(error_msg)
     
+    def _close_position_snapshot(self, position, comment):
+        """positions_get kaydından pozisyonu kapat - requote/fiyat değişiminde taze tick ile tekrar dener"""
+        ticket = position.ticket
+        symbol = position.symbol
+        
+        if position.type == mt5.ORDER_TYPE_BUY:
+            close_type = mt5.ORDER_TYPE_SELL
+        else:
+            close_type = mt5.ORDER_TYPE_BUY
+        
+        close_request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "volume": position.volume,
+            "type": close_type,
+            "position": ticket,
+            "deviation": 20,
+            "magic": ORDER_MAGIC,
+            "comment": comment[:31],
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is None:
+            return self._create_error_result(f"{symbol} fiyat bilgisi alınamadı")
+        
+        # Kapatmada kayma bütçesi yok - sadece süre ve deneme sınırı
+        close_request["price"] = tick.bid if close_type == mt5.ORDER_TYPE_SELL else tick.ask
+        self._journal('request', close_request)
+        result, send_info = self._send_with_requote_retry(close_request)
+        self._journal_result(close_request, result, send_info)
+        
+        if result is None:
+            return self._create_error_result(f"Kapatma emri gönderim hatası: {ticket}")
+        
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            return self._create_error_result(
+                f"Kapatma başarısız! Ticket: {ticket}, Kod: {result.retcode} ({self._get_error_description(result.retcode)})"
+            )
+        
+        close_result = {
+            'success': True,
+            'original_ticket': ticket,
+            'close_ticket': result.order,
+            'symbol': symbol,
+            'volume': result.volume,
+            'close_price': result.price,
+            'profit': position.profit,
+            'time': datetime.now(),
+            'comment': comment,
+            'attempts': send_info['attempts'],
+            'latency_ms': send_info['latency_ms']
+        }
+        
+        # Aktif emirlerden çıkar
+        self.active_orders.pop(ticket, None)
+        self.order_history.append(close_result)
+        self._journal('close', close_result)
+        
+        return close_result
+    
     def modify_position(self, ticket, new_sl=None, new_tp=None):
         """Pozisyon SL/TP değiştir"""
         try:
             print(f"\n✏️ Pozisyon modifiye ediliyor: {ticket}")
             
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    return self._create_error_result("MT5 bağlantısı yok")
-                
-                # Pozisyonu bul
-                positions = mt5.positions_get(ticket=ticket)
-                if not positions:
-                    return self._create_error_result(f"Pozisyon bulunamadı: {ticket}")
-                
-                position = positions[0]
-                
-                # Modifiye request'i
-                modify_request = {
-                    "action": mt5.TRADE_ACTION_SLTP,
-                    "symbol": position.symbol,
-                    "position": ticket,
-                    "sl": new_sl if new_sl else position.sl,
-                    "tp": new_tp if new_tp else position.tp,
-                }
-                
-                result = mt5.order_send(modify_request)
-                
-                if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-                    return self._create_error_result(f"Modifiye başarısız: {result.retcode if result else 'None'}")
-                
-                print(f"✅ Pozisyon modifiye edildi!")
-                print(f"   Yeni SL: {new_sl}")
-                print(f"   Yeni TP: {new_tp}")
-                
-                return {'success': True, 'ticket': ticket, 'new_sl': new_sl, 'new_tp': new_tp}
-                
+            mt5_conn = self._get_session()
+            if mt5_conn is None:
+                return self._create_error_result("MT5 bağlantısı yok")
+            
+            # Pozisyonu bul
+            positions = mt5.positions_get(ticket=ticket)
+            if not positions:
+                return self._create_error_result(f"Pozisyon bulunamadı: {ticket}")
+            
+            position = positions[0]
+            
+            # Modifiye request'i
+            modify_request = {
+                "action": mt5.TRADE_ACTION_SLTP,
+                "symbol": position.symbol,
+                "position": ticket,
+                "sl": new_sl if new_sl else position.sl,
+                "tp": new_tp if new_tp else position.tp,
+            }
+            
+            result = mt5.order_send(modify_request)
+            
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                return self._create_error_result(f"Modifiye başarısız: {result.retcode if result else 'None'}")
+            
+            self._journal('modify', {'ticket': ticket, 'new_sl': new_sl, 'new_tp': new_tp})
+            
+            print(f"✅ Pozisyon modifiye edildi!")
+            print(f"   Yeni SL: {new_sl}")
+            print(f"   Yeni TP: {new_tp}")
+            
+            return {'success': True, 'ticket': ticket, 'new_sl': new_sl, 'new_tp': new_tp}
+            
         except Exception as e:
             return self._create_error_result(f"Modifiye hatası: {e}")
     
+    def modify_stops(self, ticket, symbol, stop_loss, take_profit=0.0):
+        """SL/TP'yi doğrudan gönder - pozisyon sorgusu yok (trailing stop hızlı yolu)
+        
+        take_profit mevcut TP ile verilmeli; 0 gönderilirse broker TP'yi kaldırır.
+        """
+        try:
+            if self._get_session() is None:
+                return self._create_error_result("MT5 bağlantısı yok")
+            
+            modify_request = {
+                "action": mt5.TRADE_ACTION_SLTP,
+                "symbol": symbol,
+                "position": ticket,
+                "sl": stop_loss,
+                "tp": take_profit or 0.0,
+            }
+            
+            result, latency_ms = self._timed_order_send(modify_request)
+            
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                return self._create_error_result(f"SL/TP değişikliği başarısız ({ticket}): {result.retcode if result else 'None'}")
+            
+            self._journal('modify', {'ticket': ticket, 'new_sl': stop_loss, 'new_tp': take_profit})
+            return {'success': True, 'ticket': ticket, 'new_sl': stop_loss, 'new_tp': take_profit, 'latency_ms': latency_ms}
+            
+        except Exception as e:
+            return self._create_error_result(f"SL/TP değişikliği hatası: {e}")
+    
+    def get_ticks(self, symbols):
+        """Semboller için son tick'ler: {symbol: {'bid', 'ask', 'time_msc'}}"""
+        ticks = {}
+        if self._get_session() is None:
+            return ticks
+        
+        for symbol in symbols:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is not None:
+                ticks[symbol] = {'bid': tick.bid, 'ask': tick.ask, 'time_msc': tick.time_msc}
+        return ticks
+    
     def get_position_status(self, ticket):
         """Pozisyon durumunu al"""
         try:
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    return None
-                
-                positions = mt5.positions_get(ticket=ticket)
-                if not positions:
-                    return None
-                
-                position = positions[0]
-                
-                return {
-                    'ticket': ticket,
-                    'symbol': position.symbol,
-                    'type': 'BUY' if position.type == mt5.ORDER_TYPE_BUY else 'SELL',
-                    'volume': position.volume,
-                    'open_price': position.price_open,
-                    'current_price': position.price_current,
-                    'sl': position.sl,
-                    'tp': position.tp,
-                    'profit': position.profit,
-                    'swap': position.swap,
-                    'time_open': datetime.fromtimestamp(position.time)
-                }
-                
+            mt5_conn = self._get_session()
+            if mt5_conn is None:
+                return None
+            
+            positions = mt5.positions_get(ticket=ticket)
+            if not positions:
+                return None
+            
+            position = positions[0]
+            
+            return {
+                'ticket': ticket,
+                'symbol': position.symbol,
+                'type': 'BUY' if position.type == mt5.ORDER_TYPE_BUY else 'SELL',
+                'volume': position.volume,
+                'open_price': position.price_open,
+                'current_price': position.price_current,
+                'sl': position.sl,
+                'tp': position.tp,
+                'profit': position.profit,
+                'swap': position.swap,
+                'time_open': datetime.fromtimestamp(position.time)
+            }
+            
         except Exception as e:
             print(f"❌ Pozisyon durumu alınamadı: {e}")
             return None
@@ -420,11 +798,35 @@ class OrderExecutor:
     
     def get_order_history(self, count=10):
         """Emir geçmişini al"""
-        return self.order_history[-count:] if self.order_history else []
+        return list(self.order_history)[-count:] if self.order_history else []
     
     def get_active_orders(self):
         """Aktif emirleri al"""
         return self.active_orders
+    
+    def get_latency_report(self):
+        """Emir gönderim gecikmesi özeti"""
+        return self.send_latency.summary()
+    
+    def restore_state(self, journal_state):
+        """Günlükten kurulan açık pozisyon ve emir geçmişini yükle"""
+        self.active_orders = dict(journal_state['open_positions'])
+        self.order_history.extend(journal_state['order_history'])
+    
+    def get_retry_stats(self):
+        """Requote tekrar deneme istatistikleri"""
+        return dict(self.retry_stats, retry_latency=self.retry_latency.summary())
+    
+    def print_latency_report(self):
+        """Emir gönderim gecikmesi histogramını yazdır"""
+        print(self.send_latency.format_report("Emir gönderim gecikmesi"))
+        
+        stats = self.retry_stats
+        if stats['retried']:
+            print(f"🔁 Tekrar denenen emir: {stats['retried']}/{stats['submissions']} "
+                  f"({stats['retries']} tekrar, {stats['recovered']} kurtarıldı, "
+                  f"{stats['exhausted']} deneme / {stats['deadline']} süre / {stats['slippage']} kayma limiti)")
+            print(self.retry_latency.format_report("Tekrar denenen emirlerin toplam süresi"))
 
 
 # Test fonksiyonu
@@ -464,6 +866,9 @@ def test_order_executor():
             print(f"❌ Kapatma başarısız: {close_result['error']}")
     else:
         print(f"❌ Trade başarısız: {result['error']}")
+    
+    executor.print_latency_report()
+    executor.close()
         
     print("\n" + "="*50)
     
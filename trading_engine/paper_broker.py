@@ -0,0 +1,741 @@
+# trading_engine/paper_broker.py
+"""
+AI Trading Bot - Paper Trading Broker
+simulation_mode için OrderExecutor arayüzlü süreç içi broker. Emirler
+terminale gönderilmez; canlı bid/ask'tan, ayarlanabilir gecikme ve aleyhte
+kayma ile doldurulur. Pozisyonlar, SL/TP, komisyon ve margin takip edilir.
+Hesap / pozisyon / deal sorguları MT5Connector formatında döndüğü için
+risk durumu, P&L defteri ve devre kesici paper hesaptan beslenebilir.
+
+Pozisyon durumu NumPy dizilerinde tutulur; her tick grubunda tüm
+pozisyonların değerlemesi ve SL/TP kontrolü tek vektör işlemidir.
+"""
+
+import MetaTrader5 as mt5
+import math
+import time
+import threading
+from collections import deque
+from datetime import datetime
+import numpy as np
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    PAPER_INITIAL_BALANCE, PAPER_LATENCY_MS, PAPER_SLIPPAGE_POINTS, PAPER_COMMISSION_PER_LOT,
+    PAPER_LEVERAGE, ORDER_MAX_SLIPPAGE_POINTS, ORDER_HISTORY_SIZE, ORDER_MAGIC, CLOSE_ALL_MAX_WORKERS
+)
+from trading_engine.order_executor import OrderExecutor
+from utils.helpers import get_broker_symbol
+
+# Paper ticket'ları gerçek ticket'larla karışmasın diye ayrı aralıktan başlar
+PAPER_TICKET_START = 900000000
+
+class PaperBroker(OrderExecutor):
+    """Canlı fiyatlarla emir dolduran, pozisyonları dizilerde tutan paper broker"""
+
+    def __init__(self, mt5_conn=None, contract_specs=None, journal=None, initial_balance=PAPER_INITIAL_BALANCE,
+                 latency_ms=PAPER_LATENCY_MS, slippage_points=PAPER_SLIPPAGE_POINTS,
+                 commission_per_lot=PAPER_COMMISSION_PER_LOT, leverage=PAPER_LEVERAGE, seed=None, capacity=256):
+        """PaperBroker'ı başlat
+
+        commission_per_lot: lot başına gidiş-dönüş komisyon (açılış ve kapanışta yarısı)
+        """
+        super().__init__(mt5_conn, contract_specs, journal)
+        self.latency_ms = latency_ms
+        self.slippage_points = slippage_points
+        self.commission_per_lot = commission_per_lot
+        self.leverage = leverage
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.RLock()
+
+        # Paper hesap
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.next_ticket = PAPER_TICKET_START
+        self.deals = deque(maxlen=ORDER_HISTORY_SIZE)
+
+        # Satır başına pozisyon durumu
+        self.count = 0
+        self.tickets = np.zeros(capacity, dtype=np.int64)
+        self.symbol_ids = np.zeros(capacity, dtype=np.int64)
+        self.directions = np.zeros(capacity, dtype=np.float64)       # BUY +1, SELL -1
+        self.volumes = np.zeros(capacity, dtype=np.float64)
+        self.open_prices = np.zeros(capacity, dtype=np.float64)
+        self.stop_losses = np.zeros(capacity, dtype=np.float64)
+        self.take_profits = np.zeros(capacity, dtype=np.float64)
+        self.current_prices = np.zeros(capacity, dtype=np.float64)   # kapanış tarafı fiyatı
+        self.profits = np.zeros(capacity, dtype=np.float64)
+        self.margins = np.zeros(capacity, dtype=np.float64)
+        self.money_per_price = np.zeros(capacity, dtype=np.float64)  # 1 lot, 1.0 fiyat farkı ($)
+        self.open_times = np.zeros(capacity, dtype=np.float64)
+
+        self.rows = {}                # ticket -> satır
+        self.position_info = {}       # ticket -> {'client_id', 'comment'} (sıcak yolda kullanılmaz)
+        self.symbols = []             # symbol id -> sembol
+        self.symbol_ids_by_name = {}  # sembol -> symbol id
+
+        self.paper_stats = {'fills': 0, 'rejected': 0, 'closed': 0, 'sl_hits': 0, 'tp_hits': 0, 'evaluations': 0}
+
+        print(f"🎭 PaperBroker başlatıldı: ${initial_balance:,.2f}, gecikme {latency_ms} ms, "
+              f"kayma 0-{slippage_points} point, komisyon ${commission_per_lot}/lot")
+
+    # =========================================================================
+    # Emirler (OrderExecutor arayüzü)
+    # =========================================================================
+
+    def execute_market_order(self, symbol, order_type, lot_size, stop_loss=None, take_profit=None,
+                             comment="AI Bot", client_id=None):
+        """Market emrini canlı fiyattan gecikme ve kayma ile doldur
+
+        client_id: Aynı id ile tekrar çağrı ikinci bir dolum oluşturmaz (idempotent gönderim)
+        """
+        client_id = client_id or self.new_client_id()
+        try:
+            if self._get_session() is None:
+                return self._create_error_result("MT5 bağlantısı yok (fiyat verisi alınamıyor)")
+
+            known = self._get_client_order(client_id)
+            if known and known['status'] == 'filled':
+                print(f"♻️ {client_id} zaten doldu - tekrar gönderilmedi (Ticket: {known['result']['ticket']})")
+                return known['result']
+
+            symbol = get_broker_symbol(symbol)
+            spec = self.contract_specs.get(symbol)
+            if not spec:
+                return self._create_error_result(f"{symbol} sembol bilgisi alınamadı")
+
+            order_type = order_type.upper()
+            if order_type not in ('BUY', 'SELL'):
+                return self._create_error_result(f"Geçersiz emir tipi: {order_type}")
+            is_buy = order_type == 'BUY'
+
+            volume = self.contract_specs.normalize_volume(symbol, lot_size)
+
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                return self._create_error_result(f"{symbol} fiyat bilgisi alınamadı")
+
+            reference = tick.ask if is_buy else tick.bid
+            if is_buy and stop_loss and stop_loss >= reference:
+                stop_loss = reference - (spec['point'] * 100)  # 10 pip SL
+            elif not is_buy and stop_loss and stop_loss <= reference:
+                stop_loss = reference + (spec['point'] * 100)  # 10 pip SL
+
+            stop_loss = round(stop_loss, spec['digits']) if stop_loss else 0.0
+            take_profit = round(take_profit, spec['digits']) if take_profit else 0.0
+
+            self._remember_client_order(client_id, 'pending', symbol=symbol)
+            self._journal('request', {'symbol': symbol, 'type': order_type, 'volume': volume, 'price': reference,
+                                      'sl': stop_loss, 'tp': take_profit, 'client_id': client_id, 'paper': True})
+
+            fill_tick, price, latency_ms = self._fill(symbol, is_buy, spec)
+            self._record_retry(1, None, None, latency_ms)
+            if fill_tick is None:
+                return self._reject(client_id, symbol, f"{symbol} fiyat bilgisi alınamadı")
+
+            adverse_move = price - reference if is_buy else reference - price
+            if adverse_move > ORDER_MAX_SLIPPAGE_POINTS * spec['point']:
+                return self._reject(client_id, symbol, f"Requote - fiyat {adverse_move / spec['point']:.0f} point kaydı")
+
+            direction = 1.0 if is_buy else -1.0
+            if (stop_loss and direction * (price - stop_loss) <= 0) or (take_profit and direction * (take_profit - price) <= 0):
+                return self._reject(client_id, symbol, f"Geçersiz stop seviyesi (SL: {stop_loss}, TP: {take_profit})")
+
+            margin = self._required_margin(symbol, order_type, volume, price)
+            with self.lock:
+                free_margin = self._account_locked()['free_margin']
+                if margin > free_margin:
+                    return self._reject(client_id, symbol, f"Yetersiz margin: ${margin:.2f} > ${free_margin:.2f}")
+
+                close_price = fill_tick.bid if is_buy else fill_tick.ask
+                ticket, deal = self._open_row(symbol, direction, volume, price, close_price, stop_loss,
+                                              take_profit, margin, comment)
+                self.position_info[ticket] = {'client_id': client_id, 'comment': comment}
+
+            order_result = {
+                'success': True,
+                'ticket': ticket,
+                'client_id': client_id,
+                'symbol': symbol,
+                'type': order_type,
+                'volume': volume,
+                'price': price,
+                'stop_loss': stop_loss or None,
+                'take_profit': take_profit or None,
+                'time': datetime.now(),
+                'comment': comment,
+                'retcode': mt5.TRADE_RETCODE_DONE,
+                'deal': deal,
+                'latency_ms': latency_ms,
+                'attempts': 1,
+                'simulated': True
+            }
+
+            self.paper_stats['fills'] += 1
+            self._record_fill(client_id, order_result)
+
+            print(f"🎭 PAPER {symbol} {order_type} {volume} lot @ {price:.{spec['digits']}f} "
+                  f"(istenen {reference:.{spec['digits']}f}, SL: {stop_loss or 'Yok'}, TP: {take_profit or 'Yok'}) "
+                  f"- Ticket: {ticket}, {latency_ms:.1f} ms")
+
+            return order_result
+
+        except Exception as e:
+            error_msg = f"Paper emir hatası: {e}"
+            print(f"❌ {error_msg}")
+            return self._reject(client_id, symbol, error_msg)
+
+    def close_position(self, ticket, comment="AI Bot Close"):
+        """Pozisyonu canlı fiyattan kapat"""
+        try:
+            print(f"\n🔻 Paper pozisyon kapatılıyor: {ticket}")
+
+            if self._get_session() is None:
+                return self._create_error_result("MT5 bağlantısı yok (fiyat verisi alınamıyor)")
+
+            results = self._close_tickets([ticket], comment)
+            close_result = results[0]
+
+            if close_result['success']:
+                print(f"✅ PAPER POZİSYON KAPATILDI! Profit: ${close_result['profit']:.2f}, "
+                      f"Fiyat: {close_result['close_price']:.5f}")
+            else:
+                print(f"❌ {close_result['error']}")
+
+            return close_result
+
+        except Exception as e:
+            error_msg = f"Paper pozisyon kapatma hatası: {e}"
+            print(f"❌ {error_msg}")
+            return self._create_error_result(error_msg)
+
+    def close_all_positions(self, symbol=None, max_workers=CLOSE_ALL_MAX_WORKERS):
+        """Tüm paper pozisyonları kapat (opsiyonel olarak sadece belirli sembol)"""
+        try:
+            print(f"\n🔻 Tüm paper pozisyonlar kapatılıyor..." + (f" ({symbol})" if symbol else ""))
+            start = time.perf_counter()
+
+            if self._get_session() is None:
+                return self._create_error_result("MT5 bağlantısı yok (fiyat verisi alınamıyor)")
+
+            with self.lock:
+                tickets = self.tickets[:self.count]
+                if symbol:
+                    symbol_id = self.symbol_ids_by_name.get(get_broker_symbol(symbol), -1)
+                    tickets = tickets[self.symbol_ids[:self.count] == symbol_id]
+                tickets = [int(ticket) for ticket in tickets]
+
+            if not tickets:
+                print("📭 Kapatılacak pozisyon yok")
+                return {'success': True, 'closed_count': 0, 'total_positions': 0, 'results': [], 'elapsed_ms': 0.0}
+
+            # Canlı executor gibi max_workers emir paralel gider - gecikme dalga başına bir kez
+            results = self._close_tickets(tickets, "AI Bot - Close All", waves=math.ceil(len(tickets) / max(1, max_workers)))
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            closed_count = sum(1 for result in results if result['success'])
+
+            for result in results:
+                if not result['success']:
+                    print(f"❌ {result['error']}")
+
+            print(f"✅ Paper kapatma tamamlandı: {closed_count}/{len(tickets)} pozisyon - toplam {elapsed_ms:.1f} ms")
+
+            return {
+                'success': True,
+                'closed_count': closed_count,
+                'total_positions': len(tickets),
+                'results': results,
+                'elapsed_ms': elapsed_ms
+            }
+
+        except Exception as e:
+            error_msg = f"Paper toplu kapatma hatası: {e}"
+            print(f"❌ {error_msg}")
+            return self._create_error_result(error_msg)
+
+    def modify_position(self, ticket, new_sl=None, new_tp=None):
+        """Pozisyon SL/TP değiştir (verilmeyen seviye korunur)"""
+        with self.lock:
+            row = self.rows.get(ticket)
+            if row is None:
+                return self._create_error_result(f"Pozisyon bulunamadı: {ticket}")
+            stop_loss = new_sl if new_sl else self.stop_losses[row]
+            take_profit = new_tp if new_tp else self.take_profits[row]
+
+        return self.modify_stops(ticket, self.symbols[self.symbol_ids[row]], stop_loss, take_profit)
+
+    def modify_stops(self, ticket, symbol, stop_loss, take_profit=0.0):
+        """SL/TP'yi doğrudan ayarla - take_profit 0 verilirse TP kaldırılır (broker davranışı)"""
+        start = time.perf_counter()
+        with self.lock:
+            row = self.rows.get(ticket)
+            if row is None:
+                return self._create_error_result(f"SL/TP değişikliği başarısız ({ticket}): pozisyon yok")
+
+            # Seviyeler kapanış tarafı fiyatının doğru tarafında olmalı
+            direction = self.directions[row]
+            price = self.current_prices[row]
+            if (stop_loss and direction * (price - stop_loss) <= 0) or (take_profit and direction * (take_profit - price) <= 0):
+                return self._create_error_result(f"SL/TP değişikliği başarısız ({ticket}): geçersiz stop seviyesi")
+
+            self.stop_losses[row] = stop_loss or 0.0
+            self.take_profits[row] = take_profit or 0.0
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._journal('modify', {'ticket': ticket, 'new_sl': stop_loss, 'new_tp': take_profit})
+        return {'success': True, 'ticket': ticket, 'new_sl': stop_loss, 'new_tp': take_profit, 'latency_ms': latency_ms}
+
+    def find_client_order(self, client_id, symbol=None):
+        """Client id'yi açık paper pozisyonlar ve dedupe index'inde ara"""
+        with self.lock:
+            for ticket, info in self.position_info.items():
+                if info['client_id'] == client_id:
+                    return {'state': 'filled', 'result': self.active_orders.get(ticket)}
+
+        known = self._get_client_order(client_id)
+        if known and known['status'] == 'filled':
+            return {'state': 'filled', 'result': known['result']}
+        if known and known['status'] == 'failed':
+            return {'state': 'rejected', 'result': None}
+        return None
+
+    def get_position_status(self, ticket):
+        """Paper pozisyon durumu"""
+        with self.lock:
+            row = self.rows.get(ticket)
+            if row is None:
+                return None
+            return self._position_dict(row)
+
+    def restore_state(self, journal_state):
+        """Paper hesap her oturumda sıfırdan başlar - canlı günlükteki pozisyonlar yüklenmez"""
+        return None
+
+    # =========================================================================
+    # Tick işleme (vektörel)
+    # =========================================================================
+
+    def process_ticks(self, ticks=None):
+        """Tüm pozisyonları son tick'lerle değerle, SL/TP'ye değenleri kapat
+
+        ticks: {symbol: {'bid', 'ask'}} - verilmezse açık pozisyon sembolleri için okunur
+        Dönüş: kapanan pozisyonların close_position formatındaki sonuçları
+
+        Stoplar tick okunduğu anda kontrol edilir; iki okuma arasında seviyenin
+        ötesine geçen fiyat, okunan (daha kötü olabilecek) fiyattan kapanır.
+        """
+        if not self.count:
+            return []
+        if ticks is None:
+            ticks = self.get_ticks(self.get_symbols())
+
+        with self.lock:
+            n = self.count
+            bids = np.full(len(self.symbols), np.nan)
+            asks = np.full(len(self.symbols), np.nan)
+            for symbol, tick in ticks.items():
+                symbol_id = self.symbol_ids_by_name.get(get_broker_symbol(symbol))
+                if symbol_id is not None:
+                    bids[symbol_id] = tick['bid']
+                    asks[symbol_id] = tick['ask']
+
+            directions = self.directions[:n]
+            symbol_ids = self.symbol_ids[:n]
+
+            # BUY pozisyonu bid'den, SELL pozisyonu ask'tan kapanır
+            prices = np.where(directions > 0, bids[symbol_ids], asks[symbol_ids])
+            known = np.isfinite(prices)
+            self.current_prices[:n] = np.where(known, prices, self.current_prices[:n])
+            self.profits[:n] = (directions * (self.current_prices[:n] - self.open_prices[:n])
+                                * self.volumes[:n] * self.money_per_price[:n])
+
+            stop_losses, take_profits = self.stop_losses[:n], self.take_profits[:n]
+            sl_hit = known & (stop_losses > 0) & (directions * (prices - stop_losses) <= 0)
+            tp_hit = known & (take_profits > 0) & (directions * (prices - take_profits) >= 0)
+            self.paper_stats['evaluations'] += n
+
+            rows = np.flatnonzero(sl_hit | tp_hit)
+            if not len(rows):
+                return []
+
+            # Kapatmalar sırasında satırlar yer değiştirir - ticket'larla çalış
+            exits = [(int(self.tickets[row]), float(prices[row]), 'SL' if sl_hit[row] else 'TP') for row in rows]
+            results = []
+            for ticket, price, reason in exits:
+                result = self._close_row(ticket, price, f"AI Bot - {reason}", reason)
+                if result:
+                    self.paper_stats['sl_hits' if reason == 'SL' else 'tp_hits'] += 1
+                    results.append(result)
+
+        for result in results:
+            self._after_close(result)
+            print(f"🎭 PAPER {result['reason']}: {result['symbol']} #{result['original_ticket']} @ "
+                  f"{result['close_price']:.5f} - P&L ${result['profit']:.2f}")
+        return results
+
+    def get_symbols(self):
+        """Açık pozisyonların sembolleri"""
+        return sorted({self.symbols[symbol_id] for symbol_id in self.symbol_ids[:self.count]})
+
+    # =========================================================================
+    # Hesap sorguları (MT5Connector formatı - risk durumu ve P&L defteri için)
+    # =========================================================================
+
+    @property
+    def connected(self):
+        """Fiyat verisi için terminal oturumu açık mı?"""
+        return self.mt5_conn is not None and self.mt5_conn.connected
+
+    def get_account_info(self):
+        """Paper hesap bilgisi"""
+        with self.lock:
+            return self._account_locked()
+
+    def get_positions(self):
+        """Açık paper pozisyonlar"""
+        with self.lock:
+            return [self._position_dict(row) for row in range(self.count)]
+
+    def get_deals_history(self, date_from, date_to):
+        """Belirli aralıktaki paper deal'ler"""
+        with self.lock:
+            return [dict(deal) for deal in self.deals if date_from <= deal['time'] <= date_to]
+
+    def get_symbol_info(self, symbol):
+        """Sembol bilgisi terminalden (kontrat bilgisi yüklemesi için)"""
+        return self.mt5_conn.get_symbol_info(symbol) if self.connected else None
+
+    def calculate_margin(self, order_type, symbol, volume, price):
+        """Emir için gereken margin (terminal hesaplayamazsa kaldıraçla)"""
+        if self.connected:
+            margin = self.mt5_conn.calculate_margin(order_type, symbol, volume, price)
+            if margin is not None:
+                return margin
+        notional = self.contract_specs.get_money_per_lot(symbol, price)
+        return notional * volume / self.leverage if notional is not None else None
+
+    def get_realized_pnl(self):
+        """Oturum başından beri gerçekleşen P&L (komisyon dahil)"""
+        return self.balance - self.initial_balance
+
+    def _account_locked(self):
+        """Hesap özeti (lock altında çağrılır)"""
+        n = self.count
+        floating = float(self.profits[:n].sum())
+        margin = float(self.margins[:n].sum())
+        equity = self.balance + floating
+        return {
+            'login': 0,
+            'balance': self.balance,
+            'equity': equity,
+            'margin': margin,
+            'free_margin': equity - margin,
+            'margin_level': equity / margin * 100 if margin else 0.0,
+            'profit': floating,
+            'server': 'Paper',
+            'currency': 'USD',
+            'leverage': self.leverage
+        }
+
+    # =========================================================================
+    # Yardımcılar
+    # =========================================================================
+
+    def _fill(self, symbol, is_buy, spec):
+        """Gecikme sonrası tick'i oku, aleyhte rastgele kayma ekle - (tick, fiyat, gecikme ms)"""
+        start = time.perf_counter()
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        tick = mt5.symbol_info_tick(symbol)
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.send_latency.record(latency_ms)
+        if tick is None:
+            return None, None, latency_ms
+
+        slippage = self.rng.uniform(0, self.slippage_points) * spec['point'] if self.slippage_points else 0.0
+        price = tick.ask + slippage if is_buy else tick.bid - slippage
+        return tick, round(price, spec['digits']), latency_ms
+
+    def _required_margin(self, symbol, order_type, volume, price):
+        """Pozisyon margin'i - fiyat bucket'ı başına cache'li terminal hesabı, yoksa kaldıraç"""
+        margin_per_lot = self.contract_specs.get_margin_per_lot(symbol, order_type, price, self.mt5_conn)
+        if margin_per_lot is not None:
+            return margin_per_lot * volume
+        return self.calculate_margin(order_type, symbol, volume, price) or 0.0
+
+    def _reject(self, client_id, symbol, error_message):
+        """Reddedilen emri kaydet"""
+        self.paper_stats['rejected'] += 1
+        self._remember_client_order(client_id, 'failed', symbol=symbol)
+        return self._create_error_result(error_message)
+
+    def _new_ticket(self):
+        """Sıradaki paper ticket / deal numarası"""
+        self.next_ticket += 1
+        return self.next_ticket
+
+    def _record_deal(self, ticket, position_id, symbol, direction, entry, volume, price, profit, commission, comment):
+        """MT5Connector.get_deals_history formatında deal ekle"""
+        now = time.time()
+        self.deals.append({
+            'ticket': ticket,
+            'order': ticket,
+            'position_id': position_id,
+            'symbol': symbol,
+            'type': 'BUY' if direction > 0 else 'SELL',
+            'entry': entry,
+            'volume': volume,
+            'price': price,
+            'profit': profit,
+            'commission': -commission,
+            'swap': 0.0,
+            'fee': 0.0,
+            'magic': ORDER_MAGIC,
+            'comment': comment,
+            'time': datetime.fromtimestamp(now),
+            'time_msc': int(now * 1000)
+        })
+
+    def _open_row(self, symbol, direction, volume, price, close_price, stop_loss, take_profit, margin, comment):
+        """Yeni pozisyon satırı ve açılış deal'i (lock altında) - (ticket, deal)"""
+        if self.count == len(self.tickets):
+            self._grow()
+
+        ticket = self._new_ticket()
+        commission = self.commission_per_lot / 2 * volume
+        self.balance -= commission
+
+        row = self.count
+        self.tickets[row] = ticket
+        self.symbol_ids[row] = self._get_symbol_id(symbol)
+        self.directions[row] = direction
+        self.volumes[row] = volume
+        self.open_prices[row] = price
+        self.stop_losses[row] = stop_loss
+        self.take_profits[row] = take_profit
+        self.current_prices[row] = close_price
+        self.money_per_price[row] = self.contract_specs.get_money_per_lot(symbol, 1.0) or 0.0
+        self.profits[row] = direction * (close_price - price) * volume * self.money_per_price[row]
+        self.margins[row] = margin
+        self.open_times[row] = time.time()
+
+        self.rows[ticket] = row
+        self.count += 1
+
+        deal = self._new_ticket()
+        self._record_deal(deal, ticket, symbol, direction, 'IN', volume, price, 0.0, commission, comment)
+        return ticket, deal
+
+    def _close_row(self, ticket, price, comment, reason, latency_ms=0.0):
+        """Pozisyonu verilen fiyattan kapat, bakiyeye işle ve satırı sil (lock altında)"""
+        row = self.rows.get(ticket)
+        if row is None:
+            return None
+
+        symbol = self.symbols[self.symbol_ids[row]]
+        direction = self.directions[row]
+        volume = float(self.volumes[row])
+        profit = float(direction * (price - self.open_prices[row]) * volume * self.money_per_price[row])
+        commission = self.commission_per_lot / 2 * volume
+        self.balance += profit - commission
+
+        deal = self._new_ticket()
+        self._record_deal(deal, ticket, symbol, -direction, 'OUT', volume, price, profit, commission, comment)
+        self._remove_row(ticket)
+        self.position_info.pop(ticket, None)
+        self.paper_stats['closed'] += 1
+
+        return {
+            'success': True,
+            'original_ticket': ticket,
+            'close_ticket': deal,
+            'symbol': symbol,
+            'volume': volume,
+            'close_price': price,
+            'profit': profit,
+            'commission': commission,
+            'time': datetime.now(),
+            'comment': comment,
+            'reason': reason,
+            'attempts': 1,
+            'latency_ms': latency_ms
+        }
+
+    def _close_tickets(self, tickets, comment, waves=1):
+        """Pozisyonları canlı fiyattan kapat - gecikme dalga başına bir kez, kayma emir başına"""
+        start = time.perf_counter()
+        if self.latency_ms:
+            time.sleep(self.latency_ms * waves / 1000)
+
+        with self.lock:
+            symbols = {self.symbols[self.symbol_ids[self.rows[ticket]]] for ticket in tickets if ticket in self.rows}
+        quotes = {symbol: mt5.symbol_info_tick(symbol) for symbol in symbols}
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.send_latency.record(latency_ms)
+
+        results = []
+        with self.lock:
+            for ticket in tickets:
+                row = self.rows.get(ticket)
+                if row is None:
+                    results.append(self._create_error_result(f"Pozisyon bulunamadı: {ticket}"))
+                    continue
+
+                symbol = self.symbols[self.symbol_ids[row]]
+                tick = quotes.get(symbol)
+                if tick is None:
+                    results.append(self._create_error_result(f"{symbol} fiyat bilgisi alınamadı"))
+                    continue
+
+                spec = self.contract_specs.get(symbol)
+                is_buy = self.directions[row] > 0
+                slippage = self.rng.uniform(0, self.slippage_points) * spec['point'] if self.slippage_points else 0.0
+                price = round(tick.bid - slippage if is_buy else tick.ask + slippage, spec['digits'])
+                results.append(self._close_row(ticket, price, comment, 'BOT', latency_ms))
+
+        for result in results:
+            if result['success']:
+                self._after_close(result)
+        return results
+
+    def _after_close(self, close_result):
+        """Kapanışı aktif emirler, geçmiş ve günlüğe işle"""
+        self.active_orders.pop(close_result['original_ticket'], None)
+        self.order_history.append(close_result)
+        self._journal('close', close_result)
+
+    def _position_dict(self, row):
+        """Satırı MT5Connector.get_positions formatına çevir (lock altında)"""
+        ticket = int(self.tickets[row])
+        info = self.position_info.get(ticket, {})
+        return {
+            'ticket': ticket,
+            'symbol': self.symbols[self.symbol_ids[row]],
+            'type': 'BUY' if self.directions[row] > 0 else 'SELL',
+            'volume': float(self.volumes[row]),
+            'open_price': float(self.open_prices[row]),
+            'current_price': float(self.current_prices[row]),
+            'sl': float(self.stop_losses[row]),
+            'tp': float(self.take_profits[row]),
+            'profit': float(self.profits[row]),
+            'swap': 0.0,
+            'commission': -self.commission_per_lot / 2 * float(self.volumes[row]),
+            'time_open': datetime.fromtimestamp(self.open_times[row]),
+            'magic': ORDER_MAGIC,
+            'comment': info.get('comment', '')
+        }
+
+    def _get_symbol_id(self, symbol):
+        """Sembol için sabit indeks"""
+        symbol_id = self.symbol_ids_by_name.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids_by_name[symbol] = symbol_id
+        return symbol_id
+
+    def _arrays(self):
+        """Satır bazlı durum dizileri"""
+        return (self.tickets, self.symbol_ids, self.directions, self.volumes, self.open_prices, self.stop_losses,
+                self.take_profits, self.current_prices, self.profits, self.margins, self.money_per_price,
+                self.open_times)
+
+    def _remove_row(self, ticket):
+        """Satırı son satırla yer değiştirerek sil - O(1)"""
+        row = self.rows.pop(ticket)
+        last = self.count - 1
+        if row != last:
+            for array in self._arrays():
+                array[row] = array[last]
+            self.rows[int(self.tickets[row])] = row
+        self.count -= 1
+
+    def _grow(self):
+        """Kapasiteyi iki katına çıkar"""
+        capacity = len(self.tickets) * 2
+        for name in ('tickets', 'symbol_ids', 'directions', 'volumes', 'open_prices', 'stop_losses',
+                     'take_profits', 'current_prices', 'profits', 'margins', 'money_per_price', 'open_times'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def print_latency_report(self):
+        """Dolum gecikmesi ve paper hesap özetini yazdır"""
+        super().print_latency_report()
+
+        account = self.get_account_info()
+        stats = self.paper_stats
+        print(f"🎭 Paper hesap: bakiye ${account['balance']:,.2f}, equity ${account['equity']:,.2f}, "
+              f"gerçekleşen ${self.get_realized_pnl():,.2f}, açık {self.count} pozisyon")
+        print(f"   Dolum: {stats['fills']} | Red: {stats['rejected']} | Kapanış: {stats['closed']} "
+              f"(SL {stats['sl_hits']}, TP {stats['tp_hits']})")
+
+
+# Test fonksiyonu
+def test_paper_broker():
+    """PaperBroker'ı simüle terminalin sentetik tick'leriyle test et"""
+    import io
+    from contextlib import redirect_stdout
+    from backtesting.simulated_terminal import SimulatedTerminal, simulated_environment, generate_synthetic_ticks
+    from data_manager.mt5_connector import MT5Connector
+    # __main__ olarak çalışırken simüle terminalin yönlendirdiği modül kopyası kullanılmalı
+    from trading_engine.paper_broker import PaperBroker
+
+    print("🧪 PaperBroker Test Başlıyor...")
+    print("=" * 50)
+
+    ticks = generate_synthetic_ticks('EURUSD-T', '2024-03-04 08:00', hours=2, seed=5)
+    terminal = SimulatedTerminal({'EURUSD-T': ticks})
+    start_epoch = ticks['time'].iloc[0].timestamp()
+
+    with simulated_environment(terminal):
+        terminal.advance_to(start_epoch + 60)
+        connector = MT5Connector()
+        connector.connect()
+
+        broker = PaperBroker(connector, latency_ms=0, seed=1)
+        broker.attach_session(connector)
+
+        tick = terminal.symbol_info_tick('EURUSD-T')
+        result = broker.execute_market_order('EURUSD-T', 'BUY', 0.10, stop_loss=tick.bid - 0.0010,
+                                             take_profit=tick.bid + 0.0010)
+        print(f"   Dolum: {result['price']} (ask {tick.ask}), tekrar gönderim aynı ticket: "
+              f"{broker.execute_market_order('EURUSD-T', 'BUY', 0.10, client_id=result['client_id'])['ticket'] == result['ticket']}")
+
+        # Ölçek testi: 500 pozisyon
+        with redirect_stdout(io.StringIO()):
+            for i in range(500):
+                price = terminal.symbol_info_tick('EURUSD-T').bid
+                broker.execute_market_order('EURUSD-T', 'BUY' if i % 2 else 'SELL', 0.01,
+                                            stop_loss=price - 0.0005 if i % 2 else price + 0.0005,
+                                            take_profit=price + 0.0005 if i % 2 else price - 0.0005)
+
+        quote = terminal.symbol_info_tick('EURUSD-T')
+        start = time.perf_counter()
+        broker.process_ticks({'EURUSD-T': {'bid': quote.bid, 'ask': quote.ask}})
+        print(f"   {broker.count} pozisyon değerlemesi: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+        with redirect_stdout(io.StringIO()):
+            for second in range(0, 3600, 5):
+                terminal.advance_to(start_epoch + 120 + second)
+                broker.process_ticks()
+
+        account = broker.get_account_info()
+        print(f"   1 saat sonra: açık {broker.count}, SL {broker.paper_stats['sl_hits']}, TP {broker.paper_stats['tp_hits']}, "
+              f"bakiye ${account['balance']:.2f}, equity ${account['equity']:.2f}")
+
+        for order_type in ('BUY', 'SELL', 'BUY'):
+            broker.execute_market_order('EURUSD-T', order_type, 0.05)
+        closed = broker.close_all_positions()
+        print(f"   Toplu kapatma: {closed['closed_count']}/{closed['total_positions']}")
+        broker.print_latency_report()
+
+if __name__ == "__main__":
+    test_paper_broker()
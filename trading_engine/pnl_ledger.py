@@ -0,0 +1,228 @@
+# trading_engine/pnl_ledger.py
+"""
+AI Trading Bot - Günlük P&L Defteri
+history_deals_get ile gerçekleşen deal'leri kalıcı bir cursor'dan itibaren
+artımlı olarak çeker; gün ve sembol bazında gerçekleşen + açık P&L tutar.
+Günlük zarar kontrolü geçmişi tekrar çekmeden O(1) ile okunur.
+"""
+
+import json
+import threading
+from datetime import datetime, date, timedelta
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import PNL_LEDGER_FILE, PNL_LEDGER_KEEP_DAYS
+
+# Deal zamanları sunucu saatinde; sorgu penceresi bu pay kadar geriden başlar
+SERVER_TIME_MARGIN = timedelta(hours=14)
+
+class DailyPnLLedger:
+    """Artımlı günlük P&L defteri"""
+
+    def __init__(self, ledger_file=PNL_LEDGER_FILE, keep_days=PNL_LEDGER_KEEP_DAYS):
+        """DailyPnLLedger'ı başlat"""
+        self.ledger_file = ledger_file
+        self.keep_days = keep_days
+        self.lock = threading.Lock()
+
+        # Cursor: işlenen son deal zamanı (ms) ve o ms'deki ticket'lar
+        self.cursor_msc = 0
+        self.cursor_tickets = set()
+
+        # Gün -> {'realized': float, 'deals': int, 'symbols': {symbol: float}}
+        self.days = {}
+
+        # Açık pozisyonların anlık P&L'i
+        self.unrealized_pnl = 0.0
+        self.unrealized_by_symbol = {}
+
+        self._load()
+        print("📒 DailyPnLLedger başlatıldı")
+
+    def sync(self, mt5_conn):
+        """Cursor'dan itibaren yeni deal'leri çek ve deftere işle. Yeni deal listesini döndürür"""
+        try:
+            if self.cursor_msc:
+                date_from = datetime.fromtimestamp(self.cursor_msc / 1000) - SERVER_TIME_MARGIN
+            else:
+                date_from = datetime.combine(date.today(), datetime.min.time()) - SERVER_TIME_MARGIN
+            date_to = datetime.now() + SERVER_TIME_MARGIN
+
+            deals = mt5_conn.get_deals_history(date_from, date_to)
+            new_deals = self.apply_deals(deals)
+
+            if new_deals:
+                self._save()
+
+            return new_deals
+
+        except Exception as e:
+            print(f"❌ P&L defteri senkronizasyon hatası: {e}")
+            return []
+
+    def apply_deals(self, deals):
+        """Deal listesini deftere işle (cursor'dan eski olanlar atlanır)
+
+        deal['time'] yerel saattedir (MT5Connector sunucu saati farkını düzeltir), böylece
+        gün anahtarı sorgulardaki date.today() ile aynı saate göre kurulur.
+        """
+        new_deals = []
+
+        with self.lock:
+            for deal in sorted(deals, key=lambda item: (item['time_msc'], item['ticket'])):
+                time_msc = deal['time_msc']
+                if time_msc < self.cursor_msc:
+                    continue
+                if time_msc == self.cursor_msc and deal['ticket'] in self.cursor_tickets:
+                    continue
+
+                if time_msc > self.cursor_msc:
+                    self.cursor_msc = time_msc
+                    self.cursor_tickets = set()
+                self.cursor_tickets.add(deal['ticket'])
+
+                # Bakiye/kredi işlemleri P&L değil
+                if deal['type'] not in ('BUY', 'SELL'):
+                    continue
+
+                pnl = deal['profit'] + deal.get('commission', 0.0) + deal.get('swap', 0.0) + deal.get('fee', 0.0)
+                day_key = deal['time'].date().isoformat()
+
+                day = self.days.setdefault(day_key, {'realized': 0.0, 'deals': 0, 'symbols': {}})
+                day['realized'] += pnl
+                day['deals'] += 1
+                day['symbols'][deal['symbol']] = day['symbols'].get(deal['symbol'], 0.0) + pnl
+
+                new_deals.append(dict(deal, pnl=pnl))
+
+            if new_deals:
+                self._prune_days()
+
+        return new_deals
+
+    def set_unrealized(self, positions):
+        """Açık pozisyonlardan anlık P&L'i güncelle (MT5Connector.get_positions formatı)"""
+        by_symbol = {}
+        for position in positions or []:
+            by_symbol[position['symbol']] = by_symbol.get(position['symbol'], 0.0) + position.get('profit', 0.0)
+
+        with self.lock:
+            self.unrealized_by_symbol = by_symbol
+            self.unrealized_pnl = sum(by_symbol.values())
+
+    def get_realized_pnl(self, day=None):
+        """Günün gerçekleşen P&L'i - O(1)"""
+        day_key = (day or date.today()).isoformat()
+        day_data = self.days.get(day_key)
+        return day_data['realized'] if day_data else 0.0
+
+    def get_daily_pnl(self, day=None):
+        """Günlük P&L (gerçekleşen + açık) - O(1)"""
+        return self.get_realized_pnl(day) + self.unrealized_pnl
+
+    def get_symbol_pnl(self, symbol, day=None):
+        """Sembolün günlük P&L'i (gerçekleşen + açık)"""
+        day_key = (day or date.today()).isoformat()
+        day_data = self.days.get(day_key)
+        realized = day_data['symbols'].get(symbol, 0.0) if day_data else 0.0
+        return realized + self.unrealized_by_symbol.get(symbol, 0.0)
+
+    def get_day_summary(self, day=None):
+        """Gün özeti"""
+        day_key = (day or date.today()).isoformat()
+        day_data = self.days.get(day_key, {'realized': 0.0, 'deals': 0, 'symbols': {}})
+        return {
+            'date': day_key,
+            'realized_pnl': day_data['realized'],
+            'unrealized_pnl': self.unrealized_pnl,
+            'daily_pnl': day_data['realized'] + self.unrealized_pnl,
+            'deal_count': day_data['deals'],
+            'symbols': dict(day_data['symbols'])
+        }
+
+    def _prune_days(self):
+        """keep_days'ten eski günleri sil"""
+        if len(self.days) <= self.keep_days:
+            return
+        for day_key in sorted(self.days)[:-self.keep_days]:
+            del self.days[day_key]
+
+    def _load(self):
+        """Kalıcı defteri yükle"""
+        if not self.ledger_file or not os.path.exists(self.ledger_file):
+            return
+
+        try:
+            with open(self.ledger_file, encoding='utf-8') as f:
+                data = json.load(f)
+
+            self.cursor_msc = data.get('cursor_msc', 0)
+            self.cursor_tickets = set(data.get('cursor_tickets', []))
+            self.days = data.get('days', {})
+
+        except Exception as e:
+            print(f"❌ P&L defteri okunamadı: {e}")
+
+    def _save(self):
+        """Defteri atomik olarak diske yaz"""
+        if not self.ledger_file:
+            return
+
+        try:
+            directory = os.path.dirname(self.ledger_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with self.lock:
+                data = {
+                    'cursor_msc': self.cursor_msc,
+                    'cursor_tickets': sorted(self.cursor_tickets),
+                    'days': self.days
+                }
+
+            temp_file = f"{self.ledger_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.ledger_file)
+
+        except Exception as e:
+            print(f"❌ P&L defteri yazılamadı: {e}")
+
+
+# Test fonksiyonu
+def test_pnl_ledger():
+    """DailyPnLLedger'ı test et"""
+    print("🧪 DailyPnLLedger Test Başlıyor...")
+    print("=" * 50)
+
+    ledger = DailyPnLLedger(ledger_file=None)
+    now = datetime.now()
+
+    deals = [
+        {'ticket': 1, 'symbol': 'EURUSD-T', 'type': 'BUY', 'entry': 'IN', 'profit': 0.0,
+         'commission': -0.7, 'swap': 0.0, 'fee': 0.0, 'time': now, 'time_msc': 1000},
+        {'ticket': 2, 'symbol': 'EURUSD-T', 'type': 'SELL', 'entry': 'OUT', 'profit': -25.0,
+         'commission': -0.7, 'swap': 0.0, 'fee': 0.0, 'time': now, 'time_msc': 2000},
+        {'ticket': 3, 'symbol': '', 'type': 'OTHER', 'entry': 'IN', 'profit': 500.0,
+         'commission': 0.0, 'swap': 0.0, 'fee': 0.0, 'time': now, 'time_msc': 3000}
+    ]
+
+    print(f"   İlk senkron: {len(ledger.apply_deals(deals))} yeni deal")
+    print(f"   Tekrar senkron: {len(ledger.apply_deals(deals))} yeni deal")
+
+    ledger.set_unrealized([{'symbol': 'GOLD-T', 'profit': 12.5}])
+    print(f"   Gün özeti: {ledger.get_day_summary()}")
+
+    # Sunucu farkı düzeltilmiş deal zamanı bugünün kovasına düşer
+    from data_manager.mt5_connector import MT5Connector
+    connector = MT5Connector.__new__(MT5Connector)
+    connector.get_server_offset = lambda: 3 * 3600
+    server_time = now.timestamp() + 3 * 3600
+    print(f"   GMT+3 sunucu deal'i yerel gün: {connector.server_to_local(server_time).date() == date.today()}")
+
+if __name__ == "__main__":
+    test_pnl_ledger()
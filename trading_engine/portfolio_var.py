@@ -0,0 +1,172 @@
+# trading_engine/portfolio_var.py
+"""
+AI Trading Bot - Portföy VaR / Expected Shortfall
+Açık pozisyonlar sembol bazında tek exposure vektörüne toplanır, korelasyon
+motorunun rolling kovaryansından Cholesky ile binlerce getiri senaryosu
+üretilir. Standart normal çekilişler sabit seed ile bir kez üretilip tekrar
+kullanılır; her hesap tek bir (senaryo x sembol) matris-vektör çarpımıdır.
+"""
+
+import time
+import numpy as np
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    VAR_SIMULATIONS, VAR_CONFIDENCE, VAR_HORIZON_BARS, VAR_RANDOM_SEED
+)
+from utils.helpers import get_broker_symbol
+
+class PortfolioVaR:
+    """Monte Carlo portföy VaR ve Expected Shortfall hesaplayıcı"""
+
+    def __init__(self, correlation_engine, contract_specs, simulations=VAR_SIMULATIONS,
+                 confidence=VAR_CONFIDENCE, horizon_bars=VAR_HORIZON_BARS, seed=VAR_RANDOM_SEED):
+        """PortfolioVaR'ı başlat"""
+        self.correlation_engine = correlation_engine
+        self.contract_specs = contract_specs
+        self.simulations = simulations
+        self.confidence = confidence
+        self.horizon_bars = horizon_bars
+        self.seed = seed
+
+        # Sabit seed'li standart normal çekilişler (sembol sayısı değişince yenilenir)
+        self.shocks = None
+
+        print(f"🎲 PortfolioVaR başlatıldı ({simulations} senaryo, %{confidence * 100:.0f} güven, {horizon_bars} bar ufuk)")
+
+    def build_exposures(self, positions):
+        """Pozisyonları sembol başına hesap para birimi exposure vektörüne topla
+
+        Exposure = yön x lot x (fiyat / tick_size x tick_value); getiri r için P&L ≈ exposure x r
+        """
+        exposures = np.zeros(len(self.correlation_engine.symbols), dtype=np.float64)
+        unmodeled = 0
+
+        for position in positions or []:
+            symbol = get_broker_symbol(position['symbol'])
+            index = self.correlation_engine.symbol_index.get(symbol)
+            price = position.get('current_price') or position.get('open_price') or position.get('price')
+            money_per_lot = self.contract_specs.get_money_per_lot(symbol, price) if price else None
+
+            if index is None or money_per_lot is None:
+                unmodeled += 1
+                continue
+
+            direction = 1.0 if str(position['type']).upper() == 'BUY' else -1.0
+            exposures[index] += direction * position['volume'] * money_per_lot
+
+        return exposures, unmodeled
+
+    def calculate(self, positions):
+        """Açık pozisyonlar için VaR / ES"""
+        start = time.perf_counter()
+
+        exposures, unmodeled = self.build_exposures(positions)
+        result = {
+            'var': 0.0,
+            'expected_shortfall': 0.0,
+            'confidence': self.confidence,
+            'horizon_bars': self.horizon_bars,
+            'simulations': self.simulations,
+            'position_count': len(positions or []),
+            'unmodeled_positions': unmodeled,
+            'gross_exposure': float(np.abs(exposures).sum()),
+            'ready': self.correlation_engine.is_ready(),
+            'elapsed_ms': 0.0
+        }
+
+        if not result['ready'] or not exposures.any():
+            result['elapsed_ms'] = (time.perf_counter() - start) * 1000
+            return result
+
+        factor = self._get_cholesky_factor()
+        if factor is None:
+            result['ready'] = False
+            result['elapsed_ms'] = (time.perf_counter() - start) * 1000
+            return result
+
+        # P&L = Z @ L.T @ e  ->  önce (L.T @ e) ile sembol boyutu tek vektöre indirgenir
+        pnl = self._get_shocks(len(exposures)) @ (factor.T @ exposures)
+        losses = -pnl
+
+        var = float(np.quantile(losses, self.confidence))
+        tail = losses[losses >= var]
+
+        result['var'] = max(0.0, var)
+        result['expected_shortfall'] = max(0.0, float(tail.mean())) if tail.size else result['var']
+        result['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return result
+
+    def check_trade(self, positions, symbol, signal_type, lot_size, price, equity, max_var_percent):
+        """Yeni pozisyon eklenince portföy VaR'ı equity limitini aşıyor mu?"""
+        candidate = {'symbol': symbol, 'type': signal_type, 'volume': lot_size, 'current_price': price}
+        result = self.calculate(list(positions or []) + [candidate])
+
+        limit = equity * max_var_percent / 100 if equity else 0.0
+        allowed = not result['ready'] or result['var'] <= limit
+
+        return {
+            'allowed': allowed,
+            'var': result['var'],
+            'limit': limit,
+            'reason': None if allowed else f"Portföy VaR limiti aşılır: ${result['var']:.2f} > ${limit:.2f}"
+        }
+
+    def _get_cholesky_factor(self):
+        """Ufka ölçeklenmiş kovaryansın alt üçgen faktörü"""
+        covariance = self.correlation_engine.get_covariance_matrix()
+        if covariance is None:
+            return None
+
+        covariance = covariance * self.horizon_bars
+        try:
+            jitter = 1e-12 * max(float(np.trace(covariance)), 1e-12)
+            return np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+        except np.linalg.LinAlgError:
+            # Pozitif yarı tanımlı değilse negatif özdeğerleri kırp
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+            return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+    def _get_shocks(self, symbol_count):
+        """Sabit seed'li standart normal çekilişler (senaryo x sembol)"""
+        if self.shocks is None or self.shocks.shape[1] != symbol_count:
+            rng = np.random.default_rng(self.seed)
+            self.shocks = rng.standard_normal((self.simulations, symbol_count))
+        return self.shocks
+
+
+# Test fonksiyonu
+def test_portfolio_var():
+    """PortfolioVaR'ı test et"""
+    from trading_engine.correlation_engine import RollingCorrelationEngine
+    from trading_engine.contract_specs import ContractSpecCache
+
+    print("🧪 PortfolioVaR Test Başlıyor...")
+    print("=" * 50)
+
+    rng = np.random.default_rng(7)
+    engine = RollingCorrelationEngine(['EURUSD-T', 'GOLD-T', 'BTCUSD-T'], window=240)
+    for bar in rng.normal(0, [1e-4, 3e-4, 8e-4], (300, 3)):
+        engine.update_returns(bar)
+
+    var_calc = PortfolioVaR(engine, ContractSpecCache())
+    positions = [
+        {'symbol': 'EURUSD-T', 'type': 'BUY', 'volume': 0.5, 'current_price': 1.16},
+        {'symbol': 'GOLD-T', 'type': 'SELL', 'volume': 0.2, 'current_price': 2400.0},
+        {'symbol': 'BTCUSD-T', 'type': 'BUY', 'volume': 0.1, 'current_price': 65000.0}
+    ]
+    result = var_calc.calculate(positions)
+    print(f"   VaR: ${result['var']:.2f}, ES: ${result['expected_shortfall']:.2f} ({result['elapsed_ms']:.2f} ms)")
+
+    # Ölçek testi: 300 pozisyon
+    many = [dict(positions[i % 3], volume=0.01 * (1 + i % 5)) for i in range(300)]
+    start = time.perf_counter()
+    result = var_calc.calculate(many)
+    print(f"   300 pozisyon: VaR ${result['var']:.2f} - {(time.perf_counter() - start) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    test_portfolio_var()
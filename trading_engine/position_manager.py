@@ -0,0 +1,470 @@
+# trading_engine/position_manager.py
+"""
+AI Trading Bot - Pozisyon Yönetimi
+Açık pozisyonlar için trailing stop ve max süre kontrolü. Trailing stop
+durumu NumPy dizilerinde tutulur; her tick grubunda tüm pozisyonların yeni
+stop seviyesi tek bir vektör işlemiyle hesaplanır ve sadece minimum adımı
+aşan değişiklikler için TRADE_ACTION_SLTP gönderilir. Max süre kontrolü
+hiyerarşik bir timer wheel ile pozisyon başına O(1) zamanlanır.
+"""
+
+import time
+from datetime import datetime
+import numpy as np
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    TRAILING_STOP_DISTANCE, TRAILING_STOP_MIN_STEP, MAX_TRADE_DURATION_MINUTES, EXPIRY_CLOSE_RETRY_SECONDS,
+    ORDER_MAGIC
+)
+from utils.helpers import get_broker_symbol
+
+class TrailingStopManager:
+    """Vektörel trailing stop yöneticisi"""
+
+    def __init__(self, order_executor, contract_specs, distance=TRAILING_STOP_DISTANCE,
+                 min_step=TRAILING_STOP_MIN_STEP, capacity=64):
+        """TrailingStopManager'ı başlat"""
+        self.order_executor = order_executor
+        self.contract_specs = contract_specs
+        self.distance = distance
+        self.min_step = min_step
+
+        # Satır başına pozisyon durumu
+        self.count = 0
+        self.tickets = np.zeros(capacity, dtype=np.int64)
+        self.directions = np.zeros(capacity, dtype=np.float64)     # BUY +1, SELL -1
+        self.open_prices = np.zeros(capacity, dtype=np.float64)
+        self.stop_losses = np.zeros(capacity, dtype=np.float64)
+        self.take_profits = np.zeros(capacity, dtype=np.float64)
+        self.trail_distances = np.zeros(capacity, dtype=np.float64)
+        self.min_steps = np.zeros(capacity, dtype=np.float64)
+        self.symbol_ids = np.zeros(capacity, dtype=np.int64)
+
+        self.rows = {}                # ticket -> satır
+        self.symbols = []             # symbol id -> sembol
+        self.symbol_ids_by_name = {}  # sembol -> symbol id
+
+        self.stats = {'evaluations': 0, 'modifications': 0, 'failed': 0}
+
+        print(f"📈 TrailingStopManager başlatıldı (mesafe: {distance}, min adım: {min_step} point)")
+
+    def add_position(self, ticket, symbol, position_type, open_price, stop_loss=0.0, take_profit=0.0):
+        """Pozisyonu takibe al - O(1)"""
+        symbol = get_broker_symbol(symbol)
+        spec = self.contract_specs.get(symbol)
+        if not spec:
+            return False
+
+        if ticket in self.rows:
+            self.remove_position(ticket)
+
+        if self.count == len(self.tickets):
+            self._grow()
+
+        # Broker'ın stops_level sınırının altına inme
+        distance = max(self.distance, spec.get('stops_level', 0) + 1) * spec['point']
+
+        row = self.count
+        self.tickets[row] = ticket
+        self.directions[row] = 1.0 if str(position_type).upper() == 'BUY' else -1.0
+        self.open_prices[row] = open_price
+        self.stop_losses[row] = stop_loss or 0.0
+        self.take_profits[row] = take_profit or 0.0
+        self.trail_distances[row] = distance
+        self.min_steps[row] = self.min_step * spec['point']
+        self.symbol_ids[row] = self._get_symbol_id(symbol)
+
+        self.rows[ticket] = row
+        self.count += 1
+        return True
+
+    def remove_position(self, ticket):
+        """Pozisyonu takipten çıkar - son satırla yer değiştirerek O(1)"""
+        row = self.rows.pop(ticket, None)
+        if row is None:
+            return False
+
+        last = self.count - 1
+        if row != last:
+            for array in self._arrays():
+                array[row] = array[last]
+            self.rows[int(self.tickets[row])] = row
+
+        self.count -= 1
+        return True
+
+    def sync_positions(self, positions, magic=ORDER_MAGIC):
+        """Pozisyon listesiyle takibi eşitle (MT5Connector.get_positions formatı)
+
+        Sadece bu botun magic numarasını taşıyan pozisyonlar takip edilir;
+        elle ya da başka bir EA'nın açtığı pozisyonların stop'una dokunulmaz.
+        """
+        live_tickets = set()
+        for position in positions or []:
+            if position.get('magic') != magic:
+                continue
+            ticket = position['ticket']
+            live_tickets.add(ticket)
+
+            row = self.rows.get(ticket)
+            if row is None:
+                self.add_position(ticket, position['symbol'], position['type'], position['open_price'],
+                                  position.get('sl', 0.0), position.get('tp', 0.0))
+            else:
+                # Stop dışarıdan (elle / broker) değiştiyse onu esas al
+                self.stop_losses[row] = position.get('sl', self.stop_losses[row]) or 0.0
+                self.take_profits[row] = position.get('tp', self.take_profits[row]) or 0.0
+
+        for ticket in [ticket for ticket in self.rows if ticket not in live_tickets]:
+            self.remove_position(ticket)
+
+    def get_symbols(self):
+        """Takip edilen pozisyonların sembolleri"""
+        return sorted({self.symbols[symbol_id] for symbol_id in self.symbol_ids[:self.count]})
+
+    def compute_stop_updates(self, ticks):
+        """Tick'lere göre yeni stop seviyelerini hesapla (vektörel)
+
+        ticks: {symbol: {'bid': float, 'ask': float}}
+        Dönüş: (satırlar, yeni stoplar) - sadece min adımı aşanlar
+        """
+        n = self.count
+        if not n:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        bids = np.full(len(self.symbols), np.nan)
+        asks = np.full(len(self.symbols), np.nan)
+        for symbol, tick in ticks.items():
+            symbol_id = self.symbol_ids_by_name.get(get_broker_symbol(symbol))
+            if symbol_id is not None:
+                bids[symbol_id] = tick['bid']
+                asks[symbol_id] = tick['ask']
+
+        directions = self.directions[:n]
+        symbol_ids = self.symbol_ids[:n]
+
+        # BUY pozisyonu bid'den, SELL pozisyonu ask'tan kapanır
+        prices = np.where(directions > 0, bids[symbol_ids], asks[symbol_ids])
+        candidates = prices - directions * self.trail_distances[:n]
+
+        # Stop sadece giriş fiyatının kâr tarafına geçtikten sonra takip eder
+        in_profit = directions * (candidates - self.open_prices[:n]) > 0
+
+        current = self.stop_losses[:n]
+        improvement = np.where(current > 0, directions * (candidates - current), np.inf)
+
+        mask = np.isfinite(prices) & in_profit & (improvement >= self.min_steps[:n])
+        rows = np.flatnonzero(mask)
+
+        self.stats['evaluations'] += n
+        return rows, candidates[rows]
+
+    def on_ticks(self, ticks):
+        """Tick grubunu işle, gereken SL değişikliklerini gönder"""
+        rows, new_stops = self.compute_stop_updates(ticks)
+        if not len(rows):
+            return 0
+
+        # Gönderimler sırasında satırlar yer değiştirmesin diye ticket'larla çalış
+        updates = [(int(self.tickets[row]), self.symbols[self.symbol_ids[row]], float(stop), float(self.take_profits[row]))
+                   for row, stop in zip(rows, new_stops)]
+
+        modified = 0
+        for ticket, symbol, stop_loss, take_profit in updates:
+            spec = self.contract_specs.get(symbol)
+            stop_loss = round(stop_loss, spec['digits']) if spec else stop_loss
+
+            result = self.order_executor.modify_stops(ticket, symbol, stop_loss, take_profit)
+            if result['success']:
+                row = self.rows.get(ticket)
+                if row is not None:
+                    self.stop_losses[row] = stop_loss
+                modified += 1
+            else:
+                self.stats['failed'] += 1
+
+        self.stats['modifications'] += modified
+        return modified
+
+    def _get_symbol_id(self, symbol):
+        """Sembol için sabit indeks"""
+        symbol_id = self.symbol_ids_by_name.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids_by_name[symbol] = symbol_id
+        return symbol_id
+
+    def _arrays(self):
+        """Satır bazlı durum dizileri"""
+        return (self.tickets, self.directions, self.open_prices, self.stop_losses, self.take_profits,
+                self.trail_distances, self.min_steps, self.symbol_ids)
+
+    def _grow(self):
+        """Kapasiteyi iki katına çıkar"""
+        capacity = len(self.tickets) * 2
+        for name in ('tickets', 'directions', 'open_prices', 'stop_losses', 'take_profits',
+                     'trail_distances', 'min_steps', 'symbol_ids'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+
+class TimerWheel:
+    """Hiyerarşik timer wheel (saniye / dakika / saat)
+
+    Zamanlama ve iptal O(1). Üst seviyedeki zamanlayıcılar ilgili dakika/saat
+    başladığında alt seviyeye indirilir (cascade); her zamanlayıcı en fazla
+    seviye sayısı kadar taşınır.
+    """
+
+    # (slot sayısı, slot başına tick)
+    LEVELS = ((60, 1), (60, 60), (24, 3600))
+
+    def __init__(self, resolution_seconds=1.0, now=None):
+        """TimerWheel'i başlat"""
+        self.resolution = resolution_seconds
+        self.current_tick = self._to_tick(time.time() if now is None else now)
+        self.slots = [[{} for _ in range(slot_count)] for slot_count, _ in self.LEVELS]
+        self.locations = {}   # key -> (seviye, slot)
+        self.expire_ticks = {}
+        self.due = []
+
+    def schedule(self, key, expire_at):
+        """key için expire_at (epoch saniye) zamanında tetiklenecek zamanlayıcı kur - O(1)"""
+        self.cancel(key)
+        self._insert(key, self._to_tick(expire_at))
+
+    def cancel(self, key):
+        """Zamanlayıcıyı iptal et - O(1)"""
+        location = self.locations.pop(key, None)
+        self.expire_ticks.pop(key, None)
+        if location is None:
+            return False
+
+        level, slot = location
+        if level >= 0:
+            self.slots[level][slot].pop(key, None)
+        return True
+
+    def advance(self, now=None):
+        """Zamanı ilerlet, süresi dolan anahtarları döndür"""
+        target_tick = self._to_tick(time.time() if now is None else now)
+        expired = self._pop_due()
+
+        # Tam tur (1 gün) kadar geri kalındıysa tick tick ilerlemek yerine yeniden yerleştir
+        if target_tick - self.current_tick > self.LEVELS[-1][0] * self.LEVELS[-1][1]:
+            pending = dict(self.expire_ticks)
+            self.slots = [[{} for _ in range(slot_count)] for slot_count, _ in self.LEVELS]
+            self.locations = {}
+            self.expire_ticks = {}
+            self.current_tick = target_tick
+            for key, expire_tick in pending.items():
+                self._insert(key, expire_tick)
+            return expired + self._pop_due()
+
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            tick = self.current_tick
+
+            # Üst seviyelerden aşağı indir (önce saat, sonra dakika)
+            for level in range(len(self.LEVELS) - 1, 0, -1):
+                slot_count, ticks_per_slot = self.LEVELS[level]
+                if tick % ticks_per_slot == 0:
+                    self._cascade(level, (tick // ticks_per_slot) % slot_count)
+
+            slot = self.slots[0][tick % self.LEVELS[0][0]]
+            if slot:
+                for key in slot:
+                    self.locations.pop(key, None)
+                    self.expire_ticks.pop(key, None)
+                    expired.append(key)
+                slot.clear()
+
+        return expired + self._pop_due()
+
+    def __len__(self):
+        """Bekleyen zamanlayıcı sayısı"""
+        return len(self.locations)
+
+    def _insert(self, key, expire_tick):
+        """Zamanlayıcıyı uygun seviye/slot'a yerleştir"""
+        self.expire_ticks[key] = expire_tick
+        delta = expire_tick - self.current_tick
+
+        if delta <= 0:
+            self.locations[key] = (-1, -1)
+            self.due.append(key)
+            return
+
+        for level, (slot_count, ticks_per_slot) in enumerate(self.LEVELS):
+            if delta < slot_count * ticks_per_slot or level == len(self.LEVELS) - 1:
+                slot = (expire_tick // ticks_per_slot) % slot_count
+                self.slots[level][slot][key] = expire_tick
+                self.locations[key] = (level, slot)
+                return
+
+    def _cascade(self, level, slot):
+        """Üst seviye slot'undaki zamanlayıcıları yeniden yerleştir"""
+        entries = self.slots[level][slot]
+        if not entries:
+            return
+        self.slots[level][slot] = {}
+        for key, expire_tick in entries.items():
+            self._insert(key, expire_tick)
+
+    def _pop_due(self):
+        """Zamanı gelmiş (geçmişe kurulmuş) anahtarlar"""
+        if not self.due:
+            return []
+        due = [key for key in self.due if self.locations.get(key) == (-1, -1)]
+        for key in due:
+            self.locations.pop(key, None)
+            self.expire_ticks.pop(key, None)
+        self.due = []
+        return due
+
+    def _to_tick(self, timestamp):
+        """Epoch saniyeyi tick'e çevir"""
+        return int(timestamp // self.resolution)
+
+
+class PositionExpiryManager:
+    """MAX_TRADE_DURATION_MINUTES süresini aşan pozisyonları kapatır"""
+
+    def __init__(self, order_executor, max_duration_minutes=MAX_TRADE_DURATION_MINUTES,
+                 retry_seconds=EXPIRY_CLOSE_RETRY_SECONDS):
+        """PositionExpiryManager'ı başlat"""
+        self.order_executor = order_executor
+        self.max_duration_seconds = max_duration_minutes * 60
+        self.retry_seconds = retry_seconds
+        self.timer_wheel = TimerWheel()
+        self.stats = {'scheduled': 0, 'expired': 0, 'closed': 0, 'retried': 0}
+
+        print(f"⏳ PositionExpiryManager başlatıldı (max süre: {max_duration_minutes} dk)")
+
+    def on_position_opened(self, ticket, open_time=None, magic=ORDER_MAGIC):
+        """Pozisyon açıldı - süre dolumu zamanla
+
+        Botun magic numarasını taşımayan pozisyonlar (elle / başka EA) zamanlanmaz.
+        """
+        if magic != ORDER_MAGIC:
+            return False
+
+        if isinstance(open_time, datetime):
+            open_time = open_time.timestamp()
+        opened_at = open_time if open_time is not None else time.time()
+
+        self.timer_wheel.schedule(ticket, opened_at + self.max_duration_seconds)
+        self.stats['scheduled'] += 1
+        return True
+
+    def on_position_closed(self, ticket):
+        """Pozisyon kapandı - zamanlayıcıyı iptal et"""
+        return self.timer_wheel.cancel(ticket)
+
+    def process_expired(self, is_open=None, now=None):
+        """Süresi dolan pozisyonları executor ile kapat
+
+        is_open: ticket hâlâ açık mı? (broker tarafında SL/TP ile kapanmışsa atlanır)
+        Kapatılamayan pozisyon retry_seconds sonra tekrar denenmek üzere yeniden zamanlanır.
+        """
+        now = time.time() if now is None else now
+        results = []
+        for ticket in self.timer_wheel.advance(now):
+            self.stats['expired'] += 1
+            if is_open is not None and not is_open(ticket):
+                continue
+
+            print(f"⏳ Pozisyon {ticket} max süreyi aştı ({self.max_duration_seconds // 60} dk) - kapatılıyor")
+            result = self.order_executor.close_position(ticket, "AI Bot - Max Sure")
+            if result['success']:
+                self.stats['closed'] += 1
+            else:
+                print(f"⚠️ Pozisyon {ticket} kapatılamadı - {self.retry_seconds} sn sonra tekrar denenecek")
+                self.timer_wheel.schedule(ticket, now + self.retry_seconds)
+                self.stats['retried'] += 1
+            results.append(result)
+
+        return results
+
+
+# Test fonksiyonu
+def test_position_manager():
+    """TrailingStopManager'ı test et"""
+    import time
+    from trading_engine.contract_specs import ContractSpecCache
+
+    print("🧪 TrailingStopManager Test Başlıyor...")
+    print("=" * 50)
+
+    class DryRunExecutor:
+        """Emir göndermeyen test executor'ı"""
+        def modify_stops(self, ticket, symbol, stop_loss, take_profit):
+            return {'success': True, 'ticket': ticket, 'new_sl': stop_loss}
+
+    manager = TrailingStopManager(DryRunExecutor(), ContractSpecCache())
+    manager.add_position(1, 'EURUSD-T', 'BUY', 1.15950, stop_loss=1.15800, take_profit=1.16500)
+    manager.add_position(2, 'EURUSD-T', 'SELL', 1.16100, stop_loss=1.16300, take_profit=1.15500)
+
+    for bid in (1.15955, 1.16000, 1.16001, 1.16050, 1.16030):
+        modified = manager.on_ticks({'EURUSD-T': {'bid': bid, 'ask': bid + 0.00002}})
+        print(f"   bid {bid:.5f}: {modified} SL değişikliği, SL'ler {manager.stop_losses[:manager.count]}")
+
+    # Sync: magic'i farklı (elle açılmış) pozisyon takibe alınmaz
+    manager.sync_positions([
+        {'ticket': 1, 'symbol': 'EURUSD-T', 'type': 'BUY', 'open_price': 1.15950, 'magic': ORDER_MAGIC},
+        {'ticket': 3, 'symbol': 'EURUSD-T', 'type': 'BUY', 'open_price': 1.16000, 'magic': 0},
+    ])
+    print(f"   Sync sonrası takip edilen: {sorted(manager.rows)}")
+
+    # Ölçek testi: 500 pozisyon
+    for ticket in range(100, 600):
+        manager.add_position(ticket, 'EURUSD-T', 'BUY' if ticket % 2 else 'SELL', 1.1605)
+    start = time.perf_counter()
+    manager.compute_stop_updates({'EURUSD-T': {'bid': 1.161, 'ask': 1.16102}})
+    print(f"   {manager.count} pozisyon hesabı: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    # Timer wheel: 10.000 pozisyon, 30 dk süre
+    now = 1_700_000_000.0
+    wheel = TimerWheel(now=now)
+    start = time.perf_counter()
+    for ticket in range(10000):
+        wheel.schedule(ticket, now + 1800 + ticket % 600)
+    print(f"   10000 zamanlama: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    for ticket in range(0, 10000, 2):
+        wheel.cancel(ticket)
+
+    expired_early = wheel.advance(now + 1799)
+    expired = wheel.advance(now + 2400)
+    print(f"   30 dk öncesi: {len(expired_early)}, sonrası: {len(expired)} dolan, bekleyen: {len(wheel)}")
+
+    # Max süre: ilk kapatma denemesi başarısız -> retry_seconds sonra tekrar denenir
+    class FlakyExecutor:
+        """İlk kapatma denemesi başarısız olan test executor'ı"""
+        def __init__(self):
+            self.attempts = 0
+
+        def close_position(self, ticket, comment):
+            self.attempts += 1
+            return {'success': self.attempts > 1, 'original_ticket': ticket, 'profit': 0.0}
+
+    executor = FlakyExecutor()
+    expiry = PositionExpiryManager(executor, max_duration_minutes=30, retry_seconds=30)
+    expiry.timer_wheel = TimerWheel(now=now)
+    expiry.on_position_opened(7, open_time=now)
+    expiry.on_position_opened(8, open_time=now, magic=0)  # elle açılmış - zamanlanmamalı
+    first = expiry.process_expired(now=now + 1800)
+    second = expiry.process_expired(now=now + 1830)
+    print(f"   Max süre kapatma: ilk {[r['success'] for r in first]}, tekrar {[r['success'] for r in second]}, "
+          f"istatistik {expiry.stats}")
+
+if __name__ == "__main__":
+    test_position_manager()
@@ -6,6 +6,7 @@ Bu modül tüm risk kontrollerini, position sizing ve SL/TP hesaplamalarını ya
 
 import pandas as pd
 import numpy as np
+import time
 from datetime import datetime, timedelta
 import sys
 import os
@@ -16,9 +17,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.settings import (
     DAILY_MAX_LOSS_PERCENT, MAX_POSITIONS_PER_SYMBOL, MAX_TOTAL_POSITIONS,
     RISK_PER_TRADE, DEFAULT_LOT_SIZE, MIN_ACCOUNT_BALANCE,
-    DEFAULT_STOP_LOSS_PIPS, DEFAULT_TAKE_PROFIT_PIPS, TRADING_SYMBOLS
+    DEFAULT_STOP_LOSS_PIPS, DEFAULT_TAKE_PROFIT_PIPS, MIN_STOP_LOSS_PERCENT,
+    RISK_STATE_MAX_AGE_SECONDS, MAX_CORRELATION_POSITIONS,
+    VAR_GATE_ENABLED, MAX_PORTFOLIO_VAR_PERCENT
 )
 from data_manager.mt5_connector import MT5Connector
+from trading_engine.risk_state import RiskState
+from trading_engine.correlation_engine import RollingCorrelationEngine
+from trading_engine.pnl_ledger import DailyPnLLedger
+from trading_engine.circuit_breaker import CircuitBreaker
+from trading_engine.contract_specs import ContractSpecCache
+from trading_engine.portfolio_var import PortfolioVaR
+from utils.helpers import get_broker_symbol
 
 class RiskManager:
     """Risk yönetimi ve position sizing sınıfı"""
@@ -27,10 +37,68 @@ class RiskManager:
         """RiskManager'ı başlat"""
         self.daily_loss_tracker = {}
         self.position_count = {}
+        self.risk_state = RiskState()
+        self.correlation_engine = RollingCorrelationEngine()
+        self.pnl_ledger = DailyPnLLedger()
+        self.circuit_breaker = CircuitBreaker()
+        self.contract_specs = ContractSpecCache()
+        self.portfolio_var = PortfolioVaR(self.correlation_engine, self.contract_specs)
+        
+        # Bağlantı verilmezse kullanılacak hesap kaynağı (ör. simulation_mode'da PaperBroker)
+        self.account_connector = None
         print("🛡️ RiskManager başlatıldı")
     
-    def check_daily_loss_limit(self, account_balance, daily_pnl):
-        """Günlük zarar limitini kontrol et"""
+    def refresh_risk_state(self, mt5_conn=None):
+        """Risk durumunu terminalden (veya account_connector'dan) tek seferde yenile (hesap + pozisyonlar)"""
+        try:
+            if mt5_conn is None:
+                mt5_conn = self.account_connector
+            if mt5_conn is not None and mt5_conn.connected:
+                return self._load_risk_state(mt5_conn)
+            
+            with MT5Connector() as conn:
+                if not conn.connected:
+                    return False
+                return self._load_risk_state(conn)
+                
+        except Exception as e:
+            print(f"❌ Risk durumu yenileme hatası: {e}")
+            return False
+    
+    def _load_risk_state(self, mt5_conn):
+        """Bağlı connector üzerinden risk durumunu doldur"""
+        account_info = mt5_conn.get_account_info()
+        if not account_info:
+            return False
+        
+        # Kontrat bilgileri sembol başına bir kez terminalden yüklenir
+        self.contract_specs.ensure_loaded(mt5_conn)
+        
+        positions = mt5_conn.get_positions()
+        self.risk_state.sync_positions(positions)
+        self.risk_state.update_account(account_info)
+        
+        # Günlük P&L: sadece cursor'dan sonraki yeni deal'ler çekilir
+        new_deals = self.pnl_ledger.sync(mt5_conn)
+        self.pnl_ledger.set_unrealized(positions)
+        self.risk_state.set_realized_pnl(self.pnl_ledger.get_realized_pnl())
+        
+        # Devre kesici: kapanan deal'ler ve equity
+        self.circuit_breaker.on_deals(new_deals)
+        self.circuit_breaker.on_equity(account_info['equity'])
+        return True
+    
+    def _ensure_risk_state(self):
+        """Durum hiç yüklenmediyse veya çok eskiyse terminalden yenile"""
+        if self.risk_state.get_age_seconds() > RISK_STATE_MAX_AGE_SECONDS:
+            return self.refresh_risk_state()
+        return True
+    
+    def check_daily_loss_limit(self, account_balance, daily_pnl=None):
+        """Günlük zarar limitini kontrol et (P&L verilmezse günlük defterden okunur)"""
+        if daily_pnl is None:
+            daily_pnl = self.pnl_ledger.get_daily_pnl()
+        
         max_daily_loss = account_balance * (DAILY_MAX_LOSS_PERCENT / 100)
         
         if daily_pnl <= -max_daily_loss:
@@ -49,10 +117,23 @@ class RiskManager:
             'remaining': max_daily_loss - abs(daily_pnl) if daily_pnl < 0 else max_daily_loss
         }
     
-    def check_position_limits(self, symbol, current_positions):
-        """Pozisyon limitleri kontrol et"""
+    def check_position_limits(self, symbol, current_positions=None):
+        """Pozisyon limitleri kontrol et (liste verilmezse bellek içi risk durumu kullanılır)"""
+        if current_positions is None:
+            total_positions = self.risk_state.get_total_positions()
+            symbol_position_count = self.risk_state.get_symbol_position_count(symbol)
+            symbol_counts = {
+                open_symbol: self.risk_state.get_symbol_position_count(open_symbol)
+                for open_symbol in self.risk_state.get_open_symbols()
+            }
+        else:
+            total_positions = len(current_positions)
+            symbol_counts = {}
+            for pos in current_positions:
+                symbol_counts[pos['symbol']] = symbol_counts.get(pos['symbol'], 0) + 1
+            symbol_position_count = symbol_counts.get(symbol, 0)
+        
         # Toplam pozisyon sayısı
-        total_positions = len(current_positions)
         if total_positions >= MAX_TOTAL_POSITIONS:
             return {
                 'allowed': False,
@@ -60,26 +141,40 @@ class RiskManager:
             }
         
         # Sembole özel pozisyon sayısı
-        symbol_positions = [pos for pos in current_positions if pos['symbol'] == symbol]
-        if len(symbol_positions) >= MAX_POSITIONS_PER_SYMBOL:
+        if symbol_position_count >= MAX_POSITIONS_PER_SYMBOL:
             return {
                 'allowed': False,
-                'reason': f'{symbol} için max pozisyon limiti aşıldı: {len(symbol_positions)}/{MAX_POSITIONS_PER_SYMBOL}'
+                'reason': f'{symbol} için max pozisyon limiti aşıldı: {symbol_position_count}/{MAX_POSITIONS_PER_SYMBOL}'
             }
         
+        # Korelasyonlu küme pozisyon sayısı
+        correlated_positions = symbol_position_count
+        correlated_symbols = []
+        if self.correlation_engine.is_ready():
+            correlated_symbols = self.correlation_engine.get_correlated_symbols(symbol, symbol_counts.keys())
+            correlated_positions += sum(symbol_counts[other] for other in correlated_symbols)
+            
+            if correlated_positions >= MAX_CORRELATION_POSITIONS:
+                return {
+                    'allowed': False,
+                    'reason': f'{symbol} korelasyonlu pozisyon limiti aşıldı: {correlated_positions}/{MAX_CORRELATION_POSITIONS} ({", ".join(correlated_symbols)})'
+                }
+        
         return {
             'allowed': True,
             'reason': 'Pozisyon limitleri içinde',
             'total_positions': total_positions,
-            'symbol_positions': len(symbol_positions)
+            'symbol_positions': symbol_position_count,
+            'correlated_positions': correlated_positions,
+            'correlated_symbols': correlated_symbols
         }
     
     def calculate_position_size(self, account_balance, symbol, entry_price, stop_loss_price):
         """Position size hesapla (Risk bazlı)"""
         try:
-            # Sembol bilgilerini al
-            symbol_info = TRADING_SYMBOLS.get(symbol)
-            if not symbol_info:
+            # Kontrat bilgisini al (EURUSD veya EURUSD-T)
+            spec = self.contract_specs.get(symbol)
+            if not spec:
                 return {
                     'lot_size': DEFAULT_LOT_SIZE,
                     'reason': f'Sembol bilgisi bulunamadı, varsayılan lot: {DEFAULT_LOT_SIZE}'
@@ -88,37 +183,28 @@ class RiskManager:
             # Risk miktarını hesapla (hesabın %2'si)
             risk_amount = account_balance * (RISK_PER_TRADE / 100)
             
-            # Pip değerini hesapla
-            pip_difference = abs(entry_price - stop_loss_price)
-            
-            # Position value ve lot size hesaplama
-            point_value = symbol_info['point_value']
-            pip_value = pip_difference / point_value
+            # SL mesafesi (point cinsinden)
+            price_difference = abs(entry_price - stop_loss_price)
+            point_difference = price_difference / spec['point']
             
             # Lot size hesapla
-            if pip_value > 0:
-                # Pip başına değer (1 lot için)
-                pip_value_per_lot = self._get_pip_value_per_lot(symbol)
+            if point_difference > 0:
+                # 1 lot için SL'de kaybedilecek tutar (tick_value / tick_size)
+                loss_per_lot = self.contract_specs.get_money_per_lot(symbol, price_difference)
                 
                 # Risk bazlı lot size
-                calculated_lot = risk_amount / (pip_value * pip_value_per_lot)
-                
-                # Minimum ve maksimum lotları kontrol et
-                min_lot = symbol_info['min_lot']
-                max_lot = symbol_info['max_lot']
-                
-                # Lot size'ı sınırlar içinde tut
-                final_lot = max(min_lot, min(calculated_lot, max_lot))
+                calculated_lot = risk_amount / loss_per_lot
                 
-                # Lot size'ı standart adımlara yuvarla (0.01'in katları)
-                final_lot = round(final_lot, 2)
+                # Min/max sınırları ve broker'ın volume adımı
+                final_lot = self.contract_specs.normalize_volume(symbol, calculated_lot)
                 
                 return {
                     'lot_size': final_lot,
                     'risk_amount': risk_amount,
-                    'pip_difference': pip_value,
+                    'pip_difference': point_difference,
                     'calculated_lot': calculated_lot,
-                    'reason': f'Risk bazlı: ${risk_amount:.2f} risk, {pip_value:.1f} pip fark'
+                    'loss_per_lot': loss_per_lot,
+                    'reason': f'Risk bazlı: ${risk_amount:.2f} risk, {point_difference:.1f} point fark'
                 }
             else:
                 return {
@@ -133,24 +219,37 @@ class RiskManager:
                 'reason': f'Hesaplama hatası, varsayılan lot: {DEFAULT_LOT_SIZE}'
             }
     
+    @staticmethod
+    def stop_distances(spec, entry_price, atr_value=None):
+        """SL/TP fiyat mesafeleri (skaler veya NumPy dizisi - vektörel backtest de kullanır)
+        
+        ATR varsa 1.5 / 2.5 katı, yoksa sabit pip. SL mesafesi en az sembolün stops
+        level'ı ve fiyatın MIN_STOP_LOSS_PERCENT'i kadardır; SL genişletilirse TP de
+        aynı oranla genişletilir. Dönüş: (sl_distance, tp_distance, atr_used, floored)
+        """
+        entry_price = np.asarray(entry_price, dtype=np.float64)
+        atr = np.asarray(np.nan if atr_value is None else atr_value, dtype=np.float64)
+        atr_used = np.isfinite(atr) & (atr > 0)
+        
+        sl_distance = np.where(atr_used, atr * 1.5, DEFAULT_STOP_LOSS_PIPS * spec['point'])
+        tp_distance = np.where(atr_used, atr * 2.5, DEFAULT_TAKE_PROFIT_PIPS * spec['point'])
+        
+        # Sağlamlık tabanı: çok küçük ATR/pip SL'i dev lotlara dönüşmesin
+        floor = np.maximum((spec.get('stops_level') or 0) * spec['point'],
+                           entry_price * MIN_STOP_LOSS_PERCENT / 100)
+        floored = sl_distance < floor
+        scale = np.where(floored, floor / sl_distance, 1.0)
+        return sl_distance * scale, tp_distance * scale, atr_used, floored
+    
     def calculate_stop_loss_take_profit(self, symbol, entry_price, signal_type, atr_value=None):
         """Stop Loss ve Take Profit seviyelerini hesapla"""
         try:
-            symbol_info = TRADING_SYMBOLS.get(symbol)
-            if not symbol_info:
+            spec = self.contract_specs.get(symbol)
+            if not spec:
                 return None
             
-            point_value = symbol_info['point_value']
-            
-            # ATR bazlı SL/TP (varsa)
-            if atr_value and not pd.isna(atr_value):
-                # ATR'ın 1.5 katı SL, 2.5 katı TP
-                sl_distance = atr_value * 1.5
-                tp_distance = atr_value * 2.5
-            else:
-                # Varsayılan pip değerleri
-                sl_distance = DEFAULT_STOP_LOSS_PIPS * point_value
-                tp_distance = DEFAULT_TAKE_PROFIT_PIPS * point_value
+            sl_distance, tp_distance, atr_used, floored = self.stop_distances(spec, entry_price, atr_value)
+            sl_distance, tp_distance = float(sl_distance), float(tp_distance)
             
             if signal_type.upper() == 'BUY':
                 stop_loss = entry_price - sl_distance
@@ -160,11 +259,11 @@ class RiskManager:
                 take_profit = entry_price - tp_distance
             
             return {
-                'stop_loss': round(stop_loss, symbol_info.get('digits', 5)),
-                'take_profit': round(take_profit, symbol_info.get('digits', 5)),
+                'stop_loss': round(stop_loss, spec['digits']),
+                'take_profit': round(take_profit, spec['digits']),
                 'sl_distance': sl_distance,
                 'tp_distance': tp_distance,
-                'method': 'ATR' if atr_value else 'Fixed'
+                'method': ('ATR' if atr_used else 'Fixed') + (' (min SL)' if floored else '')
             }
             
         except Exception as e:
@@ -172,23 +271,47 @@ class RiskManager:
             return None
     
     def _get_pip_value_per_lot(self, symbol):
-        """1 lot için pip değerini hesapla"""
-        # Basitleştirilmiş pip değerleri
-        pip_values = {
-            'EURUSD': 10.0,  # $10 per pip for 1 lot
-            'GBPUSD': 10.0,
-            'USDCAD': 10.0,
-            'USDJPY': 10.0,
-            'XAUUSD': 1.0,   # $1 per pip for gold
-            'XAGUSD': 0.5,   # $0.5 per pip for silver
-        }
-        
-        return pip_values.get(symbol, 10.0)  # Varsayılan $10
+        """1 lot için point değerini hesapla (kontrat bilgisinden)"""
+        point_value = self.contract_specs.get_point_value_per_lot(symbol)
+        return point_value if point_value is not None else 10.0  # Varsayılan $10
     
     def validate_trade_risk(self, symbol, signal_type, entry_price, confidence, atr_value=None):
         """Bir trade'in tüm risk parametrelerini kontrol et"""
         print(f"\n🛡️ {symbol} {signal_type} trade risk analizi...")
         
+        try:
+            # Durum event'lerle güncel tutulur; sadece hiç yüklenmemişse terminale gidilir
+            if not self._ensure_risk_state():
+                return {
+                    'allowed': False,
+                    'reasons': ['Hesap bilgileri alınamadı'],
+                    'warnings': [],
+                    'risk_details': {}
+                }
+            
+            validation_result = self.evaluate_trade_risk(symbol, signal_type, entry_price, confidence, atr_value)
+            
+            if validation_result['risk_details']:
+                details = validation_result['risk_details']
+                print(f"✅ Risk analizi tamamlandı")
+                print(f"   Lot Size: {details['lot_size']}")
+                print(f"   Risk: ${details['risk_amount']:.2f}")
+                print(f"   SL: {details['stop_loss']:.5f}")
+                print(f"   TP: {details['take_profit']:.5f}")
+            
+            return validation_result
+                
+        except Exception as e:
+            print(f"❌ Risk validasyon hatası: {e}")
+            return {
+                'allowed': False,
+                'reasons': [f'Risk analizi hatası: {e}'],
+                'warnings': [],
+                'risk_details': {}
+            }
+    
+    def evaluate_trade_risk(self, symbol, signal_type, entry_price, confidence, atr_value=None):
+        """Bellek içi risk durumu üzerinden saf risk hesabı (terminal çağrısı yok)"""
         validation_result = {
             'allowed': True,
             'reasons': [],
@@ -196,125 +319,300 @@ class RiskManager:
             'risk_details': {}
         }
         
+        state = self.risk_state
+        balance = state.balance
+        equity = state.equity
+        
+        # Minimum bakiye kontrolü
+        if balance < MIN_ACCOUNT_BALANCE:
+            validation_result['allowed'] = False
+            validation_result['reasons'].append(f'Yetersiz bakiye: ${balance:.2f} < ${MIN_ACCOUNT_BALANCE:.2f}')
+        
+        # Devre kesici
+        if self.circuit_breaker.is_tripped():
+            validation_result['allowed'] = False
+            validation_result['reasons'].append(f'Devre kesici aktif: {self.circuit_breaker.trip_reason}')
+        
+        # Günlük P&L (defterden: bugün kapananlar + açık pozisyonlar)
+        daily_pnl = self.pnl_ledger.get_daily_pnl()
+        
+        # Günlük zarar limitini kontrol et
+        daily_check = self.check_daily_loss_limit(balance, daily_pnl)
+        if not daily_check['allowed']:
+            validation_result['allowed'] = False
+            validation_result['reasons'].append(daily_check['reason'])
+        
+        # Pozisyon limitlerini kontrol et
+        position_check = self.check_position_limits(symbol)
+        if not position_check['allowed']:
+            validation_result['allowed'] = False
+            validation_result['reasons'].append(position_check['reason'])
+        
+        # SL/TP hesapla
+        sl_tp = self.calculate_stop_loss_take_profit(symbol, entry_price, signal_type, atr_value)
+        if not sl_tp:
+            validation_result['allowed'] = False
+            validation_result['reasons'].append('SL/TP hesaplanamadı')
+            return validation_result
+        
+        # Position size hesapla
+        position_size = self.calculate_position_size(balance, symbol, entry_price, sl_tp['stop_loss'])
+        
+        # Opsiyonel portföy VaR kontrolü
+        if VAR_GATE_ENABLED:
+            var_check = self.portfolio_var.check_trade(
+                state.snapshot()['positions'], symbol, signal_type, position_size['lot_size'],
+                entry_price, equity, MAX_PORTFOLIO_VAR_PERCENT
+            )
+            if not var_check['allowed']:
+                validation_result['allowed'] = False
+                validation_result['reasons'].append(var_check['reason'])
+        
+        total_positions = state.get_total_positions()
+        
+        # Risk detaylarını kaydet
+        validation_result['risk_details'] = {
+            'account_balance': balance,
+            'account_equity': equity,
+            'daily_pnl': daily_pnl,
+            'daily_loss_limit': daily_check['max_loss'],
+            'position_count': total_positions,
+            'entry_price': entry_price,
+            'stop_loss': sl_tp['stop_loss'],
+            'take_profit': sl_tp['take_profit'],
+            'lot_size': position_size['lot_size'],
+            'risk_amount': position_size.get('risk_amount', 0),
+            'confidence': confidence
+        }
+        
+        # Uyarılar
+        if confidence < 60:
+            validation_result['warnings'].append(f'Düşük güven seviyesi: %{confidence:.1f}')
+        
+        if total_positions > MAX_TOTAL_POSITIONS * 0.8:
+            validation_result['warnings'].append('Pozisyon sayısı limite yaklaşıyor')
+        
+        if daily_check.get('remaining', 0) < daily_check['max_loss'] * 0.3:
+            validation_result['warnings'].append('Günlük zarar limitine yaklaşılıyor')
+        
+        return validation_result
+    
+    def validate_trade_batch(self, candidates, mt5_conn=None):
+        """Bir döngüdeki tüm aday sinyalleri tek hesap görüntüsüne karşı birlikte değerlendir
+        
+        candidates: [{'symbol', 'signal_type', 'entry_price', 'confidence', 'atr_value', ...}]
+        Dönüş: güvene göre sıralı kabul edilen alt küme ve reddedilenler
+        """
+        batch_result = {'accepted': [], 'rejected': [], 'snapshot': None}
+        if not candidates:
+            return batch_result
+        
+        print(f"\n🛡️ {len(candidates)} aday sinyal için toplu risk analizi...")
+        
         try:
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    validation_result['allowed'] = False
-                    validation_result['reasons'].append('MT5 bağlantısı yok')
-                    return validation_result
-                
-                # Hesap bilgilerini al
-                account_info = mt5_conn.get_account_info()
-                if not account_info:
-                    validation_result['allowed'] = False
-                    validation_result['reasons'].append('Hesap bilgileri alınamadı')
-                    return validation_result
-                
-                balance = account_info['balance']
-                equity = account_info['equity']
-                
-                # Minimum bakiye kontrolü
-                if balance < MIN_ACCOUNT_BALANCE:
-                    validation_result['allowed'] = False
-                    validation_result['reasons'].append(f'Yetersiz bakiye: ${balance:.2f} < ${MIN_ACCOUNT_BALANCE:.2f}')
+            if not self._ensure_risk_state():
+                for candidate in candidates:
+                    batch_result['rejected'].append(self._batch_rejection(candidate, ['Hesap bilgileri alınamadı']))
+                return batch_result
+            
+            # Tek hesap görüntüsü
+            state = self.risk_state.snapshot()
+            batch_result['snapshot'] = state
+            balance = state['balance']
+            daily_pnl = self.pnl_ledger.get_daily_pnl()
+            daily_check = self.check_daily_loss_limit(balance, daily_pnl)
+            
+            # Hesap geneli kontroller (tüm adaylar için ortak)
+            global_reasons = []
+            if balance < MIN_ACCOUNT_BALANCE:
+                global_reasons.append(f'Yetersiz bakiye: ${balance:.2f} < ${MIN_ACCOUNT_BALANCE:.2f}')
+            if self.circuit_breaker.is_tripped():
+                global_reasons.append(f'Devre kesici aktif: {self.circuit_breaker.trip_reason}')
+            if not daily_check['allowed']:
+                global_reasons.append(daily_check['reason'])
+            
+            if global_reasons:
+                for candidate in candidates:
+                    batch_result['rejected'].append(self._batch_rejection(candidate, global_reasons))
+                return batch_result
+            
+            # Aday başına SL/TP, lot ve margin (vektörlere)
+            count = len(candidates)
+            lots = np.zeros(count)
+            risk_amounts = np.zeros(count)
+            margins = np.full(count, np.nan)
+            confidences = np.array([candidate['confidence'] for candidate in candidates], dtype=np.float64)
+            engine_indices = np.full(count, -1, dtype=np.int64)
+            details = [None] * count
+            
+            for i, candidate in enumerate(candidates):
+                symbol = candidate['symbol']
+                sl_tp = self.calculate_stop_loss_take_profit(
+                    symbol, candidate['entry_price'], candidate['signal_type'], candidate.get('atr_value')
+                )
+                if not sl_tp:
+                    continue
                 
-                # Günlük P&L hesapla (basit - bugünkü profit)
-                daily_pnl = account_info['profit']
+                position_size = self.calculate_position_size(balance, symbol, candidate['entry_price'], sl_tp['stop_loss'])
+                lots[i] = position_size['lot_size']
+                risk_amounts[i] = position_size.get('risk_amount', 0)
                 
-                # Günlük zarar limitini kontrol et
-                daily_check = self.check_daily_loss_limit(balance, daily_pnl)
-                if not daily_check['allowed']:
-                    validation_result['allowed'] = False
-                    validation_result['reasons'].append(daily_check['reason'])
+                margin_per_lot = self.contract_specs.get_margin_per_lot(
+                    symbol, candidate['signal_type'], candidate['entry_price'], mt5_conn
+                )
+                if margin_per_lot is not None:
+                    margins[i] = margin_per_lot * lots[i]
+                else:
+                    # Margin bilinmiyorsa büyük lot denetimsiz gitmesin - minimum lota indir
+                    spec = self.contract_specs.get(symbol)
+                    min_lot = spec['volume_min'] if spec else DEFAULT_LOT_SIZE
+                    if lots[i] > min_lot:
+                        risk_amounts[i] *= min_lot / lots[i]
+                        lots[i] = min_lot
                 
-                # Mevcut pozisyonları al
-                current_positions = mt5_conn.get_positions()
+                engine_indices[i] = self.correlation_engine.symbol_index.get(get_broker_symbol(symbol), -1)
+                details[i] = sl_tp
+            
+            # Mevcut pozisyon sayıları (korelasyon motoru sembol sırasıyla)
+            engine_symbols = self.correlation_engine.symbols
+            open_counts = np.array([
+                state['symbol_exposure'].get(engine_symbol, {}).get('count', 0) for engine_symbol in engine_symbols
+            ], dtype=np.int64)
+            correlation_mask = (self.correlation_engine.get_correlation_mask()
+                                if self.correlation_engine.is_ready() else np.eye(len(engine_symbols), dtype=bool))
+            
+            total_positions = state['total_positions']
+            symbol_counts = {symbol: exposure['count'] for symbol, exposure in state['symbol_exposure'].items()}
+            free_margin = state['free_margin']
+            used_margin = 0.0
+            book_positions = list(state['positions'])
+            
+            # Güvene göre sırala, açgözlü şekilde kabul et
+            for i in np.argsort(-confidences, kind='stable'):
+                candidate = candidates[i]
+                symbol = get_broker_symbol(candidate['symbol'])
+                reasons = []
+                warnings = []
                 
-                # Pozisyon limitlerini kontrol et
-                position_check = self.check_position_limits(symbol, current_positions)
-                if not position_check['allowed']:
-                    validation_result['allowed'] = False
-                    validation_result['reasons'].append(position_check['reason'])
+                if details[i] is None:
+                    batch_result['rejected'].append(self._batch_rejection(candidate, ['SL/TP hesaplanamadı']))
+                    continue
                 
-                # SL/TP hesapla
-                sl_tp = self.calculate_stop_loss_take_profit(symbol, entry_price, signal_type, atr_value)
-                if not sl_tp:
-                    validation_result['allowed'] = False
-                    validation_result['reasons'].append('SL/TP hesaplanamadı')
-                    return validation_result
+                if total_positions >= MAX_TOTAL_POSITIONS:
+                    reasons.append(f'Max toplam pozisyon limiti aşıldı: {total_positions}/{MAX_TOTAL_POSITIONS}')
                 
-                # Position size hesapla
-                position_size = self.calculate_position_size(balance, symbol, entry_price, sl_tp['stop_loss'])
+                if symbol_counts.get(symbol, 0) >= MAX_POSITIONS_PER_SYMBOL:
+                    reasons.append(f'{symbol} için max pozisyon limiti aşıldı: {symbol_counts.get(symbol, 0)}/{MAX_POSITIONS_PER_SYMBOL}')
                 
-                # Risk detaylarını kaydet
-                validation_result['risk_details'] = {
-                    'account_balance': balance,
-                    'account_equity': equity,
-                    'daily_pnl': daily_pnl,
-                    'daily_loss_limit': daily_check['max_loss'],
-                    'position_count': len(current_positions),
-                    'entry_price': entry_price,
-                    'stop_loss': sl_tp['stop_loss'],
-                    'take_profit': sl_tp['take_profit'],
-                    'lot_size': position_size['lot_size'],
-                    'risk_amount': position_size.get('risk_amount', 0),
-                    'confidence': confidence
-                }
+                engine_index = engine_indices[i]
+                if engine_index >= 0:
+                    cluster_positions = int(correlation_mask[engine_index] @ open_counts)
+                    if cluster_positions >= MAX_CORRELATION_POSITIONS:
+                        reasons.append(f'{symbol} korelasyonlu pozisyon limiti aşıldı: {cluster_positions}/{MAX_CORRELATION_POSITIONS}')
                 
-                # Uyarılar
-                if confidence < 60:
-                    validation_result['warnings'].append(f'Düşük güven seviyesi: %{confidence:.1f}')
+                if np.isnan(margins[i]):
+                    warnings.append(f'Margin hesaplanamadı, minimum lot kullanıldı: {lots[i]}')
+                elif used_margin + margins[i] > free_margin:
+                    reasons.append(f'Yetersiz serbest margin: ${used_margin + margins[i]:.2f} > ${free_margin:.2f}')
                 
-                if len(current_positions) > MAX_TOTAL_POSITIONS * 0.8:
-                    validation_result['warnings'].append('Pozisyon sayısı limite yaklaşıyor')
+                # Opsiyonel portföy VaR kontrolü (bu döngüde kabul edilenler dahil)
+                if VAR_GATE_ENABLED and not reasons:
+                    var_check = self.portfolio_var.check_trade(
+                        book_positions, symbol, candidate['signal_type'], float(lots[i]),
+                        candidate['entry_price'], state['equity'], MAX_PORTFOLIO_VAR_PERCENT
+                    )
+                    if not var_check['allowed']:
+                        reasons.append(var_check['reason'])
                 
-                if daily_check.get('remaining', 0) < daily_check['max_loss'] * 0.3:
-                    validation_result['warnings'].append('Günlük zarar limitine yaklaşılıyor')
+                if reasons:
+                    batch_result['rejected'].append(self._batch_rejection(candidate, reasons))
+                    continue
                 
-                print(f"✅ Risk analizi tamamlandı")
-                print(f"   Lot Size: {position_size['lot_size']}")
-                print(f"   Risk: ${position_size.get('risk_amount', 0):.2f}")
-                print(f"   SL: {sl_tp['stop_loss']:.5f}")
-                print(f"   TP: {sl_tp['take_profit']:.5f}")
+                # Kabul - sonraki adaylar bu pozisyonu görerek değerlendirilir
+                total_positions += 1
+                symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
+                if engine_index >= 0:
+                    open_counts[engine_index] += 1
+                if not np.isnan(margins[i]):
+                    used_margin += margins[i]
+                book_positions.append({
+                    'symbol': symbol, 'type': candidate['signal_type'],
+                    'volume': float(lots[i]), 'current_price': candidate['entry_price']
+                })
                 
-                return validation_result
+                if candidate['confidence'] < 60:
+                    warnings.append(f'Düşük güven seviyesi: %{candidate["confidence"]:.1f}')
                 
+                batch_result['accepted'].append({
+                    'allowed': True,
+                    'reasons': [],
+                    'warnings': warnings,
+                    'candidate': candidate,
+                    'risk_details': {
+                        'account_balance': balance,
+                        'account_equity': state['equity'],
+                        'daily_pnl': daily_pnl,
+                        'daily_loss_limit': daily_check['max_loss'],
+                        'position_count': total_positions,
+                        'entry_price': candidate['entry_price'],
+                        'stop_loss': details[i]['stop_loss'],
+                        'take_profit': details[i]['take_profit'],
+                        'lot_size': float(lots[i]),
+                        'risk_amount': float(risk_amounts[i]),
+                        'margin_required': None if np.isnan(margins[i]) else float(margins[i]),
+                        'confidence': candidate['confidence']
+                    }
+                })
+            
+            print(f"✅ Toplu risk analizi: {len(batch_result['accepted'])} kabul, {len(batch_result['rejected'])} red")
+            return batch_result
+            
         except Exception as e:
-            print(f"❌ Risk validasyon hatası: {e}")
-            validation_result['allowed'] = False
-            validation_result['reasons'].append(f'Risk analizi hatası: {e}')
-            return validation_result
+            print(f"❌ Toplu risk validasyon hatası: {e}")
+            return {
+                'accepted': [],
+                'rejected': [self._batch_rejection(candidate, [f'Risk analizi hatası: {e}']) for candidate in candidates],
+                'snapshot': None
+            }
+    
+    def _batch_rejection(self, candidate, reasons):
+        """Toplu değerlendirmede reddedilen aday sonucu"""
+        return {
+            'allowed': False,
+            'reasons': list(reasons),
+            'warnings': [],
+            'candidate': candidate,
+            'risk_details': {}
+        }
     
     def get_risk_summary(self):
         """Risk durumu özeti"""
         try:
-            with MT5Connector() as mt5_conn:
-                if not mt5_conn.connected:
-                    return None
-                
-                account_info = mt5_conn.get_account_info()
-                positions = mt5_conn.get_positions()
-                
-                if not account_info:
-                    return None
-                
-                # Günlük P&L
-                daily_pnl = account_info['profit']
-                daily_check = self.check_daily_loss_limit(account_info['balance'], daily_pnl)
-                
-                summary = {
-                    'account_balance': account_info['balance'],
-                    'account_equity': account_info['equity'],
-                    'free_margin': account_info['free_margin'],
-                    'margin_level': account_info.get('margin_level', 0),
-                    'daily_pnl': daily_pnl,
-                    'daily_loss_remaining': daily_check.get('remaining', 0),
-                    'total_positions': len(positions),
-                    'max_positions': MAX_TOTAL_POSITIONS,
-                    'trading_allowed': daily_check['allowed'] and len(positions) < MAX_TOTAL_POSITIONS
-                }
-                
-                return summary
+            if not self._ensure_risk_state():
+                return None
+            
+            state = self.risk_state.snapshot()
+            
+            # Günlük P&L
+            daily_pnl = self.pnl_ledger.get_daily_pnl()
+            daily_check = self.check_daily_loss_limit(state['balance'], daily_pnl)
+            
+            summary = {
+                'account_balance': state['balance'],
+                'account_equity': state['equity'],
+                'free_margin': state['free_margin'],
+                'margin_level': state['margin_level'],
+                'daily_pnl': daily_pnl,
+                'daily_loss_remaining': daily_check.get('remaining', 0),
+                'total_positions': state['total_positions'],
+                'max_positions': MAX_TOTAL_POSITIONS,
+                'circuit_breaker': self.circuit_breaker.get_status(),
+                'portfolio_var': self.portfolio_var.calculate(state['positions']),
+                'trading_allowed': (daily_check['allowed'] and state['total_positions'] < MAX_TOTAL_POSITIONS
+                                    and not self.circuit_breaker.is_tripped())
+            }
+            
+            return summary
                 
         except Exception as e:
             print(f"❌ Risk özeti hatası: {e}")
@@ -372,5 +670,33 @@ def test_risk_manager():
         for key, value in summary.items():
             print(f"   {key}: {value}")
 
+def benchmark_risk_validation(iterations=10000):
+    """Bellek içi trade öncesi risk kontrolünün süresini ölç"""
+    print("⏱️ Risk validasyon benchmark'ı...")
+    
+    risk_mgr = RiskManager()
+    
+    # Terminal olmadan sentetik hesap durumu
+    risk_mgr.risk_state.update_account({
+        'balance': 10000.0, 'equity': 9950.0, 'margin': 120.0,
+        'free_margin': 9830.0, 'margin_level': 8291.0, 'profit': -50.0
+    })
+    positions = [
+        {'ticket': 1, 'symbol': 'EURUSD', 'type': 'BUY', 'volume': 0.1, 'profit': -30.0},
+        {'ticket': 2, 'symbol': 'XAUUSD', 'type': 'SELL', 'volume': 0.05, 'profit': -20.0}
+    ]
+    risk_mgr.risk_state.sync_positions(positions)
+    risk_mgr.pnl_ledger.set_unrealized(positions)
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = risk_mgr.evaluate_trade_risk('EURUSD', 'BUY', 1.16250, 75.0, 0.0015)
+    elapsed = time.perf_counter() - start
+    
+    print(f"   {iterations} kontrol: {elapsed * 1000:.1f} ms")
+    print(f"   Kontrol başına: {elapsed / iterations * 1e6:.1f} µs")
+    print(f"   Sonuç: {'✅ İZİNLİ' if result['allowed'] else '❌ İZİNSİZ'} - Lot: {result['risk_details']['lot_size']}")
+
 if __name__ == "__main__":
-    test_risk_manager()
\ No newline at end of file
+    test_risk_manager()
+    benchmark_risk_validation()
\ No newline at end of file
@@ -0,0 +1,230 @@
+# trading_engine/risk_state.py
+"""
+AI Trading Bot - Bellek İçi Risk Durumu
+Hesap ve pozisyon event'leriyle güncel tutulan risk durumu (bakiye, equity,
+sembol/para birimi bazlı açık pozisyon, günlük P&L). Trade öncesi risk
+kontrolleri terminale gitmeden bu durum üzerinden yapılır.
+"""
+
+import threading
+import time
+from datetime import datetime, date
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.helpers import get_symbol_currencies
+
+class RiskState:
+    """Event'lerle güncellenen bellek içi risk durumu"""
+
+    def __init__(self):
+        """RiskState'i başlat"""
+        self.lock = threading.RLock()
+
+        # Hesap durumu
+        self.balance = 0.0
+        self.equity = 0.0
+        self.margin = 0.0
+        self.free_margin = 0.0
+        self.margin_level = 0.0
+        self.floating_pnl = 0.0
+        self.currency = None
+        self.leverage = None
+
+        # Pozisyonlar ve exposure
+        self.positions = {}             # ticket -> pozisyon
+        self.symbol_exposure = {}       # symbol -> {'count', 'volume', 'net_volume'}
+        self.currency_exposure = {}     # currency -> net lot (base +, quote -)
+
+        # Günlük P&L (gerçekleşen kısım closed deal event'lerinden)
+        self.trading_day = date.today()
+        self.realized_pnl = 0.0
+
+        self.last_account_update = 0.0
+        self.last_positions_update = 0.0
+
+    # =========================================================================
+    # Event'ler
+    # =========================================================================
+
+    def update_account(self, account_info):
+        """Hesap bilgisi event'i (MT5Connector.get_account_info formatı)"""
+        if not account_info:
+            return
+
+        with self.lock:
+            self.balance = account_info['balance']
+            self.equity = account_info['equity']
+            self.margin = account_info.get('margin', 0.0)
+            self.free_margin = account_info.get('free_margin', 0.0)
+            self.margin_level = account_info.get('margin_level', 0.0) or 0.0
+            self.floating_pnl = account_info.get('profit', 0.0)
+            self.currency = account_info.get('currency', self.currency)
+            self.leverage = account_info.get('leverage', self.leverage)
+            self.last_account_update = time.time()
+
+    def sync_positions(self, positions):
+        """Tüm pozisyon listesiyle durumu yeniden kur (MT5Connector.get_positions formatı)"""
+        with self.lock:
+            self.positions = {}
+            self.symbol_exposure = {}
+            self.currency_exposure = {}
+
+            for position in positions or []:
+                self._add_position(position)
+
+            self.floating_pnl = sum(pos.get('profit', 0.0) for pos in self.positions.values())
+            self.last_positions_update = time.time()
+
+    def on_position_opened(self, position):
+        """Yeni pozisyon event'i"""
+        with self.lock:
+            if position['ticket'] in self.positions:
+                self._remove_position(position['ticket'])
+            self._add_position(position)
+
+    def on_position_closed(self, ticket, profit=None):
+        """Pozisyon kapandı event'i - gerçekleşen P&L'e eklenir"""
+        with self.lock:
+            position = self._remove_position(ticket)
+
+            if profit is None and position:
+                profit = position.get('profit', 0.0)
+
+            if profit is not None:
+                self.on_deal_closed(profit)
+
+            return position
+
+    def on_position_update(self, ticket, profit=None, current_price=None):
+        """Açık pozisyonun anlık P&L / fiyat güncellemesi"""
+        with self.lock:
+            position = self.positions.get(ticket)
+            if not position:
+                return
+
+            if profit is not None:
+                self.floating_pnl += profit - position.get('profit', 0.0)
+                position['profit'] = profit
+            if current_price is not None:
+                position['current_price'] = current_price
+
+    def on_deal_closed(self, profit):
+        """Gerçekleşen kapanış P&L'i ekle"""
+        with self.lock:
+            self._roll_day()
+            self.realized_pnl += profit
+
+    def set_realized_pnl(self, realized_pnl):
+        """Gerçekleşen günlük P&L'i dış kaynaktan ayarla"""
+        with self.lock:
+            self._roll_day()
+            self.realized_pnl = realized_pnl
+
+    # =========================================================================
+    # Sorgular (O(1))
+    # =========================================================================
+
+    def get_daily_pnl(self):
+        """Günlük P&L = gerçekleşen + açık pozisyonların anlık P&L'i"""
+        with self.lock:
+            self._roll_day()
+            return self.realized_pnl + self.floating_pnl
+
+    def get_total_positions(self):
+        """Toplam açık pozisyon sayısı"""
+        return len(self.positions)
+
+    def get_symbol_position_count(self, symbol):
+        """Sembol bazlı açık pozisyon sayısı"""
+        exposure = self.symbol_exposure.get(symbol)
+        return exposure['count'] if exposure else 0
+
+    def get_symbol_exposure(self, symbol):
+        """Sembol bazlı exposure"""
+        return dict(self.symbol_exposure.get(symbol, {'count': 0, 'volume': 0.0, 'net_volume': 0.0}))
+
+    def get_currency_exposure(self, currency):
+        """Para birimi bazlı net exposure (lot)"""
+        return self.currency_exposure.get(currency, 0.0)
+
+    def get_open_symbols(self):
+        """Açık pozisyonu olan semboller"""
+        return [symbol for symbol, exposure in self.symbol_exposure.items() if exposure['count'] > 0]
+
+    def is_ready(self):
+        """Durum en az bir kez hesap bilgisiyle beslendi mi?"""
+        return self.last_account_update > 0
+
+    def get_age_seconds(self):
+        """Son hesap güncellemesinden bu yana geçen süre"""
+        if not self.last_account_update:
+            return float('inf')
+        return time.time() - self.last_account_update
+
+    def snapshot(self):
+        """Tutarlı bir kopya al (dashboard / raporlama için)"""
+        with self.lock:
+            return {
+                'balance': self.balance,
+                'equity': self.equity,
+                'margin': self.margin,
+                'free_margin': self.free_margin,
+                'margin_level': self.margin_level,
+                'floating_pnl': self.floating_pnl,
+                'realized_pnl': self.realized_pnl,
+                'daily_pnl': self.realized_pnl + self.floating_pnl,
+                'total_positions': len(self.positions),
+                'positions': [dict(pos) for pos in self.positions.values()],
+                'symbol_exposure': {symbol: dict(exp) for symbol, exp in self.symbol_exposure.items()},
+                'currency_exposure': dict(self.currency_exposure),
+                'updated_at': datetime.fromtimestamp(self.last_account_update) if self.last_account_update else None
+            }
+
+    # =========================================================================
+    # Yardımcılar
+    # =========================================================================
+
+    def _add_position(self, position):
+        """Pozisyonu ekle ve exposure'ları artır"""
+        position = dict(position)
+        self.positions[position['ticket']] = position
+        self._apply_exposure(position, 1)
+
+    def _remove_position(self, ticket):
+        """Pozisyonu çıkar ve exposure'ları azalt"""
+        position = self.positions.pop(ticket, None)
+        if position:
+            self._apply_exposure(position, -1)
+            self.floating_pnl -= position.get('profit', 0.0)
+        return position
+
+    def _apply_exposure(self, position, sign):
+        """Sembol ve para birimi exposure'larını güncelle"""
+        symbol = position['symbol']
+        volume = position.get('volume', 0.0)
+        direction = 1 if position.get('type', 'BUY') == 'BUY' else -1
+
+        exposure = self.symbol_exposure.setdefault(symbol, {'count': 0, 'volume': 0.0, 'net_volume': 0.0})
+        exposure['count'] += sign
+        exposure['volume'] += sign * volume
+        exposure['net_volume'] += sign * direction * volume
+
+        if exposure['count'] <= 0:
+            del self.symbol_exposure[symbol]
+
+        currencies = get_symbol_currencies(symbol)
+        signed_volume = sign * direction * volume
+        self.currency_exposure[currencies[0]] = self.currency_exposure.get(currencies[0], 0.0) + signed_volume
+        if len(currencies) > 1:
+            self.currency_exposure[currencies[1]] = self.currency_exposure.get(currencies[1], 0.0) - signed_volume
+
+    def _roll_day(self):
+        """Gün değiştiyse gerçekleşen P&L'i sıfırla"""
+        today = date.today()
+        if today != self.trading_day:
+            self.trading_day = today
+            self.realized_pnl = 0.0
@@ -0,0 +1,356 @@
+# trading_engine/trade_journal.py
+"""
+AI Trading Bot - Emir ve Trade Günlüğü (Journal)
+Her emir isteği, sonucu, dolum ve kapanış event'i append-only bir dosyaya
+uzunluk önekli + CRC'li kayıt olarak yazılır. Gönderim yolunda sadece bellek
+tamponuna eklenir; arka plandaki flusher tamponu toplu yazıp tek fsync yapar
+(group commit). Açılışta günlük tekrar oynatılarak açık pozisyonlar kurulur
+ve positions_get ile uzlaştırılır.
+"""
+
+import json
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import (
+    TRADE_JOURNAL_FILE, TRADE_JOURNAL_FLUSH_MS, TRADE_JOURNAL_COMPACT_BYTES, ORDER_HISTORY_SIZE,
+    ORDER_MAGIC
+)
+
+# Kayıt başlığı: payload uzunluğu + CRC32
+RECORD_HEADER = struct.Struct('<II')
+
+class TradeJournal:
+    """Append-only, group-commit fsync'li emir/trade günlüğü"""
+
+    def __init__(self, journal_file=TRADE_JOURNAL_FILE, flush_interval_ms=TRADE_JOURNAL_FLUSH_MS):
+        """TradeJournal'ı başlat"""
+        self.journal_file = journal_file
+        self.flush_interval = flush_interval_ms / 1000
+        self.lock = threading.Condition()
+
+        self.buffer = []
+        self.pending_sequence = 0     # tampona eklenen son kayıt
+        self.synced_sequence = 0      # diske fsync'lenen son kayıt
+        self.running = False
+        self.file = None
+        self.flusher = None
+
+        self.stats = {'records': 0, 'flushes': 0, 'bytes': 0}
+
+        print("📓 TradeJournal başlatıldı")
+
+    # =========================================================================
+    # Yazma
+    # =========================================================================
+
+    def open(self):
+        """Günlük dosyasını aç ve arka plan flusher'ı başlat"""
+        if self.running:
+            return
+
+        self._open_file()
+        self.running = True
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def append(self, event_type, data):
+        """Event'i tampona ekle - fsync beklemez. Sıra numarasını döndürür"""
+        payload = json.dumps(
+            {'event': event_type, 'ts': time.time(), 'data': data},
+            default=self._json_default, separators=(',', ':')
+        ).encode('utf-8')
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self.lock:
+            self.buffer.append(record)
+            self.pending_sequence += 1
+            self.lock.notify()
+            return self.pending_sequence
+
+    def flush(self, timeout=5.0):
+        """Tampondaki tüm kayıtlar diske yazılana kadar bekle"""
+        with self.lock:
+            target = self.pending_sequence
+            if not self.running:
+                self._write_buffer_locked()
+                return True
+
+            self.lock.notify()
+            return self.lock.wait_for(lambda: self.synced_sequence >= target, timeout)
+
+    def close(self):
+        """Flusher'ı durdur, kalan kayıtları yaz ve dosyayı kapat"""
+        with self.lock:
+            if not self.running:
+                # open() hiç çağrılmadıysa tampondaki kayıtlar yine de diske yazılır
+                if self.buffer:
+                    self._open_file()
+                    self._write_buffer_locked()
+                    self.file.close()
+                    self.file = None
+                return
+            self.running = False
+            self.lock.notify()
+
+        if self.flusher:
+            self.flusher.join(timeout=5.0)
+
+        with self.lock:
+            self._write_buffer_locked()
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def _flush_loop(self):
+        """Arka plan group commit döngüsü"""
+        while True:
+            with self.lock:
+                self.lock.wait_for(lambda: self.buffer or not self.running)
+                if not self.running:
+                    return
+
+            # Aynı pencerede gelen diğer kayıtları da topla
+            time.sleep(self.flush_interval)
+
+            with self.lock:
+                self._write_buffer_locked()
+
+    def _open_file(self):
+        """Günlük dosyasını ekleme modunda aç"""
+        directory = os.path.dirname(self.journal_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.journal_file, 'ab')
+
+    def _write_buffer_locked(self):
+        """Tamponu tek write + fsync ile yaz (lock altında çağrılır)"""
+        if not self.buffer or not self.file:
+            return
+
+        records = b''.join(self.buffer)
+        sequence = self.pending_sequence
+        count = len(self.buffer)
+        self.buffer = []
+
+        try:
+            self.file.write(records)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+            self.synced_sequence = sequence
+            self.stats['records'] += count
+            self.stats['flushes'] += 1
+            self.stats['bytes'] += len(records)
+        except Exception as e:
+            print(f"❌ Trade günlüğü yazılamadı: {e}")
+        finally:
+            self.lock.notify_all()
+
+    # =========================================================================
+    # Okuma / Durum kurma
+    # =========================================================================
+
+    def replay(self):
+        """Günlükteki geçerli kayıtları sırayla oku. Yarım/bozuk kuyruk kesilir"""
+        events = []
+        if not os.path.exists(self.journal_file):
+            return events
+
+        with open(self.journal_file, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        header_size = RECORD_HEADER.size
+        while offset + header_size <= len(data):
+            length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + header_size:offset + header_size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+
+            events.append(json.loads(payload))
+            offset += header_size + length
+
+        if offset < len(data):
+            print(f"⚠️ Trade günlüğünde {len(data) - offset} byte bozuk kuyruk kesildi")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(offset)
+
+        return events
+
+    def rebuild_state(self, history_size=ORDER_HISTORY_SIZE):
+        """Günlüğü oynatarak açık pozisyonları ve son emir geçmişini kur"""
+        start = time.perf_counter()
+        open_positions = {}
+        order_history = deque(maxlen=history_size)
+
+        events = self.replay()
+        for event in events:
+            event_type = event['event']
+            data = event['data']
+
+            if event_type == 'fill':
+                open_positions[data['ticket']] = data
+                order_history.append(data)
+            elif event_type == 'close':
+                open_positions.pop(data['original_ticket'], None)
+                order_history.append(data)
+            elif event_type == 'modify':
+                position = open_positions.get(data['ticket'])
+                if position:
+                    position['stop_loss'] = data.get('new_sl') or position.get('stop_loss')
+                    position['take_profit'] = data.get('new_tp') or position.get('take_profit')
+            elif event_type == 'snapshot':
+                open_positions = {position['ticket']: position for position in data['positions']}
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"📓 Trade günlüğü oynatıldı: {len(events)} kayıt, {len(open_positions)} açık pozisyon ({elapsed_ms:.1f} ms)")
+
+        return {
+            'open_positions': open_positions,
+            'order_history': order_history,
+            'event_count': len(events),
+            'elapsed_ms': elapsed_ms
+        }
+
+    def reconcile(self, open_positions, live_positions, magic=ORDER_MAGIC):
+        """Günlükteki açık pozisyonları positions_get sonucuyla uzlaştır
+
+        Kapalıyken kapanmış pozisyonlar için 'close' event'i yazılır; günlükte olmayan
+        canlı pozisyonlardan sadece botun magic numarasını taşıyanlar 'fill' olarak
+        eklenir (elle açılan / başka EA pozisyonları sahiplenilmez). Daha önce yanlışlıkla
+        sahiplenilmiş yabancı pozisyonlar günlükten çıkarılır.
+        """
+        live_by_ticket = {position['ticket']: position for position in live_positions or []}
+        closed_offline = [ticket for ticket in open_positions if ticket not in live_by_ticket]
+        foreign = [ticket for ticket in open_positions
+                   if ticket in live_by_ticket and live_by_ticket[ticket].get('magic') != magic]
+        unknown_live = [ticket for ticket, position in live_by_ticket.items()
+                        if ticket not in open_positions and position.get('magic') == magic]
+
+        for ticket in closed_offline:
+            position = open_positions.pop(ticket)
+            self.append('close', {
+                'original_ticket': ticket,
+                'symbol': position.get('symbol'),
+                'time': datetime.now(),
+                'comment': 'reconcile - closed while offline'
+            })
+
+        for ticket in foreign:
+            position = open_positions.pop(ticket)
+            self.append('close', {
+                'original_ticket': ticket,
+                'symbol': position.get('symbol'),
+                'time': datetime.now(),
+                'comment': 'reconcile - not a bot position'
+            })
+
+        for ticket in unknown_live:
+            live = live_by_ticket[ticket]
+            position = {
+                'ticket': ticket,
+                'symbol': live['symbol'],
+                'type': live['type'],
+                'volume': live['volume'],
+                'price': live['open_price'],
+                'stop_loss': live.get('sl'),
+                'take_profit': live.get('tp'),
+                'time': live.get('time_open'),
+                'comment': 'reconcile - unknown live position'
+            }
+            open_positions[ticket] = position
+            self.append('fill', position)
+
+        if closed_offline or unknown_live or foreign:
+            print(f"🔄 Günlük uzlaştırma: {len(closed_offline)} kapanmış, {len(unknown_live)} bilinmeyen canlı, "
+                  f"{len(foreign)} bota ait olmayan pozisyon")
+
+        return {
+            'open_positions': open_positions,
+            'closed_offline': closed_offline,
+            'unknown_live': unknown_live,
+            'foreign': foreign
+        }
+
+    def compact(self, open_positions, min_bytes=TRADE_JOURNAL_COMPACT_BYTES):
+        """Günlük büyüdüyse açık pozisyon snapshot'ı ile yeniden yaz"""
+        if not os.path.exists(self.journal_file) or os.path.getsize(self.journal_file) < min_bytes:
+            return False
+
+        payload = json.dumps(
+            {'event': 'snapshot', 'ts': time.time(), 'data': {'positions': list(open_positions.values())}},
+            default=self._json_default, separators=(',', ':')
+        ).encode('utf-8')
+
+        with self.lock:
+            self._write_buffer_locked()
+
+            temp_file = f"{self.journal_file}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self.file:
+                self.file.close()
+            os.replace(temp_file, self.journal_file)
+            if self.running:
+                self.file = open(self.journal_file, 'ab')
+
+        print(f"🗜️ Trade günlüğü sıkıştırıldı ({len(open_positions)} açık pozisyon)")
+        return True
+
+    def _json_default(self, value):
+        """JSON'a çevrilemeyen değerler (datetime vb.)"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+
+# Test fonksiyonu
+def test_trade_journal():
+    """TradeJournal'ı test et"""
+    import tempfile
+
+    print("🧪 TradeJournal Test Başlıyor...")
+    print("=" * 50)
+
+    journal_file = os.path.join(tempfile.mkdtemp(), 'journal.bin')
+    journal = TradeJournal(journal_file, flush_interval_ms=2)
+    journal.open()
+
+    # Gönderim yolu maliyeti
+    start = time.perf_counter()
+    for ticket in range(1, 1001):
+        journal.append('fill', {'ticket': ticket, 'symbol': 'EURUSD-T', 'type': 'BUY',
+                                'volume': 0.1, 'price': 1.16, 'time': datetime.now()})
+    elapsed = time.perf_counter() - start
+    print(f"   append: kayıt başına {elapsed / 1000 * 1e6:.1f} µs")
+
+    for ticket in range(1, 996):
+        journal.append('close', {'original_ticket': ticket, 'symbol': 'EURUSD-T', 'profit': 1.0})
+
+    journal.flush()
+    journal.close()
+    print(f"   Flush istatistikleri: {journal.stats}")
+
+    state = journal.rebuild_state()
+    # 2001 elle açılmış pozisyon (magic 0) - sahiplenilmemeli
+    live = [{'ticket': ticket, 'symbol': 'EURUSD-T', 'type': 'BUY', 'volume': 0.1, 'open_price': 1.16,
+             'magic': magic} for ticket, magic in ((996, ORDER_MAGIC), (997, ORDER_MAGIC), (2000, ORDER_MAGIC), (2001, 0))]
+    result = journal.reconcile(state['open_positions'], live)
+    print(f"   Uzlaştırma: kapanmış {result['closed_offline']}, bilinmeyen {result['unknown_live']}, "
+          f"sahiplenilmeyen elle açılan: {2001 not in result['open_positions']}")
+
+if __name__ == "__main__":
+    test_trade_journal()
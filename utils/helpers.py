@@ -0,0 +1,136 @@
+# utils/helpers.py
+"""
+AI Trading Bot - Yardımcı Fonksiyonlar
+Modüller arasında paylaşılan küçük yardımcılar
+"""
+
+import math
+import threading
+import sys
+import os
+
+# Parent directory'yi ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import TRADING_SYMBOLS
+
+_symbol_currency_cache = {}
+
+def get_symbol_config(symbol):
+    """Config anahtarı veya broker sembolünden (EURUSD / EURUSD-T) sembol ayarlarını bul"""
+    config = TRADING_SYMBOLS.get(symbol)
+    if config:
+        return config
+
+    for config in TRADING_SYMBOLS.values():
+        if config['symbol'] == symbol:
+            return config
+
+    return None
+
+def get_broker_symbol(symbol):
+    """Config anahtarını broker sembolüne çevir (EURUSD -> EURUSD-T)"""
+    config = TRADING_SYMBOLS.get(symbol)
+    return config['symbol'] if config else symbol
+
+def get_symbol_currencies(symbol):
+    """Sembolün bağlı olduğu para birimlerini bul (EURUSD-T -> ('EUR', 'USD'))"""
+    currencies = _symbol_currency_cache.get(symbol)
+    if currencies is not None:
+        return currencies
+
+    # Config anahtarını bul (GOLD-T -> XAUUSD)
+    symbol_key = symbol
+    for key, config in TRADING_SYMBOLS.items():
+        if config['symbol'] == symbol:
+            symbol_key = key
+            break
+
+    symbol_key = symbol_key.split('-')[0].upper()
+    if len(symbol_key) == 6:
+        currencies = (symbol_key[:3], symbol_key[3:])
+    else:
+        currencies = (symbol_key,)
+
+    _symbol_currency_cache[symbol] = currencies
+    return currencies
+
+class LatencyHistogram:
+    """Log ölçekli bucket'larla gecikme histogramı (ms) - kayıt O(1), sabit bellek"""
+
+    def __init__(self, min_ms=0.01, max_ms=60000.0, buckets_per_decade=10):
+        """LatencyHistogram'ı başlat"""
+        self.min_ms = min_ms
+        self.buckets_per_decade = buckets_per_decade
+        self.bucket_count = int(math.ceil(math.log10(max_ms / min_ms) * buckets_per_decade)) + 1
+        self.counts = [0] * self.bucket_count
+        self.lock = threading.Lock()
+
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_value = 0.0
+
+    def record(self, latency_ms):
+        """Bir gecikme ölçümü ekle"""
+        if latency_ms <= self.min_ms:
+            index = 0
+        else:
+            index = min(self.bucket_count - 1,
+                        int(math.log10(latency_ms / self.min_ms) * self.buckets_per_decade) + 1)
+
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += latency_ms
+            self.max_value = max(self.max_value, latency_ms)
+
+    def percentile(self, percent):
+        """Yüzdelik değer (bucket üst sınırı olarak)"""
+        with self.lock:
+            if not self.count:
+                return 0.0
+
+            target = self.count * percent / 100
+            cumulative = 0
+            for index, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    return min(self._bucket_upper(index), self.max_value)
+
+        return self.max_value
+
+    def summary(self):
+        """Özet istatistikler"""
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_value
+        }
+
+    def get_buckets(self):
+        """Boş olmayan bucket'lar: [(üst sınır ms, adet)]"""
+        with self.lock:
+            return [(self._bucket_upper(index), bucket_count)
+                    for index, bucket_count in enumerate(self.counts) if bucket_count]
+
+    def format_report(self, title="Gecikme"):
+        """Yazdırılabilir histogram raporu"""
+        summary = self.summary()
+        lines = [f"⏱️ {title}: {summary['count']} ölçüm, ort {summary['mean_ms']:.2f} ms, "
+                 f"p50 {summary['p50_ms']:.2f} / p90 {summary['p90_ms']:.2f} / "
+                 f"p99 {summary['p99_ms']:.2f} / max {summary['max_ms']:.2f} ms"]
+
+        buckets = self.get_buckets()
+        peak = max((bucket_count for _, bucket_count in buckets), default=0)
+        for upper, bucket_count in buckets:
+            bar = '█' * max(1, int(bucket_count / peak * 30))
+            lines.append(f"   ≤{upper:>9.2f} ms | {bar} {bucket_count}")
+
+        return "\n".join(lines)
+
+    def _bucket_upper(self, index):
+        """Bucket'ın üst sınırı (ms)"""
+        return self.min_ms * 10 ** (index / self.buckets_per_decade)